@@ -15,6 +15,9 @@ from config import CreateDirs, create_leaderboard
 from utils.setup import create_player, create_administrator, create_developer
 from datetime import timedelta
 from gioco.routes import gioco_bp
+from storage.writer import write_pipeline
+from storage.commands import register_commands
+from gioco.commands import register_commands as register_game_commands
 
 login_manager = LoginManager()
 login_manager.login_view = 'auth.login'
@@ -29,6 +32,9 @@ def create_app():
     Migrate(app, db)
     login_manager.init_app(app)
     Session(app)
+    write_pipeline.init_app(app)
+    register_commands(app)
+    register_game_commands(app)
     app.permanent_session_lifetime = timedelta(minutes=30)
 
     app.register_blueprint(gioco_bp)
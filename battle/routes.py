@@ -1,15 +1,14 @@
-from flask import redirect, render_template, session, url_for, request, flash, jsonify
+import logging
+from flask import redirect, render_template, session, url_for, request, flash
+from flask_login import login_required, current_user
 from . import battle_bp
-from gioco.personaggio import Personaggio
-from gioco.inventario import Inventario
-from gioco.ambiente import Ambiente, Foresta
-from gioco.missione import Missione, GestoreMissioni
-from gioco.oggetto import Oggetto
-from utils.messaggi import Messaggi
-from utils.log import Log
-import random
-import json
-import os
+from .store import battle_store
+from .utils import BattleManager
+from characters.utils import CharacterManager
+from gioco.registry import ambienti
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
 
 #---------------------------SHOW_INVENTORY--------------------------------
 @battle_bp.route('/show_inventory', methods=['GET', 'POST'])
@@ -18,17 +17,77 @@ def show_inventory():
 
 #---------------------------BEGIN THE BATTLE------------------------------
 @battle_bp.route('/begin_battle', methods=['GET', 'POST'])
+@login_required
 def begin_battle():
-    return redirect(url_for('gioco.coming_soon_session'))
+    """
+    Scelta dei personaggi e dell'ambiente, poi avvio della battaglia contro
+    altrettanti NPC. La battaglia resta in battle_store; in sessione c'è
+    solo il suo id (session['battaglia']).
+    """
+    owned_ids = CharacterManager.filter_owned_characters(current_user.character_ids or [])
+
+    if request.method == 'POST':
+        scelti = [char_id for char_id in request.form.getlist('personaggi') if char_id in owned_ids]
+        ambiente = request.form.get('ambiente') or None
+        if not scelti:
+            flash("Scegli almeno un personaggio per la battaglia", "warning")
+            return redirect(url_for('battle.begin_battle'))
+
+        batch = CharacterManager.load_characters_batch(scelti)
+        try:
+            battle = BattleManager.start_battle(batch.loaded(), ambiente)
+        except ValueError as e:
+            flash(str(e), "danger")
+            return redirect(url_for('battle.begin_battle'))
+
+        # la battaglia precedente non è più raggiungibile dalla sessione
+        battle_store.remove(session.get('battaglia'), current_user.id)
+        session['battaglia'] = battle_store.create(battle, current_user.id)
+        logger.info(f"Battaglia avviata da {current_user.email}")
+        return redirect(url_for('battle.test_battle'))
+
+    personaggi = CharacterManager.load_fields(owned_ids, ('id', 'nome', 'classe'))
+    return render_template(
+        'begin_battle.html',
+        personaggi=personaggi,
+        ambienti=sorted(ambienti.classes())
+    )
 
 
 #---------------------------SELECT_CHAR-----------------------------------
 @battle_bp.route('/select_char', methods=['GET', 'POST'])
+@login_required
 def select_char():
-    return redirect(url_for('gioco.coming_soon_session'))
+    return redirect(url_for('battle.begin_battle'))
 
 #---------------------------TEST BATTLE-----------------------------------
 @battle_bp.route('/test_battle', methods=['GET', 'POST'])
+@login_required
 def test_battle():
-    return redirect(url_for('gioco.coming_soon_session'))
+    """
+    Battaglia in corso: mostra combattenti e log; in POST il personaggio di
+    turno attacca il bersaglio scelto e agiscono gli NPC fino al prossimo
+    personaggio giocabile.
+    """
+    with battle_store.open(session.get('battaglia'), current_user.id) as battle:
+        if battle is None:
+            return redirect(url_for('battle.begin_battle'))
+
+        if request.method == 'POST':
+            try:
+                battle.azione_giocatore(int(request.form['bersaglio']))
+            except (KeyError, ValueError) as e:
+                flash(f"Azione non valida: {e}", "danger")
+            return redirect(url_for('battle.test_battle'))
 
+        combattenti, bersagli, log = BattleManager.view(battle)
+        return render_template(
+            'battle.html',
+            combattenti=combattenti,
+            bersagli=bersagli,
+            attivo=battle.attivo,
+            esito=battle.scheduler.esito(),
+            round=battle.scheduler.round,
+            ambiente=battle.ambiente,
+            log=log
+        )
@@ -0,0 +1,489 @@
+"""
+Battaglie in corso tenute in memoria dal processo.
+
+Prima lo stato completo della battaglia (combattenti, coda di iniziativa,
+eventi) veniva serializzato in session['battaglia'] e ricostruito ad ogni
+richiesta. Ora la sessione conserva solo l'id della battaglia e l'oggetto
+Battle resta vivo in BattleStore fra una richiesta e l'altra:
+
+    battle_id = battle_store.create(battle, current_user.id)
+    with battle_store.open(battle_id, current_user.id) as battle:
+        battle.azione_giocatore(bersaglio)
+
+Le battaglie escono dalla memoria in tre casi, e vengono scritte su disco
+(spill, un file JSON per battaglia in DATA_DIR_BATTLES) per essere
+ricaricate alla richiesta successiva:
+
+- LRU: oltre max_entries battaglie o max_bytes di memoria stimata;
+- inattività: non usate da più di idle_seconds;
+- alla chiusura del processo (spill_all() registrata con atexit).
+
+Le battaglie non usate da più di ttl_seconds vengono eliminate, anche dal
+disco. La memoria di una battaglia è stimata dal numero di combattenti e
+di eventi (costanti PESO_*, misurate con `python -m storage.bench battles`)
+senza serializzarla.
+
+Il lock globale protegge solo l'indice in memoria: serializzazione,
+scrittura e lettura dei file di spill e la pulizia della directory
+avvengono senza, così le richieste sulle altre battaglie non aspettano
+il disco. Una battaglia resta nell'indice finché il suo file non è stato
+scritto: se la scrittura fallisce resta in memoria.
+
+Con più processi worker (gunicorn -w N) ogni processo ha il proprio
+store: servono sessioni "sticky", oppure un solo worker con thread.
+"""
+import os
+import time
+import atexit
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import msgspec
+
+from battle.utils import Battle
+from config import (BATTLE_IDLE_SECONDS, BATTLE_MAX_BYTES, BATTLE_MAX_ENTRIES,
+                    BATTLE_TTL_SECONDS, DATA_DIR_BATTLES)
+from storage.writer import AtomicWriter
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Lock per i caricamenti dal disco, scelto in base all'id della battaglia
+STRISCE_CARICAMENTO = 64
+
+# Memoria stimata di una battaglia in byte (CPython 3.11 64 bit)
+PESO_BATTAGLIA = 2048
+PESO_COMBATTENTE = 512
+PESO_EVENTO = 96
+
+
+def stima_memoria(battle: Battle) -> int:
+    """
+    Args:
+        battle (Battle): Battaglia
+
+    Returns:
+        int: Memoria stimata in byte, senza serializzare la battaglia
+    """
+    return (PESO_BATTAGLIA + PESO_COMBATTENTE * len(battle.combattenti)
+            + PESO_EVENTO * len(battle.eventi.eventi))
+
+
+class _Voce:
+    """
+    Battaglia in memoria con proprietario, ultimo accesso e peso stimato.
+    in_spill indica che la battaglia è stata scelta per lo spill e la
+    scrittura su disco è in corso.
+    """
+    __slots__ = ('battle', 'owner', 'accesso', 'peso', 'in_uso', 'in_spill', 'lock')
+
+    def __init__(self, battle: Battle, owner: int, accesso: float) -> None:
+        self.battle = battle
+        self.owner = owner
+        self.accesso = accesso
+        self.peso = stima_memoria(battle)
+        self.in_uso = 0
+        self.in_spill = False
+        self.lock = threading.Lock()
+
+
+class BattleStore:
+    """
+    Battaglie in corso indicizzate per id, in ordine LRU, con spill su
+    disco delle battaglie inattive o in eccesso e scadenza per TTL.
+
+    Una battaglia aperta con open() non viene mai scritta su disco né
+    eliminata finché il blocco non termina; le richieste concorrenti sulla
+    stessa battaglia vengono eseguite una alla volta.
+    """
+
+    def __init__(self, directory: str, max_entries: int, max_bytes: int,
+                 idle_seconds: float, ttl_seconds: float,
+                 orologio: Callable[[], float] = time.time) -> None:
+        """
+        Args:
+            directory (str): Directory dei file di spill
+            max_entries (int): Battaglie massime in memoria
+            max_bytes (int): Memoria stimata massima in byte
+            idle_seconds (float): Inattività dopo la quale la battaglia va su disco
+            ttl_seconds (float): Inattività dopo la quale la battaglia viene eliminata
+            orologio (Callable[[], float]): Tempo in secondi (time.time, anche
+                per i tempi di modifica dei file di spill)
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.ttl_seconds = ttl_seconds
+        self._orologio = orologio
+        self._voci: "OrderedDict[str, _Voce]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._caricamenti = [threading.Lock() for _ in range(STRISCE_CARICAMENTO)]
+        self._writer = AtomicWriter('no-fsync')
+        self._ultima_pulizia_disco = orologio()
+        self.hits = 0
+        self.loads = 0
+        self.spills = 0
+        self.expired = 0
+
+    # ------------------- FILE DI SPILL -------------------
+
+    def _path(self, battle_id: str) -> str:
+        return os.path.join(self.directory, f"{battle_id}.json")
+
+    def _spill(self, battle_id: str, voce: _Voce) -> bool:
+        """
+        Scrive la battaglia su disco, con tempo di modifica pari all'ultimo
+        accesso (usato per il TTL). Da chiamare con voce.lock acquisito e
+        senza self._lock.
+
+        Returns:
+            bool: True se il file è stato scritto
+        """
+        path = self._path(battle_id)
+        try:
+            data = msgspec.json.encode({'owner': voce.owner, 'battaglia': voce.battle.to_dict()})
+            if not self._writer.commit({path: data}):
+                return False
+            os.utime(path, (voce.accesso, voce.accesso))
+        except (OSError, TypeError, ValueError, msgspec.MsgspecError) as e:
+            logger.error(f"Errore scrittura della battaglia {battle_id}: {e}")
+            return False
+        return True
+
+    def _load(self, battle_id: str) -> Optional[_Voce]:
+        """
+        Ricarica una battaglia scritta su disco ed elimina il file.
+        Da chiamare senza self._lock, con il lock di caricamento dell'id.
+
+        Returns:
+            Optional[_Voce]: Voce ricaricata, None se assente, scaduta o illeggibile
+        """
+        path = self._path(battle_id)
+        try:
+            if self._orologio() - os.stat(path).st_mtime > self.ttl_seconds:
+                self._unlink(path)
+                with self._lock:
+                    self.expired += 1
+                return None
+            with open(path, 'rb') as f:
+                doc = msgspec.json.decode(f.read())
+            voce = _Voce(Battle.from_dict(doc['battaglia']), doc['owner'], self._orologio())
+        except FileNotFoundError:
+            return None
+        except (OSError, msgspec.MsgspecError, KeyError, TypeError, ValueError) as e:
+            logger.error(f"Battaglia {battle_id} non ripristinabile: {e}")
+            return None
+        self._unlink(path)
+        return voce
+
+    @staticmethod
+    def _unlink(path: str) -> None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    # ------------------- LIMITI -------------------
+
+    def _enforce(self) -> Tuple[List[Tuple[str, _Voce]], bool]:
+        """
+        Sceglie le battaglie inattive e, in ordine LRU, quelle oltre i
+        limiti di numero e memoria. Le battaglie aperte o già in spill
+        vengono saltate; quelle scadute per TTL vengono eliminate subito.
+        Da chiamare con self._lock acquisito; la scrittura va fatta dopo
+        averlo rilasciato, con _evict().
+
+        Returns:
+            Tuple[List[Tuple[str, _Voce]], bool]: Battaglie da scrivere su
+            disco (segnate in_spill) e se eseguire la pulizia della directory
+        """
+        adesso = self._orologio()
+        vittime = []
+        voci, peso = len(self._voci), self._bytes
+        for battle_id, voce in self._voci.items():
+            if voce.in_spill:
+                # stanno già uscendo dalla memoria
+                voci -= 1
+                peso -= voce.peso
+                continue
+            inattiva = adesso - voce.accesso > self.idle_seconds
+            if not inattiva and voci <= self.max_entries and peso <= self.max_bytes:
+                # le voci seguenti sono più recenti: nessuna è inattiva
+                break
+            if not voce.in_uso:
+                vittime.append((battle_id, voce))
+                voci -= 1
+                peso -= voce.peso
+
+        da_scrivere = []
+        for battle_id, voce in vittime:
+            if adesso - voce.accesso > self.ttl_seconds:
+                del self._voci[battle_id]
+                self._bytes -= voce.peso
+                self.expired += 1
+            else:
+                voce.in_spill = True
+                da_scrivere.append((battle_id, voce))
+
+        pulizia = adesso - self._ultima_pulizia_disco > self.idle_seconds
+        if pulizia:
+            self._ultima_pulizia_disco = adesso
+        return da_scrivere, pulizia
+
+    def _evict(self, vittime: List[Tuple[str, _Voce]], pulizia: bool = False) -> int:
+        """
+        Scrive su disco le battaglie scelte da _enforce() e le toglie dalla
+        memoria. Da chiamare senza self._lock.
+
+        Ogni battaglia viene serializzata con il suo lock: se è stata
+        riaperta nel frattempo resta in memoria (e un file già scritto
+        viene eliminato perché superato), se la scrittura fallisce resta
+        in memoria e verrà riprovata al prossimo controllo dei limiti.
+
+        Args:
+            vittime (List[Tuple[str, _Voce]]): Battaglie segnate in_spill
+            pulizia (bool): Se eliminare anche i file di spill scaduti
+
+        Returns:
+            int: Battaglie scritte e tolte dalla memoria
+        """
+        scritte = 0
+        for battle_id, voce in vittime:
+            if not voce.lock.acquire(blocking=False):
+                # aperta da una richiesta in corso
+                with self._lock:
+                    voce.in_spill = False
+                continue
+            try:
+                scritta = self._spill(battle_id, voce)
+                with self._lock:
+                    voce.in_spill = False
+                    superata = self._voci.get(battle_id) is not voce or voce.in_uso > 0
+                    if scritta and not superata:
+                        del self._voci[battle_id]
+                        self._bytes -= voce.peso
+                        self.spills += 1
+                        scritte += 1
+                if not scritta:
+                    logger.error(f"Spill della battaglia {battle_id} non riuscito: resta in memoria")
+                elif superata:
+                    self._unlink(self._path(battle_id))
+            finally:
+                voce.lock.release()
+
+        if pulizia:
+            self._sweep_disk(self._orologio())
+        return scritte
+
+    def _sweep_disk(self, adesso: float) -> None:
+        """
+        Elimina i file di spill non usati da più di ttl_seconds.
+        Da chiamare senza self._lock.
+        """
+        try:
+            voci = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return
+        scaduti = 0
+        for voce in voci:
+            if not voce.name.endswith('.json'):
+                continue
+            try:
+                if adesso - voce.stat().st_mtime > self.ttl_seconds:
+                    os.unlink(voce.path)
+                    scaduti += 1
+            except FileNotFoundError:
+                pass
+        if scaduti:
+            with self._lock:
+                self.expired += scaduti
+
+    # ------------------- API -------------------
+
+    def create(self, battle: Battle, owner: int) -> str:
+        """
+        Aggiunge una nuova battaglia.
+
+        Args:
+            battle (Battle): Battaglia avviata
+            owner (int): Id dell'utente proprietario
+
+        Returns:
+            str: Id della battaglia (da conservare in sessione)
+        """
+        battle_id = uuid.uuid4().hex
+        voce = _Voce(battle, owner, self._orologio())
+        with self._lock:
+            self._voci[battle_id] = voce
+            self._bytes += voce.peso
+            vittime, pulizia = self._enforce()
+        self._evict(vittime, pulizia)
+        return battle_id
+
+    @contextmanager
+    def open(self, battle_id: Optional[str], owner: int) -> Iterator[Optional[Battle]]:
+        """
+        Apre una battaglia dalla memoria o dal disco. La battaglia resta
+        esclusiva del blocco e le modifiche restano nell'oggetto: non serve
+        salvarla.
+
+        Args:
+            battle_id (Optional[str]): Id restituito da create()
+            owner (int): Id dell'utente che la richiede
+
+        Yields:
+            Optional[Battle]: La battaglia, None se non esiste, è scaduta o
+            appartiene a un altro utente
+        """
+        battle_id = self._normalize(battle_id)
+        voce = self._acquire(battle_id, owner) if battle_id else None
+        if voce is None:
+            yield None
+            return
+        try:
+            with voce.lock:
+                yield voce.battle
+        finally:
+            with self._lock:
+                voce.in_uso -= 1
+                voce.accesso = self._orologio()
+                if self._voci.get(battle_id) is voce:
+                    peso = stima_memoria(voce.battle)
+                    self._bytes += peso - voce.peso
+                    voce.peso = peso
+                vittime, pulizia = self._enforce()
+            self._evict(vittime, pulizia)
+
+    @staticmethod
+    def _normalize(battle_id: Optional[str]) -> Optional[str]:
+        """
+        Returns:
+            Optional[str]: Id in forma canonica (uuid esadecimale), None se
+            non è un id valido (evita percorsi arbitrari per i file di spill)
+        """
+        try:
+            return uuid.UUID(hex=battle_id).hex
+        except (TypeError, ValueError, AttributeError):
+            return None
+
+    def _acquire(self, battle_id: str, owner: int) -> Optional[_Voce]:
+        """
+        Cerca la battaglia in memoria e, se manca, la ricarica dal disco
+        senza il lock globale. I caricamenti dello stesso id sono serializzati
+        dal lock di caricamento: il secondo trova la battaglia già in memoria.
+
+        Returns:
+            Optional[_Voce]: Voce segnata in uso e portata in coda LRU, o None
+        """
+        with self._lock:
+            if battle_id in self._voci:
+                return self._reserve(battle_id, owner)
+
+        with self._caricamenti[hash(battle_id) % STRISCE_CARICAMENTO]:
+            with self._lock:
+                if battle_id in self._voci:
+                    return self._reserve(battle_id, owner)
+            voce = self._load(battle_id)
+            if voce is None:
+                return None
+            with self._lock:
+                self.loads += 1
+                self._voci[battle_id] = voce
+                self._bytes += voce.peso
+                return self._reserve(battle_id, owner, caricata=True)
+
+    def _reserve(self, battle_id: str, owner: int, caricata: bool = False) -> Optional[_Voce]:
+        """
+        Segna in uso una battaglia presente in memoria, dopo i controlli di
+        scadenza e proprietario. Da chiamare con self._lock acquisito.
+
+        Args:
+            battle_id (str): Id della battaglia, presente in self._voci
+            owner (int): Id dell'utente che la richiede
+            caricata (bool): True se appena ricaricata dal disco
+
+        Returns:
+            Optional[_Voce]: Voce segnata in uso, o None
+        """
+        voce = self._voci[battle_id]
+        if not caricata:
+            if not voce.in_uso and not voce.in_spill \
+                    and self._orologio() - voce.accesso > self.ttl_seconds:
+                del self._voci[battle_id]
+                self._bytes -= voce.peso
+                self.expired += 1
+                return None
+            self.hits += 1
+        if voce.owner != owner:
+            logger.warning(f"Accesso negato alla battaglia {battle_id} per l'utente {owner}")
+            return None
+        self._voci.move_to_end(battle_id)
+        voce.in_uso += 1
+        return voce
+
+    def remove(self, battle_id: Optional[str], owner: int) -> bool:
+        """
+        Elimina una battaglia dalla memoria e dal disco.
+
+        Args:
+            battle_id (Optional[str]): Id della battaglia
+            owner (int): Id dell'utente proprietario
+
+        Returns:
+            bool: True se la battaglia è stata eliminata
+        """
+        battle_id = self._normalize(battle_id)
+        voce = self._acquire(battle_id, owner) if battle_id else None
+        if voce is None:
+            return False
+        with self._lock:
+            voce.in_uso -= 1
+            if self._voci.get(battle_id) is voce:
+                del self._voci[battle_id]
+                self._bytes -= voce.peso
+        return True
+
+    def spill_all(self) -> int:
+        """
+        Scrive su disco tutte le battaglie non aperte e libera la memoria.
+
+        Returns:
+            int: Battaglie scritte
+        """
+        with self._lock:
+            vittime = []
+            for battle_id, voce in self._voci.items():
+                if voce.in_uso or voce.in_spill:
+                    continue
+                voce.in_spill = True
+                vittime.append((battle_id, voce))
+        return self._evict(vittime)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dict[str, int]: hits, loads, spills, expired, entries, bytes
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "loads": self.loads,
+                "spills": self.spills,
+                "expired": self.expired,
+                "entries": len(self._voci),
+                "bytes": self._bytes,
+            }
+
+
+# Istanza condivisa dal processo
+battle_store = BattleStore(DATA_DIR_BATTLES, BATTLE_MAX_ENTRIES, BATTLE_MAX_BYTES,
+                           BATTLE_IDLE_SECONDS, BATTLE_TTL_SECONDS)
+
+# le battaglie in memoria sopravvivono al riavvio del processo
+atexit.register(battle_store.spill_all)
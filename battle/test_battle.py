@@ -0,0 +1,34 @@
+"""
+Una battaglia ripristinata da to_dict/from_dict a ogni azione (come fra
+due richieste) deve proseguire identica a quella rimasta in memoria.
+"""
+import json
+
+import pytest
+
+from battle.utils import Battle, BattleManager
+from gioco.serializers import to_dict
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_battaglia_ripristinata_identica(senza_log, seed):
+    pgs = [to_dict(p) for p in BattleManager.create_npcs(1 + seed % 4)]
+    diretta = BattleManager.start_battle(pgs, seed=seed)
+    sessione = BattleManager.start_battle(pgs, seed=seed).to_dict()
+    while diretta.attivo is not None:
+        bersaglio = list(diretta.scheduler.bersagli(diretta.attivo))[0]
+        diretta.azione_giocatore(bersaglio)
+        ripristinata = Battle.from_dict(json.loads(json.dumps(sessione)))
+        ripristinata.azione_giocatore(bersaglio)
+        sessione = ripristinata.to_dict()
+    assert diretta.to_dict() == sessione
+    assert diretta.scheduler.finita()
+
+
+def test_ambiente_attivo(personaggio_di_esempio):
+    battle = BattleManager.start_battle([personaggio_di_esempio()], "Vulcano", seed=1)
+    assert battle.ambiente == "Vulcano"
+    assert battle.ambiente_attivo.nome == "Vulcano"
+    ripristinata = Battle.from_dict(battle.to_dict())
+    assert ripristinata.ambiente_attivo is battle.ambiente_attivo
+    assert BattleManager.start_battle([personaggio_di_esempio()], seed=1).ambiente_attivo is None
@@ -0,0 +1,66 @@
+"""
+battle.store contro la battaglia serializzata in sessione ad ogni
+richiesta (il comportamento precedente): stesse battaglie dopo richieste
+casuali con spill per LRU, per memoria e per inattività, scadenza per TTL
+e proprietario controllato.
+"""
+import os
+import random
+import uuid
+
+import pytest
+
+from battle.store import BattleStore
+from battle.utils import Battle, BattleManager
+
+
+@pytest.mark.usefixtures("senza_log")
+def test_store_come_sessione(tmp_path, personaggio_di_esempio):
+    rng = random.Random(25)
+
+    def nuova(seed: int) -> Battle:
+        docs = [personaggio_di_esempio(id=str(uuid.UUID(int=rng.getrandbits(128))), nome=f"PG {i}")
+                for i in range(1 + seed % 3)]
+        return BattleManager.start_battle(docs, rng.choice([None, "Foresta", "Vulcano"]), seed)
+
+    def azione(battle: Battle, scelta: int) -> None:
+        bersagli = sorted(battle.scheduler.bersagli(battle.attivo))
+        battle.azione_giocatore(bersagli[scelta % len(bersagli)])
+
+    adesso = [1_000_000.0]
+    store = BattleStore(str(tmp_path), max_entries=20, max_bytes=20 * 12_000,
+                        idle_seconds=60, ttl_seconds=3600, orologio=lambda: adesso[0])
+    ids, sessioni = [], []
+    for seed in range(100):
+        battle = nuova(seed)
+        sessioni.append(battle.to_dict())
+        ids.append(store.create(battle, seed % 7))
+    for _ in range(3000):
+        adesso[0] += rng.random() * 2
+        i = rng.randrange(len(ids))
+        scelta = rng.randrange(100)
+        riferimento = Battle.from_dict(sessioni[i])
+        with store.open(ids[i], i % 7) as battle:
+            assert battle.to_dict() == sessioni[i], i
+            if battle.attivo is not None:
+                azione(battle, scelta)
+                azione(riferimento, scelta)
+                sessioni[i] = riferimento.to_dict()
+            assert battle.to_dict() == sessioni[i], i
+    stats = store.stats()
+    assert stats["spills"] and stats["loads"], stats
+    assert stats["entries"] <= 20, stats
+
+    # proprietario diverso e id non valido
+    with store.open(ids[0], 1) as battle:
+        assert battle is None
+    with store.open("../../etc/passwd", 0) as battle:
+        assert battle is None
+
+    # oltre il TTL: scadute in memoria e su disco
+    adesso[0] += 10_000
+    with store.open(ids[0], 0) as battle:
+        assert battle is None
+    store.create(nuova(0), 0)
+    assert store.stats()["entries"] == 1
+    assert not any(name.endswith(".json") for name in os.listdir(tmp_path))
@@ -0,0 +1,271 @@
+import logging
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from characters.utils import CharacterCombat
+from gioco.ambiente import Ambiente, AmbienteFactory
+from gioco.eventi import BattleEnded, Defeated, EventBus, formatta, registra
+from gioco.personaggio import Personaggio
+from gioco.probabilita import probabilita_duello
+from gioco.registry import ambienti, personaggi
+from gioco.rng import current_rng, new_seed, seeded
+from gioco.scheduler import TurnScheduler
+from gioco.serializers import from_dict, to_dict
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Azioni degli NPC eseguite al massimo per richiesta prima di restituire il
+# controllo (con almeno un PG e un NPC in piedi la battaglia torna a un PG
+# molto prima)
+MAX_AZIONI_NPC = 1000
+
+# Eventi di combattimento conservati nel log della battaglia (gioco.eventi)
+EVENTI_BATTAGLIA = 300
+
+
+class Battle:
+    """
+    Battaglia in corso fra i personaggi del giocatore e gli NPC.
+    Fra una richiesta e l'altra resta in memoria in battle.store; lo stato
+    è serializzabile (to_dict/from_dict) per lo spill su disco.
+
+    Ogni azione usa un generatore dedicato derivato da seed e numero
+    dell'azione (gioco.rng.seeded), quindi la battaglia è ripetibile.
+    Il log è il buffer degli eventi di combattimento (gioco.eventi),
+    trasformati in testo solo quando la battaglia viene mostrata.
+    """
+
+    def __init__(self, combattenti: List[Personaggio], scheduler: TurnScheduler,
+                 seed: int, ambiente: Optional[str] = None, azioni: int = 0,
+                 attivo: Optional[int] = None, eventi: Optional[EventBus] = None):
+        """
+        Usare BattleManager.start_battle() o Battle.from_dict().
+
+        Args:
+            combattenti (List[Personaggio]): PG (npc=False) e NPC (npc=True)
+            scheduler (TurnScheduler): Coda di iniziativa sui combattenti
+            seed (int): Seed della battaglia
+            ambiente (Optional[str]): Ambiente registrato o None
+            azioni (int): Azioni eseguite finora
+            attivo (Optional[int]): PG di turno in attesa di un'azione
+            eventi (Optional[EventBus]): Eventi della battaglia
+        """
+        self.combattenti = combattenti
+        self.scheduler = scheduler
+        self.seed = seed
+        self.ambiente = ambiente
+        self.azioni = azioni
+        self.attivo = attivo
+        self.eventi = eventi if eventi is not None else EventBus(EVENTI_BATTAGLIA)
+        self._ambiente = AmbienteFactory.istanza(ambiente) if ambiente else None
+
+    @property
+    def ambiente_attivo(self) -> Optional[Ambiente]:
+        """
+        Returns:
+            Optional[Ambiente]: Istanza dell'ambiente della battaglia
+            (condivisa, immutabile) o None; `ambiente` è il suo nome
+        """
+        return self._ambiente
+
+    def _seed_azione(self) -> int:
+        """
+        Returns:
+            int: Seed dell'azione corrente (seed della battaglia e contatore)
+        """
+        self.azioni += 1
+        return (self.seed << 32) + self.azioni
+
+    def _attacca(self, attaccante: int, bersaglio: int) -> None:
+        """
+        Attacco di un combattente su un bersaglio, con il modificatore
+        dell'ambiente, e aggiornamento della coda se il bersaglio cade.
+
+        Args:
+            attaccante (int): Indice dell'attaccante
+            bersaglio (int): Indice del bersaglio
+        """
+        with registra(self.eventi):
+            CharacterCombat.execute_combat_turn(
+                self.combattenti[attaccante], self.combattenti[bersaglio], self._ambiente
+            )
+        if self.scheduler.aggiorna(bersaglio):
+            self.eventi.emetti(Defeated(self.combattenti[bersaglio].nome))
+
+    def avanza(self) -> Optional[int]:
+        """
+        Fa agire gli NPC di turno (attacco su un PG in piedi a caso) fino al
+        turno di un PG o alla fine della battaglia.
+
+        Returns:
+            Optional[int]: PG di turno, None se la battaglia è finita
+        """
+        for _ in range(MAX_AZIONI_NPC):
+            indice = self.scheduler.prossimo()
+            if indice is None:
+                self.attivo = None
+                self.eventi.emetti(BattleEnded(self.scheduler.esito()))
+                return None
+            if not self.combattenti[indice].npc:
+                self.attivo = indice
+                return indice
+            with seeded(self._seed_azione()):
+                bersaglio = current_rng().choice(list(self.scheduler.bersagli(indice)))
+                self._attacca(indice, bersaglio)
+        self.attivo = None
+        return None
+
+    def azione_giocatore(self, bersaglio: int) -> None:
+        """
+        Attacco del PG di turno sul bersaglio scelto, poi turni degli NPC
+        fino al prossimo PG.
+
+        Args:
+            bersaglio (int): Indice del bersaglio
+
+        Raises:
+            ValueError: Se non è il turno di un PG o il bersaglio non è valido
+        """
+        if self.attivo is None:
+            raise ValueError("Nessun personaggio giocabile di turno")
+        if bersaglio not in self.scheduler.bersagli(self.attivo):
+            raise ValueError("Bersaglio non valido")
+        with seeded(self._seed_azione()):
+            self._attacca(self.attivo, bersaglio)
+        self.avanza()
+
+    def to_dict(self) -> Dict:
+        """
+        Returns:
+            Dict: Stato serializzabile della battaglia
+        """
+        return {
+            'seed': self.seed,
+            'ambiente': self.ambiente,
+            'azioni': self.azioni,
+            'attivo': self.attivo,
+            'combattenti': [to_dict(p) for p in self.combattenti],
+            'scheduler': self.scheduler.to_dict(),
+            'eventi': self.eventi.to_list(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Battle':
+        """
+        Args:
+            data (Dict): Dizionario prodotto da to_dict()
+
+        Returns:
+            Battle: Battaglia ripristinata
+        """
+        combattenti = [from_dict(Personaggio, doc) for doc in data['combattenti']]
+        scheduler = TurnScheduler.from_dict(data['scheduler'], combattenti)
+        eventi = EventBus.from_list(data.get('eventi', []), EVENTI_BATTAGLIA)
+        return cls(combattenti, scheduler, data['seed'], data.get('ambiente'),
+                   data['azioni'], data.get('attivo'), eventi)
+
+
+class BattleManager:
+    """Classe per l'avvio delle battaglie a più partecipanti."""
+
+    @staticmethod
+    def create_npcs(numero: int) -> List[Personaggio]:
+        """
+        Crea NPC di classe casuale. Anche gli id vengono dal generatore di
+        gioco.rng, quindi con lo stesso seed si ottengono gli stessi NPC.
+
+        Args:
+            numero (int): Numero di NPC
+
+        Returns:
+            List[Personaggio]: NPC con npc=True
+        """
+        classi = sorted(personaggi.classes())
+        npcs = []
+        for n in range(1, numero + 1):
+            rng = current_rng()
+            classe = rng.choice(classi)
+            npcs.append(personaggi.classes()[classe](
+                id=uuid.UUID(int=rng.getrandbits(128), version=4),
+                nome=f"Nemico {n}", classe=classe, npc=True
+            ))
+        return npcs
+
+    @staticmethod
+    def start_battle(pg_docs: List[Dict], ambiente: Optional[str] = None,
+                     seed: Optional[int] = None) -> Battle:
+        """
+        Prepara una battaglia: i personaggi scelti contro altrettanti NPC,
+        in ordine di iniziativa casuale, e fa agire gli NPC che precedono
+        il primo PG.
+
+        Args:
+            pg_docs (List[Dict]): Documenti dei personaggi del giocatore
+            ambiente (Optional[str]): Ambiente registrato (default: nessuno)
+            seed (Optional[int]): Seed (default: nuovo seed casuale)
+
+        Returns:
+            Battle: Battaglia pronta per l'azione del primo PG
+
+        Raises:
+            ValueError: Se non ci sono personaggi o l'ambiente non esiste
+        """
+        if not pg_docs:
+            raise ValueError("Serve almeno un personaggio per la battaglia")
+        if ambiente and ambiente not in ambienti:
+            raise ValueError(f"Ambiente non valido: {ambiente}")
+
+        seed = seed if seed is not None else new_seed()
+        pgs = [from_dict(Personaggio, doc) for doc in pg_docs]
+        for pg in pgs:
+            pg.npc = False
+
+        with seeded(seed << 32):
+            combattenti = pgs + BattleManager.create_npcs(len(pgs))
+            scheduler = TurnScheduler(combattenti)
+
+        battle = Battle(combattenti, scheduler, seed, ambiente)
+        battle.avanza()
+        logger.info(f"Battaglia avviata con {len(pgs)} personaggi, seed {seed}")
+        return battle
+
+    @staticmethod
+    def view(battle: Battle) -> Tuple[List[Dict], List[int], List[str]]:
+        """
+        Dati per il template della battaglia. Per ogni bersaglio del PG di
+        turno c'è anche la probabilità esatta di vincere un duello contro di
+        lui, attaccando per primo, con la salute attuale (gioco.probabilita).
+        Il testo del log viene costruito qui dagli eventi.
+
+        Args:
+            battle (Battle): Battaglia in corso
+
+        Returns:
+            Tuple[List[Dict], List[int], List[str]]: (combattenti in ordine
+            di iniziativa con indice, stato e probabilità di vittoria in
+            duello, bersagli validi del PG di turno, righe del log)
+        """
+        combattenti = [
+            {
+                'indice': i,
+                'nome': p.nome,
+                'classe': p.classe,
+                'npc': p.npc,
+                'salute': p.salute,
+                'salute_max': p.salute_max,
+                'in_piedi': battle.scheduler.in_piedi(i),
+            }
+            for i, p in enumerate(battle.combattenti)
+        ]
+        bersagli = list(battle.scheduler.bersagli(battle.attivo)) if battle.attivo is not None else []
+        for i in bersagli:
+            try:
+                esito = probabilita_duello(battle.combattenti[battle.attivo],
+                                           battle.combattenti[i], battle.ambiente_attivo)
+                combattenti[i]['vittoria_duello'] = esito.vittoria
+            except ValueError as e:
+                logger.warning(f"Probabilità di vittoria non calcolabile: {e}")
+        combattenti.sort(key=lambda c: battle.scheduler.iniziativa[c['indice']])
+        log = [formatta(evento) for evento in battle.eventi.eventi]
+        return combattenti, bersagli, log
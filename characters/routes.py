@@ -4,9 +4,14 @@ import logging
 from flask import render_template, request, redirect, url_for, session, abort, flash, jsonify
 from flask_login import login_required, current_user
 from inventory.utils import InventoryValidator, InventoryManager
-from gioco.schemas.personaggio import PersonaggioSchema
+from gioco.personaggio import Personaggio
+from gioco.storico import StoricoDanni
+from gioco.registry import ambienti
+from gioco.replay import BattleRecord, play_duel, replay_duel
+from gioco.serializers import from_dict, to_dict
 from auth.models import db
 from config import CreateDirs
+from storage.writer import write_pipeline
 from . import characters_bp
 from .utils import (CharacterValidator, CharacterManager, CharacterStatsCalculator,
                     CharacterCombat, CharacterLogger)
@@ -15,9 +20,6 @@ from .utils import (CharacterValidator, CharacterManager, CharacterStatsCalculat
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-# Schema initialization
-schema = PersonaggioSchema()
-
 # ------------------------CARICA PERSONAGGI POSSEDUTI----------------------
 @characters_bp.route('/load_char')
 @login_required
@@ -26,9 +28,6 @@ def load_char():
     Carica IDs dei personaggi posseduti dall'utente confrontando
     file JSON esistenti con character_ids nel database.
     """
-    # Ottieni tutti i file JSON dei personaggi
-    all_char_files = CharacterManager.get_user_character_files()
-    
     # Filtra solo quelli posseduti dall'utente
     owned_chars = CharacterManager.filter_owned_characters(current_user.character_ids or [])
     
@@ -95,17 +94,21 @@ def create_char():
             current_user.crediti -= costo_pg
 
             # Serializzazione e salvataggio con le classi refactorizzate
-            pg_dict = schema.dump(pg)
-            if not CharacterManager.save_character_json(pg_dict):
+            pg_dict = to_dict(pg)
+            if not CharacterManager.save_character_json(pg_dict, owner_id=current_user.id):
                 raise Exception("Errore salvataggio personaggio")
 
-            InventoryManager.save_inventory_json(inv)
+            if not InventoryManager.save_inventory_json(inv):
+                raise Exception("Errore salvataggio inventario")
 
             # Aggiornamento character_ids utente con le classi refactorizzate
             current_user.character_ids = CharacterManager.update_user_character_ids(
                 current_user.character_ids, str(pg.id), 'add'
             )
 
+            # file scritti prima di addebitare i crediti: se la scrittura
+            # fallisce la transazione viene annullata
+            write_pipeline.flush()
             db.session.commit()
 
             # Logging con le classi refactorizzate
@@ -118,6 +121,7 @@ def create_char():
             return redirect(url_for('characters.show_chars'))
 
         except Exception as e:
+            write_pipeline.rollback()
             db.session.rollback()
             logger.error(f"Errore creazione personaggio: {str(e)}")
             flash("Errore durante la creazione", "danger")
@@ -175,9 +179,11 @@ def edit_char(char_id):
             pg_obj.id = pg_dict['id']
 
             # Serializzazione e salvataggio con le classi refactorizzate
-            updated_dict = schema.dump(pg_obj)
+            updated_dict = to_dict(pg_obj)
             if not CharacterManager.save_character_json(updated_dict):
                 raise Exception("Errore salvataggio modifiche")
+            write_pipeline.flush()
+            db.session.commit()
 
             # Logging con le classi refactorizzate
             CharacterLogger.log_character_operation(
@@ -189,6 +195,8 @@ def edit_char(char_id):
             return redirect(url_for('characters.show_chars'))
 
         except Exception as e:
+            write_pipeline.rollback()
+            db.session.rollback()
             logger.error(f"Errore modifica personaggio {char_id}: {str(e)}")
             flash("Errore durante la modifica", "danger")
 
@@ -218,7 +226,8 @@ def show_chars():
     con caricamento e validazione dati.
     """
     owned_chars = load_char()
-    lista_pers_utente = get_owned_chars(owned_chars)
+    # la lista mostra solo nome e classe: bastano i sommari
+    lista_pers_utente = CharacterManager.load_fields(owned_chars, fields=('id', 'nome', 'classe'))
     
     logger.info(f"Lista personaggi richiesta - Count: {len(lista_pers_utente)}")
     
@@ -256,6 +265,7 @@ def char_details(char_id):
     return render_template(
         'char_details.html',
         pg=pg_dict,
+        storico=StoricoDanni.from_data(pg_dict.get('storico_danni_subiti', [])),
         id=char_id
     )
 
@@ -274,8 +284,8 @@ def char_delete(char_id):
             flash("File personaggio non raggiungibile", "danger")
             return redirect(url_for('characters.show_chars'))
 
-        # Deserializzazione per rimborso crediti
-        pg_obj = schema.load(pg_dict)
+        # Deserializzazione per rimborso crediti (documento già validato dallo storage)
+        pg_obj = from_dict(Personaggio, pg_dict)
 
         # Eliminazione file personaggio e inventario con le classi refactorizzate
         if not CharacterManager.delete_character_json(str(char_id)):
@@ -315,61 +325,48 @@ def char_delete(char_id):
 @login_required
 def begin_combat():
     """
-    Sistema di combattimento tra personaggi dell'utente
-    con simulazione turni e meccaniche di successo/fallimento.
+    Duello tra due personaggi dell'utente, eventualmente in un ambiente.
+    Il registro del duello (seed e personaggi a inizio duello) resta in
+    sessione per /combattimento/replay.
     """
-    # Filtro personaggi dell'utente dalla sessione
-    lista_pers = session.get('personaggi', [])
-    personaggi_utente = [p for p in lista_pers if p['id'] in (current_user.character_ids or [])]
+    owned_ids = CharacterManager.filter_owned_characters(current_user.character_ids or [])
 
     if request.method == 'POST':
         try:
             # Raccolta IDs combattenti
             id_1 = request.form['pg1']
             id_2 = request.form['pg2']
+            ambiente = request.form.get('ambiente') or None
 
-            # Ricerca personaggi con le classi refactorizzate
-            pg1_dict = CharacterManager.find_character_by_id(personaggi_utente, id_1)
-            pg2_dict = CharacterManager.find_character_by_id(personaggi_utente, id_2)
+            if id_1 not in owned_ids or id_2 not in owned_ids:
+                flash("Personaggio non trovato.", "danger")
+                return redirect(url_for('characters.begin_combat'))
 
+            personaggi = CharacterManager.load_characters_batch([id_1, id_2]).loaded()
+            pg1_dict = CharacterManager.find_character_by_id(personaggi, id_1)
+            pg2_dict = CharacterManager.find_character_by_id(personaggi, id_2)
             if not pg1_dict or not pg2_dict:
-                abort(400, "Personaggio non trovato.")
-
-            # Deserializzazione personaggi
-            pg1 = schema.load(pg1_dict)
-            pg2 = schema.load(pg2_dict)
-
-            # Inizializzazione combattimento
-            log_combattimento = []
-            turno = 1
-
-            # Loop combattimento con meccaniche avanzate usando le classi refactorizzate
-            while pg1.salute > 0 and pg2.salute > 0:
-                log_combattimento.append(f"Turno {turno}:")
-
-                # Turno personaggio 1 con le classi refactorizzate
-                successo, danno, messaggio = CharacterCombat.execute_combat_turn(pg1, pg2)
-                log_combattimento.append(messaggio)
-
-                if pg2.salute <= 0:
-                    break
+                flash("Personaggio non trovato.", "danger")
+                return redirect(url_for('characters.begin_combat'))
 
-                # Turno personaggio 2 con le classi refactorizzate
-                successo, danno, messaggio = CharacterCombat.execute_combat_turn(pg2, pg1)
-                log_combattimento.append(messaggio)
-
-                turno += 1
+            # Duello con seed dedicato: attacca prima pg1, poi pg2 se ancora in piedi.
+            # Il registro (seed + personaggi scelti) basta a rigiocarlo
+            esito, registro = play_duel(pg1_dict, pg2_dict, ambiente)
+            session['ultimo_combattimento'] = registro.to_dict()
+            pg1, pg2 = esito.pg1, esito.pg2
+            log_combattimento, turni = esito.log, esito.turni
 
             # Determinazione vincitore con le classi refactorizzate
             risultato = CharacterCombat.determine_combat_winner(pg1, pg2)
             log_combattimento.append(f"Risultato finale: {risultato}")
             
-            logger.info(f"Combattimento completato - {risultato}")
+            logger.info(f"Combattimento completato in {turni} turni - {risultato}")
 
             return render_template(
                 'combat.html',
                 pg1=pg1,
                 pg2=pg2,
+                ambiente=ambiente,
                 risultato=risultato,
                 log_combattimento=log_combattimento
             )
@@ -378,7 +375,38 @@ def begin_combat():
             logger.error(f"Errore durante combattimento: {str(e)}")
             flash("Errore durante il combattimento", "danger")
 
-    return render_template('combat.html', personaggi=personaggi_utente)
+    personaggi_utente = CharacterManager.load_fields(owned_ids, ('id', 'nome', 'classe'))
+    return render_template(
+        'combat.html',
+        personaggi=personaggi_utente,
+        ambienti=sorted(ambienti.classes())
+    )
+
+@characters_bp.route('/combattimento/replay')
+@login_required
+def replay_combat():
+    """
+    Rigioca l'ultimo combattimento dell'utente dal registro in sessione
+    (seed e personaggi a inizio duello) e ne restituisce il log.
+    """
+    registro = session.get('ultimo_combattimento')
+    if not registro:
+        return jsonify({'success': False, 'error': 'Nessun combattimento da rigiocare'}), 404
+
+    try:
+        esito = replay_duel(BattleRecord.from_dict(registro))
+    except (ValueError, KeyError) as e:
+        logger.error(f"Errore replay combattimento: {str(e)}")
+        return jsonify({'success': False, 'error': 'Registro del combattimento non valido'}), 400
+
+    risultato = CharacterCombat.determine_combat_winner(esito.pg1, esito.pg2)
+    return jsonify({
+        'success': True,
+        'seed': registro['seed'],
+        'turni': esito.turni,
+        'risultato': risultato,
+        'log': esito.log + [f"Risultato finale: {risultato}"]
+    })
 
 # ------------------------DASHBOARD STATISTICHE-----------------------------
 @characters_bp.route('/dashboard')
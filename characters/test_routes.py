@@ -0,0 +1,62 @@
+"""
+Duello tra due personaggi dell'utente da /combattimento e replay da
+/combattimento/replay: stesso seed, stesso log e stesso risultato.
+"""
+import pytest
+from markupsafe import escape
+
+from auth.models import db
+from storage.repository import RepositoryFactory
+
+
+@pytest.fixture
+def client(app_di_test, giocatore, personaggio_di_esempio):
+    personaggi = [personaggio_di_esempio(nome="Aldo", classe="Mago"),
+                  personaggio_di_esempio(nome="Bruno", classe="Ladro")]
+    for personaggio in personaggi:
+        RepositoryFactory.characters().save(personaggio, giocatore.id)
+    giocatore.character_ids = [p["id"] for p in personaggi]
+    db.session.commit()
+
+    client = app_di_test.test_client()
+    with client.session_transaction() as sessione:
+        sessione["_user_id"] = str(giocatore.id)
+        sessione["_fresh"] = True
+    client.personaggi = giocatore.character_ids
+    return client
+
+
+@pytest.mark.usefixtures("senza_log")
+@pytest.mark.parametrize("ambiente", ["", "Vulcano"])
+def test_duello_e_replay(client, ambiente):
+    pg1, pg2 = client.personaggi
+    pagina = client.get("/combattimento")
+    assert pagina.status_code == 200 and b"Aldo" in pagina.data and b"Bruno" in pagina.data
+
+    duello = client.post("/combattimento", data={"pg1": pg1, "pg2": pg2, "ambiente": ambiente})
+    assert duello.status_code == 200
+    assert b"Risultato finale" in duello.data
+
+    with client.session_transaction() as sessione:
+        registro = sessione["ultimo_combattimento"]
+    assert registro["ambiente"] == (ambiente or None)
+    assert [p["id"] for p in registro["partecipanti"]] == [pg1, pg2]
+
+    replay = client.get("/combattimento/replay").get_json()
+    assert replay["success"] and replay["seed"] == registro["seed"]
+    # stesso log del duello giocato, riga per riga
+    for riga in replay["log"]:
+        assert str(escape(riga)).encode() in duello.data
+
+
+def test_replay_senza_duello(client):
+    assert client.get("/combattimento/replay").status_code == 404
+
+
+def test_duello_con_personaggio_altrui(client, personaggio_di_esempio):
+    estraneo = personaggio_di_esempio(nome="Estraneo")
+    RepositoryFactory.characters().save(estraneo)
+    risposta = client.post("/combattimento", data={"pg1": client.personaggi[0], "pg2": estraneo["id"]})
+    assert risposta.status_code == 302
+    with client.session_transaction() as sessione:
+        assert "ultimo_combattimento" not in sessione
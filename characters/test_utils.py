@@ -0,0 +1,96 @@
+"""
+JsonCharacterRepository.load_many deve dare gli stessi documenti di una
+load() per ID, vedere i salvataggi non ancora scritti della richiesta e
+segnalare per ID i file mancanti o non validi senza perdere gli altri.
+
+CharacterIndex deve vedere i file creati ed eliminati da altri processi,
+anche quando subito dopo questo processo salva o elimina un personaggio.
+"""
+import os
+import uuid
+import shutil
+
+from flask import Flask
+
+from characters.utils import CharacterIndex, JsonCharacterRepository
+from storage.layout import document_path
+from storage.writer import write_pipeline
+
+
+def _salva(repository, personaggi) -> list:
+    for personaggio in personaggi:
+        assert repository.save(personaggio)
+    return [p["id"] for p in personaggi]
+
+
+def test_come_load_singole(archivio_json, personaggio_di_esempio):
+    repository = JsonCharacterRepository()
+    classi = ("Mago", "Guerriero", "Ladro")
+    ids = _salva(repository, [personaggio_di_esempio(classe=classi[i % 3], nome=f"Pg{i}") for i in range(12)])
+    ordine = ids[::-1] + ids[:2]
+
+    # a cache vuota (lettura dal disco) e poi a cache piena
+    for _ in range(2):
+        batch = repository.load_many(ordine)
+        assert batch.ids == ordine and batch.errors == {}
+        assert batch.documents == [repository.load(char_id) for char_id in ordine]
+
+
+def test_salvataggi_in_attesa(archivio_json, personaggio_di_esempio):
+    repository = JsonCharacterRepository()
+    salvato = personaggio_di_esempio(nome="Salvato")
+    _salva(repository, [salvato])
+    nuovo = personaggio_di_esempio(nome="Nuovo")
+
+    with Flask(__name__).test_request_context():
+        _salva(repository, [dict(salvato, nome="Modificato"), nuovo])
+        batch = repository.load_many([salvato["id"], nuovo["id"]])
+        assert [doc["nome"] for doc in batch.documents] == ["Modificato", "Nuovo"]
+        assert not os.path.exists(document_path(archivio_json.pgs, nuovo["id"]))
+        write_pipeline.rollback()
+
+    assert [doc and doc["nome"] for doc in repository.load_many([salvato["id"], nuovo["id"]]).documents] == [
+        "Salvato", None]
+
+
+def test_file_mancanti_e_non_validi(archivio_json, personaggio_di_esempio):
+    repository = JsonCharacterRepository()
+    ids = _salva(repository, [personaggio_di_esempio(nome=f"Pg{i}") for i in range(3)])
+    mancante = str(uuid.uuid4())
+    with open(document_path(archivio_json.pgs, ids[1]), "w", encoding="utf-8") as file:
+        file.write('{"classe": "Mago", "salute": "tanta"}')
+    troncato = str(uuid.uuid4())
+    with open(document_path(archivio_json.pgs, troncato), "w", encoding="utf-8") as file:
+        file.write('{"classe": "Ma')
+
+    batch = repository.load_many([ids[0], mancante, ids[1], troncato, ids[2]])
+    assert [doc and doc["nome"] for doc in batch.documents] == ["Pg0", None, None, None, "Pg2"]
+    assert sorted(batch.errors) == sorted([mancante, ids[1], troncato])
+    assert [doc["nome"] for doc in batch.loaded()] == ["Pg0", "Pg2"]
+
+
+def _modifica_esterna(directory: str, modifica) -> None:
+    # un altro processo cambia la directory; l'mtime viene spostato in avanti
+    # perché un timestamp a grana grossa potrebbe non cambiare
+    prima = os.stat(directory).st_mtime_ns
+    modifica()
+    os.utime(directory, ns=(prima, max(os.stat(directory).st_mtime_ns, prima + 1_000_000)))
+
+
+def test_indice_vede_le_modifiche_di_altri_processi(archivio_json, personaggio_di_esempio):
+    repository = JsonCharacterRepository()
+    ids = _salva(repository, [personaggio_di_esempio() for _ in range(3)])
+    assert CharacterIndex.ids() == set(ids)
+
+    esterno = personaggio_di_esempio(nome="Esterno")
+    percorso = document_path(archivio_json.pgs, esterno["id"])
+
+    _modifica_esterna(archivio_json.pgs,
+                      lambda: shutil.copyfile(document_path(archivio_json.pgs, ids[0]), percorso))
+    # salvataggio di questo processo prima di un nuovo accesso all'indice
+    nostro = _salva(repository, [personaggio_di_esempio()])[0]
+    assert CharacterIndex.ids() == set(ids) | {esterno["id"], nostro}
+
+    _modifica_esterna(archivio_json.pgs, lambda: os.remove(percorso))
+    assert repository.delete(ids[0])
+    assert CharacterIndex.filter_existing([esterno["id"], ids[0], ids[1], nostro]) == [ids[1], nostro]
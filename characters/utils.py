@@ -1,10 +1,24 @@
 import os
-import json
+import copy
+import time
 import logging
-from typing import List, Dict, Optional, Tuple
+import threading
+import msgspec
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Mapping, Optional, Sequence, Set, Tuple
+from gioco.ambiente import Ambiente
 from gioco.personaggio import Personaggio
+from gioco.registry import personaggi
 from gioco.schemas.personaggio import PersonaggioSchema
-from config import DATA_DIR_PGS
+from config import DATA_DIR_PGS, BATCH_LOAD_WORKERS, CHARACTER_SUMMARY_FILE
+from storage.cache import document_cache
+from storage.journal import JournaledIndex
+from storage.writer import write_pipeline
+from storage.layout import (
+    document_path, iter_documents, prepare_path, remove_legacy, resolve_path, touch_root
+)
+from storage.codec import decode_character, decode_characters, decode_summary, encode_document
+from storage.repository import BatchResult, CharacterRepository, RepositoryFactory, SUMMARY_FIELDS
 from auth.credits import credits_to_create, credits_to_refund
 
 # Setup logging
@@ -19,14 +33,14 @@ class CharacterValidator:
     """Classe per validazioni dei personaggi."""
     
     @staticmethod
-    def get_character_classes() -> Dict[str, type]:
+    def get_character_classes() -> Mapping[str, type]:
         """
-        Ottiene mapping dinamico di tutte le classi personaggio disponibili.
+        Ottiene il mapping delle classi personaggio registrate (gioco.registry).
         
         Returns:
-            Dict[str, type]: Dizionario {nome_classe: classe_python}
+            Mapping[str, type]: Mapping di sola lettura {nome_classe: classe_python}
         """
-        return {cls.__name__: cls for cls in Personaggio.__subclasses__()}
+        return personaggi.classes()
     
     @staticmethod
     def validate_character_name(nome: str) -> Tuple[bool, str]:
@@ -91,27 +105,315 @@ class CharacterValidator:
             return False, f"Crediti insufficienti. Servono {required_credits}, hai {int(user_credits)}"
 
 
-class CharacterManager:
-    """Classe per operazioni CRUD sui personaggi."""
-    
+class CharacterIndex:
+    """
+    Indice in memoria, condiviso dal processo, degli ID dei personaggi
+    presenti in DATA_DIR_PGS.
+
+    L'indice viene costruito scansionando la directory e poi tenuto
+    aggiornato da save_character_json/delete_character_json. Per accorgersi
+    di modifiche fatte da altri processi (es. altri worker gunicorn) ad ogni
+    accesso confronta l'mtime della directory: una sola os.stat al posto
+    della scansione completa finché la directory non cambia. Anche le
+    creazioni ed eliminazioni di questo processo cambiano l'mtime, quindi
+    sono seguite da una nuova scansione (solo i nomi dei file, senza aprirli).
+    """
+
+    _ids: Set[str] = set()
+    _mtime_ns: Optional[int] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _dir_mtime_ns() -> Optional[int]:
+        """
+        Legge l'mtime della directory dei personaggi.
+
+        Returns:
+            Optional[int]: mtime in nanosecondi o None se la directory non esiste
+        """
+        try:
+            return os.stat(DATA_DIR_PGS).st_mtime_ns
+        except OSError:
+            return None
+
+    @classmethod
+    def _rebuild(cls, mtime_ns: Optional[int]) -> None:
+        """
+        Ricostruisce l'indice leggendo la directory dei personaggi.
+        Da chiamare con il lock acquisito.
+
+        Args:
+            mtime_ns (Optional[int]): mtime della directory letto prima della scansione
+        """
+        ids = set()
+        try:
+            for char_id, _ in iter_documents(DATA_DIR_PGS):
+                ids.add(char_id)
+        except OSError as e:
+            logger.error(f"Errore lettura directory personaggi: {str(e)}")
+
+        cls._ids = ids
+        cls._mtime_ns = mtime_ns
+        logger.info(f"Indice personaggi ricostruito: {len(ids)} personaggi")
+
+    @classmethod
+    def _ensure_fresh(cls) -> None:
+        """
+        Ricostruisce l'indice solo se la directory è cambiata dall'ultima lettura.
+        Da chiamare con il lock acquisito.
+        """
+        mtime_ns = cls._dir_mtime_ns()
+        if cls._mtime_ns is None or mtime_ns != cls._mtime_ns:
+            cls._rebuild(mtime_ns)
+
+    @classmethod
+    def ids(cls) -> Set[str]:
+        """
+        Restituisce una copia dell'insieme degli ID dei personaggi esistenti.
+
+        Returns:
+            Set[str]: ID dei personaggi presenti su disco
+        """
+        with cls._lock:
+            cls._ensure_fresh()
+            return set(cls._ids)
+
+    @classmethod
+    def contains(cls, char_id: str) -> bool:
+        """
+        Verifica in O(1) se esiste il file di un personaggio.
+
+        Args:
+            char_id (str): ID del personaggio
+
+        Returns:
+            bool: True se il personaggio esiste
+        """
+        with cls._lock:
+            cls._ensure_fresh()
+            return str(char_id) in cls._ids
+
+    @classmethod
+    def filter_existing(cls, char_ids: List[str]) -> List[str]:
+        """
+        Filtra una lista di ID mantenendo solo quelli esistenti,
+        con un solo controllo di freschezza per tutta la lista.
+
+        Args:
+            char_ids (List[str]): ID da filtrare
+
+        Returns:
+            List[str]: ID esistenti, nell'ordine ricevuto
+        """
+        with cls._lock:
+            cls._ensure_fresh()
+            ids = cls._ids
+            return [str(cid) for cid in char_ids if str(cid) in ids]
+
+    @classmethod
+    def add(cls, char_id: str) -> None:
+        """
+        Registra un personaggio appena salvato su disco.
+
+        Args:
+            char_id (str): ID del personaggio salvato
+        """
+        with cls._lock:
+            if cls._mtime_ns is None:
+                cls._rebuild(cls._dir_mtime_ns())
+            if str(char_id) not in cls._ids:
+                touch_root(DATA_DIR_PGS)
+            cls._ids.add(str(char_id))
+            # l'mtime noto resta quello dell'ultima scansione: il nuovo mtime
+            # della directory comprende anche le modifiche fatte nel frattempo
+            # da altri processi, che prendendolo non verrebbero mai viste.
+            # Al prossimo accesso la directory viene quindi riletta
+
+    @classmethod
+    def discard(cls, char_id: str) -> None:
+        """
+        Rimuove dall'indice un personaggio appena eliminato da disco.
+
+        Args:
+            char_id (str): ID del personaggio eliminato
+        """
+        with cls._lock:
+            if cls._mtime_ns is None:
+                cls._rebuild(cls._dir_mtime_ns())
+            if str(char_id) in cls._ids:
+                touch_root(DATA_DIR_PGS)
+            cls._ids.discard(str(char_id))
+            # come in add: l'indice resta da rileggere al prossimo accesso
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """
+        Forza la ricostruzione dell'indice al prossimo accesso.
+        """
+        with cls._lock:
+            cls._mtime_ns = None
+
+
+class CharacterSummaryIndex:
+    """
+    Sommario persistente dei personaggi: id -> {id, nome, classe, livello}.
+
+    Le pagine con le liste (personaggi, menu, inventario) leggono solo
+    questi campi: con il sommario non serve aprire e validare il file di
+    ogni personaggio. È salvato in CHARACTER_SUMMARY_FILE come JournaledIndex:
+    i salvataggi (solo se uno dei campi cambia) e le eliminazioni aggiungono
+    una riga al log, le modifiche degli altri processi vengono rilette.
+    """
+
+    _index: JournaledIndex
+
     @staticmethod
-    def save_character_json(character_dict: Dict) -> bool:
+    def _read_summary(char_id: str) -> Optional[Dict]:
+        """
+        Legge il sommario dal file di un personaggio.
+
+        Args:
+            char_id (str): ID del personaggio
+
+        Returns:
+            Optional[Dict]: Sommario o None se il file manca o non è valido
+        """
+        try:
+            with open(resolve_path(DATA_DIR_PGS, char_id), "rb") as file:
+                return decode_summary(file.read())
+        except (OSError, msgspec.MsgspecError) as e:
+            logger.error(f"Sommario non leggibile per {char_id}: {e}")
+            return None
+
+    @classmethod
+    def _scan(cls) -> Dict[str, Dict]:
+        """
+        Legge il sommario di tutti i file personaggio.
+        È l'unica scansione completa: avviene solo alla ricostruzione.
+
+        Returns:
+            Dict[str, Dict]: Dizionario {id: sommario}
+        """
+        summaries = {}
+        try:
+            documents = list(iter_documents(DATA_DIR_PGS))
+        except OSError as e:
+            logger.error(f"Errore lettura directory personaggi: {str(e)}")
+            return summaries
+
+        for char_id, _ in documents:
+            summary = cls._read_summary(char_id)
+            if summary is not None:
+                summaries[char_id] = summary
+        return summaries
+
+    @classmethod
+    def get_many(cls, char_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Sommari degli ID richiesti. Un personaggio esistente ma assente dal
+        sommario (es. scritto da una versione precedente) viene letto dal suo
+        file e aggiunto.
+
+        Args:
+            char_ids (List[str]): ID dei personaggi esistenti
+
+        Returns:
+            Dict[str, Dict]: Dizionario {id: sommario} (copie)
+        """
+        found = {char_id: dict(summary)
+                 for char_id, summary in cls._index.get_many(char_ids).items()}
+        added = {}
+        for char_id in char_ids:
+            if char_id not in found:
+                summary = cls._read_summary(char_id)
+                if summary is not None:
+                    added[char_id] = summary
+                    found[char_id] = dict(summary)
+        if added:
+            cls._index.update(added)
+        return found
+
+    @classmethod
+    def update(cls, summary: Dict) -> None:
+        """
+        Aggiorna il sommario di un personaggio appena salvato.
+        Il log cresce solo se uno dei campi è cambiato.
+
+        Args:
+            summary (Dict): Sommario del personaggio
+        """
+        cls._index.update({summary['id']: summary})
+
+    @classmethod
+    def discard(cls, char_id: str) -> None:
+        """
+        Rimuove dal sommario un personaggio eliminato.
+
+        Args:
+            char_id (str): ID del personaggio eliminato
+        """
+        cls._index.update({str(char_id): None})
+
+    @staticmethod
+    def summary_of(character_dict: Dict) -> Dict:
+        """
+        Args:
+            character_dict (Dict): Personaggio serializzato
+
+        Returns:
+            Dict: Sommario con i campi SUMMARY_FIELDS
+        """
+        summary = {name: character_dict.get(name) for name in SUMMARY_FIELDS}
+        summary['id'] = str(summary['id'])
+        if summary['livello'] is None:
+            summary['livello'] = 1
+        return summary
+
+
+CharacterSummaryIndex._index = JournaledIndex(
+    CHARACTER_SUMMARY_FILE, CharacterSummaryIndex._scan, "Sommario personaggi")
+
+
+class JsonCharacterRepository(CharacterRepository):
+    """
+    Backend dei personaggi su file JSON: un file per personaggio in DATA_DIR_PGS.
+    Usa CharacterIndex per l'esistenza dei file, la cache LRU condivisa per
+    le letture e la pipeline di scrittura atomica per i salvataggi.
+    """
+
+    # Pool condiviso per le letture concorrenti di load_many, creato al primo uso
+    _pool: Optional[ThreadPoolExecutor] = None
+    _pool_lock = threading.Lock()
+
+    def save(self, character_dict: Dict, owner_id: Optional[int] = None) -> bool:
         """
         Salva dizionario personaggio su file JSON.
+        Il proprietario non viene salvato: su file resta in User.character_ids.
         
         Args:
             character_dict (Dict): Dati personaggio serializzati
+            owner_id (Optional[int]): Ignorato dal backend JSON
             
         Returns:
             bool: True se salvato con successo
         """
         try:
-            name_file = f"{character_dict['id']}.json"
-            path = os.path.join(DATA_DIR_PGS, name_file)
-            
-            with open(path, "w", encoding="utf-8") as file:
-                json.dump(character_dict, file, indent=4)
-            
+            char_id = str(character_dict['id'])
+            name_file = f"{char_id}.json"
+            path = prepare_path(DATA_DIR_PGS, char_id)
+            data = encode_document(character_dict)
+
+            summary = CharacterSummaryIndex.summary_of(character_dict)
+
+            def on_commit():
+                remove_legacy(DATA_DIR_PGS, char_id)
+                CharacterIndex.add(char_id)
+                CharacterSummaryIndex.update(summary)
+                document_cache.invalidate('personaggi', char_id)
+
+            # Scrittura atomica, raggruppata con le altre della stessa richiesta
+            write_pipeline.submit(path, data, on_commit=on_commit)
+
             logger.info(f"Personaggio salvato: {name_file}")
             return True
             
@@ -119,8 +421,7 @@ class CharacterManager:
             logger.error(f"Errore salvataggio personaggio: {str(e)}")
             return False
     
-    @staticmethod
-    def load_character_json(char_id: str) -> Optional[Dict]:
+    def load(self, char_id: str) -> Optional[Dict]:
         """
         Carica personaggio da file JSON e lo valida.
         
@@ -131,18 +432,21 @@ class CharacterManager:
             Optional[Dict]: Dati personaggio o None se errore
         """
         try:
-            path = os.path.join(DATA_DIR_PGS, f"{char_id}.json")
+            # Scrittura della stessa richiesta non ancora su disco
+            pending = write_pipeline.pending(document_path(DATA_DIR_PGS, char_id))
+            if pending is not None:
+                return decode_character(pending)
             
-            if not os.path.exists(path):
-                logger.warning(f"File personaggio non trovato: {char_id}")
-                return None
+            path = resolve_path(DATA_DIR_PGS, char_id)
             
-            with open(path, "r", encoding='utf-8') as file:
-                char_dict = json.load(file)
+            # Lettura tramite cache LRU: il file viene riletto e rivalidato
+            # solo se (mtime, size) sono cambiati dall'ultimo caricamento
+            validated_dict = document_cache.get_or_load(
+                'personaggi', str(char_id), path, self._load_file
+            )
             
-            # Validazione con Marshmallow
-            character = schema.load(char_dict)
-            validated_dict = schema.dump(character)
+            if validated_dict is None:
+                logger.warning(f"File personaggio non trovato: {char_id}")
             
             return validated_dict
             
@@ -151,7 +455,152 @@ class CharacterManager:
             return None
     
     @staticmethod
-    def delete_character_json(char_id: str) -> bool:
+    def _load_file(path: str) -> Dict:
+        """
+        Legge un file personaggio e lo valida con il codec msgspec
+        (stesso risultato di PersonaggioSchema.load + dump).
+        
+        Args:
+            path (str): Percorso del file personaggio
+            
+        Returns:
+            Dict: Dati personaggio validati
+        """
+        with open(path, "rb") as file:
+            return decode_character(file.read())
+    
+    @classmethod
+    def _get_pool(cls) -> ThreadPoolExecutor:
+        """
+        Returns:
+            ThreadPoolExecutor: Pool limitato a BATCH_LOAD_WORKERS thread
+        """
+        with cls._pool_lock:
+            if cls._pool is None:
+                cls._pool = ThreadPoolExecutor(
+                    max_workers=BATCH_LOAD_WORKERS, thread_name_prefix="load-personaggi"
+                )
+            return cls._pool
+
+    @staticmethod
+    def _read_or_hit(char_id: str) -> Tuple[Optional[Dict], Optional[Tuple[int, int]], Optional[bytes]]:
+        """
+        Lettura eseguita nei thread del pool: restituisce il documento dalla
+        cache se il file non è cambiato, altrimenti i byte letti dal disco
+        con il relativo (mtime_ns, size).
+
+        Args:
+            char_id (str): ID del personaggio
+
+        Returns:
+            Tuple: (documento in cache, stamp, byte letti); tutto None se il file non esiste
+        """
+        path = resolve_path(DATA_DIR_PGS, char_id)
+        try:
+            with open(path, "rb") as file:
+                st = os.fstat(file.fileno())
+                stamp = (st.st_mtime_ns, st.st_size)
+                cached = document_cache.get_fresh('personaggi', char_id, stamp)
+                if cached is not None:
+                    return cached, stamp, None
+                return None, stamp, file.read()
+        except FileNotFoundError:
+            return None, None, None
+
+    def load_many(self, char_ids: List[str]) -> BatchResult:
+        """
+        Carica più personaggi con una sola "andata" di I/O: i file vengono
+        letti in parallelo dal pool di thread e quelli non in cache vengono
+        validati tutti insieme con un'unica decodifica msgspec.
+
+        Args:
+            char_ids (List[str]): ID da caricare
+
+        Returns:
+            BatchResult: Documenti nell'ordine richiesto ed errori per ID
+        """
+        start = time.perf_counter()
+        ids = [str(char_id) for char_id in char_ids]
+        documents: List[Optional[Dict]] = [None] * len(ids)
+        errors: Dict[str, str] = {}
+
+        # Le scritture in attesa della richiesta corrente si leggono
+        # nel thread della richiesta (la pipeline usa flask.g)
+        to_read = []
+        for i, char_id in enumerate(ids):
+            pending = write_pipeline.pending(document_path(DATA_DIR_PGS, char_id))
+            if pending is None:
+                to_read.append(i)
+                continue
+            try:
+                documents[i] = decode_character(pending)
+            except msgspec.MsgspecError as e:
+                errors[char_id] = str(e)
+
+        if len(to_read) > 1:
+            reads = list(self._get_pool().map(self._read_or_hit, [ids[i] for i in to_read]))
+        else:
+            reads = [self._read_or_hit(ids[i]) for i in to_read]
+
+        misses = []
+        for i, (cached, stamp, raw) in zip(to_read, reads):
+            if cached is not None:
+                documents[i] = cached
+            elif raw is None:
+                errors[ids[i]] = "File personaggio non trovato"
+            else:
+                misses.append((i, stamp, raw))
+
+        # Validazione del gruppo in un solo passaggio; se un documento non è
+        # valido si ripiega sulla decodifica singola per isolare l'errore
+        try:
+            decoded = decode_characters([raw for _, _, raw in misses])
+            if len(decoded) != len(misses):
+                raise msgspec.DecodeError("Numero di documenti decodificati non corrispondente")
+            results = list(zip(misses, decoded))
+        except msgspec.MsgspecError:
+            results = []
+            for miss in misses:
+                try:
+                    results.append((miss, decode_character(miss[2])))
+                except msgspec.MsgspecError as e:
+                    errors[ids[miss[0]]] = str(e)
+
+        for (i, stamp, _), doc in results:
+            document_cache.put('personaggi', ids[i], stamp, doc)
+            documents[i] = copy.deepcopy(doc)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        return BatchResult(ids, documents, errors, elapsed_ms)
+
+    def load_summaries(self, char_ids: List[str]) -> List[Dict]:
+        """
+        Carica i sommari dei personaggi da CharacterSummaryIndex, senza
+        aprire i file. Per i salvataggi non ancora scritti della richiesta
+        corrente il sommario viene letto dai byte in attesa.
+
+        Args:
+            char_ids (List[str]): ID da caricare
+
+        Returns:
+            List[Dict]: Sommari nell'ordine richiesto (i mancanti sono saltati)
+        """
+        summaries: Dict[str, Dict] = {}
+        on_disk = []
+        for char_id in map(str, char_ids):
+            pending = write_pipeline.pending(document_path(DATA_DIR_PGS, char_id))
+            if pending is None:
+                on_disk.append(char_id)
+                continue
+            try:
+                summaries[char_id] = decode_summary(pending)
+            except msgspec.MsgspecError as e:
+                logger.error(f"Sommario non leggibile per {char_id}: {e}")
+
+        summaries.update(CharacterSummaryIndex.get_many(CharacterIndex.filter_existing(on_disk)))
+        return [summaries[str(char_id)] for char_id in char_ids if str(char_id) in summaries]
+
+    def delete(self, char_id: str) -> bool:
         """
         Elimina file JSON del personaggio.
         
@@ -162,13 +611,20 @@ class CharacterManager:
             bool: True se eliminato con successo
         """
         try:
-            file_path = os.path.join(DATA_DIR_PGS, f"{char_id}.json")
+            write_pipeline.discard(document_path(DATA_DIR_PGS, char_id))
+            document_cache.invalidate('personaggi', str(char_id))
             
+            file_path = resolve_path(DATA_DIR_PGS, char_id)
             if os.path.exists(file_path):
                 os.remove(file_path)
+                remove_legacy(DATA_DIR_PGS, char_id)
+                CharacterIndex.discard(char_id)
+                CharacterSummaryIndex.discard(char_id)
                 logger.info(f"File personaggio eliminato: {file_path}")
                 return True
             else:
+                CharacterIndex.discard(char_id)
+                CharacterSummaryIndex.discard(char_id)
                 logger.warning(f"File personaggio non trovato: {file_path}")
                 return False
                 
@@ -176,33 +632,87 @@ class CharacterManager:
             logger.error(f"Errore eliminazione file personaggio {char_id}: {str(e)}")
             return False
     
-    @staticmethod
-    def get_user_character_files() -> List[str]:
+    def all_ids(self) -> List[str]:
         """
         Ottiene lista di tutti i file personaggio esistenti.
+        Usa l'indice in memoria invece di leggere la directory ad ogni chiamata.
         
         Returns:
             List[str]: Lista di IDs dei file trovati
         """
-        try:
-            files = os.listdir(DATA_DIR_PGS)
-            char_ids = []
+        return list(CharacterIndex.ids())
+    
+    def filter_existing(self, char_ids: List[str]) -> List[str]:
+        """
+        Filtra gli ID mantenendo quelli con un file su disco.
+        Lookup O(1) per ID sull'indice: costo O(posseduti) e non O(file x posseduti).
+        
+        Args:
+            char_ids (List[str]): ID da filtrare
             
-            for file in files:
-                if file.endswith('.json') and file != '.gitkeep':
-                    filename = os.path.splitext(file)[0]
-                    char_ids.append(filename)
+        Returns:
+            List[str]: ID esistenti, nell'ordine ricevuto
+        """
+        return CharacterIndex.filter_existing(char_ids)
+
+
+class CharacterManager:
+    """Classe per operazioni CRUD sui personaggi."""
+    
+    @staticmethod
+    def save_character_json(character_dict: Dict, owner_id: Optional[int] = None) -> bool:
+        """
+        Salva dizionario personaggio tramite il repository configurato.
+        
+        Args:
+            character_dict (Dict): Dati personaggio serializzati
+            owner_id (Optional[int]): ID dell'utente proprietario, se noto
+            
+        Returns:
+            bool: True se salvato con successo
+        """
+        return RepositoryFactory.characters().save(character_dict, owner_id=owner_id)
+    
+    @staticmethod
+    def load_character_json(char_id: str) -> Optional[Dict]:
+        """
+        Carica personaggio dal repository configurato e lo valida.
+        
+        Args:
+            char_id (str): ID del personaggio da caricare
             
-            return char_ids
+        Returns:
+            Optional[Dict]: Dati personaggio o None se errore
+        """
+        return RepositoryFactory.characters().load(char_id)
+    
+    @staticmethod
+    def delete_character_json(char_id: str) -> bool:
+        """
+        Elimina il personaggio dal repository configurato.
+        
+        Args:
+            char_id (str): ID del personaggio da eliminare
             
-        except Exception as e:
-            logger.error(f"Errore lettura directory personaggi: {str(e)}")
-            return []
+        Returns:
+            bool: True se eliminato con successo
+        """
+        return RepositoryFactory.characters().delete(char_id)
+    
+    @staticmethod
+    def get_user_character_files() -> List[str]:
+        """
+        Ottiene lista di tutti i personaggi esistenti.
+        
+        Returns:
+            List[str]: Lista di IDs dei personaggi trovati
+        """
+        return RepositoryFactory.characters().all_ids()
     
     @staticmethod
     def filter_owned_characters(user_char_ids: List[str]) -> List[str]:
         """
-        Filtra personaggi dell'utente che esistono realmente su file.
+        Filtra personaggi dell'utente che esistono realmente.
         
         Args:
             user_char_ids (List[str]): IDs personaggi nel database utente
@@ -213,8 +723,7 @@ class CharacterManager:
         if not user_char_ids:
             return []
         
-        all_files = CharacterManager.get_user_character_files()
-        owned_chars = [char_id for char_id in user_char_ids if char_id in all_files]
+        owned_chars = RepositoryFactory.characters().filter_existing(user_char_ids)
         
         logger.info(f"Filtrati {len(owned_chars)} personaggi posseduti da {len(user_char_ids)} totali")
         return owned_chars
@@ -246,10 +755,33 @@ class CharacterManager:
         
         return current_ids
     
+    @staticmethod
+    def load_characters_batch(char_ids: List[str]) -> BatchResult:
+        """
+        Carica più personaggi in un'unica operazione tramite il repository
+        configurato (letture concorrenti e validazione di gruppo).
+        
+        Args:
+            char_ids (List[str]): Lista di IDs da caricare
+            
+        Returns:
+            BatchResult: Personaggi nell'ordine richiesto, errori per ID e durata
+        """
+        batch = RepositoryFactory.characters().load_many(char_ids)
+        
+        for char_id, error in batch.errors.items():
+            logger.warning(f"Personaggio {char_id} non caricato: {error}")
+        
+        logger.info(
+            f"Caricati {len(batch.ids) - len(batch.errors)} personaggi da "
+            f"{len(batch.ids)} richiesti in {batch.elapsed_ms:.1f} ms"
+        )
+        return batch
+    
     @staticmethod
     def load_multiple_characters_json(char_ids: List[str]) -> List[Dict]:
         """
-        Carica multipli personaggi da file JSON e li valida.
+        Carica multipli personaggi e li valida.
         
         Args:
             char_ids (List[str]): Lista di IDs da caricare
@@ -257,15 +789,30 @@ class CharacterManager:
         Returns:
             List[Dict]: Lista personaggi caricati con successo
         """
-        characters = []
-        
-        for char_id in char_ids:
-            char_data = CharacterManager.load_character_json(char_id)
-            if char_data:
-                characters.append(char_data)
+        return CharacterManager.load_characters_batch(char_ids).loaded()
+    
+    @staticmethod
+    def load_fields(char_ids: List[str], fields: Sequence[str] = SUMMARY_FIELDS) -> List[Dict]:
+        """
+        Carica solo alcuni campi dei personaggi (proiezione), per le pagine
+        con le liste. Se i campi sono tra SUMMARY_FIELDS vengono letti dal
+        sommario del repository, senza caricare e validare i personaggi
+        completi; altrimenti si ripiega sul caricamento completo.
         
-        logger.info(f"Caricati {len(characters)} personaggi da {len(char_ids)} richiesti")
-        return characters
+        Args:
+            char_ids (List[str]): Lista di IDs da caricare
+            fields (Sequence[str]): Campi da restituire
+            
+        Returns:
+            List[Dict]: Un dizionario {campo: valore} per personaggio esistente,
+            nell'ordine richiesto
+        """
+        repo = RepositoryFactory.characters()
+        if set(fields) <= set(SUMMARY_FIELDS):
+            documents = repo.load_summaries(char_ids)
+        else:
+            documents = repo.load_many(char_ids).loaded()
+        return [{name: doc.get(name) for name in fields} for doc in documents]
     
     @staticmethod
     def find_character_by_id(characters: List[Dict], char_id: str) -> Optional[Dict]:
@@ -350,17 +897,16 @@ class CharacterStatsCalculator:
         if not user_char_ids:
             return {"Mago": 0, "Guerriero": 0, "Ladro": 0, "Totale": 0}
         
-        # Carica tutti i personaggi dell'utente
+        # Conteggio per classe delegato al repository
+        # (query indicizzata con il backend SQLite)
         owned_chars = CharacterManager.filter_owned_characters(user_char_ids)
-        characters = CharacterManager.load_multiple_characters_json(owned_chars)
+        counts = RepositoryFactory.characters().count_by_class(owned_chars)
         
-        # Conteggio per classe
         stats = {"Mago": 0, "Guerriero": 0, "Ladro": 0}
         
-        for char in characters:
-            classe = char.get('classe', 'Unknown')
+        for classe, count in counts.items():
             if classe in stats:
-                stats[classe] += 1
+                stats[classe] += count
         
         # Aggiungi totale
         stats["Totale"] = sum(stats.values())
@@ -448,13 +994,16 @@ class CharacterCombat:
     """Classe per gestione combattimenti."""
     
     @staticmethod
-    def execute_combat_turn(attacker: Personaggio, defender: Personaggio) -> Tuple[bool, int, str]:
+    def execute_combat_turn(attacker: Personaggio, defender: Personaggio,
+                            ambiente: Optional[Ambiente] = None) -> Tuple[bool, int, str]:
         """
         Esegue un singolo turno di combattimento.
         
         Args:
             attacker (Personaggio): Personaggio attaccante
             defender (Personaggio): Personaggio difensore
+            ambiente (Optional[Ambiente]): Ambiente del duello, il cui
+                modifica_attacco si applica all'attacco (default: nessuno)
             
         Returns:
             Tuple[bool, int, str]: (successo, danno_inflitto, messaggio)
@@ -462,7 +1011,8 @@ class CharacterCombat:
         successo = attacker.esegui_azione()
         
         if successo:
-            danno = attacker.attacca()
+            mod_ambiente = ambiente.modifica_attacco(attacker) if ambiente is not None else 0
+            danno = attacker.attacca(mod_ambiente)
             defender.subisci_danno(danno)
             messaggio = f"{attacker.nome} infligge {danno} danni a {defender.nome} (Salute residua: {defender.salute})"
             return True, danno, messaggio
@@ -470,6 +1020,40 @@ class CharacterCombat:
             messaggio = f"{attacker.nome} ha fallito l'attacco!"
             return False, 0, messaggio
     
+    @staticmethod
+    def run_duel(pg1: Personaggio, pg2: Personaggio,
+                 ambiente: Optional[Ambiente] = None) -> Tuple[List[str], int]:
+        """
+        Esegue un duello fino alla sconfitta di uno dei due: a ogni turno
+        attacca prima pg1, poi pg2 se è ancora in piedi.
+        Il simulatore vettoriale (gioco.simulatore) riproduce queste regole.
+        
+        Args:
+            pg1 (Personaggio): Primo combattente, attacca per primo
+            pg2 (Personaggio): Secondo combattente
+            ambiente (Optional[Ambiente]): Ambiente del duello (default: nessuno)
+            
+        Returns:
+            Tuple[List[str], int]: (log dei turni, numero di turni iniziati)
+        """
+        log_combattimento = []
+        turno = 0
+
+        while pg1.salute > 0 and pg2.salute > 0:
+            turno += 1
+            log_combattimento.append(f"Turno {turno}:")
+
+            successo, danno, messaggio = CharacterCombat.execute_combat_turn(pg1, pg2, ambiente)
+            log_combattimento.append(messaggio)
+
+            if pg2.salute <= 0:
+                break
+
+            successo, danno, messaggio = CharacterCombat.execute_combat_turn(pg2, pg1, ambiente)
+            log_combattimento.append(messaggio)
+
+        return log_combattimento, turno
+
     @staticmethod
     def determine_combat_winner(pg1: Personaggio, pg2: Personaggio) -> str:
         """
@@ -14,6 +14,9 @@ DATA_DIR_INV = os.path.join(BASE_DIR, 'data', 'json', 'inventari')
 # directory file JSON del salvataggio della battaglia
 DATA_DIR_SAVE = os.path.join(BASE_DIR, 'data', 'json', 'save')
 
+# directory dei file delle battaglie in corso scritte su disco (vedi battle/store.py)
+DATA_DIR_BATTLES = os.path.join(DATA_DIR_SAVE, 'battaglie')
+
 # directory file JSON delle missioni
 DATA_DIR_MIS = os.path.join(BASE_DIR, 'static', 'json', 'missions')
 
@@ -23,6 +26,53 @@ DATA_DIR_LEADERBOARD = os.path.join(BASE_DIR, 'data', 'json', 'leaderboard')
 # file JSON con classifica
 LEADERBOARD_FILE = os.path.join(DATA_DIR_LEADERBOARD, 'leaderboard.json')
 
+# directory file JSON degli indici
+DATA_DIR_INDEX = os.path.join(BASE_DIR, 'data', 'json', 'indici')
+
+# file JSON con l'indice id_proprietario -> file inventario
+INVENTORY_INDEX_FILE = os.path.join(DATA_DIR_INDEX, 'inventari.json')
+
+# file JSON con il sommario (id, nome, classe, livello) di ogni personaggio
+CHARACTER_SUMMARY_FILE = os.path.join(DATA_DIR_INDEX, 'personaggi.json')
+
+# directory dei file pack (backend 'pack', vedi storage/pack.py)
+DATA_DIR_PACK = os.path.join(BASE_DIR, 'data', 'pack')
+
+# file pack di personaggi e inventari
+PACK_PGS_FILE = os.path.join(DATA_DIR_PACK, 'personaggi.pack')
+PACK_INV_FILE = os.path.join(DATA_DIR_PACK, 'inventari.pack')
+
+# Limiti della cache LRU dei documenti validati (personaggi e inventari)
+CACHE_MAX_ENTRIES = 4096             # numero massimo di documenti in cache
+CACHE_MAX_BYTES = 16 * 1024 * 1024   # budget in byte (somma delle dimensioni dei file)
+
+# Durabilità delle scritture JSON di personaggi e inventari:
+# 'no-fsync', 'fsync-file' oppure 'fsync-dir' (vedi storage/writer.py)
+STORAGE_DURABILITY = 'fsync-file'
+
+# Backend di persistenza di personaggi e inventari: 'json' (file in data/json),
+# 'sqlite' (tabelle nello stesso database degli utenti, vedi storage/sqlite.py)
+# oppure 'pack' (file append-only in data/pack, vedi storage/pack.py).
+# Per passare a 'sqlite' o 'pack' importare prima i dati:
+#   flask --app app storage migrate-json   /   flask --app app storage migrate-pack
+STORAGE_BACKEND = 'json'
+
+# Thread massimi per la lettura concorrente dei file nei caricamenti multipli
+BATCH_LOAD_WORKERS = 8
+
+# Layout dei file di personaggi e inventari: False = tutti nella stessa directory,
+# True = sottodirectory per prefisso dell'UUID (personaggi/ab/cd/<uuid>.json).
+# Dopo averlo cambiato spostare i file esistenti: flask --app app storage migrate-layout
+STORAGE_SHARDED = False
+
+# Battaglie in corso tenute in memoria (battle/store.py): oltre i limiti, o
+# se inattive da BATTLE_IDLE_SECONDS, vengono scritte su disco e ricaricate
+# alla richiesta successiva; dopo BATTLE_TTL_SECONDS di inattività vengono eliminate
+BATTLE_MAX_ENTRIES = 10000             # battaglie massime in memoria
+BATTLE_MAX_BYTES = 256 * 1024 * 1024   # memoria stimata massima in byte
+BATTLE_IDLE_SECONDS = 10 * 60
+BATTLE_TTL_SECONDS = 24 * 60 * 60
+
 # Numero di giocatori massimo per ogni singolo utente
 NUMERO_MAX_PGS = 5
 
@@ -38,8 +88,11 @@ def CreateDirs():
     for d in (DATA_DIR_PGS,
               DATA_DIR_INV,
               DATA_DIR_SAVE,
+              DATA_DIR_BATTLES,
               DATA_DIR_MIS,
-              DATA_DIR_LEADERBOARD):
+              DATA_DIR_LEADERBOARD,
+              DATA_DIR_INDEX,
+              DATA_DIR_PACK):
         os.makedirs(d, exist_ok=True)
 
         # crea file gitkeep se non esiste
@@ -47,6 +100,13 @@ def CreateDirs():
         if not os.path.exists(gitkeep):
             open(gitkeep, 'a').close()
 
+    # sottodirectory di primo livello del layout a sottodirectory
+    if STORAGE_SHARDED:
+        from storage.layout import shard_roots
+        for d in (DATA_DIR_PGS, DATA_DIR_INV):
+            for shard in shard_roots(d):
+                os.makedirs(shard, exist_ok=True)
+
 
 def add_user_leaderboard(user_id):
     """
@@ -0,0 +1,181 @@
+"""
+Fixture condivise dai test (pytest) accanto ai moduli.
+
+I benchmark in storage/bench.py misurano solo i tempi: le verifiche di
+equivalenza con le implementazioni precedenti sono nei test test_*.py
+accanto al codice che verificano.
+"""
+import os
+import math
+import uuid
+import logging
+
+import pytest
+
+
+def sample_character(**campi) -> dict:
+    """
+    Restituisce un personaggio serializzato di esempio.
+
+    Args:
+        **campi: Campi da sostituire a quelli di default
+
+    Returns:
+        dict: Personaggio come salvato in DATA_DIR_PGS
+    """
+    personaggio = {
+        "classe": "Guerriero",
+        "id": str(uuid.uuid4()),
+        "nome": "Benchmark",
+        "npc": False,
+        "salute_max": 130,
+        "salute": 130,
+        "attacco_min": 20,
+        "attacco_max": 100,
+        "livello": 1,
+        "destrezza": 15,
+        "storico_danni_subiti": {},
+    }
+    personaggio.update(campi)
+    return personaggio
+
+
+@pytest.fixture
+def personaggio_di_esempio():
+    """Fabbrica di personaggi serializzati di esempio (vedi sample_character)."""
+    return sample_character
+
+
+@pytest.fixture
+def senza_log():
+    """
+    Disattiva i messaggi INFO dei moduli di gioco per la durata del test:
+    i confronti su migliaia di duelli ne scriverebbero uno per azione.
+    """
+    logging.disable(logging.INFO)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+def _z_critico(alfa: float) -> float:
+    """
+    Args:
+        alfa (float): Probabilità delle due code
+
+    Returns:
+        float: z tale che P(|Z| > z) = alfa per Z normale standard
+    """
+    basso, alto = 0.0, 40.0
+    for _ in range(100):
+        medio = (basso + alto) / 2
+        if math.erfc(medio / math.sqrt(2)) > alfa:
+            basso = medio
+        else:
+            alto = medio
+    return alto
+
+
+@pytest.fixture
+def z_critico():
+    """Soglia dei test z a due code (vedi _z_critico)."""
+    return _z_critico
+
+
+@pytest.fixture
+def app_di_test(monkeypatch):
+    """
+    Applicazione Flask con tutti i blueprint, database SQLite in memoria e
+    backend 'sqlite' per personaggi e inventari: i test non toccano
+    user.db né i file in data/.
+
+    Yields:
+        Flask: Applicazione con un contesto attivo e le tabelle create
+    """
+    from flask import Flask
+    from flask_login import LoginManager
+
+    from auth.models import User, db
+    from auth.routes import auth_bp
+    from battle.routes import battle_bp
+    from characters.routes import characters_bp
+    from environment.routes import environment_bp
+    from gioco.routes import gioco_bp
+    from inventory.routes import inventory_bp
+    from mission.routes import mission_bp
+    from statistics.routes import statistics_bp
+    from storage.repository import RepositoryFactory
+    from storage.sqlite import SqliteCharacterRepository, SqliteInventoryRepository
+    from storage.writer import write_pipeline
+
+    app = Flask("app", root_path=os.path.dirname(os.path.abspath(__file__)))
+    app.config.update(SECRET_KEY="test", TESTING=True, SQLALCHEMY_DATABASE_URI="sqlite://")
+    db.init_app(app)
+    login_manager = LoginManager(app)
+    login_manager.user_loader(lambda user_id: db.session.get(User, int(user_id)))
+    write_pipeline.init_app(app)
+    for blueprint in (gioco_bp, battle_bp, characters_bp, inventory_bp, mission_bp,
+                      auth_bp, statistics_bp, environment_bp):
+        app.register_blueprint(blueprint)
+
+    monkeypatch.setattr(RepositoryFactory, "_characters", SqliteCharacterRepository())
+    monkeypatch.setattr(RepositoryFactory, "_inventories", SqliteInventoryRepository())
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def giocatore(app_di_test):
+    """
+    Giocatore senza personaggi nel database di app_di_test.
+
+    Returns:
+        User: Utente salvato
+    """
+    from auth.models import User, UserRole, db
+
+    utente = User(nome="Giocatore", email="giocatore@test.it", password_hash="-",
+                  crediti=1000, character_ids=[], ruolo=UserRole.PLAYER)
+    db.session.add(utente)
+    db.session.commit()
+    return utente
+
+
+@pytest.fixture
+def archivio_json(tmp_path, monkeypatch):
+    """
+    Directory dei personaggi e degli inventari, indici e cache dei documenti
+    in tmp_path al posto di quelli in data/: i repository JSON lavorano su
+    un archivio vuoto.
+
+    Returns:
+        SimpleNamespace: pgs e inv (directory), cache (DocumentCache del test)
+    """
+    from types import SimpleNamespace
+
+    import characters.utils
+    import inventory.utils
+    from characters.utils import CharacterIndex, CharacterSummaryIndex
+    from inventory.utils import InventoryIndex
+    from storage.cache import DocumentCache
+    from storage.journal import JournaledIndex
+
+    archivio = SimpleNamespace(pgs=str(tmp_path / "personaggi"), inv=str(tmp_path / "inventari"),
+                               cache=DocumentCache(64, 1024 * 1024))
+    indici = tmp_path / "indici"
+    for directory in (archivio.pgs, archivio.inv, indici):
+        os.makedirs(directory)
+
+    monkeypatch.setattr(characters.utils, "DATA_DIR_PGS", archivio.pgs)
+    monkeypatch.setattr(inventory.utils, "DATA_DIR_INV", archivio.inv)
+    monkeypatch.setattr(characters.utils, "document_cache", archivio.cache)
+    monkeypatch.setattr(inventory.utils, "document_cache", archivio.cache)
+    monkeypatch.setattr(CharacterIndex, "_ids", set())
+    monkeypatch.setattr(CharacterIndex, "_mtime_ns", None)
+    monkeypatch.setattr(CharacterSummaryIndex, "_index", JournaledIndex(
+        str(indici / "personaggi.json"), CharacterSummaryIndex._scan, "Sommario personaggi"))
+    monkeypatch.setattr(InventoryIndex, "_index", JournaledIndex(
+        str(indici / "inventari.json"), InventoryIndex._scan, "Indice inventari"))
+    return archivio
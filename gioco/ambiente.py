@@ -1,4 +1,3 @@
-import random
 import logging
 from typing import Dict
 from dataclasses import dataclass
@@ -7,30 +6,188 @@ from marshmallow import Schema, fields, post_load
 from gioco.oggetto import BombaAcida, Oggetto, PozioneCura
 from gioco.classi import Guerriero, Ladro, Mago
 from gioco.personaggio import Personaggio
+from gioco.registry import ambienti, oggetti, personaggi
+from gioco.rng import current_rng
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
-@dataclass
+# Variazione casuale massima del danno delle bombe acide nel Vulcano
+VARIAZIONE_BOMBA_VULCANO = 15
+
+
+@dataclass(frozen=True)
+class EffettoOggetto:
+    """
+    Modificatore di un ambiente all'effetto di una classe di oggetti:
+    int(valore * fattore) + randint(minimo, massimo). Gli effetti casuali
+    sono una distribuzione esplicita (uniforme su minimo..massimo), che i
+    simulatori possono leggere senza usare l'oggetto.
+    """
+    fattore: float = 0.0
+    minimo: int = 0
+    massimo: int = 0
+
+    def applica(self, valore: int) -> int:
+        """
+        Args:
+            valore (int): Valore dell'oggetto
+
+        Returns:
+            int: Modificatore da passare a Oggetto.usa
+        """
+        mod = int(valore * self.fattore)
+        if self.massimo != self.minimo:
+            return mod + current_rng().randint(self.minimo, self.massimo)
+        return mod + self.minimo
+
+    def distribuzione(self, valore: int) -> Dict[int, float]:
+        """
+        Args:
+            valore (int): Valore dell'oggetto
+
+        Returns:
+            Dict[int, float]: Probabilità di ogni modificatore possibile
+        """
+        base = int(valore * self.fattore)
+        casi = self.massimo - self.minimo + 1
+        return {base + mod: 1 / casi for mod in range(self.minimo, self.massimo + 1)}
+
+
+NESSUN_EFFETTO = EffettoOggetto()
+
+
+class TabellaModificatori:
+    """
+    Modificatori di un ambiente per classe di personaggio (attacco, cura) e
+    per classe di oggetto, calcolati una volta dalle regole dell'ambiente
+    (Ambiente.regola_*). Le classi registrate sono compilate subito, le
+    altre alla prima richiesta.
+    """
+
+    def __init__(self, ambiente: 'Ambiente'):
+        """
+        Args:
+            ambiente (Ambiente): Ambiente di cui compilare le regole
+        """
+        self._ambiente = ambiente
+        self._attacco: Dict[type, int] = {}
+        self._cura: Dict[type, int] = {}
+        self._oggetto: Dict[type, EffettoOggetto] = {}
+        for classe in personaggi.classes().values():
+            self.attacco(classe)
+            self.cura(classe)
+        for classe in oggetti.classes().values():
+            self.oggetto(classe)
+
+    def attacco(self, classe: type) -> int:
+        """
+        Args:
+            classe (type): Classe dell'attaccante
+
+        Returns:
+            int: Modificatore di attacco
+        """
+        mod = self._attacco.get(classe)
+        if mod is None:
+            mod = self._attacco[classe] = self._ambiente.regola_attacco(classe)
+        return mod
+
+    def cura(self, classe: type) -> int:
+        """
+        Args:
+            classe (type): Classe del personaggio curato
+
+        Returns:
+            int: Modificatore di cura
+        """
+        mod = self._cura.get(classe)
+        if mod is None:
+            mod = self._cura[classe] = self._ambiente.regola_cura(classe)
+        return mod
+
+    def oggetto(self, classe: type) -> EffettoOggetto:
+        """
+        Args:
+            classe (type): Classe dell'oggetto
+
+        Returns:
+            EffettoOggetto: Modificatore dell'effetto
+        """
+        effetto = self._oggetto.get(classe)
+        if effetto is None:
+            effetto = self._oggetto[classe] = self._ambiente.regola_oggetto(classe)
+        return effetto
+
+
+@dataclass(frozen=True)
 class Ambiente():
     """
     E responsabile alla gestione di variabili  globali dovuti all'ambiente
     interagisce con le classi Personaggio e Oggetto
+
+    Le sottoclassi descrivono i modificatori per classe (regola_attacco,
+    regola_cura, regola_oggetto); modifica_attacco, modifica_cura e
+    modifica_effetto_oggetto li leggono dalla TabellaModificatori
+    dell'istanza, compilata al primo uso. Gli ambienti sono immutabili
+    (dataclass frozen): la tabella resta valida per tutta la vita
+    dell'istanza e la stessa istanza può essere condivisa fra battaglie.
     """
     nome: str
     mod_attacco: int = 0
     mod_cura: float = 0.0
 
-    def modifica_attacco(self, attaccante: Personaggio) -> int:
+    def regola_attacco(self, classe: type) -> int:
         raise NotImplementedError
 
-    def modifica_effetto_oggetto(self, oggetto: Oggetto) -> int:
+    def regola_oggetto(self, classe: type) -> EffettoOggetto:
         raise NotImplementedError
 
-    def modifica_cura(self, soggetto: Personaggio) -> int:
+    def regola_cura(self, classe: type) -> int:
         raise NotImplementedError
 
+    def tabella(self) -> TabellaModificatori:
+        """
+        Returns:
+            TabellaModificatori: Modificatori compilati dell'ambiente
+        """
+        tabella = self.__dict__.get('_tabella')
+        if tabella is None:
+            # non è un campo: scritta direttamente, aggirando il frozen
+            tabella = self.__dict__['_tabella'] = TabellaModificatori(self)
+        return tabella
+
+    def modifica_attacco(self, attaccante: Personaggio) -> int:
+        """
+        Args:
+            attaccante (Personaggio): Attaccante
+
+        Returns:
+            int: Modificatore di attacco per la classe dell'attaccante
+        """
+        return self.tabella().attacco(type(attaccante))
+
+    def modifica_effetto_oggetto(self, oggetto: Oggetto) -> int:
+        """
+        Args:
+            oggetto (Oggetto): Oggetto usato
+
+        Returns:
+            int: Modificatore dell'effetto (estratto se l'effetto è casuale)
+        """
+        return self.tabella().oggetto(type(oggetto)).applica(oggetto.valore)
+
+    def modifica_cura(self, soggetto: Personaggio) -> int:
+        """
+        Args:
+            soggetto (Personaggio): Il personaggio che riceve la cura
+
+        Returns:
+            int: Modificatore di cura per la classe del personaggio
+        """
+        return self.tabella().cura(type(soggetto))
+
     def to_dict(self) -> dict:
         """Restituisce uno stato serializzabile per session o JSON.
 
@@ -55,10 +212,13 @@ class Ambiente():
             Ambiente:
         """
         nome = data.get("classe", "")
+        if nome in ambienti.classes():
+            return AmbienteFactory.istanza(nome)
         return AmbienteFactory.usa_ambiente(nome)
 
 
-@dataclass
+@ambienti.register
+@dataclass(frozen=True)
 class Foresta(Ambiente):
     """
     La classe Foresta eredita da Ambiente e rappresenta un ambiente specifico
@@ -69,57 +229,46 @@ class Foresta(Ambiente):
     mod_attacco: int = 5
     mod_cura: float = 5.0
 
-    def modifica_attacco(self, attaccante: Personaggio) -> int:
+    def regola_attacco(self, classe: type) -> int:
         """
-        Il metodo controlla se l'attaccante è un Guerriero e, in caso
-        affermativo, aumenta il suo attacco massimo di un valore definito
-        modifica_attacco=5.
+        I guerrieri aumentano il loro attacco massimo di mod_attacco=5.
 
         Args:
-            attaccante (Personaggio): Attaccante
+            classe (type): Classe dell'attaccante
 
         Returns:
             int: Il valore intero che andrà a modificare l'attacco o 0 se
             l'attaccante non è un guerriero
         """
-        if isinstance(attaccante, Guerriero):
-            logger.info(
-                f"{attaccante.nome} guadagna {self.modifica_attacco}"
-                f"attacco nella Foresta!"
-            )
-            return self.mod_attacco
-        return 0
+        return self.mod_attacco if issubclass(classe, Guerriero) else 0
 
-    def modifica_effetto_oggetto(self, oggetto: Oggetto) -> int:
+    def regola_oggetto(self, classe: type) -> EffettoOggetto:
         """
-        Questo metodo non modifica l'effetto dell'oggetto.
+        La Foresta non modifica l'effetto degli oggetti.
 
         Args:
-            oggetto (Oggetto): Oggetto da modificare
+            classe (type): Classe dell'oggetto
 
         returns:
-            int: 0
+            EffettoOggetto: NESSUN_EFFETTO
         """
-        return 0
+        return NESSUN_EFFETTO
 
-    def modifica_cura(self, soggetto: Personaggio) -> int:
+    def regola_cura(self, classe: type) -> int:
         """
-        Questa funzione aumenta la cura del ladro di un valore definito
-        nell'ambiente Foresta.
+        La cura dei ladri aumenta di mod_cura.
 
         Args:
-            soggetto (Personaggio): Il personaggio che riceve la cura se è un
-            ladro
+            classe (type): Classe del personaggio curato
 
         returns:
             int: L'aumento della cura se il soggetto è un ladro, altrimenti 0
         """
-        if isinstance(soggetto, Ladro):
-            return int(self.mod_cura)
-        return 0
+        return int(self.mod_cura) if issubclass(classe, Ladro) else 0
 
 
-@dataclass
+@ambienti.register
+@dataclass(frozen=True)
 class Vulcano(Ambiente):
     """
     La classe Vulcano eredita da Ambiente e rappresenta un ambiente specifico
@@ -130,71 +279,53 @@ class Vulcano(Ambiente):
     mod_attacco: int = 10
     mod_cura: float = -5.0
 
-    def modifica_attacco(self, attaccante: Personaggio) -> int:
+    def regola_attacco(self, classe: type) -> int:
         """
-        Il metodo controlla se l'attaccante è un Mago e, in caso affermativo,
-        aumenta il suo attacco massimo di un valore definito
-        modifica_attacco=10.
-        Se l'attaccante è un Ladro, diminuisce il suo attacco massimo di un
-        valore definito modifica_attacco=10.
+        I maghi aumentano il loro attacco massimo di mod_attacco=10, i ladri
+        lo diminuiscono dello stesso valore.
 
         Args:
-            attaccante (Personaggio): Il personaggio che attacca
+            classe (type): Classe dell'attaccante
 
         returns:
             int: L'aumento o la diminuzione dell'attacco massimo
         """
-
-        if isinstance(attaccante, Mago):
-            logger.info(
-                f"{attaccante.nome} guadagna {self.modifica_attacco}"
-                "attacco nel Vulcano!"
-            )
+        if issubclass(classe, Mago):
             return self.mod_attacco
-        elif isinstance(attaccante, Ladro):
-            logger.info(
-                f"{attaccante.nome} perde {self.modifica_attacco}"
-                "attacco nel Vulcano!"
-            )
+        if issubclass(classe, Ladro):
             return -self.mod_attacco
         return 0
 
-    def modifica_effetto_oggetto(self, oggetto: Oggetto) -> int:
+    def regola_oggetto(self, classe: type) -> EffettoOggetto:
         """
-        Il metodo aumenta il danno della bomba acida di un valore casuale
-        da 0 a 15
+        Il danno della bomba acida aumenta di un valore casuale da 0 a
+        VARIAZIONE_BOMBA_VULCANO.
 
         Args:
-            oggetto (Oggetto): Oggetto da modificare
+            classe (type): Classe dell'oggetto
 
         returns:
-            int: Aumento del danno della bomba acida
-        """
-        if isinstance(oggetto, BombaAcida):
-            variazione = random.randint(0, 15)
-            logger.info(
-                f"Nella {self.nome}, la Bomba Acida guadagna {variazione}"
-                f" danni!"
-            )
-            return variazione
-        return 0
+            EffettoOggetto: Aumento casuale per le bombe acide
+        """
+        if issubclass(classe, BombaAcida):
+            return EffettoOggetto(minimo=0, massimo=VARIAZIONE_BOMBA_VULCANO)
+        return NESSUN_EFFETTO
 
-    def modifica_cura(self, soggetto: Personaggio) -> int:
+    def regola_cura(self, classe: type) -> int:
         """
-        Questo metodo aumenta la cura di tutti i personaggi di un valore
-        definito nell'ambiente Vulcano.
+        La cura di tutti i personaggi cambia di mod_cura.
 
         Args:
-            soggetto (Personaggio): Il personaggio che riceve la cura
+            classe (type): Classe del personaggio curato
 
         returns:
-            int: L'aumento della cura se il soggetto è un ladro, altrimenti 0
-
+            int: Il modificatore di cura
         """
         return int(self.mod_cura)
 
 
-@dataclass
+@ambienti.register
+@dataclass(frozen=True)
 class Palude(Ambiente):
     """
     La classe Palude eredita da Ambiente e rappresenta un ambiente specifico
@@ -205,44 +336,35 @@ class Palude(Ambiente):
     mod_attacco: int = -5
     mod_cura: float = 0.3
 
-    def modifica_attacco(self, attaccante: Personaggio) -> int:
+    def regola_attacco(self, classe: type) -> int:
         """
-        Il metodo controlla se l'attaccante è un Guerriero o un Ladro e, in
-        caso affermativo, diminuisce il suo attacco massimo di un valore
-        definito modifica_attacco=-5 nell'ambiente Palude.
+        Guerrieri e ladri diminuiscono il loro attacco massimo di
+        mod_attacco=-5.
 
         Args:
-            attaccante (Personaggio): Il personaggio che attacca
+            classe (type): Classe dell'attaccante
 
         returns:
             int: La diminuzione dell'attacco massimo
         """
-        if isinstance(attaccante, (Guerriero, Ladro)):
-            logger.info(
-                f"{attaccante.nome} perde {-self.mod_attacco} "
-                "attacco nella Palude!")
-            return self.mod_attacco
-        return 0
+        return self.mod_attacco if issubclass(classe, (Guerriero, Ladro)) else 0
 
-    def modifica_effetto_oggetto(self, oggetto: Oggetto) -> int:
+    def regola_oggetto(self, classe: type) -> EffettoOggetto:
         """
-        Il metodo riduce l'effetto della Pozione Cura del %30
+        L'effetto delle Pozioni Cura è ridotto del 30% (mod_cura).
+
         Args:
-            oggetto (Oggetto): Oggetto da modificare
+            classe (type): Classe dell'oggetto
 
         returns:
-            int: Riduzione dell'effetto della Pozione Cura
-        """
-        if isinstance(oggetto, PozioneCura):
-            riduzione = int(oggetto.valore * self.mod_cura)
-            logger.info(
-                f"Nella {self.nome}, la Pozione Cura ha effetto ridotto di"
-                f"{riduzione} punti!"
-                )
-            return -riduzione
-        return 0
+            EffettoOggetto: Riduzione proporzionale al valore della pozione
+        """
+        if issubclass(classe, PozioneCura):
+            # int() tronca verso zero: int(v * -0.3) == -int(v * 0.3)
+            return EffettoOggetto(fattore=-self.mod_cura)
+        return NESSUN_EFFETTO
 
-    def modifica_cura(self, soggetto: Personaggio) -> int:
+    def regola_cura(self, classe: type) -> int:
         return 0
 
 
@@ -252,38 +374,68 @@ class AmbienteFactory:
     Factory per la generazione di ambienti nel sistema di combattimento.
     Fornisce metodi per creare un ambiente casuale oppure selezionarlo
     manualmente.
+
+    Gli ambienti sono istanze uniche per classe registrata, con la tabella
+    dei modificatori già compilata.
     """
+    # ordine delle opzioni numerate ("1", "2", "3")
+    OPZIONI = ("Foresta", "Vulcano", "Palude")
+
+    _istanze: Dict[str, Ambiente] = {}
+    # scelte valide per usa_ambiente: numero dell'opzione
+    _scelte: Dict[str, Ambiente] = {}
+
+    @staticmethod
+    def istanza(nome: str) -> Ambiente:
+        """
+        Args:
+            nome (str): Nome della classe registrata
+
+        Returns:
+            Ambiente: Istanza unica dell'ambiente
+
+        Raises:
+            KeyError: Se l'ambiente non è registrato
+        """
+        ambiente = AmbienteFactory._istanze.get(nome)
+        if ambiente is None:
+            ambiente = ambienti.classes()[nome]()
+            ambiente.tabella()
+            AmbienteFactory._istanze[nome] = ambiente
+            if nome in AmbienteFactory.OPZIONI:
+                AmbienteFactory._scelte[str(AmbienteFactory.OPZIONI.index(nome) + 1)] = ambiente
+        return ambiente
+
     @staticmethod
     def get_opzioni() -> Dict[str, Ambiente]:
         return {
-            "1": Foresta(),
-            "2": Vulcano(),
-            "3": Palude()
+            str(numero): AmbienteFactory.istanza(nome)
+            for numero, nome in enumerate(AmbienteFactory.OPZIONI, start=1)
         }
 
     @staticmethod
     def usa_ambiente(scelta: str) -> Ambiente:
         """
-        Permette all'utente di selezionare un ambiente tra quelli disponibili.
+        Permette all'utente di selezionare un ambiente tra quelli disponibili
+        per numero ("1", "2", "3"). Per un ambiente per nome di classe si usa
+        istanza().
 
-        Se l'input è valido, viene restituito l'ambiente predefinito (Foresta).
+        Se l'input non è valido, viene restituito l'ambiente predefinito (Foresta).
 
         Args:
-            None
+            scelta (str): Numero dell'ambiente
 
         Returns:
-            ambiente: Un'istanza della sottoclasse selezionata di Ambiente, o
+            ambiente: L'istanza della sottoclasse selezionata di Ambiente, o
             Foresta come default.
         """
-        mapping = AmbienteFactory.get_opzioni()
-        scelta = scelta.strip().lower()
-        if scelta in mapping:
-            env = mapping[scelta]
+        env = AmbienteFactory._scelte.get(scelta.strip())
+        if env is not None:
             logger.info(f"selezionato ambiente {env.nome}")
             return env
         # fallback
         logger.warning(f"scelta ambiente sconosciuta: {scelta}, uso foresta")
-        return Foresta()
+        return AmbienteFactory.istanza("Foresta")
 
     @staticmethod
     def ambiente_random() -> Ambiente:
@@ -294,35 +446,16 @@ class AmbienteFactory:
             None
 
         Returns:
-            ambiente: Un'istanza di una sottoclasse di Ambiente scelta
+            ambiente: L'istanza di una sottoclasse di Ambiente scelta
             casualmente (Foresta, Vulcano o Palude).
         """
-        random_choice = random.choice(
+        random_choice = current_rng().choice(
             list(AmbienteFactory.get_opzioni().values())
         )
         logger.info(f"Ambiente Casuale Selezionato: {random_choice}")
         return random_choice
 
 
-def get_all_subclasses(cls):
-    """
-    Ottiene tutte le sottoclassi di una classe base, utilizzata per
-    la deserializzazione dinamica tramite Marshmallow.
-
-    Args:
-        cls: La classe base di cui ottenere le sottoclassi
-
-    Returns:
-        set: Un set contenente tutte le sottoclassi
-    """
-    subclasses = set()
-    for subclass in cls.__subclasses__():
-        subclasses.add(subclass)
-        # subclasses.update(get_all_subclasses(subclass))
-        # nel caso di sottoclassi indirette
-    return subclasses
-
-
 class AmbienteSchema(Schema):
     classe = fields.String(required=True)
     nome = fields.String(required=True)
@@ -331,22 +464,12 @@ class AmbienteSchema(Schema):
 
     @post_load
     def make_obj(self, data, **kwargs):
-        # Crea la mappa dinamica: nome classe -> classe Python
-        classe_nome = data.get("classe")
-        ambienti_map = {
-            subcls.__name__: subcls
-            for subcls in get_all_subclasses(Ambiente)
-        }
-
         # rimuovo classe dai dati per evitare conflitti
         data_clean = {k: v for k, v in data.items() if k != 'classe'}
 
-        if classe_nome in ambienti_map:
-            ambiente_cls = ambienti_map[classe_nome]
-            return ambiente_cls(**data_clean)
-        else:
-            # Fallback alla classe base Ambiente
-            return Ambiente(**data_clean)
+        # classe registrata, con fallback alla classe base Ambiente
+        ambiente_cls = ambienti.get(data.get("classe"), Ambiente)
+        return ambiente_cls(**data_clean)
 
     def dump(self, obj, *, many=None, **kwargs):
         """
@@ -366,4 +489,9 @@ class AmbienteSchema(Schema):
             if isinstance(data, dict) and hasattr(obj, '__class__'):
                 data['classe'] = obj.__class__.__name__
 
-        return data
\ No newline at end of file
+        return data
+
+
+# istanze uniche e tabelle dei modificatori compilate all'avvio
+for _nome in ambienti.classes():
+    AmbienteFactory.istanza(_nome)
@@ -1,5 +1,9 @@
-import random, uuid, logging
+import uuid, logging
+from gioco.eventi import AttackResolved, Healed, bus_corrente
 from gioco.personaggio import Personaggio
+from gioco.registry import personaggi
+from gioco.rng import current_rng
+from gioco.storico import StoricoDanni, StoricoDanniField
 
 from dataclasses import dataclass, field
 from marshmallow import Schema, fields, post_load
@@ -7,7 +11,8 @@ from marshmallow import Schema, fields, post_load
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-@dataclass
+@personaggi.register
+@dataclass(slots=True)
 class Mago(Personaggio):
     """
     Classe che rappresenta un personaggio mago.
@@ -32,10 +37,11 @@ class Mago(Personaggio):
         Returns:
             int: danno inflitto all'avversario
         """
-        danno = random.randint(self.attacco_min, self.attacco_max)
+        danno = current_rng().randint(self.attacco_min, self.attacco_max)
         danno += mod_ambiente
-        msg = f"{self.nome} lancia un incantesimo infliggendo {danno} danni!"
-        logger.info(msg)
+        bus = bus_corrente()
+        if bus is not None:
+            bus.emetti(AttackResolved(self.nome, type(self).__name__, True, danno))
         return danno
 
     def recupera_salute(self, mod_ambiente: int = 0) -> None:
@@ -53,12 +59,13 @@ class Mago(Personaggio):
         nuova_salute = min(self.salute + recupero, 80)
         effettivo = nuova_salute - self.salute
         self.salute = nuova_salute
-        msg = f"{self.nome} medita e recupera {effettivo} HP." \
-            f" Salute attuale: {self.salute}"
-        logger.info(msg)
+        bus = bus_corrente()
+        if bus is not None:
+            bus.emetti(Healed(self.nome, type(self).__name__, effettivo, self.salute))
 
 
-@dataclass
+@personaggi.register
+@dataclass(slots=True)
 class Guerriero(Personaggio):
     """
     Classe che rappresenta un personaggio guerriero.
@@ -84,12 +91,13 @@ class Guerriero(Personaggio):
         Returns:
             None
         """
-        danno = random.randint(
+        danno = current_rng().randint(
             self.attacco_min,
             self.attacco_max + mod_ambiente
         )
-        msg = f"{self.nome} colpisce con la spada infliggendo {danno} danni!"
-        logger.info(msg)
+        bus = bus_corrente()
+        if bus is not None:
+            bus.emetti(AttackResolved(self.nome, type(self).__name__, True, danno))
         return danno
 
     def recupera_salute(self, mod_ambiente: int = 0) -> None:
@@ -107,12 +115,13 @@ class Guerriero(Personaggio):
         nuova_salute = min(self.salute + recupero, 120)
         effettivo = nuova_salute - self.salute
         self.salute = nuova_salute
-        msg = f"{self.nome} si fascia le ferite e recupera {effettivo} HP." \
-            f" Salute attuale: {self.salute}"
-        logger.info(msg)
+        bus = bus_corrente()
+        if bus is not None:
+            bus.emetti(Healed(self.nome, type(self).__name__, effettivo, self.salute))
 
 
-@dataclass
+@personaggi.register
+@dataclass(slots=True)
 class Ladro(Personaggio):
     """
     Estende la classe Personaggio, ha salute elevata a 140, +5 attacco_max e
@@ -137,14 +146,14 @@ class Ladro(Personaggio):
             danno (int): danno inflitto all'avversario
         """
         danno = 0
-        if self.esegui_azione():
-            danno = random.randint(
+        riuscito = self.esegui_azione()
+        if riuscito:
+            danno = current_rng().randint(
                 self.attacco_min, self.attacco_max
             ) + mod_ambiente
-            msg = f"{self.nome} colpisce furtivamente infliggendo {danno} danni!"
-        else:
-            msg = f"{self.nome} tenta di attaccare ma fallisce!"
-        logger.info(msg)
+        bus = bus_corrente()
+        if bus is not None:
+            bus.emetti(AttackResolved(self.nome, type(self).__name__, riuscito, danno))
         return danno
 
     def recupera_salute(self, mod_ambiente: int = 0) -> None:
@@ -159,13 +168,13 @@ class Ladro(Personaggio):
         Returns:
             None
         """
-        recupero = random.randint(10, 40) + mod_ambiente
+        recupero = current_rng().randint(10, 40) + mod_ambiente
         nuova_salute = min(self.salute + recupero, 140)
         effettivo = nuova_salute - self.salute
         self.salute = nuova_salute
-        msg = f"{self.nome} si cura rapidamente e recupera {effettivo} HP. " \
-            f"Salute attuale: {self.salute}"
-        logger.info(msg)
+        bus = bus_corrente()
+        if bus is not None:
+            bus.emetti(Healed(self.nome, type(self).__name__, effettivo, self.salute))
 
 
 class PersonaggioSchema(Schema):
@@ -176,7 +185,7 @@ class PersonaggioSchema(Schema):
     classe = fields.String(required=True)
     id = fields.UUID(load_default=lambda: uuid.uuid4())
 
-    storico_danni_subiti = fields.List(fields.Integer(), load_default=list)
+    storico_danni_subiti = StoricoDanniField(load_default=StoricoDanni)
 
     def _set_default_if_empty(self, data, key, default):
         """
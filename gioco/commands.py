@@ -0,0 +1,59 @@
+import os
+import logging
+
+import click
+from flask.cli import AppGroup
+
+from gioco.farm import MOTORI, SimulationFarm
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+simula_cli = AppGroup('simula', help="Simulazioni di bilanciamento delle classi di gioco")
+
+
+@simula_cli.command('farm')
+@click.option('--workers', type=int, default=None, help="Processi (default: numero di core)")
+@click.option('--duelli', type=int, default=100_000, show_default=True, help="Duelli per cella")
+@click.option('--seed', type=int, default=0, show_default=True)
+@click.option('--motore', type=click.Choice(MOTORI), default='vettoriale', show_default=True)
+@click.option('--shard', type=int, default=None, help="Duelli per shard")
+@click.option('--scaling', is_flag=True, help="Ripete con 1, 2, 4... processi fino a --workers")
+def farm(workers, duelli, seed, motore, shard, scaling):
+    """
+    Matrice classe x classe x ambiente delle vittorie di chi attacca per
+    primo, con turni/s totali e per core.
+    """
+    workers = workers or os.cpu_count() or 1
+    prove = [workers]
+    if scaling:
+        prove = sorted({min(2 ** n, workers) for n in range(workers.bit_length() + 1)})
+
+    risultato = None
+    for n in prove:
+        risultato = SimulationFarm(n, motore, shard).run(duelli, seed)
+        click.echo(
+            f"{n:>3} processi: {risultato.turni_totali} turni in {risultato.secondi:.1f}s, "
+            f"{risultato.turni_al_secondo:,.0f} turni/s, "
+            f"{risultato.turni_al_secondo_per_core:,.0f} turni/s per core, "
+            f"efficienza {risultato.efficienza:.0%}"
+        )
+
+    matrice = risultato.matrice
+    click.echo(f"\nVittorie di chi attacca per primo ({duelli} duelli per cella, seed {seed})")
+    for k, ambiente in enumerate(matrice.ambienti):
+        click.echo(f"{ambiente:<10}" + "".join(f" {nome:>10}" for nome in matrice.classi))
+        for i, primo in enumerate(matrice.classi):
+            click.echo(f"{primo:<10}" + "".join(
+                f" {matrice.win_rate[i, j, k]:>10.3f}" for j in range(len(matrice.classi))
+            ))
+
+
+def register_commands(app) -> None:
+    """
+    Registra i comandi CLI delle simulazioni (flask --app app simula ...).
+
+    Args:
+        app (Flask): Applicazione Flask
+    """
+    app.cli.add_command(simula_cli)
@@ -0,0 +1,134 @@
+"""
+Rappresentazione compatta delle entità di gioco.
+
+Personaggio, Oggetto e Inventario (con le sottoclassi) sono dataclass con
+slots=True: niente __dict__ per istanza, gli attributi stanno in posizioni
+fisse dell'oggetto. Gli UUID non vengono conservati come oggetti uuid.UUID
+(oggetto + intero a 128 bit, circa 100 byte) ma come il solo intero a
+128 bit: compact_ids() sostituisce lo slot del campo con un descrittore che
+converte in scrittura e ricostruisce l'uuid.UUID in lettura, quindi per il
+resto del codice obj.id resta un uuid.UUID.
+
+    @compact_ids('id')
+    @dataclass(slots=True)
+    class Oggetto:
+        id: uuid.UUID = field(default_factory=uuid.uuid4)
+
+Budget di memoria per entità (byte allocati, CPython 3.11 64 bit, misurati
+con tracemalloc, come in gioco/test_compact.py). Sono compresi
+l'oggetto, l'id e il contenitore vuoto (lo StoricoDanni senza colpi di
+gioco.storico, la lista degli oggetti dell'inventario); per il
+Personaggio anche il nome, una stringa nuova di circa 20 caratteri. Le
+stringhe costanti (nomi di default degli oggetti, classe) e gli interi
+piccoli sono condivisi fra le istanze e non contano:
+
+    entità        prima    dopo   budget
+    Personaggio     382     277      300
+    Oggetto         228     124      130
+    Inventario      352     200      210   (oggetti contenuti esclusi)
+
+Le sottoclassi devono usare anch'esse @dataclass(slots=True), altrimenti
+ogni istanza torna ad avere un __dict__.
+"""
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+# Budget di memoria per entità in byte (vedi tabella sopra), verificato da
+# gioco/test_compact.py
+MEMORY_BUDGET: Dict[str, int] = {
+    'Personaggio': 300,
+    'Oggetto': 130,
+    'Inventario': 210,
+}
+
+# Costruzione diretta di uuid.UUID da un intero già valido, senza i
+# controlli di UUID.__init__ (stesso meccanismo usato dal modulo uuid)
+_new_object = object.__new__
+_set_attribute = object.__setattr__
+_SAFE_UNKNOWN = uuid.SafeUUID.unknown
+
+
+def _uuid_from_int(value: int) -> uuid.UUID:
+    """
+    Args:
+        value (int): Intero a 128 bit (uuid.UUID.int)
+
+    Returns:
+        uuid.UUID: UUID corrispondente
+    """
+    result = _new_object(uuid.UUID)
+    _set_attribute(result, 'int', value)
+    _set_attribute(result, 'is_safe', _SAFE_UNKNOWN)
+    return result
+
+
+class CompactUUID:
+    """
+    Descrittore per un campo uuid.UUID (o Optional[uuid.UUID]) che conserva
+    nello slot dell'istanza solo l'intero a 128 bit.
+
+    In scrittura accetta uuid.UUID, stringhe in formato UUID, interi
+    (interpretati come UUID.int) e None. Un valore non convertibile viene
+    conservato così com'è e restituito invariato in lettura, come faceva
+    il campo non compatto.
+    """
+
+    def __init__(self, slot: Any):
+        """
+        Args:
+            slot (Any): Descrittore dello slot creato da dataclass(slots=True)
+        """
+        self._slot = slot
+        self.__name__ = slot.__name__
+        self.__doc__ = slot.__doc__
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.__name__ = name
+
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> Any:
+        if instance is None:
+            return self
+        value = self._slot.__get__(instance, owner)
+        if type(value) is int:
+            return _uuid_from_int(value)
+        return value
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        if isinstance(value, uuid.UUID):
+            value = value.int
+        elif isinstance(value, str):
+            try:
+                value = uuid.UUID(value).int
+            except ValueError:
+                pass
+        self._slot.__set__(instance, value)
+
+    def __delete__(self, instance: Any) -> None:
+        self._slot.__delete__(instance)
+
+
+def compact_ids(*names: str) -> Callable[[type], type]:
+    """
+    Decoratore di classe: i campi UUID indicati vengono conservati come
+    intero a 128 bit. Va applicato sopra @dataclass(slots=True), sulla
+    classe che dichiara i campi; le sottoclassi ereditano il descrittore.
+
+    Args:
+        *names (str): Nomi dei campi UUID
+
+    Returns:
+        Callable[[type], type]: Decoratore
+
+    Raises:
+        TypeError: Se un campo non è uno slot della classe
+    """
+    def decorate(cls: type) -> type:
+        for name in names:
+            slot = cls.__dict__.get(name)
+            if name not in getattr(cls, '__slots__', ()) or slot is None:
+                raise TypeError(
+                    f"{cls.__name__}.{name} non è uno slot: serve @dataclass(slots=True)"
+                )
+            setattr(cls, name, CompactUUID(slot))
+        return cls
+    return decorate
@@ -0,0 +1,127 @@
+"""
+Dati di supporto ai test, condivisi con i benchmark di storage/bench.py:
+oggetti di gioco casuali e le regole d'ambiente precedenti alle tabelle.
+"""
+import uuid
+
+
+def random_objects(rng, cases: int) -> list:
+    """
+    Genera dataclass di gioco casuali (personaggi, oggetti, ambienti,
+    inventari e missioni), per il confronto con Marshmallow in
+    gioco/test_serializers.py e per storage.bench.
+
+    Args:
+        rng (random.Random): Generatore casuale
+        cases (int): Numero di oggetti per famiglia
+
+    Returns:
+        list: Coppie (oggetto, schema Marshmallow)
+    """
+    from gioco.ambiente import AmbienteSchema
+    from gioco.inventario import Inventario
+    from gioco.missione import Missione
+    from gioco.registry import ambienti, oggetti, personaggi
+    from gioco.schemas.inventario import InventarioSchema
+    from gioco.schemas.missione import MissioniSchema
+    from gioco.schemas.oggetto import OggettoSchema
+    from gioco.schemas.personaggio import PersonaggioSchema
+    from gioco.strategy import StrategiaFactory
+
+    def testo() -> str:
+        return "".join(rng.choice("abcdeèàù XYZ'\"\\") for _ in range(rng.randint(0, 12)))
+
+    def personaggio():
+        classe, cls = rng.choice(list(personaggi.classes().items()))
+        return cls(nome=testo(), classe=classe, npc=rng.random() < 0.5,
+                   salute=rng.randint(-50, 300), salute_max=rng.randint(0, 300),
+                   attacco_min=rng.randint(0, 50), attacco_max=rng.randint(50, 150),
+                   livello=rng.randint(1, 99), destrezza=rng.randint(0, 40),
+                   storico_danni_subiti=[rng.randint(0, 200) for _ in range(rng.randint(0, 80))])
+
+    def oggetto():
+        cls = rng.choice(list(oggetti.classes().values()))
+        return cls(nome=testo(), usato=rng.random() < 0.5, valore=rng.randint(0, 200),
+                   tipo_oggetto=testo())
+
+    def ambiente():
+        cls = rng.choice(list(ambienti.classes().values()))
+        return cls(nome=testo(), mod_attacco=rng.randint(-20, 20), mod_cura=rng.uniform(-5, 5))
+
+    def inventario():
+        return Inventario(id_proprietario=uuid.UUID(int=rng.getrandbits(128)) if rng.random() < 0.8 else None,
+                          oggetti=[oggetto() for _ in range(rng.randint(0, 6))])
+
+    def missione():
+        return Missione(nome=testo(), ambiente=ambiente(),
+                        nemici=[personaggio() for _ in range(rng.randint(0, 4))],
+                        premi=[oggetto() for _ in range(rng.randint(0, 4))],
+                        strategia_nemici=StrategiaFactory.usa_strategia(
+                            rng.choice(["aggressiva", "difensiva", "equilibrata"])),
+                        completata=rng.random() < 0.5, attiva=rng.random() < 0.5)
+
+    famiglie = ((personaggio, PersonaggioSchema()), (oggetto, OggettoSchema()),
+                (ambiente, AmbienteSchema()), (inventario, InventarioSchema()),
+                (missione, MissioniSchema()))
+    return [(make(), schema) for make, schema in famiglie for _ in range(cases)]
+
+
+def legacy_environment_rules() -> dict:
+    """
+    Regole dei modificatori d'ambiente precedenti alle tabelle (catene di
+    isinstance e un log per chiamata), usate come riferimento in
+    gioco/test_ambiente.py e come misura "prima" in storage.bench.
+
+    Returns:
+        dict: {"attacco", "cura", "oggetto", "usa_ambiente": funzione}
+    """
+    import logging
+    from gioco.ambiente import Foresta, Palude, Vulcano
+    from gioco.classi import Guerriero, Ladro, Mago
+    from gioco.oggetto import BombaAcida, PozioneCura
+    from gioco.rng import current_rng
+
+    registro = logging.getLogger("gioco.ambiente")
+
+    def attacco(ambiente, attaccante) -> int:
+        if isinstance(ambiente, Foresta):
+            if isinstance(attaccante, Guerriero):
+                registro.info(f"{attaccante.nome} guadagna {ambiente.mod_attacco}attacco nella Foresta!")
+                return ambiente.mod_attacco
+        elif isinstance(ambiente, Vulcano):
+            if isinstance(attaccante, Mago):
+                registro.info(f"{attaccante.nome} guadagna {ambiente.mod_attacco}attacco nel Vulcano!")
+                return ambiente.mod_attacco
+            elif isinstance(attaccante, Ladro):
+                registro.info(f"{attaccante.nome} perde {ambiente.mod_attacco}attacco nel Vulcano!")
+                return -ambiente.mod_attacco
+        elif isinstance(attaccante, (Guerriero, Ladro)):
+            registro.info(f"{attaccante.nome} perde {-ambiente.mod_attacco} attacco nella Palude!")
+            return ambiente.mod_attacco
+        return 0
+
+    def oggetto(ambiente, oggetto) -> int:
+        if isinstance(ambiente, Vulcano) and isinstance(oggetto, BombaAcida):
+            variazione = current_rng().randint(0, 15)
+            registro.info(f"Nella {ambiente.nome}, la Bomba Acida guadagna {variazione} danni!")
+            return variazione
+        if isinstance(ambiente, Palude) and isinstance(oggetto, PozioneCura):
+            riduzione = int(oggetto.valore * ambiente.mod_cura)
+            registro.info(f"Nella {ambiente.nome}, la Pozione Cura ha effetto ridotto di{riduzione} punti!")
+            return -riduzione
+        return 0
+
+    def usa_ambiente(scelta: str):
+        mapping = {"1": Foresta(), "2": Vulcano(), "3": Palude()}
+        env = mapping[scelta.strip().lower()]
+        registro.info(f"selezionato ambiente {env.nome}")
+        return env
+
+    def cura(ambiente, soggetto) -> int:
+        if isinstance(ambiente, Foresta):
+            return int(ambiente.mod_cura) if isinstance(soggetto, Ladro) else 0
+        if isinstance(ambiente, Vulcano):
+            return int(ambiente.mod_cura)
+        return 0
+
+    return {"attacco": attacco, "cura": cura, "oggetto": oggetto, "usa_ambiente": usa_ambiente}
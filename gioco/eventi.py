@@ -0,0 +1,246 @@
+"""
+Eventi di combattimento.
+
+Le azioni dei personaggi e degli oggetti (tiri, attacchi, danni, cure, uso
+di oggetti, livelli) non scrivono più un messaggio di log ciascuna: emettono
+un evento, una tupla tipizzata con i soli dati dell'azione, sul bus del
+contesto corrente (contextvars, come gioco.rng):
+
+    bus = EventBus()
+    with registra(bus):
+        CharacterCombat.run_duel(pg1, pg2)
+    righe = [formatta(evento) for evento in bus.eventi]
+
+Il testo viene costruito da formatta() solo quando il log viene mostrato.
+Fuori da registra() non c'è nessun bus: i punti di emissione controllano
+bus_corrente() e non costruiscono neppure l'evento, quindi simulazioni e
+benchmark non pagano nulla.
+
+Il bus conserva gli ultimi eventi in un buffer circolare (deque con
+maxlen) e li passa agli eventuali ascoltatori (es. inoltra_al_log).
+"""
+import logging
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Eventi conservati dal buffer circolare di un bus
+CAPACITA_EVENTI = 1024
+
+
+class ActionChecked(NamedTuple):
+    """Tiro d20 contro la destrezza (Personaggio.esegui_azione)."""
+    nome: str
+    tiro: int
+    successo: bool
+
+
+class AttackResolved(NamedTuple):
+    """Attacco risolto (attacca); danno 0 se fallito."""
+    nome: str
+    classe: str
+    riuscito: bool
+    danno: int
+
+
+class DamageTaken(NamedTuple):
+    """Danno subito (subisci_danno), con la salute risultante."""
+    nome: str
+    danno: int
+    salute: int
+
+
+class ItemUsed(NamedTuple):
+    """Oggetto usato da un inventario, con l'effetto prodotto."""
+    oggetto: str
+    classe: str
+    effetto: int
+
+
+class Healed(NamedTuple):
+    """Salute recuperata (recupera_salute), con la salute risultante."""
+    nome: str
+    classe: str
+    recupero: int
+    salute: int
+
+
+class LevelUp(NamedTuple):
+    """Passaggio di livello (migliora_statistiche)."""
+    nome: str
+    livello: int
+
+
+class Defeated(NamedTuple):
+    """Combattente sconfitto in battaglia."""
+    nome: str
+
+
+class BattleEnded(NamedTuple):
+    """Fine della battaglia, con l'esito per i personaggi giocabili."""
+    esito: str
+
+
+TIPI_EVENTO: Dict[str, type] = {
+    tipo.__name__: tipo
+    for tipo in (ActionChecked, AttackResolved, DamageTaken, ItemUsed,
+                 Healed, LevelUp, Defeated, BattleEnded)
+}
+
+Ascoltatore = Callable[[tuple], None]
+
+
+class EventBus:
+    """
+    Raccoglie gli eventi emessi nel contesto in cui è registrato.
+    """
+
+    def __init__(self, capacita: int = CAPACITA_EVENTI,
+                 ascoltatori: Iterable[Ascoltatore] = (),
+                 eventi: Iterable[tuple] = ()):
+        """
+        Args:
+            capacita (int): Eventi conservati (i più vecchi vengono scartati)
+            ascoltatori (Iterable[Ascoltatore]): Funzioni chiamate per ogni evento
+            eventi (Iterable[tuple]): Eventi iniziali (ripristino)
+        """
+        self.eventi: deque = deque(eventi, maxlen=capacita)
+        self._ascoltatori: List[Ascoltatore] = list(ascoltatori)
+
+    def iscrivi(self, ascoltatore: Ascoltatore) -> None:
+        """
+        Args:
+            ascoltatore (Ascoltatore): Funzione chiamata per ogni evento
+        """
+        self._ascoltatori.append(ascoltatore)
+
+    def emetti(self, evento: tuple) -> None:
+        """
+        Args:
+            evento (tuple): Evento (uno dei tipi di TIPI_EVENTO)
+        """
+        self.eventi.append(evento)
+        for ascoltatore in self._ascoltatori:
+            ascoltatore(evento)
+
+    def to_list(self) -> List[list]:
+        """
+        Returns:
+            List[list]: Eventi serializzabili ([tipo, *campi]), dal più vecchio
+        """
+        return [[type(evento).__name__, *evento] for evento in self.eventi]
+
+    @classmethod
+    def from_list(cls, data: List[list], capacita: int = CAPACITA_EVENTI) -> 'EventBus':
+        """
+        Args:
+            data (List[list]): Lista prodotta da to_list()
+            capacita (int): Eventi conservati
+
+        Returns:
+            EventBus: Bus con gli eventi ripristinati, senza ascoltatori
+        """
+        return cls(capacita, eventi=(TIPI_EVENTO[tipo](*campi) for tipo, *campi in data))
+
+
+_corrente: ContextVar[Optional[EventBus]] = ContextVar('eventi', default=None)
+
+# bus_corrente() -> Optional[EventBus]: il bus del contesto, None se nessuno
+# ascolta (metodo legato della ContextVar: nessuna chiamata in più)
+bus_corrente = _corrente.get
+
+
+@contextmanager
+def registra(bus: Optional[EventBus] = None) -> Iterator[EventBus]:
+    """
+    Esegue il blocco con il bus indicato come bus del contesto. I blocchi
+    possono essere annidati: all'uscita torna il bus precedente.
+
+    Args:
+        bus (Optional[EventBus]): Bus (default: un nuovo EventBus)
+
+    Yields:
+        EventBus: Il bus del blocco
+    """
+    bus = bus if bus is not None else EventBus()
+    token = _corrente.set(bus)
+    try:
+        yield bus
+    finally:
+        _corrente.reset(token)
+
+
+# Frasi di attacco per classe (come i vecchi messaggi di log dei metodi attacca)
+_ATTACCHI = {
+    'Mago': "{nome} lancia un incantesimo infliggendo {danno} danni!",
+    'Guerriero': "{nome} colpisce con la spada infliggendo {danno} danni!",
+    'Ladro': "{nome} colpisce furtivamente infliggendo {danno} danni!",
+}
+_CURE = {
+    'Mago': "{nome} medita e recupera {recupero} HP. Salute attuale: {salute}",
+    'Guerriero': "{nome} si fascia le ferite e recupera {recupero} HP. Salute attuale: {salute}",
+    'Ladro': "{nome} si cura rapidamente e recupera {recupero} HP. Salute attuale: {salute}",
+}
+
+
+def _azione(e: ActionChecked) -> str:
+    if e.successo:
+        return f"{e.nome} ha eseguito l'azione con successo! (tiro={e.tiro})"
+    return f"{e.nome} ha fallito l'azione! (tiro={e.tiro})"
+
+
+def _attacco(e: AttackResolved) -> str:
+    if not e.riuscito:
+        return f"{e.nome} tenta di attaccare ma fallisce!"
+    formato = _ATTACCHI.get(e.classe, "{nome} attacca con successo e infligge {danno} danni!")
+    return formato.format(nome=e.nome, danno=e.danno)
+
+
+def _cura(e: Healed) -> str:
+    formato = _CURE.get(e.classe, "{nome} recupera {recupero} HP. Salute attuale: {salute}")
+    return formato.format(nome=e.nome, recupero=e.recupero, salute=e.salute)
+
+
+def _oggetto(e: ItemUsed) -> str:
+    if e.classe == 'BombaAcida':
+        return f"{e.oggetto} infligge {-e.effetto} danni!"
+    return f"{e.oggetto} usato (effetto {e.effetto})"
+
+
+_FORMATI: Dict[type, Callable[[tuple], str]] = {
+    ActionChecked: _azione,
+    AttackResolved: _attacco,
+    DamageTaken: lambda e: f"{e.nome} subisce {e.danno} danni. Salute: {e.salute}",
+    ItemUsed: _oggetto,
+    Healed: _cura,
+    LevelUp: lambda e: f"{e.nome} è salito al livello {e.livello}!",
+    Defeated: lambda e: f"{e.nome} è stato sconfitto!",
+    BattleEnded: lambda e: f"Battaglia terminata: {e.esito}",
+}
+
+
+def formatta(evento: tuple) -> str:
+    """
+    Args:
+        evento (tuple): Evento di combattimento
+
+    Returns:
+        str: Testo dell'evento per il log della battaglia
+    """
+    return _FORMATI[type(evento)](evento)
+
+
+def inoltra_al_log(evento: tuple) -> None:
+    """
+    Ascoltatore che scrive l'evento nel log (livello INFO), formattandolo
+    solo se il livello è abilitato.
+
+    Args:
+        evento (tuple): Evento di combattimento
+    """
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(formatta(evento))
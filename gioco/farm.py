@@ -0,0 +1,245 @@
+"""
+Farm di simulazione: duelli classe x classe x ambiente distribuiti su più
+processi (ProcessPoolExecutor).
+
+Il lavoro di ogni cella della matrice viene diviso in shard di duelli.
+Ogni shard ha il proprio flusso casuale, derivato dal seed con
+numpy.random.SeedSequence(seed, spawn_key=(cella, shard)): i flussi sono
+indipendenti e non dipendono da quale processo esegue lo shard né
+dall'ordine di completamento. I risultati degli shard sono somme intere
+(vittorie, sconfitte, duelli interrotti, turni) e vengono sommati man mano
+che arrivano, quindi lo stesso seed dà risultati identici bit per bit con
+qualunque numero di processi.
+
+Motori disponibili:
+- 'vettoriale': gioco.simulatore.simula_duelli (NumPy);
+- 'oggetti': le classi di gioco tramite CharacterCombat.run_duel, con il
+  generatore di gioco.rng inizializzato dal flusso dello shard.
+
+Da riga di comando:
+    flask --app app simula farm --workers 8 --duelli 1000000 --seed 42
+"""
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from gioco.ambiente import AmbienteFactory
+from gioco.registry import ambienti, personaggi
+from gioco.rng import seeded
+from gioco.simulatore import (
+    MAX_TURNI, NESSUN_AMBIENTE, MatriceDuelli, Profilo, simula_duelli
+)
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+MOTORI = ('vettoriale', 'oggetti')
+
+# Duelli per shard: abbastanza da rendere trascurabile il costo del
+# passaggio fra processi, abbastanza pochi da bilanciare il carico
+SHARD_DUELLI = {'vettoriale': 200_000, 'oggetti': 2_000}
+
+# Risultato di uno shard: (cella, vittorie, sconfitte, interrotti, duelli, turni, secondi CPU)
+RisultatoShard = Tuple[int, int, int, int, int, int, float]
+
+
+def _init_worker() -> None:
+    """
+    Inizializzazione dei processi della farm: i metodi delle classi di gioco
+    scrivono un messaggio di log per azione, inutile in simulazione.
+    """
+    logging.disable(logging.INFO)
+
+
+def _esegui_shard(motore: str, classi: Tuple[str, ...], nomi_ambienti: Tuple[str, ...],
+                  cella: int, shard: int, duelli: int, seed: int,
+                  max_turni: int) -> RisultatoShard:
+    """
+    Esegue uno shard di duelli di una cella. Gira nei processi della farm.
+
+    Args:
+        motore (str): 'vettoriale' o 'oggetti'
+        classi (Tuple[str, ...]): Classi della matrice
+        nomi_ambienti (Tuple[str, ...]): Ambienti della matrice
+        cella (int): Indice piatto della cella (primo, secondo, ambiente)
+        shard (int): Indice dello shard nella cella
+        duelli (int): Duelli da eseguire
+        seed (int): Seed della simulazione
+        max_turni (int): Turni oltre i quali un duello è interrotto
+
+    Returns:
+        RisultatoShard: Somme dello shard e tempo CPU impiegato
+    """
+    start = time.process_time()
+    i, j, k = np.unravel_index(cella, (len(classi), len(classi), len(nomi_ambienti)))
+    flusso = np.random.SeedSequence(seed, spawn_key=(cella, shard))
+
+    def nuovo(nome: str):
+        return personaggi.classes()[nome](nome=nome, classe=nome)
+
+    nome_ambiente = nomi_ambienti[k]
+    ambiente = None if nome_ambiente == NESSUN_AMBIENTE else AmbienteFactory.istanza(nome_ambiente)
+
+    if motore == 'vettoriale':
+        esito = simula_duelli(Profilo.from_personaggio(nuovo(classi[i]), ambiente),
+                              Profilo.from_personaggio(nuovo(classi[j]), ambiente),
+                              duelli, np.random.default_rng(flusso), max_turni)
+        risultato = (esito.vittorie, esito.sconfitte, esito.interrotti,
+                     duelli, int(esito.turni.sum()))
+    else:
+        # import locale: characters.utils dipende da Flask e dallo storage
+        from characters.utils import CharacterCombat
+
+        vittorie = sconfitte = turni = 0
+        with seeded(int.from_bytes(flusso.generate_state(4, np.uint64).tobytes(), 'little')):
+            for _ in range(duelli):
+                pg1, pg2 = nuovo(classi[i]), nuovo(classi[j])
+                _, turno = CharacterCombat.run_duel(pg1, pg2, ambiente)
+                vittorie += pg2.salute <= 0
+                sconfitte += pg1.salute <= 0
+                turni += turno
+        risultato = (vittorie, sconfitte, duelli - vittorie - sconfitte, duelli, turni)
+
+    return (cella,) + risultato + (time.process_time() - start,)
+
+
+@dataclass
+class RisultatoFarm:
+    """
+    Risultato di una simulazione della farm.
+
+    Attributes:
+        matrice (MatriceDuelli): Percentuali di vittoria e turni medi
+        vittorie, sconfitte, interrotti, turni (np.ndarray): Somme per cella
+        workers (int): Processi usati
+        secondi (float): Tempo totale
+        secondi_cpu (float): Somma dei tempi CPU dei singoli shard
+    """
+    matrice: MatriceDuelli
+    vittorie: np.ndarray
+    sconfitte: np.ndarray
+    interrotti: np.ndarray
+    turni: np.ndarray
+    workers: int
+    secondi: float
+    secondi_cpu: float
+
+    @property
+    def turni_totali(self) -> int:
+        return int(self.turni.sum())
+
+    @property
+    def turni_al_secondo(self) -> float:
+        return self.turni_totali / self.secondi if self.secondi else 0.0
+
+    @property
+    def turni_al_secondo_per_core(self) -> float:
+        return self.turni_al_secondo / self.workers
+
+    @property
+    def efficienza(self) -> float:
+        """Turni/s reali rispetto a workers volte i turni per secondo CPU."""
+        if not self.secondi_cpu or not self.secondi:
+            return 0.0
+        per_cpu = self.turni_totali / self.secondi_cpu
+        return self.turni_al_secondo / (per_cpu * self.workers)
+
+
+class SimulationFarm:
+    """
+    Esegue la matrice dei duelli distribuendo gli shard su più processi.
+    """
+
+    def __init__(self, workers: Optional[int] = None, motore: str = 'vettoriale',
+                 shard_duelli: Optional[int] = None, max_turni: int = MAX_TURNI):
+        """
+        Args:
+            workers (Optional[int]): Processi (default: os.cpu_count())
+            motore (str): 'vettoriale' o 'oggetti'
+            shard_duelli (Optional[int]): Duelli per shard (default: SHARD_DUELLI[motore])
+            max_turni (int): Turni oltre i quali un duello è interrotto
+
+        Raises:
+            ValueError: Se il motore non esiste
+        """
+        if motore not in MOTORI:
+            raise ValueError(f"Motore di simulazione sconosciuto: {motore}")
+        self.workers = workers or os.cpu_count() or 1
+        self.motore = motore
+        self.shard_duelli = shard_duelli or SHARD_DUELLI[motore]
+        self.max_turni = max_turni
+
+    def _shards(self, celle: int, duelli: int) -> List[Tuple[int, int, int]]:
+        """
+        Args:
+            celle (int): Celle della matrice
+            duelli (int): Duelli per cella
+
+        Returns:
+            List[Tuple[int, int, int]]: (cella, shard, duelli dello shard)
+        """
+        shards = []
+        for cella in range(celle):
+            for shard, inizio in enumerate(range(0, duelli, self.shard_duelli)):
+                shards.append((cella, shard, min(self.shard_duelli, duelli - inizio)))
+        return shards
+
+    def run(self, duelli: int, seed: int = 0,
+            classi: Optional[Sequence[str]] = None,
+            nomi_ambienti: Optional[Sequence[str]] = None,
+            progresso: Optional[Callable[[int, int], None]] = None) -> RisultatoFarm:
+        """
+        Simula `duelli` duelli per ogni cella classe x classe x ambiente.
+
+        Args:
+            duelli (int): Duelli per cella
+            seed (int): Seed della simulazione
+            classi (Optional[Sequence[str]]): Classi registrate (default: tutte)
+            nomi_ambienti (Optional[Sequence[str]]): Ambienti registrati più
+                NESSUN_AMBIENTE (default: tutti)
+            progresso (Optional[Callable[[int, int], None]]): Chiamata a ogni
+                shard completato con (shard completati, shard totali)
+
+        Returns:
+            RisultatoFarm: Matrice, somme per cella e tempi
+        """
+        classi = tuple(classi) if classi is not None else tuple(personaggi.classes())
+        if nomi_ambienti is None:
+            nomi_ambienti = (NESSUN_AMBIENTE,) + tuple(ambienti.classes())
+        nomi_ambienti = tuple(nomi_ambienti)
+
+        forma = (len(classi), len(classi), len(nomi_ambienti))
+        somme = np.zeros((5, int(np.prod(forma))), dtype=np.int64)
+        shards = self._shards(somme.shape[1], duelli)
+        secondi_cpu = 0.0
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as pool:
+            futures = [
+                pool.submit(_esegui_shard, self.motore, classi, nomi_ambienti,
+                            cella, shard, n, seed, self.max_turni)
+                for cella, shard, n in shards
+            ]
+            for completati, future in enumerate(as_completed(futures), start=1):
+                cella, *valori, secondi = future.result()
+                somme[:, cella] += valori
+                secondi_cpu += secondi
+                if progresso is not None:
+                    progresso(completati, len(shards))
+        secondi = time.perf_counter() - start
+
+        vittorie, sconfitte, interrotti, giocati, turni = (s.reshape(forma) for s in somme)
+        con_duelli = np.maximum(giocati, 1)
+        matrice = MatriceDuelli(classi, nomi_ambienti, duelli,
+                                vittorie / con_duelli, turni / con_duelli)
+        logger.info(
+            f"Farm: {int(giocati.sum())} duelli, {int(turni.sum())} turni in {secondi:.1f}s "
+            f"con {self.workers} processi ({self.motore})"
+        )
+        return RisultatoFarm(matrice, vittorie, sconfitte, interrotti, turni,
+                             self.workers, secondi, secondi_cpu)
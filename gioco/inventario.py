@@ -1,8 +1,9 @@
 import uuid
+from gioco.compact import compact_ids
 from gioco.oggetto import Oggetto
-from gioco.schemas.oggetto import OggettoSchema
 from gioco.personaggio import Personaggio
 from gioco.ambiente import Ambiente
+from gioco.eventi import ItemUsed, bus_corrente
 #  , Json
 from typing import List, Optional, Union
 from dataclasses import dataclass, field
@@ -12,7 +13,8 @@ import logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-@dataclass
+@compact_ids('id', 'id_proprietario')
+@dataclass(slots=True)
 class Inventario:
     """
     Gestisce la lista di oggetti posseduto da ogni personaggio
@@ -151,6 +153,9 @@ class Inventario:
                 mod_ambiente=mod_ambiente
             )
             self.oggetti.remove(oggetto)
+            bus = bus_corrente()
+            if bus is not None:
+                bus.emetti(ItemUsed(oggetto.nome, type(oggetto).__name__, result))
         return result
 
 
@@ -205,10 +210,13 @@ class Inventario:
         Returns:
             dict: Rappresentazione dell'inventario come dizionario.
         """
+        # import locale: gioco.serializers importa questo modulo
+        from gioco.serializers import to_dict as oggetto_to_dict
+
         return {
             'classe': self.__class__.__name__,
             'id': str(self.id),
-            'oggetti': [OggettoSchema().dump(oggetto) for oggetto in self.oggetti],
+            'oggetti': [oggetto_to_dict(oggetto) for oggetto in self.oggetti],
             'id_proprietario': str(
                 self.id_proprietario
                 ) if self.id_proprietario else None
@@ -1,4 +1,3 @@
-import random
 import uuid
 import json
 import os
@@ -9,6 +8,7 @@ from gioco.ambiente import Ambiente, AmbienteFactory
 from gioco.oggetto import Oggetto
 from gioco.inventario import Inventario
 from gioco.strategy import Strategia, StrategiaFactory
+from gioco.rng import current_rng
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -23,7 +23,7 @@ class Missione():
 
     id: uuid.UUID = field(default_factory=uuid.uuid4)
     ambiente: Ambiente = field(
-        default_factory=lambda: AmbienteFactory.usa_ambiente("Palude")
+        default_factory=lambda: AmbienteFactory.istanza("Palude")
     )
     nemici: list[Personaggio] = field(default_factory=list)
     premi: list[Oggetto] = field(default_factory=list)
@@ -119,7 +119,7 @@ class Missione():
 
         """
         for premio in self.premi:
-            inventario = random.choice(inventari_giocatori)
+            inventario = current_rng().choice(inventari_giocatori)
             if inventario.id_proprietario is None:
                 msg = "Non è possibile assegnare un premio ad un inventario"
                 msg += "senza un personaggio"
@@ -179,16 +179,16 @@ class GestoreMissioni():
         # cerco dentro a static/mission ogni file json avrà lo stesso nome
         # della missione, il nome della sottoclasse di ambiente, il nome
         # della sottoclasse della strategia  e la lista dei nemici e dei premi
-        lista = []
+        documenti = []
         schema = MissioniSchema()
         routes = r"static\mission"
         for files in os.listdir(routes):
             if files.endswith(".json"):
                 with open(os.path.join(routes, files), 'r') as file:
-                    data = json.load(file)
-                    missione = schema.load(data)
-                    lista.append(missione)
-        self.lista_missioni = lista
+                    documenti.append(json.load(file))
+        # tutte le missioni in un solo load(many=True): nemici e premi
+        # vengono costruiti in blocco per classe
+        self.lista_missioni = schema.load(documenti, many=True)
 
     def mostra(self) -> None:
         """
@@ -245,7 +245,7 @@ class GestoreMissioni():
             if missione.attiva:
                 return missione
         try:
-            random.shuffle(self.lista_missioni)
+            current_rng().shuffle(self.lista_missioni)
             for missione in self.lista_missioni:
                 if not missione.completata:
                     missione.attiva = True
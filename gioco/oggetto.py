@@ -1,8 +1,12 @@
 from dataclasses import dataclass, field
 import uuid
 
+from gioco.compact import compact_ids
+from gioco.registry import oggetti
 
-@dataclass
+
+@compact_ids('id')
+@dataclass(slots=True)
 class Oggetto:
     """
     Inizializza un oggetto con nome e tipo
@@ -45,7 +49,8 @@ class Oggetto:
         raise NotImplementedError("Questo oggetto non ha effetto definito.")
 
 
-@dataclass
+@oggetti.register
+@dataclass(slots=True)
 class PozioneCura(Oggetto):
     """
     Cura il personaggio che la usa di un certo valore
@@ -71,7 +76,8 @@ class PozioneCura(Oggetto):
         return cura
 
 
-@dataclass
+@oggetti.register
+@dataclass(slots=True)
 class BombaAcida(Oggetto):
     """
     Infligge danno pari al valore(Proprietà)
@@ -99,7 +105,8 @@ class BombaAcida(Oggetto):
         return danno
 
 
-@dataclass
+@oggetti.register
+@dataclass(slots=True)
 class Medaglione(Oggetto):
     """
     Incrementa l'attacco_max del personaggio che lo usa
@@ -1,6 +1,12 @@
-import random, uuid, logging
+import uuid, logging
 from dataclasses import dataclass, field
 
+from gioco.compact import compact_ids
+from gioco.eventi import (ActionChecked, AttackResolved, DamageTaken, Healed,
+                          LevelUp, bus_corrente)
+from gioco.rng import current_rng
+from gioco.storico import StoricoDanni
+
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -13,7 +19,8 @@ logger.setLevel(logging.INFO)
 # log con troppi messaggi
 
 
-@dataclass
+@compact_ids('id')
+@dataclass(slots=True)
 class Personaggio():
     """
     Classe Padre per tutte classi
@@ -26,7 +33,7 @@ class Personaggio():
     salute_max: int = 200
     attacco_min: int = 5
     attacco_max: int = 80
-    storico_danni_subiti: list[int] = field(default_factory=list)
+    storico_danni_subiti: StoricoDanni = field(default_factory=StoricoDanni)
     livello: int = 1
     destrezza: int = 15
     classe: str = ""
@@ -55,6 +62,13 @@ class Personaggio():
         # self.destrezza = 15  # Caratteristica per la sistema d20
         # self.npc = npc  # Indica se il personaggio è un NPC
 
+    def __post_init__(self) -> None:
+        """
+        Converte lo storico passato come lista di danni (vecchio formato).
+        """
+        if not isinstance(self.storico_danni_subiti, StoricoDanni):
+            self.storico_danni_subiti = StoricoDanni.from_data(self.storico_danni_subiti)
+
     def esegui_azione(self) -> bool:
         """
         Tira un d20 e verifica se il risultato è minore o uguale alla destrezza del personaggio.
@@ -62,16 +76,11 @@ class Personaggio():
         Returns:
             bool: True se il testo è superato, False altrimenti.
         """
-        tiro = random.randint(1, 20)
+        tiro = current_rng().randint(1, 20)
         successo = tiro <= self.destrezza
-        if successo:
-            msg = (
-                f"{self.nome} ha eseguito l'azione con successo! (tiro={tiro})"
-        )
-            logger.info(msg)
-        else:
-            msg = f"{self.nome} ha fallito l'azione! (tiro={tiro})"
-            logger.info(msg)
+        bus = bus_corrente()
+        if bus is not None:
+            bus.emetti(ActionChecked(self.nome, tiro, successo))
         return successo
 
     def attacca(self, mod_ambiente: int = 0) -> int:
@@ -87,12 +96,12 @@ class Personaggio():
             int: danno inflitto all'avversario, 0 se l'attacco fallisce
         """
         danno = 0
-        if self.esegui_azione():
-            danno = random.randint(self.attacco_min, self.attacco_max) + mod_ambiente
-            msg = f"{self.nome} Attacca con successo e infligge {danno} danni!"
-        else:
-            msg = f"{self.nome} Tenta di attaccare ma fallisce!"
-        logger.info(msg)
+        riuscito = self.esegui_azione()
+        if riuscito:
+            danno = current_rng().randint(self.attacco_min, self.attacco_max) + mod_ambiente
+        bus = bus_corrente()
+        if bus is not None:
+            bus.emetti(AttackResolved(self.nome, type(self).__name__, riuscito, danno))
         return danno
 
     def subisci_danno(self, danno: int) -> None:
@@ -103,8 +112,9 @@ class Personaggio():
         """
         self.salute = max(0, self.salute - danno)
         self.storico_danni_subiti.append(danno)
-        msg = f"Salute di {self.nome}: {self.salute}\n"
-        logger.info(msg)
+        bus = bus_corrente()
+        if bus is not None:
+            bus.emetti(DamageTaken(self.nome, danno, self.salute))
 
     def sconfitto(self) -> bool:
         """
@@ -123,18 +133,14 @@ class Personaggio():
             mod_ambiente (int): modificatore di recupero in base all'ambiente
         """
         if self.salute >= self.salute_max:
-            msg = f"{self.nome} ha già la salute piena."
-            logger.info(msg)
             return
         recupero = int(self.salute * 0.3) + mod_ambiente
         nuova_salute = min(self.salute + recupero, 100)
         effettivo = nuova_salute - self.salute
         self.salute = nuova_salute
-        msg = (
-            f"\n{self.nome} recupera {effettivo} HP."
-            f" Salute attuale: {self.salute}"
-        )
-        logger.info(msg)
+        bus = bus_corrente()
+        if bus is not None:
+            bus.emetti(Healed(self.nome, type(self).__name__, effettivo, self.salute))
 
     def migliora_statistiche(self) -> None:
         """
@@ -145,5 +151,6 @@ class Personaggio():
         self.livello += 1
         self.attacco_max = int(self.attacco_max + 0.02 * self.attacco_max)
         self.salute_max = int(self.salute_max + 0.01 * self.salute_max)
-        msg = f"{self.nome} è salito al livello {self.livello}!"
-        logger.info(msg)
\ No newline at end of file
+        bus = bus_corrente()
+        if bus is not None:
+            bus.emetti(LevelUp(self.nome, self.livello))
\ No newline at end of file
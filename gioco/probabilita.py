@@ -0,0 +1,188 @@
+"""
+Esito esatto di un duello (programmazione dinamica sugli stati di salute).
+
+Il simulatore (gioco.simulatore) stima la probabilità di vittoria
+campionando duelli; qui la si calcola esattamente, con le stesse regole
+(vedi Profilo e _ATTACCO in gioco.simulatore).
+
+Ogni attacco è una variabile casuale indipendente: danno 0 se il tiro
+fallisce, altrimenti uniforme sull'intervallo della regola di attacca. Lo
+stato del duello all'inizio di un turno è la coppia (salute del primo,
+salute del secondo); per ogni stato (a, b):
+
+    W(a, b) = P(d1 >= b) + sum_{d1 < b} q1(d1) sum_{d2 < a} q2(d2) W(a - d2, b - d1)
+
+con q1, q2 le distribuzioni dei danni dei due combattenti; la sconfitta L e
+i turni attesi T seguono la stessa ricorrenza con un termine noto diverso.
+Gli stati si calcolano per righe di salute del primo crescente: i termini
+delle righe precedenti sono una convoluzione con q1 (moltiplicazione per la
+matrice di Toeplitz di q1), quelli della stessa riga (il secondo manca il
+colpo, d2 = 0) un sistema triangolare con la stessa matrice per ogni riga,
+invertita una volta sola. Un duello fra personaggi di livello 1 si risolve
+in pochi millisecondi; gli esiti sono in cache per coppia di profili.
+
+    esito = probabilita_duello(pg1, pg2, Vulcano())
+    esito.vittoria, esito.sconfitta, esito.turni_attesi
+"""
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+from gioco.ambiente import Ambiente
+from gioco.personaggio import Personaggio
+from gioco.simulatore import Profilo
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Salute oltre la quale il calcolo esatto viene rifiutato (tempo e memoria
+# crescono con il quadrato e il cubo della salute)
+MAX_SALUTE_ESATTA = 2000
+
+# Esiti tenuti in cache (coppie di profili)
+CACHE_DUELLI = 4096
+
+
+@dataclass(frozen=True)
+class EsitoEsatto:
+    """
+    Esito esatto di un duello senza limite di turni (come run_duel).
+
+    Attributes:
+        vittoria (float): Probabilità che vinca chi attacca per primo
+        sconfitta (float): Probabilità che vinca il secondo
+        turni_attesi (float): Turni iniziati attesi (inf se il duello
+            può non finire mai)
+    """
+    vittoria: float
+    sconfitta: float
+    turni_attesi: float
+
+    @property
+    def interrotto(self) -> float:
+        """Probabilità che il duello non finisca (nessuno può fare danni)."""
+        return max(0.0, 1.0 - self.vittoria - self.sconfitta)
+
+
+def distribuzione_danni(profilo: Profilo, limite: int) -> np.ndarray:
+    """
+    Distribuzione del danno di un attacco (execute_combat_turn + attacca).
+
+    Args:
+        profilo (Profilo): Attaccante
+        limite (int): Salute del difensore: i danni maggiori sono accorpati
+            in questo valore (hanno lo stesso effetto)
+
+    Returns:
+        np.ndarray: P(danno = d) per d = 0..limite, P(danno >= limite) in limite
+
+    Raises:
+        ValueError: Se l'intervallo dei danni è vuoto (randint fallirebbe) o
+            comprende danni negativi
+    """
+    colpo = min(max(profilo.destrezza, 0), 20) / 20
+    if profilo.regola == 'tiro':
+        colpo *= colpo
+    if profilo.regola == 'massimo':
+        basso, alto = profilo.attacco_min, profilo.attacco_max + profilo.mod_ambiente
+    else:
+        basso = profilo.attacco_min + profilo.mod_ambiente
+        alto = profilo.attacco_max + profilo.mod_ambiente
+
+    pmf = np.zeros(limite + 1)
+    pmf[0] = 1.0 - colpo
+    if colpo > 0:
+        if alto < basso:
+            raise ValueError(f"Intervallo di danni vuoto: {basso}..{alto}")
+        if basso < 0:
+            raise ValueError(f"Danni negativi non supportati: {basso}..{alto}")
+        valori = np.minimum(np.arange(basso, alto + 1), limite)
+        np.add.at(pmf, valori, colpo / (alto - basso + 1))
+    return pmf
+
+
+@lru_cache(maxsize=CACHE_DUELLI)
+def duello_esatto(primo: Profilo, secondo: Profilo) -> EsitoEsatto:
+    """
+    Probabilità di vittoria e turni attesi di un duello in cui attacca
+    prima il primo combattente (run_duel).
+
+    Args:
+        primo (Profilo): Combattente che attacca per primo
+        secondo (Profilo): Secondo combattente
+
+    Returns:
+        EsitoEsatto: Esito esatto del duello
+
+    Raises:
+        ValueError: Se la salute supera MAX_SALUTE_ESATTA o i danni non
+            sono supportati (vedi distribuzione_danni)
+    """
+    salute_a, salute_b = primo.salute, secondo.salute
+    if salute_a <= 0 or salute_b <= 0:
+        # run_duel non entra nel ciclo: vince chi è ancora in piedi
+        return EsitoEsatto(float(salute_b <= 0 < salute_a), float(salute_a <= 0 < salute_b), 0.0)
+    if max(salute_a, salute_b) > MAX_SALUTE_ESATTA:
+        raise ValueError(f"Salute oltre {MAX_SALUTE_ESATTA}: usare gioco.simulatore")
+
+    q1 = distribuzione_danni(primo, salute_b)
+    q2 = distribuzione_danni(secondo, salute_a)
+    if q1[0] == 1.0 and q2[0] == 1.0:
+        return EsitoEsatto(0.0, 0.0, float('inf'))
+
+    # code[x] = P(danno >= x)
+    coda1 = np.cumsum(q1[::-1])[::-1]
+    coda2 = np.cumsum(q2[::-1])[::-1]
+
+    # toeplitz[b, b'] = q1(b - b') per b' <= b (stati di salute del secondo 1..B)
+    indici = np.arange(1, salute_b + 1)
+    differenza = indici[:, None] - indici[None, :]
+    toeplitz = np.where(differenza >= 0, q1[np.clip(differenza, 0, salute_b)], 0.0)
+    # termini della stessa riga (il secondo manca il colpo): (I - q2(0) T) X = ...
+    inversa_t = np.linalg.inv(np.eye(salute_b) - q2[0] * toeplitz).T
+
+    # X[0] = W (vittoria), X[1] = L (sconfitta), X[2] = T (turni); riga e colonna 0
+    # sono gli stati finali, mai raggiunti dalla ricorrenza
+    stati = np.zeros((3, salute_a + 1, salute_b + 1))
+    noto = np.empty((3, salute_b))
+    for a in range(1, salute_a + 1):
+        noto[0] = coda1[1:]
+        noto[1] = (1.0 - coda1[1:]) * coda2[a]
+        noto[2] = 1.0
+        if a > 1:
+            # il secondo colpisce con d2 = 1..a-1: righe precedenti
+            righe = np.tensordot(q2[1:a], stati[:, a - 1:0:-1, 1:], axes=([0], [1]))
+            noto += righe @ toeplitz.T
+        stati[:, a, 1:] = noto @ inversa_t
+
+    esito = EsitoEsatto(float(stati[0, salute_a, salute_b]),
+                        float(stati[1, salute_a, salute_b]),
+                        float(stati[2, salute_a, salute_b]))
+    logger.info(
+        f"Duello esatto {salute_a}x{salute_b} stati: vittoria {esito.vittoria:.4f}, "
+        f"turni attesi {esito.turni_attesi:.2f}"
+    )
+    return esito
+
+
+def probabilita_duello(pg1: Personaggio, pg2: Personaggio,
+                       ambiente: Optional[Ambiente] = None) -> EsitoEsatto:
+    """
+    Esito esatto di un duello fra due personaggi, con la loro salute attuale.
+
+    Args:
+        pg1 (Personaggio): Personaggio che attacca per primo
+        pg2 (Personaggio): Secondo personaggio
+        ambiente (Optional[Ambiente]): Ambiente del duello (default: nessuno)
+
+    Returns:
+        EsitoEsatto: Esito esatto del duello
+
+    Raises:
+        ValueError: Se il duello non si può calcolare esattamente
+    """
+    return duello_esatto(Profilo.from_personaggio(pg1, ambiente),
+                         Profilo.from_personaggio(pg2, ambiente))
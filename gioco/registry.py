@@ -0,0 +1,153 @@
+"""
+Registri delle classi di gioco usati nella deserializzazione.
+
+Gli schemi Marshmallow (post_load) e i validatori devono passare dal valore
+del campo 'classe' alla classe Python da istanziare. Invece di percorrere
+__subclasses__() a ogni oggetto caricato, ogni sottoclasse si registra
+esplicitamente quando viene definita:
+
+    @personaggi.register
+    @dataclass
+    class Mago(Personaggio):
+        ...
+
+e la mappa nome -> classe viene costruita una sola volta all'import del
+modulo che la definisce. La mappa esposta è di sola lettura: l'unico modo
+per aggiungere una classe è register().
+
+build_many() costruisce una lista di oggetti in un colpo solo (usato dagli
+schemi con many=True): gli elementi vengono raggruppati per 'classe' e per
+ogni classe la ricerca e l'elenco dei parametri del costruttore vengono
+calcolati una volta sola.
+"""
+import logging
+import threading
+from dataclasses import fields, is_dataclass
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class ClassRegistry:
+    """
+    Mappa nome classe -> classe Python per una famiglia di classi
+    (personaggi, oggetti, ambienti).
+    """
+
+    def __init__(self, famiglia: str):
+        """
+        Args:
+            famiglia (str): Nome della famiglia, usato nei messaggi di errore
+        """
+        self.famiglia = famiglia
+        self._lock = threading.Lock()
+        self._classes: Mapping[str, type] = MappingProxyType({})
+        self._params: Dict[type, Optional[FrozenSet[str]]] = {}
+
+    def register(self, cls: type) -> type:
+        """
+        Registra una classe con il suo __name__. Usabile come decoratore.
+
+        Args:
+            cls (type): Classe da registrare
+
+        Returns:
+            type: La classe stessa
+
+        Raises:
+            ValueError: Se un'altra classe è già registrata con lo stesso nome
+        """
+        with self._lock:
+            current = self._classes.get(cls.__name__)
+            if current is not None and current is not cls:
+                raise ValueError(
+                    f"Classe {self.famiglia} '{cls.__name__}' già registrata da {current.__module__}"
+                )
+            # copia e sostituzione: i lettori vedono sempre una mappa completa
+            classes: Dict[str, type] = dict(self._classes)
+            classes[cls.__name__] = cls
+            self._classes = MappingProxyType(classes)
+        return cls
+
+    def get(self, nome: str, default: Optional[type] = None) -> Optional[type]:
+        """
+        Args:
+            nome (str): Nome della classe (campo 'classe' del documento)
+            default (Optional[type]): Classe restituita se il nome non è registrato
+
+        Returns:
+            Optional[type]: Classe registrata o default
+        """
+        return self._classes.get(nome, default)
+
+    def classes(self) -> Mapping[str, type]:
+        """
+        Returns:
+            Mapping[str, type]: Vista di sola lettura {nome_classe: classe}
+        """
+        return self._classes
+
+    def __contains__(self, nome: str) -> bool:
+        return nome in self._classes
+
+    def _init_params(self, cls: type) -> Optional[FrozenSet[str]]:
+        """
+        Parametri del costruttore di una dataclass, calcolati alla prima
+        richiesta. I default restano al costruttore.
+
+        Args:
+            cls (type): Classe da costruire
+
+        Returns:
+            Optional[FrozenSet[str]]: Nomi dei parametri, None se cls non è
+            una dataclass (le chiavi vengono passate tutte al costruttore)
+        """
+        if cls not in self._params:
+            self._params[cls] = (frozenset(f.name for f in fields(cls) if f.init)
+                                 if is_dataclass(cls) else None)
+        return self._params[cls]
+
+    def build_many(self, items: List[Dict]) -> List[Any]:
+        """
+        Costruisce gli oggetti di una lista di documenti già validati,
+        raggruppandoli per 'classe' e restituendoli nell'ordine di input.
+        La chiave 'classe' viene scartata se non è un parametro del
+        costruttore (es. per Oggetto); default e chiavi sconosciute restano
+        al costruttore.
+
+        Args:
+            items (List[Dict]): Documenti con il campo 'classe'
+
+        Returns:
+            List[Any]: Oggetti costruiti, nello stesso ordine di items
+
+        Raises:
+            KeyError: Se una classe non è registrata
+            TypeError: Se un documento ha chiavi che non sono parametri del costruttore
+        """
+        groups: Dict[Any, List[int]] = {}
+        for index, item in enumerate(items):
+            groups.setdefault(item.get('classe'), []).append(index)
+
+        result: List[Any] = [None] * len(items)
+        for nome, indices in groups.items():
+            cls = self.get(nome)
+            if cls is None:
+                raise KeyError(f"Classe {self.famiglia} '{nome}' non registrata")
+
+            names = self._init_params(cls)
+            scarta_classe = names is not None and 'classe' not in names
+            for index in indices:
+                kwargs = items[index]
+                if scarta_classe and 'classe' in kwargs:
+                    kwargs = {k: v for k, v in kwargs.items() if k != 'classe'}
+                result[index] = cls(**kwargs)
+        return result
+
+
+# Registri delle famiglie di classi di gioco
+personaggi = ClassRegistry('Personaggio')
+oggetti = ClassRegistry('Oggetto')
+ambienti = ClassRegistry('Ambiente')
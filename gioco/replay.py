@@ -0,0 +1,151 @@
+"""
+Registrazione e replay dei duelli.
+
+Un duello è determinato dal seed del generatore (gioco.rng) e dagli input
+del giocatore: i due personaggi scelti, come erano a inizio duello, e
+l'ambiente. BattleRecord conserva solo questi dati, nessuno stato per
+turno; replay_duel() riesegue il duello con le stesse regole e lo stesso
+seed e ottiene gli stessi tiri, gli stessi danni e lo stesso log.
+
+    risultato, registro = play_duel(pg1_doc, pg2_doc)
+    session['ultimo_combattimento'] = registro.to_dict()
+    ...
+    rigiocato = replay_duel(BattleRecord.from_dict(session['ultimo_combattimento']))
+"""
+import copy
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from gioco.ambiente import AmbienteFactory
+from gioco.personaggio import Personaggio
+from gioco.rng import new_seed, seeded
+from gioco.serializers import from_dict
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Versione del formato di BattleRecord
+RECORD_VERSION = 1
+
+
+@dataclass(frozen=True)
+class BattleRecord:
+    """
+    Dati minimi per rigiocare un duello.
+
+    Attributes:
+        seed (int): Seed del generatore del duello
+        partecipanti (Tuple[Dict, Dict]): Documenti dei due personaggi a
+            inizio duello, nell'ordine di attacco
+        ambiente (Optional[str]): Nome dell'ambiente registrato o None
+    """
+    seed: int
+    partecipanti: Tuple[Dict, Dict]
+    ambiente: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        """
+        Returns:
+            Dict: Rappresentazione serializzabile (session, JSON)
+        """
+        return {
+            'versione': RECORD_VERSION,
+            'seed': self.seed,
+            'partecipanti': [copy.deepcopy(doc) for doc in self.partecipanti],
+            'ambiente': self.ambiente,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'BattleRecord':
+        """
+        Args:
+            data (Dict): Dizionario prodotto da to_dict()
+
+        Returns:
+            BattleRecord: Registro del duello
+
+        Raises:
+            ValueError: Se la versione del formato non è supportata
+        """
+        if data.get('versione') != RECORD_VERSION:
+            raise ValueError(f"Versione del registro di battaglia non supportata: {data.get('versione')}")
+        pg1, pg2 = data['partecipanti']
+        return cls(int(data['seed']), (copy.deepcopy(pg1), copy.deepcopy(pg2)), data.get('ambiente'))
+
+
+@dataclass
+class BattleResult:
+    """
+    Esito di un duello giocato o rigiocato.
+
+    Attributes:
+        pg1, pg2 (Personaggio): Combattenti a fine duello
+        log (List[str]): Log dei turni
+        turni (int): Turni iniziati
+    """
+    pg1: Personaggio
+    pg2: Personaggio
+    log: List[str]
+    turni: int
+
+
+def _esegui(record: BattleRecord) -> BattleResult:
+    """
+    Esegue il duello descritto dal registro.
+
+    Args:
+        record (BattleRecord): Seed e input del duello
+
+    Returns:
+        BattleResult: Esito del duello
+
+    Raises:
+        KeyError: Se l'ambiente non è registrato
+    """
+    # import locale: characters.utils dipende da Flask e dallo storage
+    from characters.utils import CharacterCombat
+
+    pg1 = from_dict(Personaggio, copy.deepcopy(record.partecipanti[0]))
+    pg2 = from_dict(Personaggio, copy.deepcopy(record.partecipanti[1]))
+    ambiente = AmbienteFactory.istanza(record.ambiente) if record.ambiente else None
+    with seeded(record.seed):
+        log, turni = CharacterCombat.run_duel(pg1, pg2, ambiente)
+    return BattleResult(pg1, pg2, log, turni)
+
+
+def play_duel(pg1_doc: Dict, pg2_doc: Dict, ambiente: Optional[str] = None,
+              seed: Optional[int] = None) -> Tuple[BattleResult, BattleRecord]:
+    """
+    Gioca un nuovo duello con un seed dedicato e ne restituisce il registro.
+
+    Args:
+        pg1_doc (Dict): Documento del personaggio che attacca per primo
+        pg2_doc (Dict): Documento del secondo personaggio
+        ambiente (Optional[str]): Nome dell'ambiente registrato (default: nessuno)
+        seed (Optional[int]): Seed (default: nuovo seed casuale)
+
+    Returns:
+        Tuple[BattleResult, BattleRecord]: (esito, registro per il replay)
+    """
+    record = BattleRecord(
+        seed if seed is not None else new_seed(),
+        (copy.deepcopy(pg1_doc), copy.deepcopy(pg2_doc)),
+        ambiente,
+    )
+    result = _esegui(record)
+    logger.info(f"Duello {pg1_doc.get('id')} contro {pg2_doc.get('id')} registrato con seed {record.seed}")
+    return result, record
+
+
+def replay_duel(record: BattleRecord) -> BattleResult:
+    """
+    Rigioca un duello registrato: stesso esito e stesso log dell'originale.
+
+    Args:
+        record (BattleRecord): Registro prodotto da play_duel
+
+    Returns:
+        BattleResult: Esito del duello rigiocato
+    """
+    return _esegui(record)
@@ -0,0 +1,65 @@
+"""
+Generatore casuale di contesto per le regole di gioco.
+
+Le classi di gioco (tiri d20, danni, recuperi, strategie, premi delle
+missioni, ambienti) non chiamano direttamente il modulo random ma
+current_rng(), che restituisce il generatore del contesto corrente
+(contextvars: locale al thread e al task asyncio):
+
+    with seeded(seed):
+        CharacterCombat.run_duel(pg1, pg2)
+
+Dentro seeded() ogni estrazione viene da un random.Random(seed) dedicato,
+quindi una battaglia è determinata dal seed e dagli input del giocatore e
+può essere rigiocata identica (vedi gioco.replay). Fuori da seeded()
+current_rng() restituisce un generatore di processo di questo modulo,
+inizializzato dal sistema operativo: per tiri ripetibili si usa seeded(),
+non random.seed().
+"""
+import random
+import secrets
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+# Generatore usato fuori da seeded(), condiviso da tutto il processo
+_globale = random.Random()
+
+_corrente: ContextVar[random.Random] = ContextVar('rng', default=_globale)
+
+
+def current_rng() -> random.Random:
+    """
+    Returns:
+        random.Random: Generatore del contesto corrente
+    """
+    return _corrente.get()
+
+
+def new_seed() -> int:
+    """
+    Returns:
+        int: Seed a 64 bit per una nuova battaglia
+    """
+    return secrets.randbits(64)
+
+
+@contextmanager
+def seeded(seed: int) -> Iterator[random.Random]:
+    """
+    Esegue il blocco con un generatore dedicato inizializzato da seed.
+    I blocchi possono essere annidati: all'uscita torna il generatore
+    precedente.
+
+    Args:
+        seed (int): Seed della battaglia
+
+    Yields:
+        random.Random: Il generatore del blocco
+    """
+    generatore = random.Random(seed)
+    token = _corrente.set(generatore)
+    try:
+        yield generatore
+    finally:
+        _corrente.reset(token)
@@ -0,0 +1,186 @@
+"""
+Coda di iniziativa per le battaglie a più partecipanti (PG e NPC).
+
+All'inizio ogni combattente riceve una posizione di iniziativa casuale (dal
+generatore di gioco.rng). La coda è un heap di voci (round, iniziativa,
+indice): il prossimo ad agire è la voce più piccola, e dopo aver agito il
+combattente viene reinserito nel round successivo.
+
+I combattenti sconfitti non vengono cercati e tolti dall'heap: restano come
+voci scadute e vengono scartati quando arrivano in cima (cancellazione
+pigra). Per ogni lato (PG, NPC) c'è l'insieme dei combattenti ancora in
+piedi, quindi:
+
+- prossimo():  O(log n) ammortizzato
+- bersagli():  O(1), vista sull'insieme del lato avversario
+- finita():    O(1), un lato senza combattenti in piedi
+
+Il lato di un combattente è il suo campo npc.
+"""
+import heapq
+import logging
+from typing import Dict, KeysView, List, Optional, Sequence
+
+from gioco.personaggio import Personaggio
+from gioco.rng import current_rng
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Esiti della battaglia, dal punto di vista dei personaggi giocabili
+VITTORIA = 'vittoria'
+SCONFITTA = 'sconfitta'
+
+
+class TurnScheduler:
+    """
+    Ordine dei turni di una battaglia fra personaggi giocabili e NPC.
+    """
+
+    def __init__(self, combattenti: Sequence[Personaggio],
+                 iniziativa: Optional[List[int]] = None):
+        """
+        Args:
+            combattenti (Sequence[Personaggio]): Partecipanti, identificati
+                dalla loro posizione nella sequenza
+            iniziativa (Optional[List[int]]): Posizione di iniziativa per
+                combattente (default: ordine casuale)
+        """
+        self.combattenti = list(combattenti)
+        if iniziativa is None:
+            ordine = list(range(len(self.combattenti)))
+            current_rng().shuffle(ordine)
+            iniziativa = [0] * len(ordine)
+            for posizione, indice in enumerate(ordine):
+                iniziativa[indice] = posizione
+        self.iniziativa = list(iniziativa)
+        self.round = 1
+
+        self._coda = [(1, self.iniziativa[i], i) for i in range(len(self.combattenti))]
+        heapq.heapify(self._coda)
+        # combattenti in piedi per lato (npc): dict come insieme ordinato
+        self._in_piedi: Dict[bool, Dict[int, None]] = {False: {}, True: {}}
+        for indice in sorted(range(len(self.combattenti)), key=self.iniziativa.__getitem__):
+            if self.combattenti[indice].salute > 0:
+                self._in_piedi[self._lato(indice)][indice] = None
+
+    def _lato(self, indice: int) -> bool:
+        return bool(self.combattenti[indice].npc)
+
+    def in_piedi(self, indice: int) -> bool:
+        """
+        Args:
+            indice (int): Combattente
+
+        Returns:
+            bool: True se il combattente non è stato sconfitto
+        """
+        return indice in self._in_piedi[self._lato(indice)]
+
+    def prossimo(self) -> Optional[int]:
+        """
+        Estrae il prossimo combattente in piedi e lo rimette in coda per il
+        round successivo. Le voci dei combattenti sconfitti vengono scartate.
+
+        Returns:
+            Optional[int]: Indice del combattente di turno, None se la
+            battaglia è finita
+        """
+        if self.finita():
+            return None
+        while self._coda:
+            round_, iniziativa, indice = heapq.heappop(self._coda)
+            if not self.in_piedi(indice):
+                continue
+            self.round = round_
+            heapq.heappush(self._coda, (round_ + 1, iniziativa, indice))
+            return indice
+        return None
+
+    def bersagli(self, indice: int) -> KeysView:
+        """
+        Args:
+            indice (int): Combattente che agisce
+
+        Returns:
+            KeysView: Indici dei combattenti in piedi del lato avversario,
+            in ordine di iniziativa
+        """
+        return self._in_piedi[not self._lato(indice)].keys()
+
+    def aggiorna(self, indice: int) -> bool:
+        """
+        Da chiamare dopo aver modificato la salute di un combattente: se è
+        sceso a zero viene tolto dai combattenti in piedi (la sua voce nella
+        coda scade).
+
+        Args:
+            indice (int): Combattente colpito
+
+        Returns:
+            bool: True se il combattente è stato appena sconfitto
+        """
+        if self.combattenti[indice].salute > 0 or not self.in_piedi(indice):
+            return False
+        del self._in_piedi[self._lato(indice)][indice]
+        logger.info(f"{self.combattenti[indice].nome} è stato sconfitto")
+        return True
+
+    def vivi(self, npc: bool) -> int:
+        """
+        Args:
+            npc (bool): Lato (False: personaggi giocabili, True: NPC)
+
+        Returns:
+            int: Combattenti in piedi del lato
+        """
+        return len(self._in_piedi[npc])
+
+    def finita(self) -> bool:
+        """
+        Returns:
+            bool: True se uno dei due lati non ha più combattenti in piedi
+        """
+        return not self._in_piedi[False] or not self._in_piedi[True]
+
+    def esito(self) -> Optional[str]:
+        """
+        Returns:
+            Optional[str]: VITTORIA se tutti gli NPC sono sconfitti, SCONFITTA
+            se lo sono tutti i personaggi giocabili, None se la battaglia
+            è in corso
+        """
+        if not self._in_piedi[False]:
+            return SCONFITTA
+        if not self._in_piedi[True]:
+            return VITTORIA
+        return None
+
+    def to_dict(self) -> Dict:
+        """
+        Stato della coda senza i combattenti (serializzati a parte).
+
+        Returns:
+            Dict: {'iniziativa', 'round', 'coda'}
+        """
+        return {
+            'iniziativa': list(self.iniziativa),
+            'round': self.round,
+            'coda': [list(voce) for voce in self._coda],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, combattenti: Sequence[Personaggio]) -> 'TurnScheduler':
+        """
+        Args:
+            data (Dict): Dizionario prodotto da to_dict()
+            combattenti (Sequence[Personaggio]): Combattenti, nello stesso ordine
+
+        Returns:
+            TurnScheduler: Coda ripristinata
+        """
+        scheduler = cls(combattenti, data['iniziativa'])
+        scheduler.round = data['round']
+        scheduler._coda = [tuple(voce) for voce in data['coda']]
+        heapq.heapify(scheduler._coda)
+        return scheduler
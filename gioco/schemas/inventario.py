@@ -14,7 +14,8 @@ class InventarioSchema(Schema):
 
     id = fields.UUID(required=True)
     id_proprietario = fields.UUID(allow_none=True)
-    oggetti = fields.List(fields.Nested(OggettoSchema), load_default=list)
+    # Nested con many=True: gli oggetti vengono costruiti in blocco (OggettoSchema.make_oggetto)
+    oggetti = fields.Nested(OggettoSchema, many=True, load_default=list)
 
     @post_load
     def make_inventario(self, data, **kwargs):
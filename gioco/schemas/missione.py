@@ -14,8 +14,9 @@ class MissioniSchema(Schema):
     id = fields.UUID(load_default=lambda: uuid.uuid4())
     nome = fields.String(required=True)
     ambiente = fields.Nested(AmbienteSchema, required=True)
-    nemici = fields.List(fields.Nested(PersonaggioSchema), required=True)
-    premi = fields.List(fields.Nested(OggettoSchema), required=True)
+    # Nested con many=True: nemici e premi vengono costruiti in blocco per classe
+    nemici = fields.Nested(PersonaggioSchema, many=True, required=True)
+    premi = fields.Nested(OggettoSchema, many=True, required=True)
     strategia_nemici = fields.Nested(StrategiaSchema, allow_none=True)
     completata = fields.Bool()
     attiva = fields.Bool()
@@ -35,15 +36,14 @@ class GestoreMissioniSchema(Schema):
         return gm
 
     def prendi_Missione_Da_Json(self):
-        lista = []
+        documenti = []
         schema = MissioniSchema()
         routes = r"static\json\missions"
         for files in os.listdir(routes):
             if files.endswith(".json"):
                 with open(os.path.join(routes, files), 'r') as file:
-                    data = json.load(file)
-                    missione = schema.load(data)
-                    lista.append(missione)
+                    documenti.append(json.load(file))
         nuovo = GestoreMissioni()
-        nuovo.lista_missioni = lista
+        # tutte le missioni in un solo load(many=True)
+        nuovo.lista_missioni = schema.load(documenti, many=True)
         return nuovo
\ No newline at end of file
@@ -1,16 +1,10 @@
 from marshmallow import Schema, fields, post_load
 import uuid
 
-from gioco.personaggio import Personaggio
-
-
-def get_all_subclasses(cls):
-    subclasses = set()
-    for subclass in cls.__subclasses__():
-        subclasses.add(subclass)
-        # subclasses.update(get_all_subclasses(subclass))
-        # nel caso di sottoclassi indirette
-    return subclasses
+# importa gioco.classi per registrare Mago, Guerriero e Ladro
+from gioco.classi import Mago, Guerriero, Ladro  # noqa: F401
+from gioco.registry import personaggi
+from gioco.storico import StoricoDanni, StoricoDanniField
 
 
 class PersonaggioSchema(Schema):
@@ -28,19 +22,14 @@ class PersonaggioSchema(Schema):
     attacco_max = fields.Integer()
     livello = fields.Integer(load_default=1)
     destrezza = fields.Integer(load_default=15)
-    storico_danni_subiti = fields.List(fields.Integer(), load_default=list)
-
-    @post_load
-    def make_personaggio(self, data, **_kwargs):
-        print(f"\nimport: \n{data}\n")
-        # Crea la mappa dinamica: nome classe -> classe Python
-        classe_nome = data.get("classe")
-        classe_map = {
-            subcls.__name__: subcls
-            for subcls in get_all_subclasses(Personaggio)
-        }
-
-        personaggio_cls = classe_map[classe_nome]
+    storico_danni_subiti = StoricoDanniField(load_default=StoricoDanni)
+
+    @post_load(pass_collection=True)
+    def make_personaggio(self, data, many, **_kwargs):
+        # con many=True la lista viene costruita in blocco, raggruppata per classe
+        if many:
+            return personaggi.build_many(data)
+        personaggio_cls = personaggi.classes()[data.get("classe")]
         return personaggio_cls(**data)
 
 
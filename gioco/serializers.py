@@ -0,0 +1,372 @@
+"""
+Serializzatori generati per le dataclass di gioco.
+
+All'import del modulo, per ogni dataclass di gioco (Personaggio e
+sottoclassi, Oggetto e sottoclassi, Ambiente e sottoclassi, Inventario,
+Missione, Strategia) viene generato il sorgente di una funzione to_dict e di
+una from_dict specializzate. Queste funzioni leggono gli attributi per nome,
+senza passare per i Field di Marshmallow. La descrizione dei campi (ordine,
+tipo, data_key, load_default, hook post_load) viene letta dallo schema
+Marshmallow della famiglia, quindi:
+
+- to_dict(obj) produce lo stesso dizionario di Schema().dump(obj), chiavi
+  nello stesso ordine;
+- from_dict(cls, data) produce lo stesso oggetto di Schema().load(data)
+  quando data è valido.
+
+from_dict NON valida: va usato solo su documenti già validati (letti dallo
+storage tramite storage.codec o prodotti da to_dict). Per l'input
+dell'utente restano gli schemi Marshmallow.
+
+L'equivalenza con Marshmallow è verificata su dati casuali da
+gioco/test_serializers.py; la velocità si misura con
+    python -m storage.bench serializers
+"""
+import uuid
+import logging
+from dataclasses import fields as dataclass_fields, is_dataclass
+from typing import Any, Callable, Dict, List, Tuple
+
+from marshmallow import Schema, fields, missing
+
+from gioco.ambiente import Ambiente, AmbienteSchema
+from gioco.inventario import Inventario
+from gioco.missione import Missione
+from gioco.oggetto import Oggetto
+from gioco.personaggio import Personaggio
+from gioco.registry import ambienti, oggetti, personaggi
+from gioco.schemas.inventario import InventarioSchema
+from gioco.schemas.missione import MissioniSchema
+from gioco.schemas.oggetto import OggettoSchema
+from gioco.schemas.personaggio import PersonaggioSchema
+from gioco.schemas.strategy import StrategiaSchema
+from gioco.storico import StoricoDanni, StoricoDanniField
+from gioco.strategy import Strategia
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Famiglie di dataclass: (classe base, schema, classi concrete).
+# AmbienteSchema.dump aggiunge 'classe' in coda: lo dichiara l'ultimo elemento.
+_FAMIGLIE: Tuple[Tuple[type, type, Callable[[], List[type]], bool], ...] = (
+    (Personaggio, PersonaggioSchema, lambda: list(personaggi.classes().values()), False),
+    (Oggetto, OggettoSchema, lambda: list(oggetti.classes().values()), False),
+    (Ambiente, AmbienteSchema, lambda: list(ambienti.classes().values()), True),
+    (Strategia, StrategiaSchema, lambda: Strategia.__subclasses__(), False),
+    (Inventario, InventarioSchema, lambda: [], False),
+    (Missione, MissioniSchema, lambda: [], False),
+)
+
+# Funzioni generate: classe -> to_dict, classe -> from_dict
+_DUMPERS: Dict[type, Callable[[Any], Dict]] = {}
+_LOADERS: Dict[type, Callable[[Dict], Any]] = {}
+
+# Sorgente generato, per ispezione (source())
+_SOURCES: Dict[str, str] = {}
+
+# Istanze degli schemi, usate solo per gli hook post_load
+_SCHEMA_INSTANCES: Dict[type, Schema] = {}
+
+# Globali del codice generato: gli helper (aggiunti in fondo al modulo),
+# le funzioni già generate, i load_default e gli hook degli schemi.
+# Separati dai globali del modulo, così un nome generato non può
+# sovrascrivere una funzione di gioco.serializers.
+_NAMESPACE: Dict[str, Any] = {}
+
+
+def _to_bool(value: Any) -> bool:
+    """Conversione di fields.Boolean (serializzazione e deserializzazione)."""
+    try:
+        if value in fields.Boolean.truthy:
+            return True
+        if value in fields.Boolean.falsy:
+            return False
+    except TypeError:
+        pass
+    return bool(value)
+
+
+def _to_uuid(value: Any) -> uuid.UUID:
+    """Conversione di fields.UUID in deserializzazione."""
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+
+def _dump_expr(field: fields.Field, var: str) -> str:
+    """
+    Espressione Python che serializza var come field._serialize.
+
+    Args:
+        field (fields.Field): Campo Marshmallow
+        var (str): Nome della variabile con il valore
+
+    Returns:
+        str: Espressione (None se var è None)
+
+    Raises:
+        TypeError: Se il tipo di campo non è supportato dal generatore
+    """
+    if isinstance(field, fields.UUID):
+        expr = f"str({var})"
+    elif isinstance(field, fields.String):
+        expr = f"str({var})"
+    elif isinstance(field, fields.Integer):
+        expr = f"int({var})"
+    elif isinstance(field, fields.Float):
+        expr = f"float({var})"
+    elif isinstance(field, fields.Boolean):
+        expr = f"_to_bool({var})"
+    elif isinstance(field, fields.List):
+        expr = f"[{_dump_expr(field.inner, var + '_')} for {var}_ in {var}]"
+    elif isinstance(field, fields.Nested):
+        expr = f"[to_dict(x) for x in {var}]" if field.many else f"to_dict({var})"
+    elif isinstance(field, StoricoDanniField):
+        expr = f"{var}.to_dict()"
+    else:
+        raise TypeError(f"Campo {type(field).__name__} non supportato dal generatore")
+    return f"(None if {var} is None else {expr})"
+
+
+def _load_expr(field: fields.Field, var: str, namespace: Dict[str, Any]) -> str:
+    """
+    Espressione Python che deserializza var come field._deserialize
+    (senza validazione).
+
+    Args:
+        field (fields.Field): Campo Marshmallow
+        var (str): Nome della variabile con il valore
+        namespace (Dict[str, Any]): Namespace del codice generato
+
+    Returns:
+        str: Espressione (None se var è None)
+
+    Raises:
+        TypeError: Se il tipo di campo non è supportato dal generatore
+    """
+    if isinstance(field, fields.UUID):
+        expr = f"_to_uuid({var})"
+    elif isinstance(field, fields.String):
+        expr = var
+    elif isinstance(field, fields.Integer):
+        expr = f"int({var})"
+    elif isinstance(field, fields.Float):
+        expr = f"float({var})"
+    elif isinstance(field, fields.Boolean):
+        expr = f"_to_bool({var})"
+    elif isinstance(field, fields.List):
+        expr = f"[{_load_expr(field.inner, var + '_', namespace)} for {var}_ in {var}]"
+    elif isinstance(field, fields.Nested):
+        nested = field.schema.__class__
+        fields_fn = f"_fields_{nested.__name__}"
+        hook_fn = f"_post_load_{nested.__name__}"
+        if field.many:
+            expr = f"{hook_fn}([{fields_fn}(x) for x in {var}], True)"
+        else:
+            expr = f"{hook_fn}({fields_fn}({var}), False)"
+    elif isinstance(field, StoricoDanniField):
+        expr = f"StoricoDanni.from_data({var})"
+    else:
+        raise TypeError(f"Campo {type(field).__name__} non supportato dal generatore")
+    return f"(None if {var} is None else {expr})"
+
+
+def _has_attribute(cls: type, name: str) -> bool:
+    """
+    Returns:
+        bool: True se le istanze di cls hanno l'attributo (Marshmallow salta
+        nel dump gli attributi mancanti, es. 'classe' su Ambiente)
+    """
+    if is_dataclass(cls) and name in {f.name for f in dataclass_fields(cls)}:
+        return True
+    return hasattr(cls, name)
+
+
+def _compile(name: str, source: str, namespace: Dict[str, Any]) -> Callable:
+    """
+    Compila una funzione generata e ne conserva il sorgente.
+
+    Returns:
+        Callable: La funzione definita nel sorgente
+    """
+    _SOURCES[name] = source
+    exec(compile(source, f"<gioco.serializers:{name}>", "exec"), namespace)
+    return namespace[name]
+
+
+def _generate_dumper(cls: type, schema_cls: type, append_classe: bool) -> Callable[[Any], Dict]:
+    """
+    Genera to_dict per una classe: una lettura di attributo e una
+    conversione per campo, nell'ordine dei campi dello schema.
+
+    Args:
+        cls (type): Classe da serializzare
+        schema_cls (type): Schema Marshmallow di riferimento
+        append_classe (bool): Aggiunge 'classe' in coda (AmbienteSchema.dump)
+
+    Returns:
+        Callable[[Any], Dict]: Funzione obj -> dict
+    """
+    name = f"_dump_{cls.__module__.replace('.', '_')}_{cls.__name__}"
+    lines = [f"def {name}(obj):"]
+    items = []
+    for index, (field_name, field) in enumerate(schema_cls._declared_fields.items()):
+        if field.load_only:
+            continue
+        attribute = field.attribute or field_name
+        if not _has_attribute(cls, attribute):
+            continue
+        var = f"v{index}"
+        lines.append(f"    {var} = obj.{attribute}")
+        items.append(f"{(field.data_key or field_name)!r}: {_dump_expr(field, var)}")
+    if append_classe:
+        items.append(f"'classe': {cls.__name__!r}")
+    lines.append("    return {" + ", ".join(items) + "}")
+    return _compile(name, "\n".join(lines) + "\n", _NAMESPACE)
+
+
+def _generate_loader(schema_cls: type) -> Callable[[Dict], Any]:
+    """
+    Genera per uno schema le funzioni:
+    - _fields_<Schema>(data): campi convertiti e load_default applicati;
+    - _post_load_<Schema>(data, many): hook post_load dello schema;
+    - _load_<Schema>(data): oggetto costruito.
+
+    Args:
+        schema_cls (type): Schema Marshmallow di riferimento
+
+    Returns:
+        Callable[[Dict], Any]: Funzione dict -> oggetto
+    """
+    namespace = _NAMESPACE
+    schema_name = schema_cls.__name__
+    instance = _SCHEMA_INSTANCES.setdefault(schema_cls, schema_cls())
+
+    lines = [f"def _fields_{schema_name}(data):", "    kw = {}"]
+    for index, (field_name, field) in enumerate(schema_cls._declared_fields.items()):
+        if field.dump_only:
+            continue
+        key = field.data_key or field_name
+        attribute = field.attribute or field_name
+        var = f"v{index}"
+        lines.append(f"    if {key!r} in data:")
+        lines.append(f"        {var} = data[{key!r}]")
+        lines.append(f"        kw[{attribute!r}] = {_load_expr(field, var, namespace)}")
+        if field.load_default is not missing:
+            default_name = f"_default_{schema_name}_{field_name}"
+            namespace[default_name] = field.load_default
+            call = "()" if callable(field.load_default) else ""
+            lines.append("    else:")
+            lines.append(f"        kw[{attribute!r}] = {default_name}{call}")
+    lines.append("    return kw")
+    _compile(f"_fields_{schema_name}", "\n".join(lines) + "\n", namespace)
+
+    # hook post_load: gli hook pass_collection ricevono la lista intera,
+    # gli altri un elemento alla volta, come in Schema._invoke_processors
+    hooks = instance._hooks.get("post_load", [])
+    lines = [f"def _post_load_{schema_name}(data, many):"]
+    for index, (attr_name, pass_collection, _kwargs) in enumerate(hooks):
+        hook_name = f"_hook_{schema_name}_{index}"
+        namespace[hook_name] = getattr(instance, attr_name)
+        if pass_collection:
+            lines.append(f"    data = {hook_name}(data, many=many)")
+        else:
+            lines.append(f"    data = [{hook_name}(d, many=False) for d in data] if many "
+                         f"else {hook_name}(data, many=False)")
+    lines.append("    return data")
+    _compile(f"_post_load_{schema_name}", "\n".join(lines) + "\n", namespace)
+
+    source = (
+        f"def _load_{schema_name}(data):\n"
+        f"    return _post_load_{schema_name}(_fields_{schema_name}(data), False)\n"
+    )
+    return _compile(f"_load_{schema_name}", source, namespace)
+
+
+def _generate() -> None:
+    """
+    Genera i serializzatori di tutte le famiglie. I loader degli schemi
+    annidati (Oggetto, Personaggio, Ambiente, Strategia) vengono generati
+    prima di quelli che li contengono (Inventario, Missione).
+    """
+    for base, schema_cls, concrete, append_classe in _FAMIGLIE:
+        loader = _generate_loader(schema_cls)
+        for cls in [base, *concrete()]:
+            _DUMPERS[cls] = _generate_dumper(cls, schema_cls, append_classe)
+            _LOADERS[cls] = loader
+
+
+def _family_of(cls: type) -> Tuple[type, bool]:
+    """
+    Returns:
+        Tuple[type, bool]: Schema e flag 'classe in coda' della famiglia di cls
+
+    Raises:
+        TypeError: Se cls non appartiene a nessuna famiglia
+    """
+    for base, schema_cls, _concrete, append_classe in _FAMIGLIE:
+        if issubclass(cls, base):
+            return schema_cls, append_classe
+    raise TypeError(f"Nessun serializzatore per {cls.__name__}")
+
+
+def to_dict(obj: Any) -> Dict:
+    """
+    Serializza una dataclass di gioco come lo schema Marshmallow della sua
+    famiglia. Le classi registrate dopo l'import vengono generate al primo uso.
+
+    Args:
+        obj (Any): Personaggio, Oggetto, Ambiente, Strategia, Inventario o Missione
+
+    Returns:
+        Dict: Stesso risultato di Schema().dump(obj)
+    """
+    dumper = _DUMPERS.get(obj.__class__)
+    if dumper is None:
+        cls = obj.__class__
+        schema_cls, append_classe = _family_of(cls)
+        dumper = _DUMPERS[cls] = _generate_dumper(cls, schema_cls, append_classe)
+        _LOADERS[cls] = _LOADERS[_FAMIGLIE_BASE[schema_cls]]
+    return dumper(obj)
+
+
+def from_dict(cls: type, data: Dict) -> Any:
+    """
+    Ricostruisce una dataclass di gioco da un documento già validato.
+    La classe concreta viene scelta dal campo 'classe' come negli schemi.
+
+    Args:
+        cls (type): Classe della famiglia (es. Personaggio, Inventario)
+        data (Dict): Documento valido per lo schema della famiglia
+
+    Returns:
+        Any: Stesso risultato di Schema().load(data)
+    """
+    loader = _LOADERS.get(cls)
+    if loader is None:
+        schema_cls, _append_classe = _family_of(cls)
+        loader = _LOADERS[cls] = _LOADERS[_FAMIGLIE_BASE[schema_cls]]
+    return loader(data)
+
+
+def source(cls: type) -> str:
+    """
+    Args:
+        cls (type): Classe generata
+
+    Returns:
+        str: Sorgente generato di to_dict per la classe
+    """
+    return _SOURCES[f"_dump_{cls.__module__.replace('.', '_')}_{cls.__name__}"]
+
+
+# schema -> classe base della famiglia
+_FAMIGLIE_BASE: Dict[type, type] = {schema_cls: base for base, schema_cls, _c, _a in _FAMIGLIE}
+
+# helper usati dalle espressioni di _dump_expr e _load_expr
+_NAMESPACE.update({
+    "to_dict": to_dict,
+    "_to_bool": _to_bool,
+    "_to_uuid": _to_uuid,
+    "StoricoDanni": StoricoDanni,
+})
+
+_generate()
@@ -0,0 +1,292 @@
+"""
+Simulatore vettoriale di duelli (Monte Carlo).
+
+CharacterCombat.run_duel risolve un duello alla volta, un attacco per
+chiamata di metodo e un messaggio di log per azione. Per rispondere a
+domande come "qual è la percentuale di vittorie del Mago contro il Ladro nel
+Vulcano" servono centinaia di migliaia di duelli: qui i duelli di uno
+scontro procedono in parallelo su array NumPy, un turno alla volta per
+tutti i duelli ancora in corso.
+
+Le regole riprodotte sono quelle del motore a oggetti:
+- execute_combat_turn: tiro d20 <= destrezza (esegui_azione), poi attacca
+  con il modificatore ambiente.modifica_attacco(attaccante);
+- attacca di ogni classe (vedi _ATTACCO): Personaggio e Ladro ripetono il
+  tiro d20 e in caso di successo fanno randint(min, max) + mod, il Mago fa
+  randint(min, max) + mod, il Guerriero randint(min, max + mod);
+- subisci_danno: salute = max(0, salute - danno);
+- run_duel: attacca prima il primo combattente, poi il secondo se è ancora
+  in piedi; i turni contati sono quelli iniziati.
+
+Il modificatore d'ambiente non è ricopiato: viene chiesto una volta per
+scontro al metodo modifica_attacco dell'ambiente, con il personaggio vero.
+
+La corrispondenza con il motore a oggetti si verifica con un test
+statistico (z sulle percentuali di vittoria e sui turni medi):
+    python -m storage.bench duels
+"""
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from gioco.ambiente import Ambiente, AmbienteFactory
+from gioco.personaggio import Personaggio
+from gioco.registry import ambienti, personaggi
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Turni oltre i quali un duello viene interrotto (il motore a oggetti non ha
+# limite: con le classi attuali un duello dura in media meno di 10 turni)
+MAX_TURNI = 1000
+
+# Nome usato nella matrice per il duello senza ambiente (begin_combat)
+NESSUN_AMBIENTE = 'Nessuno'
+
+# Regola di attacca per la classe che definisce il metodo:
+# 'tiro'    -> secondo tiro d20, poi randint(min, max) + mod
+# 'diretto' -> randint(min, max) + mod
+# 'massimo' -> randint(min, max + mod)
+_ATTACCO: Dict[str, str] = {
+    'Personaggio': 'tiro',
+    'Ladro': 'tiro',
+    'Mago': 'diretto',
+    'Guerriero': 'massimo',
+}
+
+
+@dataclass(frozen=True)
+class Profilo:
+    """
+    Parametri di un combattente in uno scontro.
+    """
+    salute: int
+    destrezza: int
+    attacco_min: int
+    attacco_max: int
+    regola: str
+    mod_ambiente: int
+
+    @classmethod
+    def from_personaggio(cls, personaggio: Personaggio,
+                         ambiente: Optional[Ambiente] = None) -> 'Profilo':
+        """
+        Args:
+            personaggio (Personaggio): Combattente
+            ambiente (Optional[Ambiente]): Ambiente del duello
+
+        Returns:
+            Profilo: Statistiche, regola di attacco e modificatore d'ambiente
+
+        Raises:
+            ValueError: Se la classe ridefinisce attacca senza una regola in _ATTACCO
+        """
+        definita_da = next(k for k in type(personaggio).__mro__ if 'attacca' in k.__dict__)
+        if definita_da.__name__ not in _ATTACCO:
+            raise ValueError(f"Nessuna regola vettoriale di attacca per {definita_da.__name__}")
+        mod = ambiente.modifica_attacco(personaggio) if ambiente is not None else 0
+        return cls(
+            salute=personaggio.salute,
+            destrezza=personaggio.destrezza,
+            attacco_min=personaggio.attacco_min,
+            attacco_max=personaggio.attacco_max,
+            regola=_ATTACCO[definita_da.__name__],
+            mod_ambiente=mod,
+        )
+
+
+@dataclass
+class EsitoDuelli:
+    """
+    Risultato di una serie di duelli fra gli stessi due combattenti.
+
+    Attributes:
+        vittorie (int): Duelli vinti dal primo combattente
+        sconfitte (int): Duelli vinti dal secondo
+        interrotti (int): Duelli arrivati a MAX_TURNI o senza vincitore
+        turni (np.ndarray): Turni iniziati, uno per duello
+    """
+    vittorie: int
+    sconfitte: int
+    interrotti: int
+    turni: np.ndarray
+
+    @property
+    def duelli(self) -> int:
+        return len(self.turni)
+
+    @property
+    def win_rate(self) -> float:
+        return self.vittorie / self.duelli if self.duelli else 0.0
+
+    @property
+    def turni_medi(self) -> float:
+        return float(self.turni.mean()) if self.duelli else 0.0
+
+
+@dataclass
+class MatriceDuelli:
+    """
+    Percentuali di vittoria e turni medi per attaccante x difensore x ambiente.
+
+    Attributes:
+        classi (Tuple[str, ...]): Classi, indici dei primi due assi
+        ambienti (Tuple[str, ...]): Ambienti, indice del terzo asse
+        duelli (int): Duelli per cella
+        win_rate (np.ndarray): Vittorie di chi attacca per primo / duelli
+        turni_medi (np.ndarray): Turni medi per duello
+    """
+    classi: Tuple[str, ...]
+    ambienti: Tuple[str, ...]
+    duelli: int
+    win_rate: np.ndarray
+    turni_medi: np.ndarray
+
+    def righe(self) -> List[Dict]:
+        """
+        Returns:
+            List[Dict]: Una riga per cella {primo, secondo, ambiente, win_rate, turni_medi}
+        """
+        return [
+            {
+                'primo': primo,
+                'secondo': secondo,
+                'ambiente': ambiente,
+                'win_rate': float(self.win_rate[i, j, k]),
+                'turni_medi': float(self.turni_medi[i, j, k]),
+            }
+            for i, primo in enumerate(self.classi)
+            for j, secondo in enumerate(self.classi)
+            for k, ambiente in enumerate(self.ambienti)
+        ]
+
+
+def _danni(rng: np.random.Generator, profilo: Profilo, n: int) -> np.ndarray:
+    """
+    Danni di n attacchi (execute_combat_turn + attacca), 0 per i falliti.
+
+    Args:
+        rng (np.random.Generator): Generatore casuale
+        profilo (Profilo): Attaccante
+        n (int): Numero di attacchi
+
+    Returns:
+        np.ndarray: Danno inflitto per attacco
+    """
+    riuscito = rng.integers(1, 21, size=n) <= profilo.destrezza
+    if profilo.regola == 'tiro':
+        riuscito &= rng.integers(1, 21, size=n) <= profilo.destrezza
+    if profilo.regola == 'massimo':
+        danno = rng.integers(profilo.attacco_min,
+                             profilo.attacco_max + profilo.mod_ambiente + 1, size=n)
+    else:
+        danno = rng.integers(profilo.attacco_min, profilo.attacco_max + 1,
+                             size=n) + profilo.mod_ambiente
+    return np.where(riuscito, danno, 0)
+
+
+def simula_duelli(primo: Profilo, secondo: Profilo, duelli: int,
+                  rng: Optional[np.random.Generator] = None,
+                  max_turni: int = MAX_TURNI) -> EsitoDuelli:
+    """
+    Esegue in parallelo duelli indipendenti fra due combattenti.
+
+    Args:
+        primo (Profilo): Combattente che attacca per primo
+        secondo (Profilo): Secondo combattente
+        duelli (int): Numero di duelli
+        rng (Optional[np.random.Generator]): Generatore casuale
+        max_turni (int): Turni oltre i quali il duello è interrotto
+
+    Returns:
+        EsitoDuelli: Vittorie, sconfitte e turni dei duelli
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    salute_primo = np.full(duelli, primo.salute, dtype=np.int64)
+    salute_secondo = np.full(duelli, secondo.salute, dtype=np.int64)
+    turni = np.zeros(duelli, dtype=np.int32)
+    # 1: vince il primo, 2: vince il secondo, 0: in corso / interrotto
+    esito = np.zeros(duelli, dtype=np.int8)
+
+    if primo.salute <= 0 or secondo.salute <= 0:
+        # run_duel non entra nel ciclo: vince chi è ancora in piedi
+        if secondo.salute <= 0 < primo.salute:
+            esito[:] = 1
+        elif primo.salute <= 0 < secondo.salute:
+            esito[:] = 2
+        attivi = np.arange(0)
+    else:
+        attivi = np.arange(duelli)
+
+    turno = 0
+    while len(attivi) and turno < max_turni:
+        turno += 1
+        turni[attivi] = turno
+
+        salute = salute_secondo[attivi] - _danni(rng, primo, len(attivi))
+        salute_secondo[attivi] = np.maximum(salute, 0)
+        caduti = salute <= 0
+        esito[attivi[caduti]] = 1
+        attivi = attivi[~caduti]
+
+        salute = salute_primo[attivi] - _danni(rng, secondo, len(attivi))
+        salute_primo[attivi] = np.maximum(salute, 0)
+        caduti = salute <= 0
+        esito[attivi[caduti]] = 2
+        attivi = attivi[~caduti]
+
+    vittorie = int(np.count_nonzero(esito == 1))
+    sconfitte = int(np.count_nonzero(esito == 2))
+    return EsitoDuelli(vittorie, sconfitte, duelli - vittorie - sconfitte, turni)
+
+
+def matrice_duelli(classi: Optional[Sequence[str]] = None,
+                   nomi_ambienti: Optional[Sequence[str]] = None,
+                   duelli: int = 100_000, seed: Optional[int] = None,
+                   max_turni: int = MAX_TURNI) -> MatriceDuelli:
+    """
+    Simula ogni scontro classe contro classe in ogni ambiente, con i
+    personaggi di livello 1 (valori di default della classe).
+
+    Args:
+        classi (Optional[Sequence[str]]): Classi registrate (default: tutte)
+        nomi_ambienti (Optional[Sequence[str]]): Ambienti registrati più
+            NESSUN_AMBIENTE (default: tutti)
+        duelli (int): Duelli per cella
+        seed (Optional[int]): Seed del generatore, per risultati ripetibili
+        max_turni (int): Turni oltre i quali un duello è interrotto
+
+    Returns:
+        MatriceDuelli: Matrice attaccante x difensore x ambiente
+
+    Raises:
+        KeyError: Se una classe o un ambiente non è registrato
+    """
+    classi = tuple(classi) if classi is not None else tuple(personaggi.classes())
+    if nomi_ambienti is None:
+        nomi_ambienti = (NESSUN_AMBIENTE,) + tuple(ambienti.classes())
+    nomi_ambienti = tuple(nomi_ambienti)
+
+    prototipi = [personaggi.classes()[nome](nome=nome, classe=nome) for nome in classi]
+    istanze = [None if nome == NESSUN_AMBIENTE else AmbienteFactory.istanza(nome)
+               for nome in nomi_ambienti]
+
+    rng = np.random.default_rng(seed)
+    forma = (len(classi), len(classi), len(nomi_ambienti))
+    win_rate = np.zeros(forma)
+    turni_medi = np.zeros(forma)
+    for k, ambiente in enumerate(istanze):
+        profili = [Profilo.from_personaggio(p, ambiente) for p in prototipi]
+        for i, primo in enumerate(profili):
+            for j, secondo in enumerate(profili):
+                esito = simula_duelli(primo, secondo, duelli, rng, max_turni)
+                win_rate[i, j, k] = esito.win_rate
+                turni_medi[i, j, k] = esito.turni_medi
+
+    logger.info(
+        f"Simulati {duelli * win_rate.size} duelli "
+        f"({len(classi)} classi, {len(nomi_ambienti)} ambienti)"
+    )
+    return MatriceDuelli(classi, nomi_ambienti, duelli, win_rate, turni_medi)
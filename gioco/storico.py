@@ -0,0 +1,339 @@
+"""
+Storico compatto dei danni subiti da un personaggio.
+
+Prima lo storico era una lista con un intero per ogni colpo subito: cresceva
+senza limite ed era scritto per intero in ogni file JSON e in ogni payload
+di sessione. StoricoDanni conserva solo gli ultimi CAPACITA_STORICO colpi
+e, oltre quelli, degli aggregati su tutti i colpi:
+
+- conteggio, somma e massimo dei danni;
+- istogramma a FASCE_ISTOGRAMMA fasce larghe LARGHEZZA_FASCIA (l'ultima
+  raccoglie anche tutti i danni maggiori).
+
+Finché i colpi sono al più CAPACITA_STORICO lo storico è una semplice lista
+(append veloce come quello della vecchia lista) e gli aggregati vengono
+calcolati dai colpi quando servono. Al colpo successivo la lista diventa un
+buffer circolare array('H') (2 byte per colpo) e gli aggregati contatori
+aggiornati ad ogni append.
+
+Il documento serializzato ha dimensione limitata e contiene gli aggregati
+solo quando non si possono ricalcolare dai colpi recenti:
+
+    {}                                       nessun colpo
+    {"recenti": [12, 40, 7]}                 al più CAPACITA_STORICO colpi
+    {"recenti": [...], "conteggio": 250, "somma": 8120,
+     "massimo": 95, "istogramma": [30, 41, ...]}
+
+con i colpi recenti dal più vecchio, l'istogramma senza gli zeri finali e
+senza le chiavi che valgono 0 (una chiave assente si ricalcola dai colpi
+recenti con lo stesso risultato). from_data() accetta anche il vecchio
+formato (lista di danni): gli aggregati vengono calcolati su tutta la
+lista, quindi i file esistenti vengono migrati alla prima lettura e
+riscritti compatti al salvataggio.
+
+I danni sono conservati come interi in 0..MAX_DANNO: i valori fuori
+intervallo vengono limitati (un danno negativo conta come 0). In lettura
+i contatori devono stare in 0..MAX_CONTATORE e il documento deve essere
+coerente: conteggio (se presente) non minore dei colpi recenti e, quando
+gli aggregati sono conservati, istogramma con somma pari al conteggio.
+"""
+from array import array
+from typing import Any, Dict, Iterator, List, Optional
+
+from marshmallow import ValidationError, fields
+
+# Colpi recenti conservati singolarmente
+CAPACITA_STORICO = 32
+
+# Istogramma: fasce [0, 10), [10, 20), ..., l'ultima comprende i danni maggiori
+FASCE_ISTOGRAMMA = 16
+LARGHEZZA_FASCIA = 10
+
+# Massimo danno rappresentabile in array('H')
+MAX_DANNO = 0xFFFF
+
+# Massimo valore letto per i contatori (conteggio, somma, fasce): entra in
+# array('Q') lasciando margine agli append successivi ed è anche il limite
+# degli interi validati da msgspec (storage.codec)
+MAX_CONTATORE = 2 ** 63 - 1
+
+# Posizioni in StoricoDanni._contatori
+_TESTA, _CONTEGGIO, _SOMMA, _MASSIMO, _ISTOGRAMMA = range(5)
+
+
+def _istogramma(danni: List[int]) -> List[int]:
+    """
+    Returns:
+        List[int]: Colpi per fascia di danno (FASCE_ISTOGRAMMA valori)
+    """
+    istogramma = [0] * FASCE_ISTOGRAMMA
+    for danno in danni:
+        fascia = danno // LARGHEZZA_FASCIA
+        istogramma[fascia if fascia < FASCE_ISTOGRAMMA else FASCE_ISTOGRAMMA - 1] += 1
+    return istogramma
+
+
+class StoricoDanni:
+    """
+    Colpi recenti con aggregati su tutti i colpi.
+
+    _recenti è None senza colpi, una lista finché i colpi sono al più
+    CAPACITA_STORICO, poi un buffer circolare array('H'). _contatori esiste
+    solo dopo il passaggio al buffer: un solo array('Q') con testa del
+    buffer, conteggio, somma, massimo e le fasce dell'istogramma.
+    """
+    __slots__ = ('_recenti', '_contatori')
+
+    def __init__(self, danni: Optional[List[int]] = None):
+        """
+        Args:
+            danni (Optional[List[int]]): Danni iniziali, dal più vecchio
+        """
+        self._recenti: Optional[List[int]] = None
+        self._contatori: Optional[array] = None
+        if danni:
+            self.extend(danni)
+
+    def _avvolgi(self) -> array:
+        """
+        Passa dalla lista al buffer circolare, calcolando gli aggregati dei
+        colpi presenti.
+
+        Returns:
+            array: I contatori allocati
+        """
+        danni = self._recenti or []
+        contatori = array('Q', bytes(8 * (_ISTOGRAMMA + FASCE_ISTOGRAMMA)))
+        contatori[_CONTEGGIO] = len(danni)
+        contatori[_SOMMA] = sum(danni)
+        contatori[_MASSIMO] = max(danni, default=0)
+        contatori[_ISTOGRAMMA:] = array('Q', _istogramma(danni))
+        self._recenti = array('H', danni)
+        self._contatori = contatori
+        return contatori
+
+    def append(self, danno: int) -> None:
+        """
+        Registra un colpo subito.
+
+        Args:
+            danno (int): Danno subito
+        """
+        if type(danno) is not int:
+            danno = int(danno)
+        if danno < 0:
+            danno = 0
+        elif danno > MAX_DANNO:
+            danno = MAX_DANNO
+        recenti = self._recenti
+        contatori = self._contatori
+        if contatori is None:
+            if recenti is None:
+                self._recenti = [danno]
+                return
+            if len(recenti) < CAPACITA_STORICO:
+                recenti.append(danno)
+                return
+            contatori = self._avvolgi()
+            recenti = self._recenti
+
+        if len(recenti) < CAPACITA_STORICO:
+            recenti.append(danno)
+        else:
+            # buffer pieno: si sovrascrive il colpo più vecchio
+            testa = contatori[_TESTA]
+            recenti[testa] = danno
+            contatori[_TESTA] = testa + 1 if testa + 1 < CAPACITA_STORICO else 0
+        contatori[_CONTEGGIO] += 1
+        contatori[_SOMMA] += danno
+        if danno > contatori[_MASSIMO]:
+            contatori[_MASSIMO] = danno
+        fascia = danno // LARGHEZZA_FASCIA
+        contatori[_ISTOGRAMMA + (fascia if fascia < FASCE_ISTOGRAMMA else FASCE_ISTOGRAMMA - 1)] += 1
+
+    def extend(self, danni: List[int]) -> None:
+        """
+        Args:
+            danni (List[int]): Colpi subiti, dal più vecchio
+        """
+        for danno in danni:
+            self.append(danno)
+
+    @property
+    def recenti(self) -> List[int]:
+        """Ultimi colpi subiti, dal più vecchio."""
+        if self._contatori is None:
+            return list(self._recenti or ())
+        testa = self._contatori[_TESTA]
+        return self._recenti[testa:].tolist() + self._recenti[:testa].tolist()
+
+    @property
+    def conteggio(self) -> int:
+        """Colpi subiti in totale."""
+        if self._contatori is None:
+            return len(self._recenti or ())
+        return self._contatori[_CONTEGGIO]
+
+    @property
+    def somma(self) -> int:
+        """Danni subiti in totale."""
+        if self._contatori is None:
+            return sum(self._recenti or ())
+        return self._contatori[_SOMMA]
+
+    @property
+    def massimo(self) -> int:
+        """Danno più alto subito."""
+        if self._contatori is None:
+            return max(self._recenti or (), default=0)
+        return self._contatori[_MASSIMO]
+
+    @property
+    def istogramma(self) -> List[int]:
+        """Colpi per fascia di danno (FASCE_ISTOGRAMMA valori)."""
+        if self._contatori is None:
+            return _istogramma(self._recenti or ())
+        return self._contatori[_ISTOGRAMMA:].tolist()
+
+    @property
+    def media(self) -> float:
+        """Danno medio per colpo (0 se nessun colpo)."""
+        conteggio = self.conteggio
+        return self.somma / conteggio if conteggio else 0.0
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.recenti)
+
+    def __len__(self) -> int:
+        return 0 if self._recenti is None else len(self._recenti)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, StoricoDanni):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return (f"StoricoDanni(recenti={self.recenti}, conteggio={self.conteggio}, "
+                f"somma={self.somma}, massimo={self.massimo})")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: Documento compatto: solo 'recenti' finché gli
+            aggregati si ricalcolano dai colpi, nessuna chiave che vale 0
+        """
+        if self._contatori is None:
+            return {'recenti': list(self._recenti)} if self._recenti else {}
+        documento = {'recenti': self.recenti, 'conteggio': self.conteggio}
+        if self.somma:
+            documento['somma'] = self.somma
+        if self.massimo:
+            documento['massimo'] = self.massimo
+        istogramma = self.istogramma
+        while istogramma and istogramma[-1] == 0:
+            istogramma.pop()
+        if istogramma:
+            documento['istogramma'] = istogramma
+        return documento
+
+    @classmethod
+    def from_data(cls, data: Any) -> 'StoricoDanni':
+        """
+        Ricostruisce lo storico da un documento già validato.
+
+        Args:
+            data (Any): Documento di to_dict() o lista di danni (vecchio formato)
+
+        Returns:
+            StoricoDanni: Storico ricostruito
+        """
+        if isinstance(data, StoricoDanni):
+            return data
+        if isinstance(data, list):
+            return cls(data)
+
+        storico = cls()
+        recenti = data.get('recenti', [])
+        conteggio = data.get('conteggio', 0)
+        if conteggio <= len(recenti):
+            # aggregati ricalcolabili dai colpi (anche dai documenti completi)
+            if recenti:
+                storico._recenti = list(recenti)
+            return storico
+
+        # la testa resta 0: il colpo più vecchio è in posizione 0
+        istogramma = data.get('istogramma', [])
+        contatori = array('Q', bytes(8 * (_ISTOGRAMMA + FASCE_ISTOGRAMMA)))
+        contatori[_CONTEGGIO] = conteggio
+        contatori[_SOMMA] = data.get('somma', 0)
+        contatori[_MASSIMO] = data.get('massimo', 0)
+        contatori[_ISTOGRAMMA:_ISTOGRAMMA + len(istogramma)] = array('Q', istogramma)
+        storico._recenti = array('H', recenti)
+        storico._contatori = contatori
+        return storico
+
+
+def _intero(value: Any, massimo: int = MAX_CONTATORE) -> int:
+    """
+    Returns:
+        int: value se è un intero in 0..massimo
+
+    Raises:
+        ValidationError: Altrimenti
+    """
+    if type(value) is not int or value < 0 or value > massimo:
+        raise ValidationError(f"Valore non valido nello storico dei danni: {value!r}")
+    return value
+
+
+def _verifica_coerenza(recenti: List[int], conteggio: int, istogramma: List[int]) -> None:
+    """
+    Controlla che gli aggregati siano compatibili con i colpi recenti
+    (un conteggio 0 equivale alla chiave assente).
+
+    Raises:
+        ValidationError: Se il conteggio è minore dei colpi recenti o se,
+        con gli aggregati conservati, l'istogramma non somma al conteggio
+    """
+    if conteggio and conteggio < len(recenti):
+        raise ValidationError(f"'conteggio' ({conteggio}) minore dei colpi recenti ({len(recenti)})")
+    if conteggio > len(recenti) and sum(istogramma) != conteggio:
+        raise ValidationError(f"'istogramma' non somma al conteggio ({conteggio})")
+
+
+# Campo del vecchio formato (lista di danni)
+_LISTA_DANNI = fields.List(fields.Integer())
+
+
+class StoricoDanniField(fields.Field):
+    """
+    Campo Marshmallow per StoricoDanni: serializza il documento compatto e
+    in deserializzazione accetta anche la vecchia lista di danni.
+    """
+
+    def _serialize(self, value: Optional[StoricoDanni], attr, obj, **kwargs) -> Optional[Dict]:
+        if value is None:
+            return None
+        return value.to_dict()
+
+    def _deserialize(self, value: Any, attr, data, **kwargs) -> StoricoDanni:
+        if isinstance(value, list):
+            # vecchio formato: stessa validazione del campo che lo descriveva
+            return StoricoDanni(_LISTA_DANNI.deserialize(value))
+        if not isinstance(value, dict):
+            raise ValidationError("Lo storico dei danni deve essere un oggetto o una lista")
+        recenti = value.get('recenti', [])
+        istogramma = value.get('istogramma', [])
+        if not isinstance(recenti, list) or len(recenti) > CAPACITA_STORICO:
+            raise ValidationError(f"'recenti' deve essere una lista di al più {CAPACITA_STORICO} danni")
+        if not isinstance(istogramma, list) or len(istogramma) > FASCE_ISTOGRAMMA:
+            raise ValidationError(f"'istogramma' deve essere una lista di al più {FASCE_ISTOGRAMMA} fasce")
+        documento = {
+            'recenti': [_intero(danno, MAX_DANNO) for danno in recenti],
+            'conteggio': _intero(value.get('conteggio', 0)),
+            'somma': _intero(value.get('somma', 0)),
+            'massimo': _intero(value.get('massimo', 0), MAX_DANNO),
+            'istogramma': [_intero(colpi) for colpi in istogramma],
+        }
+        _verifica_coerenza(documento['recenti'], documento['conteggio'], documento['istogramma'])
+        return StoricoDanni.from_data(documento)
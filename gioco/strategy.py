@@ -1,6 +1,7 @@
-import random, logging
+import logging
 from gioco.ambiente import Ambiente
 from gioco.inventario import Inventario
+from gioco.rng import current_rng
 from dataclasses import dataclass, field
 
 logger = logging.getLogger(__name__)
@@ -93,7 +94,7 @@ class Aggressiva(Strategia):
                 ),
                 None
             )
-            if ogg and (random.randint(0, 1) == 0):
+            if ogg and (current_rng().randint(0, 1) == 0):
                 result = inventario.usa_oggetto(
                     oggetto=ogg,
                     ambiente=ambiente
@@ -157,7 +158,7 @@ class Difensiva(Strategia):
                 ),
                 None
             )
-            if ogg and (random.randint(0, 1) == 0):
+            if ogg and (current_rng().randint(0, 1) == 0):
                 result = inventario.usa_oggetto(
                     oggetto=ogg,
                     ambiente=ambiente
@@ -218,7 +219,6 @@ class Equilibrata(Strategia):
             rappresentante i danni inflitti o None se non viene effettuato
         '''
         result = None
-        msg = ""
         if salute_npc < 40:
             if inventario and inventario.oggetti:
                 ogg = next(
@@ -228,14 +228,11 @@ class Equilibrata(Strategia):
                     ),
                     None
                 )
-                if ogg and (random.randint(0, 2) == 0):
+                if ogg and (current_rng().randint(0, 2) == 0):
                     result = inventario.usa_oggetto(
                         oggetto=ogg,
                         ambiente=ambiente
                     )
-                    msg = (
-                        "viene usata una Pozione Rossa per curarsi di "
-                        f"{result} punti ferita")
         elif inventario and inventario.oggetti:
             ogg = next(
                 (
@@ -244,17 +241,12 @@ class Equilibrata(Strategia):
                 ),
                 None
             )
-            if ogg and (random.randint(0, 2) == 0):
+            if ogg and (current_rng().randint(0, 2) == 0):
                 result = inventario.usa_oggetto(
                     ogg,
                     ambiente=ambiente
                 )
-                msg = (
-                    "viene utilizzata una Bomba Acida causando un danno di "
-                    f"{result} punti ferita"
-                )
-        if msg != "":
-            logger.info(msg)
+        # l'uso dell'oggetto è un evento ItemUsed (gioco.eventi)
         return result
 
 # ----------------------------------------------------------------------------
@@ -278,7 +270,7 @@ class StrategiaFactory:
         Returns:
             Strategia: un'istanza della strategia randomica.
         '''
-        random_choice = random.choice(
+        random_choice = current_rng().choice(
             ["aggressiva", "difensiva", "equilibrata"]
         )
         return StrategiaFactory.usa_strategia(random_choice)
@@ -0,0 +1,265 @@
+"""
+Tabella a colonne (struct-of-arrays) per operare su molti personaggi insieme.
+
+Gli oggetti Personaggio vanno bene per il duello, dove si muove un
+personaggio alla volta. Per aggiornare migliaia di personaggi (ondate di
+NPC, simulazioni, progressione di livello) CharacterTable tiene le
+statistiche in array NumPy, una colonna per statistica, e applica le stesse
+regole dei metodi di Personaggio, Mago, Guerriero e Ladro con operazioni
+vettoriali:
+
+    tabella = CharacterTable.from_personaggi(nemici)
+    tabella.subisci_danno(danni)
+    tabella.recupera_salute(ambiente=ambiente)
+    tabella.to_personaggi()     # riscrive i valori negli oggetti
+
+Differenze rispetto ai metodi degli oggetti:
+- il recupero casuale del Ladro usa un numpy.random.Generator, quindi a
+  parità di seed i tiri sono diversi da quelli di random.randint;
+- gli storici dei danni vengono accumulati nella tabella e aggiunti agli
+  oggetti solo da to_personaggi();
+- non viene scritto un messaggio di log per personaggio, ma uno per
+  operazione.
+"""
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from gioco.ambiente import Ambiente
+from gioco.personaggio import Personaggio
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Colonne numeriche, nello stesso ordine dei campi di Personaggio
+COLONNE: Tuple[str, ...] = (
+    'salute', 'salute_max', 'attacco_min', 'attacco_max', 'destrezza', 'livello'
+)
+
+# Regole di recupera_salute per la classe che definisce il metodo (vedi
+# gioco/personaggio.py e gioco/classi.py): (tipo di recupero, parametro,
+# tetto alla salute)
+Regola = Tuple[str, Union[float, int, Tuple[int, int]], int]
+_RECUPERO: Dict[str, Regola] = {
+    'Personaggio': ('personaggio', 0.3, 100),
+    'Mago': ('percentuale', 0.2, 80),
+    'Guerriero': ('fisso', 30, 120),
+    'Ladro': ('casuale', (10, 40), 140),
+}
+
+# Indici: None (tutte le righe), array di posizioni o maschera booleana
+Indici = Optional[Union[Sequence[int], np.ndarray]]
+
+
+def _regola(tipo: type) -> Regola:
+    """
+    Args:
+        tipo (type): Classe del personaggio
+
+    Returns:
+        Regola: Regola di recupero della classe che definisce recupera_salute
+
+    Raises:
+        ValueError: Se quella classe non ha una regola in _RECUPERO
+    """
+    definita_da = next(k for k in tipo.__mro__ if 'recupera_salute' in k.__dict__)
+    if definita_da.__name__ not in _RECUPERO:
+        raise ValueError(
+            f"Nessuna regola vettoriale di recupera_salute per {definita_da.__name__}"
+        )
+    return _RECUPERO[definita_da.__name__]
+
+
+class CharacterTable:
+    """
+    Statistiche di una lista di personaggi, per colonne.
+
+    Attributes:
+        salute, salute_max, attacco_min, attacco_max, destrezza, livello
+            (np.ndarray): Colonne int64, una riga per personaggio
+        classe (np.ndarray): Codice della classe (int8), indice in classi
+        classi (Tuple[type, ...]): Classi presenti nella tabella
+        personaggi (List[Personaggio]): Oggetti di origine, nello stesso
+            ordine delle righe
+    """
+
+    def __init__(self, personaggi: List[Personaggio], classi: Tuple[type, ...],
+                 classe: np.ndarray, colonne: Dict[str, np.ndarray]):
+        """
+        Usare CharacterTable.from_personaggi().
+
+        Args:
+            personaggi (List[Personaggio]): Oggetti di origine
+            classi (Tuple[type, ...]): Classi presenti
+            classe (np.ndarray): Codice di classe per riga
+            colonne (Dict[str, np.ndarray]): Una colonna per nome in COLONNE
+        """
+        self.personaggi = personaggi
+        self.classi = classi
+        self.classe = classe
+        for nome in COLONNE:
+            setattr(self, nome, colonne[nome])
+        # danni subiti non ancora riportati negli storici: (righe, danni)
+        self._storico: List[Tuple[np.ndarray, np.ndarray]] = []
+
+    @classmethod
+    def from_personaggi(cls, personaggi: Iterable[Personaggio]) -> 'CharacterTable':
+        """
+        Costruisce la tabella dalle statistiche degli oggetti.
+
+        Args:
+            personaggi (Iterable[Personaggio]): Personaggi da copiare
+
+        Returns:
+            CharacterTable: Tabella con una riga per personaggio
+
+        Raises:
+            ValueError: Se una classe ridefinisce recupera_salute senza una
+                regola vettoriale in _RECUPERO
+        """
+        personaggi = list(personaggi)
+        codici: Dict[type, int] = {}
+        classe = np.fromiter(
+            (codici.setdefault(type(p), len(codici)) for p in personaggi),
+            dtype=np.int8, count=len(personaggi)
+        )
+        classi = tuple(codici)
+        for tipo in classi:
+            _regola(tipo)
+
+        colonne = {
+            nome: np.fromiter((getattr(p, nome) for p in personaggi),
+                              dtype=np.int64, count=len(personaggi))
+            for nome in COLONNE
+        }
+        return cls(personaggi, classi, classe, colonne)
+
+    def to_personaggi(self) -> List[Personaggio]:
+        """
+        Riscrive le colonne negli oggetti di origine e aggiunge agli storici
+        i danni subiti tramite la tabella.
+
+        Returns:
+            List[Personaggio]: Gli oggetti aggiornati, nell'ordine delle righe
+        """
+        valori = [getattr(self, nome).tolist() for nome in COLONNE]
+        for personaggio, riga in zip(self.personaggi, zip(*valori)):
+            for nome, valore in zip(COLONNE, riga):
+                setattr(personaggio, nome, valore)
+
+        for righe, danni in self._storico:
+            for riga, danno in zip(righe.tolist(), danni.tolist()):
+                self.personaggi[riga].storico_danni_subiti.append(danno)
+        self._storico.clear()
+        return self.personaggi
+
+    def __len__(self) -> int:
+        return len(self.personaggi)
+
+    def _righe(self, indici: Indici) -> np.ndarray:
+        """
+        Args:
+            indici (Indici): None, posizioni o maschera booleana
+
+        Returns:
+            np.ndarray: Posizioni delle righe selezionate
+        """
+        if indici is None:
+            return np.arange(len(self))
+        indici = np.asarray(indici)
+        if indici.dtype == np.bool_:
+            return np.flatnonzero(indici)
+        return indici.astype(np.intp, copy=False)
+
+    def subisci_danno(self, danni: Union[int, Sequence[int], np.ndarray],
+                      indici: Indici = None) -> None:
+        """
+        Versione vettoriale di Personaggio.subisci_danno: salute ridotta del
+        danno, non sotto zero. Una riga ripetuta in indici subisce la somma
+        dei danni (uguale all'applicazione in sequenza per danni >= 0).
+
+        Args:
+            danni (Union[int, Sequence[int], np.ndarray]): Danno unico o uno
+                per riga selezionata
+            indici (Indici): Righe colpite (default: tutte)
+        """
+        righe = self._righe(indici)
+        danni = np.broadcast_to(np.asarray(danni, dtype=np.int64), righe.shape)
+        if indici is None:
+            self.salute -= danni
+        else:
+            np.subtract.at(self.salute, righe, danni)
+        self.salute[righe] = np.maximum(self.salute[righe], 0)
+        self._storico.append((righe.copy(), danni.copy()))
+        logger.info(f"Danni applicati a {len(righe)} personaggi")
+
+    def sconfitto(self) -> np.ndarray:
+        """
+        Versione vettoriale di Personaggio.sconfitto.
+
+        Returns:
+            np.ndarray: Maschera booleana, True per i personaggi a zero salute
+        """
+        return self.salute <= 0
+
+    def recupera_salute(self, mod_ambiente: int = 0, indici: Indici = None,
+                        rng: Optional[np.random.Generator] = None,
+                        ambiente: Optional[Ambiente] = None) -> None:
+        """
+        Versione vettoriale di recupera_salute, con la regola di ogni classe:
+        Personaggio +30% (solo se sotto salute_max, max 100), Mago +20% di
+        (salute + mod) (max 80), Guerriero +30 (max 120), Ladro +10..40
+        casuale (max 140). Il modificatore ambientale si somma come nei
+        metodi degli oggetti.
+
+        Args:
+            mod_ambiente (int): Modificatore ambientale di recupero
+            indici (Indici): Righe che recuperano (default: tutte)
+            rng (Optional[np.random.Generator]): Generatore per il Ladro
+            ambiente (Optional[Ambiente]): Se indicato, il modificatore di
+                ogni classe viene dalla tabella dell'ambiente (modifica_cura)
+                al posto di mod_ambiente
+        """
+        righe = self._righe(indici)
+        for codice, tipo in enumerate(self.classi):
+            selezione = righe[self.classe[righe] == codice]
+            if not len(selezione):
+                continue
+            regola, parametro, tetto = _regola(tipo)
+            salute = self.salute[selezione]
+            mod = ambiente.tabella().cura(tipo) if ambiente is not None else mod_ambiente
+
+            if regola == 'personaggio':
+                sotto_massimo = salute < self.salute_max[selezione]
+                selezione, salute = selezione[sotto_massimo], salute[sotto_massimo]
+                recupero = (salute * parametro).astype(np.int64) + mod
+            elif regola == 'percentuale':
+                # int() tronca verso zero come astype
+                recupero = ((salute + mod) * parametro).astype(np.int64)
+            elif regola == 'fisso':
+                recupero = parametro + mod
+            else:
+                minimo, massimo = parametro
+                rng = rng if rng is not None else np.random.default_rng()
+                recupero = rng.integers(minimo, massimo + 1, size=len(selezione)) + mod
+
+            self.salute[selezione] = np.minimum(salute + recupero, tetto)
+        logger.info(f"Recupero salute per {len(righe)} personaggi")
+
+    def migliora_statistiche(self, indici: Indici = None) -> None:
+        """
+        Versione vettoriale di Personaggio.migliora_statistiche: +1 livello,
+        attacco_max +2% e salute_max +1% (troncati a intero). Ogni riga
+        sale di un solo livello anche se ripetuta in indici.
+
+        Args:
+            indici (Indici): Righe che salgono di livello (default: tutte)
+        """
+        righe = self._righe(indici)
+        self.livello[righe] += 1
+        attacco_max = self.attacco_max[righe]
+        self.attacco_max[righe] = (attacco_max + 0.02 * attacco_max).astype(np.int64)
+        salute_max = self.salute_max[righe]
+        self.salute_max[righe] = (salute_max + 0.01 * salute_max).astype(np.int64)
+        logger.info(f"{len(righe)} personaggi saliti di livello")
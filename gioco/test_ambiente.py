@@ -0,0 +1,52 @@
+"""
+Le tabelle dei modificatori d'ambiente devono dare gli stessi valori delle
+regole originali (gioco.dati_di_test.legacy_environment_rules) per ogni
+ambiente x classe di personaggio e di oggetto, con gli stessi tiri casuali
+a parità di seed.
+"""
+import random
+
+import pytest
+
+from gioco.ambiente import AmbienteFactory
+from gioco.oggetto import BombaAcida
+from gioco.registry import ambienti, oggetti, personaggi
+from gioco.rng import current_rng, seeded
+from gioco.dati_di_test import legacy_environment_rules
+
+ORIGINALI = legacy_environment_rules()
+
+
+@pytest.mark.usefixtures("senza_log")
+@pytest.mark.parametrize("nome", list(ambienti.classes()))
+def test_tabelle_come_regole_originali(nome):
+    ambiente = AmbienteFactory.istanza(nome)
+    for classe, cls in personaggi.classes().items():
+        combattente = cls(nome=classe)
+        assert ambiente.modifica_attacco(combattente) == ORIGINALI["attacco"](ambiente, combattente)
+        assert ambiente.modifica_cura(combattente) == ORIGINALI["cura"](ambiente, combattente)
+
+    scelta = random.Random(11)
+    for cls in oggetti.classes().values():
+        for _ in range(50):
+            oggetto = cls(valore=scelta.randint(0, 200))
+            seed = scelta.getrandbits(32)
+            # stesso effetto e stesso stato del generatore dopo la chiamata
+            with seeded(seed):
+                nuovo = [ambiente.modifica_effetto_oggetto(oggetto), current_rng().random()]
+            with seeded(seed):
+                originale = [ORIGINALI["oggetto"](ambiente, oggetto), current_rng().random()]
+            assert nuovo == originale, (cls.__name__, nuovo, originale)
+
+
+def test_distribuzione_bomba_nel_vulcano():
+    distribuzione = AmbienteFactory.istanza("Vulcano").tabella().oggetto(BombaAcida).distribuzione(30)
+    assert sorted(distribuzione) == list(range(16))
+    assert sum(distribuzione.values()) == pytest.approx(1, abs=1e-12)
+
+
+@pytest.mark.usefixtures("senza_log")
+@pytest.mark.parametrize("scelta", ["1", "2", "3"])
+def test_usa_ambiente_come_originale(scelta):
+    assert type(AmbienteFactory.usa_ambiente(scelta)) is type(ORIGINALI["usa_ambiente"](scelta))
+
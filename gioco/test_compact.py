@@ -0,0 +1,36 @@
+"""
+Le dataclass di gioco con slots e id compatti devono restare entro
+gioco.compact.MEMORY_BUDGET byte per istanza.
+"""
+import gc
+import sys
+import uuid
+import tracemalloc
+
+import pytest
+
+from gioco.classi import Guerriero
+from gioco.compact import MEMORY_BUDGET
+from gioco.inventario import Inventario
+from gioco.oggetto import PozioneCura
+
+# nomi nuovi per i personaggi, nomi di default (condivisi) per gli oggetti,
+# come nel gioco; ogni inventario ha un proprietario
+CASI = {
+    "Personaggio": lambda i: Guerriero(nome=f"Personaggio {i}"),
+    "Oggetto": lambda i: PozioneCura(),
+    "Inventario": lambda i: Inventario(id_proprietario=uuid.uuid4()),
+}
+
+
+@pytest.mark.usefixtures("senza_log")
+@pytest.mark.parametrize("nome", list(CASI))
+def test_memoria_per_istanza_entro_il_budget(nome):
+    crea, count = CASI[nome], 5000
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    entities = [crea(i) for i in range(count)]
+    allocated = tracemalloc.get_traced_memory()[0] - baseline - sys.getsizeof(entities)
+    tracemalloc.stop()
+    assert allocated / count <= MEMORY_BUDGET[nome]
@@ -0,0 +1,52 @@
+"""
+Eventi di combattimento (gioco.eventi) sui duelli del motore a oggetti:
+stessi tiri con e senza bus, danni degli eventi pari alla salute persa,
+buffer circolare limitato, andata e ritorno JSON e testo per ogni evento.
+"""
+import json
+import random
+
+import pytest
+
+from characters.utils import CharacterCombat
+from gioco.eventi import DamageTaken, EventBus, formatta, registra
+from gioco.registry import personaggi
+from gioco.rng import seeded
+
+
+@pytest.fixture
+def coppie():
+    classi = list(personaggi.classes().values())
+    scelta = random.Random(8)
+    return [(scelta.choice(classi), scelta.choice(classi)) for _ in range(300)]
+
+
+def _duello(coppia, seed: int):
+    pg1, pg2 = coppia[0](nome="Primo"), coppia[1](nome="Secondo")
+    salute = {"Primo": pg1.salute, "Secondo": pg2.salute}
+    with seeded(seed):
+        log, _ = CharacterCombat.run_duel(pg1, pg2)
+    return log, salute, {"Primo": pg1.salute, "Secondo": pg2.salute}
+
+
+@pytest.mark.usefixtures("senza_log")
+def test_eventi_coerenti_con_i_duelli(coppie):
+    for seed, coppia in enumerate(coppie):
+        senza, _, _ = _duello(coppia, seed)
+        with registra(EventBus(capacita=100_000)) as bus:
+            con, prima, dopo = _duello(coppia, seed)
+        assert senza == con
+        for nome in prima:
+            persa = sum(e.danno for e in bus.eventi if type(e) is DamageTaken and e.nome == nome)
+            assert max(0, prima[nome] - persa) == dopo[nome], (nome, prima, dopo)
+        ripristinato = EventBus.from_list(json.loads(json.dumps(bus.to_list())), capacita=100_000)
+        assert list(ripristinato.eventi) == list(bus.eventi)
+        assert all(formatta(e) for e in bus.eventi)
+
+
+@pytest.mark.usefixtures("senza_log")
+def test_buffer_limitato(coppie):
+    with registra(EventBus(capacita=10)) as bus:
+        for seed, coppia in enumerate(coppie[:20]):
+            _duello(coppia, seed)
+    assert len(bus.eventi) == 10
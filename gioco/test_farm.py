@@ -0,0 +1,23 @@
+"""
+gioco.farm deve dare risultati identici bit per bit con lo stesso seed e
+numeri diversi di processi, per entrambi i motori.
+"""
+import numpy as np
+import pytest
+
+from gioco.farm import SimulationFarm
+
+
+@pytest.mark.parametrize("motore, duelli, shard", [
+    ("vettoriale", 30_000, 7_000),
+    ("oggetti", 300, 70),
+])
+def test_stesso_seed_stessi_risultati(motore, duelli, shard):
+    risultati = [SimulationFarm(n, motore, shard).run(duelli, seed=11) for n in (1, 2, 3, 1)]
+    for risultato in risultati[1:]:
+        for nome in ("vittorie", "sconfitte", "interrotti", "turni"):
+            assert np.array_equal(getattr(risultato, nome), getattr(risultati[0], nome)), nome
+        assert risultato.matrice.win_rate.tobytes() == risultati[0].matrice.win_rate.tobytes()
+
+    diverso = SimulationFarm(1, motore, shard).run(duelli, seed=12)
+    assert not np.array_equal(diverso.vittorie, risultati[0].vittorie)
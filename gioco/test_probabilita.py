@@ -0,0 +1,93 @@
+"""
+gioco.probabilita.duello_esatto contro una ricorsione diretta sugli stati
+(salute piccola, profili casuali) e contro il simulatore Monte Carlo per
+ogni classe x classe x ambiente (test z su vittorie e turni medi).
+"""
+import sys
+import math
+import random
+from functools import cache
+
+import numpy as np
+import pytest
+
+from gioco.probabilita import distribuzione_danni, duello_esatto
+from gioco.registry import ambienti, personaggi
+from gioco.simulatore import NESSUN_AMBIENTE, Profilo, simula_duelli
+
+DUELLI_SIMULATORE = 50_000
+
+
+def _ricorsione(primo: Profilo, secondo: Profilo) -> tuple:
+    q1 = distribuzione_danni(primo, secondo.salute)
+    q2 = distribuzione_danni(secondo, primo.salute)
+    ripeti = q1[0] * q2[0]
+
+    @cache
+    def stato(a: int, b: int) -> tuple:
+        # (vittoria, sconfitta, turni) dall'inizio di un turno in (a, b);
+        # il termine d1 = d2 = 0 riporta allo stesso stato
+        w, l, t = 0.0, 0.0, 1.0
+        for d1 in range(len(q1)):
+            if d1 >= b:
+                w += q1[d1]
+                continue
+            for d2 in range(len(q2)):
+                p = q1[d1] * q2[d2]
+                if d2 >= a:
+                    l += p
+                elif d1 or d2:
+                    sw, sl, st = stato(a - d2, b - d1)
+                    w, l, t = w + p * sw, l + p * sl, t + p * st
+        return w / (1 - ripeti), l / (1 - ripeti), t / (1 - ripeti)
+
+    return stato(primo.salute, secondo.salute)
+
+
+@pytest.fixture
+def ricorsione_profonda():
+    limite = sys.getrecursionlimit()
+    sys.setrecursionlimit(10000)
+    yield
+    sys.setrecursionlimit(limite)
+
+
+@pytest.mark.usefixtures("ricorsione_profonda")
+def test_come_ricorsione_diretta():
+    scelta = random.Random(3)
+    regole = ('tiro', 'diretto', 'massimo')
+    for _ in range(100):
+        profili = []
+        for _ in range(2):
+            minimo = scelta.randint(0, 8)
+            profili.append(Profilo(salute=scelta.randint(1, 30), destrezza=scelta.randint(1, 20),
+                                   attacco_min=minimo, attacco_max=minimo + scelta.randint(0, 15),
+                                   regola=scelta.choice(regole), mod_ambiente=scelta.randint(0, 5)))
+        esito = duello_esatto(*profili)
+        atteso = _ricorsione(*profili)
+        assert esito.vittoria == pytest.approx(atteso[0], abs=1e-9), profili
+        assert esito.sconfitta == pytest.approx(atteso[1], abs=1e-9), profili
+        assert esito.turni_attesi == pytest.approx(atteso[2], rel=1e-9), profili
+
+
+@pytest.mark.usefixtures("senza_log")
+def test_come_simulatore(z_critico):
+    classi = tuple(personaggi.classes())
+    nomi_ambienti = (NESSUN_AMBIENTE,) + tuple(ambienti.classes())
+    celle = len(classi) ** 2 * len(nomi_ambienti)
+    soglia = z_critico(0.001 / (2 * celle))
+    rng = np.random.default_rng(7)
+    for ambiente_nome in nomi_ambienti:
+        ambiente = None if ambiente_nome == NESSUN_AMBIENTE else ambienti.classes()[ambiente_nome]()
+        profili = [Profilo.from_personaggio(personaggi.classes()[nome](nome=nome, classe=nome), ambiente)
+                   for nome in classi]
+        for primo in profili:
+            for secondo in profili:
+                esatto = duello_esatto(primo, secondo)
+                simulato = simula_duelli(primo, secondo, DUELLI_SIMULATORE, rng)
+                errore = math.sqrt(max(esatto.vittoria * (1 - esatto.vittoria), 1e-12) / DUELLI_SIMULATORE)
+                z_vittorie = (simulato.win_rate - esatto.vittoria) / errore
+                z_turni = ((simulato.turni_medi - esatto.turni_attesi)
+                           / max(math.sqrt(simulato.turni.var(ddof=1) / DUELLI_SIMULATORE), 1e-12))
+                assert abs(z_vittorie) < soglia, (ambiente_nome, primo, secondo, z_vittorie)
+                assert abs(z_turni) < soglia, (ambiente_nome, primo, secondo, z_turni)
@@ -0,0 +1,54 @@
+"""
+Il caricamento di liste con many=True (gioco.registry.build_many) deve
+costruire gli stessi oggetti del caricamento elemento per elemento.
+"""
+import dataclasses
+
+import pytest
+from marshmallow import ValidationError
+
+from gioco.registry import personaggi
+from gioco.schemas.oggetto import OggettoSchema
+from gioco.schemas.personaggio import PersonaggioSchema
+
+
+def _campi(obj) -> dict:
+    # dataclass con slots: senza __dict__; l'id generato cambia a ogni load
+    return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)} | {"id": None}
+
+
+def test_personaggi_many_come_singoli(personaggio_di_esempio):
+    schema = PersonaggioSchema()
+    classi = ("Mago", "Guerriero", "Ladro")
+    items = [personaggio_di_esempio(classe=classi[i % len(classi)]) for i in range(30)]
+    caricati = schema.load(items, many=True)
+    assert [type(o).__name__ for o in caricati] == [item["classe"] for item in items]
+    assert [_campi(o) for o in caricati] == [_campi(schema.load(item)) for item in items]
+
+
+def test_oggetti_many_come_singoli():
+    schema = OggettoSchema()
+    items = [{"nome": "Pozione Rossa", "usato": False, "valore": 30,
+              "tipo_oggetto": "Ristorativo", "classe": classe}
+             for classe in ("PozioneCura", "BombaAcida", "Medaglione") * 10]
+    caricati = schema.load(items, many=True)
+    assert [type(o).__name__ for o in caricati] == [item["classe"] for item in items]
+    assert [_campi(o) for o in caricati] == [_campi(schema.load(item)) for item in items]
+
+
+def test_build_many_rifiuta_campi_sconosciuti():
+    with pytest.raises(TypeError, match="inatteso"):
+        personaggi.build_many([{"classe": "Mago", "nome": "a", "inatteso": 1}])
+
+
+def test_build_many_classe_non_registrata():
+    with pytest.raises(KeyError):
+        personaggi.build_many([{"classe": "Drago", "nome": "a"}])
+
+
+@pytest.mark.parametrize("many", [False, True])
+def test_oggetto_classe_non_registrata(many):
+    item = {"nome": "Spada", "valore": 5, "classe": "Spada"}
+    with pytest.raises(ValidationError) as errore:
+        OggettoSchema().load([item] if many else item, many=many)
+    assert "classe" in errore.value.messages
@@ -0,0 +1,52 @@
+"""
+Un duello rigiocato con gioco.replay dal solo registro (seed + personaggi
+scelti) deve avere lo stesso log e lo stesso stato finale dell'originale,
+anche rigiocando in parallelo su più thread.
+"""
+import json
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from gioco.registry import ambienti, personaggi
+from gioco.replay import BattleRecord, play_duel, replay_duel
+from gioco.serializers import to_dict
+
+
+def _stato(esito) -> tuple:
+    return (esito.log, esito.turni, to_dict(esito.pg1), to_dict(esito.pg2))
+
+
+@pytest.fixture
+def duelli_registrati(senza_log):
+    scelta = random.Random(99)
+    classi = list(personaggi.classes())
+    nomi_ambienti = [None] + list(ambienti.classes())
+
+    def documento() -> dict:
+        nome = scelta.choice(classi)
+        personaggio = personaggi.classes()[nome](nome=f"{nome} {scelta.randint(1, 999)}", classe=nome)
+        personaggio.livello = scelta.randint(1, 10)
+        return to_dict(personaggio)
+
+    giocati = [play_duel(documento(), documento(), scelta.choice(nomi_ambienti)) for _ in range(300)]
+    # il registro passa da JSON, come se fosse stato salvato
+    registri = [BattleRecord.from_dict(json.loads(json.dumps(registro.to_dict())))
+                for _, registro in giocati]
+    return [esito for esito, _ in giocati], registri
+
+
+def test_replay_identico(duelli_registrati):
+    originali, registri = duelli_registrati
+    for originale, registro in zip(originali, registri):
+        assert _stato(replay_duel(registro)) == _stato(originale), originale.log
+
+
+def test_replay_concorrenti_indipendenti(duelli_registrati):
+    # il generatore è locale al contesto: replay concorrenti non si disturbano
+    originali, registri = duelli_registrati
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        rigiocati = list(pool.map(replay_duel, registri))
+    for originale, rigiocato in zip(originali, rigiocati):
+        assert _stato(rigiocato) == _stato(originale), originale.log
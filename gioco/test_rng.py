@@ -0,0 +1,26 @@
+"""
+current_rng() restituisce il generatore di seeded() dentro il blocco e il
+generatore di processo di gioco.rng fuori.
+"""
+import random
+
+from gioco.rng import current_rng, seeded
+
+
+def test_seeded_ripetibile_e_annidato():
+    with seeded(7) as esterno:
+        primo = current_rng().random()
+        with seeded(8) as interno:
+            assert current_rng() is interno
+        assert current_rng() is esterno
+    with seeded(7):
+        assert current_rng().random() == primo
+
+
+def test_fuori_da_seeded_generatore_del_modulo():
+    globale = current_rng()
+    assert isinstance(globale, random.Random)
+    with seeded(1) as generatore:
+        assert current_rng() is generatore
+        pass
+    assert current_rng() is globale
@@ -0,0 +1,55 @@
+"""
+gioco.scheduler.TurnScheduler contro un riferimento ingenuo (scansione
+della lista a ogni turno) su battaglie casuali: stesso ordine dei turni,
+stessi bersagli, stessa fine ed esito, salvando e ripristinando la coda
+a ogni turno.
+"""
+import random
+
+from gioco.personaggio import Personaggio
+from gioco.scheduler import SCONFITTA, VITTORIA, TurnScheduler
+
+
+def test_coda_come_riferimento_a_scansione(senza_log):
+    rng = random.Random(5)
+    for _ in range(500):
+        gruppo = [Personaggio(nome=f"C{i}", npc=rng.random() < 0.5, salute=rng.randint(1, 60))
+                  for i in range(rng.randint(2, 12))]
+        if all(c.npc for c in gruppo) or not any(c.npc for c in gruppo):
+            gruppo[0].npc = not gruppo[0].npc
+        scheduler = TurnScheduler(gruppo)
+        ordine = sorted(range(len(gruppo)), key=scheduler.iniziativa.__getitem__)
+        posizione = 0
+        while True:
+            # riferimento: prossimo in piedi nell'ordine di iniziativa, ciclico
+            vivi = {lato: [i for i in ordine if gruppo[i].npc == lato and gruppo[i].salute > 0]
+                    for lato in (False, True)}
+            if not vivi[False] or not vivi[True]:
+                assert scheduler.finita() and scheduler.prossimo() is None
+                assert scheduler.esito() == (SCONFITTA if not vivi[False] else VITTORIA)
+                break
+            while gruppo[ordine[posizione % len(ordine)]].salute <= 0:
+                posizione += 1
+            atteso = ordine[posizione % len(ordine)]
+            posizione += 1
+
+            scheduler = TurnScheduler.from_dict(scheduler.to_dict(), gruppo)
+            indice = scheduler.prossimo()
+            assert indice == atteso
+            assert list(scheduler.bersagli(indice)) == vivi[not gruppo[indice].npc]
+            bersaglio = rng.choice(vivi[not gruppo[indice].npc])
+            gruppo[bersaglio].salute = max(0, gruppo[bersaglio].salute - rng.randint(0, 30))
+            assert scheduler.aggiorna(bersaglio) == (gruppo[bersaglio].salute == 0)
+
+
+def test_sconfitti_scartati_senza_fine_battaglia():
+    gruppo = [Personaggio(nome=f"C{i}", npc=bool(i % 2), salute=100) for i in range(40)]
+    scheduler = TurnScheduler(gruppo)
+    # metà dei combattenti di ogni lato sconfitti: le voci scadute vengono scartate
+    for i in range(len(gruppo)):
+        if i % 4 < 2:
+            gruppo[i].salute = 0
+            scheduler.aggiorna(i)
+    assert not scheduler.finita()
+    for _ in range(100):
+        assert gruppo[scheduler.prossimo()].salute > 0
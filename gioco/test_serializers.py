@@ -0,0 +1,20 @@
+"""
+gioco.serializers deve produrre, su dati casuali, gli stessi dizionari
+(chiavi in ordine) e gli stessi oggetti degli schemi Marshmallow.
+"""
+import json
+import random
+
+import pytest
+
+from gioco import serializers
+from gioco.dati_di_test import random_objects
+
+
+@pytest.mark.usefixtures("senza_log")
+def test_equivalenza_con_marshmallow():
+    # StrategiaFactory e AmbienteFactory registrano ogni istanza creata
+    for obj, schema in random_objects(random.Random(1234), 100):
+        expected = schema.dump(obj)
+        assert json.dumps(serializers.to_dict(obj)) == json.dumps(expected)
+        assert serializers.from_dict(type(obj), expected) == schema.load(expected)
@@ -0,0 +1,61 @@
+"""
+Il simulatore vettoriale (gioco.simulatore) deve dare la stessa
+distribuzione del motore a oggetti (CharacterCombat.run_duel) per ogni
+classe x classe x ambiente: test z su percentuale di vittorie e turni medi.
+"""
+import math
+
+import numpy as np
+import pytest
+
+from characters.utils import CharacterCombat
+from gioco.registry import ambienti, personaggi
+from gioco.simulatore import NESSUN_AMBIENTE, Profilo, simula_duelli
+
+# duelli per cella: pochi per il motore a oggetti, che è il più lento
+DUELLI_OGGETTI = 1000
+DUELLI_SIMULATORE = 20_000
+
+
+def _nuovo(nome: str):
+    return personaggi.classes()[nome](nome=nome, classe=nome)
+
+
+def _ambiente(nome: str):
+    return None if nome == NESSUN_AMBIENTE else ambienti.classes()[nome]()
+
+
+@pytest.mark.usefixtures("senza_log")
+def test_simulatore_come_motore_a_oggetti(z_critico):
+    classi = tuple(personaggi.classes())
+    nomi_ambienti = (NESSUN_AMBIENTE,) + tuple(ambienti.classes())
+    # soglia con correzione di Bonferroni: 2 test per cella, alfa totale 0.001
+    celle = len(classi) ** 2 * len(nomi_ambienti)
+    soglia = z_critico(0.001 / (2 * celle))
+
+    rng = np.random.default_rng(2024)
+    for ambiente_nome in nomi_ambienti:
+        for primo in classi:
+            for secondo in classi:
+                ambiente = _ambiente(ambiente_nome)
+                vittorie, turni = 0, []
+                for _ in range(DUELLI_OGGETTI):
+                    pg1, pg2 = _nuovo(primo), _nuovo(secondo)
+                    _, turno = CharacterCombat.run_duel(pg1, pg2, ambiente)
+                    vittorie += pg2.salute <= 0
+                    turni.append(turno)
+                turni = np.asarray(turni, dtype=np.float64)
+                esito = simula_duelli(Profilo.from_personaggio(_nuovo(primo), ambiente),
+                                      Profilo.from_personaggio(_nuovo(secondo), ambiente),
+                                      DUELLI_SIMULATORE, rng)
+
+                p_comune = (vittorie + esito.vittorie) / (DUELLI_OGGETTI + DUELLI_SIMULATORE)
+                errore = math.sqrt(max(p_comune * (1 - p_comune), 1e-12)
+                                   * (1 / DUELLI_OGGETTI + 1 / DUELLI_SIMULATORE))
+                z_vittorie = (vittorie / DUELLI_OGGETTI - esito.win_rate) / errore
+                errore = math.sqrt(turni.var(ddof=1) / DUELLI_OGGETTI
+                                   + esito.turni.var(ddof=1) / DUELLI_SIMULATORE)
+                z_turni = (turni.mean() - esito.turni_medi) / max(errore, 1e-12)
+                cella = (primo, secondo, ambiente_nome)
+                assert abs(z_vittorie) < soglia, (cella, z_vittorie)
+                assert abs(z_turni) < soglia, (cella, z_turni)
@@ -0,0 +1,94 @@
+"""
+Lo storico compatto dei danni (gioco.storico) contro la vecchia lista:
+aggregati e colpi recenti su liste casuali, migrazione del vecchio formato
+identica fra Marshmallow e codec msgspec, buffer circolare che prosegue
+correttamente dopo un andata e ritorno JSON; documenti incoerenti o con
+contatori fuori intervallo rifiutati da entrambi i percorsi di lettura.
+"""
+import json
+import random
+
+import msgspec
+import pytest
+from marshmallow import ValidationError
+
+from gioco.schemas.personaggio import PersonaggioSchema
+from gioco.storico import (CAPACITA_STORICO, FASCE_ISTOGRAMMA, LARGHEZZA_FASCIA,
+                           MAX_CONTATORE, MAX_DANNO, StoricoDanni)
+from storage.codec import decode_character, encode_document
+
+
+def _atteso(danni: list) -> dict:
+    # documento compatto calcolato dalla lista completa dei colpi
+    limitati = [min(max(d, 0), MAX_DANNO) for d in danni]
+    if len(limitati) <= CAPACITA_STORICO:
+        return {"recenti": limitati} if limitati else {}
+    istogramma = [0] * FASCE_ISTOGRAMMA
+    for d in limitati:
+        istogramma[min(d // LARGHEZZA_FASCIA, FASCE_ISTOGRAMMA - 1)] += 1
+    while istogramma and istogramma[-1] == 0:
+        istogramma.pop()
+    documento = {"recenti": limitati[-CAPACITA_STORICO:], "conteggio": len(limitati),
+                 "somma": sum(limitati), "massimo": max(limitati), "istogramma": istogramma}
+    return {k: v for k, v in documento.items() if v or k == "recenti"}
+
+
+def test_storico_come_lista(personaggio_di_esempio):
+    rng = random.Random(24)
+    schema = PersonaggioSchema()
+    for _ in range(500):
+        danni = [rng.randint(-5, 400) for _ in range(rng.randint(0, 200))]
+        storico = StoricoDanni(danni)
+        assert storico.to_dict() == _atteso(danni), danni
+        assert list(storico) == _atteso(danni).get("recenti", [])
+
+        # vecchio formato: migrazione identica nei due percorsi di lettura
+        legacy = personaggio_di_esempio(storico_danni_subiti=danni)
+        migrato = decode_character(json.dumps(legacy).encode())
+        assert migrato == schema.dump(schema.load(legacy)), danni
+        assert migrato["storico_danni_subiti"] == _atteso(danni)
+
+        # il buffer ripristinato continua a scartare i colpi più vecchi
+        altri = [rng.randint(0, 400) for _ in range(rng.randint(0, 50))]
+        ripristinato = schema.load(decode_character(encode_document(migrato)))
+        ripristinato.storico_danni_subiti.extend(altri)
+        assert ripristinato.storico_danni_subiti.to_dict() == _atteso(danni + altri)
+
+
+def test_aggregati_prima_e_dopo_il_buffer_circolare():
+    storico = StoricoDanni()
+    assert storico.to_dict() == {} and storico.media == 0.0
+    danni = list(range(1, CAPACITA_STORICO + 2))
+    for danno in danni:
+        storico.append(danno)
+        visti = danni[:danni.index(danno) + 1]
+        assert (storico.conteggio, storico.somma, storico.massimo) == (len(visti), sum(visti), max(visti))
+    assert storico.recenti == danni[-CAPACITA_STORICO:]
+    assert StoricoDanni.from_data(storico.to_dict()) == storico
+
+
+@pytest.mark.parametrize("storico", [
+    {"recenti": [1] * CAPACITA_STORICO, "conteggio": 2 ** 64, "istogramma": [2 ** 64]},
+    {"recenti": [1], "conteggio": 2, "somma": 2 ** 64, "istogramma": [2]},
+    {"recenti": [1], "conteggio": 2, "istogramma": [1, 2 ** 64]},
+    {"recenti": [1, 2, 3], "conteggio": 2},
+    {"recenti": [1] * CAPACITA_STORICO, "conteggio": 40, "istogramma": [39]},
+    {"recenti": [1], "conteggio": 2},
+])
+def test_documento_non_valido_rifiutato(personaggio_di_esempio, storico):
+    documento = personaggio_di_esempio(storico_danni_subiti=storico)
+    with pytest.raises(ValidationError):
+        PersonaggioSchema().load(documento)
+    with pytest.raises(msgspec.ValidationError):
+        decode_character(json.dumps(documento).encode())
+
+
+def test_contatori_al_limite(personaggio_di_esempio):
+    storico = {"recenti": [5], "conteggio": MAX_CONTATORE, "somma": MAX_CONTATORE,
+               "massimo": 5, "istogramma": [MAX_CONTATORE]}
+    documento = personaggio_di_esempio(storico_danni_subiti=storico)
+    caricato = PersonaggioSchema().load(documento).storico_danni_subiti
+    assert caricato.to_dict() == storico
+    caricato.append(MAX_DANNO)
+    assert caricato.conteggio == MAX_CONTATORE + 1
+    assert decode_character(json.dumps(documento).encode())["storico_danni_subiti"] == storico
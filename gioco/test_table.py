@@ -0,0 +1,56 @@
+"""
+gioco.table.CharacterTable deve applicare le stesse regole dei metodi di
+Personaggio e sottoclassi: stessa sequenza di operazioni sugli oggetti e
+sulla tabella, stesso risultato.
+"""
+import copy
+import random
+
+import pytest
+
+from gioco.classi import Guerriero, Ladro, Mago
+from gioco.personaggio import Personaggio
+from gioco.table import COLONNE, CharacterTable
+
+
+@pytest.mark.usefixtures("senza_log")
+def test_tabella_come_i_metodi_degli_oggetti():
+    rng = random.Random(7)
+    classi = (Personaggio, Mago, Guerriero, Ladro)
+    oggetti = []
+    for i in range(2000):
+        personaggio = classi[i % len(classi)](nome=f"PG {i}")
+        personaggio.salute = rng.randint(0, personaggio.salute_max)
+        personaggio.attacco_max = rng.randint(50, 150)
+        personaggio.livello = rng.randint(1, 20)
+        oggetti.append(personaggio)
+
+    tabella = CharacterTable.from_personaggi(copy.deepcopy(oggetti))
+    for mod in (0, 5, -3):
+        danni = [rng.randint(0, 60) for _ in oggetti]
+        for personaggio, danno in zip(oggetti, danni):
+            personaggio.subisci_danno(danno)
+        tabella.subisci_danno(danni)
+        assert tabella.sconfitto().tolist() == [p.sconfitto() for p in oggetti]
+
+        prima = tabella.salute.copy()
+        for personaggio in oggetti:
+            if not isinstance(personaggio, Ladro):
+                personaggio.recupera_salute(mod)
+        tabella.recupera_salute(mod)
+        for riga, personaggio in enumerate(oggetti):
+            if isinstance(personaggio, Ladro):
+                # tiro casuale diverso: si controlla l'intervallo della regola
+                minimo = min(prima[riga] + 10 + mod, 140)
+                massimo = min(prima[riga] + 40 + mod, 140)
+                assert minimo <= tabella.salute[riga] <= massimo, personaggio
+                personaggio.salute = int(tabella.salute[riga])
+
+        livello = [i for i in range(len(oggetti)) if i % 3 == 0]
+        for i in livello:
+            oggetti[i].migliora_statistiche()
+        tabella.migliora_statistiche(livello)
+
+    for atteso, personaggio in zip(oggetti, tabella.to_personaggi()):
+        for nome in COLONNE + ("storico_danni_subiti",):
+            assert getattr(atteso, nome) == getattr(personaggio, nome), (nome, atteso, personaggio)
@@ -8,7 +8,7 @@ from . import inventory_bp
 # Import delle classi refactorizzate per inventory
 from .utils import (
     InventoryValidator, InventoryManager, InventoryOperations,
-    InventoryStatsCalculator, InventoryLogger
+    InventoryStatsCalculator, InventoryLogger, InventoryIndex
 )
 
 # Import delle classi refactorizzate per characters
@@ -18,6 +18,8 @@ from gioco.schemas.inventario import InventarioSchema
 from gioco.inventario import Inventario
 from marshmallow import ValidationError
 import os
+from auth.models import db
+from storage.writer import write_pipeline
 from config import DATA_DIR_INV
 
 # Setup logging
@@ -37,7 +39,8 @@ def inventory():
     """
     # Usa le classi refactorizzate per characters
     owned_ids = CharacterManager.filter_owned_characters(current_user.character_ids or [])
-    personaggi = CharacterManager.load_multiple_characters_json(owned_ids)
+    # la pagina mostra solo id, nome e classe: bastano i sommari
+    personaggi = CharacterManager.load_fields(owned_ids, fields=('id', 'nome', 'classe'))
     nome_per_id = {p['id']: p['nome'] for p in personaggi}
 
     # Ottieni ID personaggio da GET o POST
@@ -149,6 +152,10 @@ def add_object():
             success, message = InventoryOperations.add_object_to_inventory(inventario_pg, nuovo_oggetto)
 
             if success:
+                # file scritto prima del commit: se la scrittura fallisce si annulla tutto
+                write_pipeline.flush()
+                db.session.commit()
+
                 # Log operazione con le classi refactorizzate
                 InventoryLogger.log_inventory_operation(
                     "object_added", inventario_pg, current_user.email,
@@ -158,9 +165,13 @@ def add_object():
                 flash(f"Oggetto '{nuovo_oggetto.nome}' aggiunto a {personaggio['nome']}", "success")
                 return redirect(url_for('inventory.inventory', personaggio_id=personaggio_id))
             else:
+                write_pipeline.rollback()
+                db.session.rollback()
                 flash(message, "danger")
 
         except Exception as e:
+            write_pipeline.rollback()
+            db.session.rollback()
             logger.error(f"Errore aggiunta oggetto: {str(e)}")
             flash("Errore durante l'aggiunta dell'oggetto", "danger")
 
@@ -205,6 +216,10 @@ def delete_object(oggetto_id):
         success, message, oggetto_rimosso = InventoryOperations.remove_object_from_inventory(inventario_pg, oggetto_id)
 
         if success and oggetto_rimosso:
+            # file scritto prima del commit: se la scrittura fallisce si annulla tutto
+            write_pipeline.flush()
+            db.session.commit()
+
             # Log operazione con le classi refactorizzate
             InventoryLogger.log_inventory_operation(
                 "object_removed", inventario_pg, current_user.email,
@@ -213,9 +228,13 @@ def delete_object(oggetto_id):
 
             flash(f"Oggetto '{oggetto_rimosso.nome}' rimosso da {personaggio['nome']}", "success")
         else:
+            write_pipeline.rollback()
+            db.session.rollback()
             flash(message, "warning")
 
     except Exception as e:
+        write_pipeline.rollback()
+        db.session.rollback()
         logger.error(f"Errore eliminazione oggetto {oggetto_id}: {str(e)}")
         flash("Errore durante l'eliminazione dell'oggetto", "danger")
 
@@ -263,6 +282,10 @@ def use_object():
         )
 
         if success:
+            # file scritto prima del commit: se la scrittura fallisce si annulla tutto
+            write_pipeline.flush()
+            db.session.commit()
+
             # Log operazione con le classi refactorizzate
             InventoryLogger.log_inventory_operation(
                 "object_used", inventario_pg, current_user.email,
@@ -273,9 +296,13 @@ def use_object():
 
             flash(f"Oggetto '{oggetto_nome}' utilizzato con successo", "success")
         else:
+            write_pipeline.rollback()
+            db.session.rollback()
             flash(message, "danger")
 
     except Exception as e:
+        write_pipeline.rollback()
+        db.session.rollback()
         logger.error(f"Errore utilizzo oggetto: {str(e)}")
         flash("Errore durante l'utilizzo dell'oggetto", "danger")
 
@@ -425,6 +452,16 @@ def search_objects(personaggio_id):
         flash("Errore durante la ricerca", "danger")
         return redirect(url_for('inventory.inventory', personaggio_id=personaggio_id))
 
+# ------------------------COMANDI CLI---------------------------------------
+@inventory_bp.cli.command('rebuild-index')
+def rebuild_index():
+    """
+    Ricostruisce l'indice id_proprietario -> file inventario.
+    Uso: flask --app app inventory rebuild-index
+    """
+    count = InventoryIndex.rebuild()
+    print(f"Indice inventari ricostruito: {count} proprietari")
+
 # ------------------------COMPATIBILITÀ CON CODICE ESISTENTE---------------
 def salva_inventario_su_json(inventario: Inventario):
     """
@@ -437,6 +474,7 @@ def salva_inventario_su_json(inventario: Inventario):
     try:
         success = InventoryManager.save_inventory_json(inventario)
         if success:
+            db.session.commit()
             logger.info("Inventario salvato tramite funzione compatibilità")
         else:
             logger.error("Errore salvataggio inventario tramite funzione compatibilità")
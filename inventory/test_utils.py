@@ -0,0 +1,98 @@
+"""
+InventoryIndex e JsonInventoryRepository: l'inventario di un proprietario
+si trova anche se il file ha un altro nome, le associazioni scritte da
+altri processi vengono viste e le voci orfane vengono rimosse.
+"""
+import json
+import os
+import uuid
+
+from inventory.utils import InventoryIndex, JsonInventoryRepository
+from storage.journal import JournaledIndex
+from storage.layout import document_path
+
+
+def _inventario(owner_id=None) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "id_proprietario": owner_id,
+        "oggetti": [{"id": str(uuid.uuid4()), "nome": "Medaglione", "usato": False, "valore": 10,
+                     "tipo_oggetto": "Buff", "classe": "Medaglione"}],
+    }
+
+
+def _altro_processo() -> JournaledIndex:
+    # stesso snapshot e stesso log, istanza separata come in un altro worker
+    return JournaledIndex(InventoryIndex._index.path, InventoryIndex._scan, "Indice inventari")
+
+
+def test_salvataggio_ed_eliminazione(archivio_json):
+    repository = JsonInventoryRepository()
+    owner_id = str(uuid.uuid4())
+    inventario = _inventario(owner_id)
+    assert repository.save(inventario)
+    assert InventoryIndex.lookup(owner_id) == f"{owner_id}.json"
+    assert repository.load_by_owner(owner_id)["id"] == inventario["id"]
+
+    assert repository.delete_by_owner(owner_id)
+    assert InventoryIndex.lookup(owner_id) is None
+    assert repository.load_by_owner(owner_id) is None
+
+
+def test_file_con_altro_nome_trovato_via_indice(archivio_json):
+    owner_id = str(uuid.uuid4())
+    inventario = _inventario(owner_id)
+    with open(document_path(archivio_json.inv, inventario["id"]), "w", encoding="utf-8") as file:
+        json.dump(inventario, file)
+
+    # l'indice viene costruito dalla scansione dei file al primo accesso
+    assert InventoryIndex.lookup(owner_id) == f"{inventario['id']}.json"
+    assert JsonInventoryRepository().load_by_owner(owner_id)["id"] == inventario["id"]
+
+
+def test_modifiche_di_altri_processi(archivio_json):
+    repository = JsonInventoryRepository()
+    nostro, esterno = str(uuid.uuid4()), str(uuid.uuid4())
+    repository.save(_inventario(nostro))
+    assert InventoryIndex.lookup(esterno) is None
+
+    inventario = _inventario(esterno)
+    with open(document_path(archivio_json.inv, inventario["id"]), "w", encoding="utf-8") as file:
+        json.dump(inventario, file)
+    _altro_processo().update({esterno: f"{inventario['id']}.json"})
+
+    # una scrittura di questo processo non nasconde quella dell'altro
+    InventoryIndex.register(nostro, f"{nostro}.json")
+    assert InventoryIndex.lookup(esterno) == f"{inventario['id']}.json"
+    assert repository.load_by_owner(esterno)["id"] == inventario["id"]
+
+    _altro_processo().update({nostro: None})
+    assert InventoryIndex.lookup(nostro) is None
+
+
+def test_voce_orfana_rimossa(archivio_json):
+    owner_id = str(uuid.uuid4())
+    inventario = _inventario(owner_id)
+    path = document_path(archivio_json.inv, inventario["id"])
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(inventario, file)
+    InventoryIndex.register(owner_id, f"{inventario['id']}.json")
+
+    # file eliminato da fuori: la ricerca non lo trova e pulisce l'indice
+    os.remove(path)
+    assert JsonInventoryRepository().load_by_owner(owner_id) is None
+    assert InventoryIndex.lookup(owner_id) is None
+    assert _altro_processo().get(owner_id) is None
+
+
+def test_ricostruzione(archivio_json):
+    repository = JsonInventoryRepository()
+    owners = [str(uuid.uuid4()) for _ in range(3)]
+    for owner_id in owners:
+        repository.save(_inventario(owner_id))
+    repository.save(_inventario())
+    os.remove(document_path(archivio_json.inv, owners[0]))
+
+    assert InventoryIndex.rebuild() == 2
+    assert InventoryIndex.lookup(owners[0]) is None
+    assert [InventoryIndex.lookup(owner_id) for owner_id in owners[1:]] == [f"{o}.json" for o in owners[1:]]
@@ -1,13 +1,22 @@
 import os
 import json
 import logging
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Mapping, Optional, Tuple
 from gioco.oggetto import Oggetto
 from gioco.inventario import Inventario
+from gioco.registry import oggetti
+from gioco.serializers import to_dict
 from gioco.schemas.oggetto import OggettoSchema
 from gioco.schemas.inventario import InventarioSchema
+import msgspec
 from marshmallow import ValidationError
-from config import DATA_DIR_INV
+from config import DATA_DIR_INV, INVENTORY_INDEX_FILE
+from storage.cache import document_cache
+from storage.journal import JournaledIndex
+from storage.writer import write_pipeline
+from storage.layout import document_path, iter_documents, prepare_path, remove_legacy, resolve_path
+from storage.codec import decode_inventory, encode_document
+from storage.repository import InventoryRepository, RepositoryFactory
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -22,14 +31,14 @@ class InventoryValidator:
     """Classe per validazioni degli inventari e oggetti."""
     
     @staticmethod
-    def get_object_classes() -> Dict[str, type]:
+    def get_object_classes() -> Mapping[str, type]:
         """
-        Ottiene mapping dinamico di tutte le classi oggetto disponibili.
+        Ottiene il mapping delle classi oggetto registrate (gioco.registry).
         
         Returns:
-            Dict[str, type]: Dizionario {nome_oggetto: classe_python}
+            Mapping[str, type]: Mapping di sola lettura {nome_oggetto: classe_python}
         """
-        return {cls.__name__: cls for cls in Oggetto.__subclasses__()}
+        return oggetti.classes()
     
     @staticmethod
     def validate_object_class(object_name: str) -> Tuple[bool, str]:
@@ -93,34 +102,135 @@ class InventoryValidator:
         return True, ""
 
 
-class InventoryManager:
-    """Classe per operazioni CRUD sugli inventari."""
-    
-    @staticmethod
-    def save_inventory_json(inventario: Inventario) -> bool:
+class InventoryIndex:
+    """
+    Indice persistente id_proprietario -> nome file inventario.
+
+    Serve a trovare in O(1) gli inventari il cui file non si chiama
+    <id_proprietario>.json, senza aprire e validare tutti i file di
+    DATA_DIR_INV. L'indice è salvato in INVENTORY_INDEX_FILE come
+    JournaledIndex: save_inventory_json/delete_inventory_json aggiungono
+    una riga al log, le modifiche degli altri processi vengono rilette.
+    """
+
+    _index: JournaledIndex
+
+    @classmethod
+    def _scan(cls) -> Dict[str, str]:
+        """
+        Legge tutti i file inventario ed estrae id_proprietario.
+        È l'unica scansione completa: avviene solo alla ricostruzione.
+
+        Returns:
+            Dict[str, str]: Dizionario {id_proprietario: nome_file}
         """
-        Salva inventario su file JSON usando Marshmallow.
+        owners = {}
+        try:
+            documents = list(iter_documents(DATA_DIR_INV))
+        except OSError as e:
+            logger.error(f"Errore lettura directory inventari: {str(e)}")
+            return owners
+
+        for doc_id, path in documents:
+            file = f"{doc_id}.json"
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"Errore lettura {file} durante ricostruzione indice: {e}")
+                continue
+
+            owner = data.get('id_proprietario') if isinstance(data, dict) else None
+            if owner:
+                owners[str(owner)] = file
+        return owners
+
+    @classmethod
+    def rebuild(cls) -> int:
+        """
+        Ricostruisce da zero l'indice scansionando DATA_DIR_INV
+        e compatta il log.
+
+        Returns:
+            int: Numero di proprietari indicizzati
+        """
+        count = cls._index.rebuild()
+        logger.info(f"Indice inventari ricostruito: {count} proprietari")
+        return count
+
+    @classmethod
+    def lookup(cls, owner_id: str) -> Optional[str]:
+        """
+        Restituisce il nome del file inventario di un proprietario.
+
+        Args:
+            owner_id (str): ID del proprietario
+
+        Returns:
+            Optional[str]: Nome del file o None se non indicizzato
+        """
+        return cls._index.get(str(owner_id))
+
+    @classmethod
+    def register(cls, owner_id: str, file_name: str) -> None:
+        """
+        Associa un proprietario al suo file inventario.
+        Il log cresce solo se l'associazione cambia.
+
+        Args:
+            owner_id (str): ID del proprietario
+            file_name (str): Nome del file inventario
+        """
+        cls._index.update({str(owner_id): file_name})
+
+    @classmethod
+    def unregister(cls, owner_id: str) -> None:
+        """
+        Rimuove un proprietario dall'indice.
+
+        Args:
+            owner_id (str): ID del proprietario
+        """
+        cls._index.update({str(owner_id): None})
+
+
+InventoryIndex._index = JournaledIndex(INVENTORY_INDEX_FILE, InventoryIndex._scan, "Indice inventari")
+
+
+class JsonInventoryRepository(InventoryRepository):
+    """
+    Backend degli inventari su file JSON in DATA_DIR_INV.
+    Il file si chiama <id_proprietario>.json (o <id>.json se senza proprietario);
+    i file con nome diverso vengono trovati tramite InventoryIndex.
+    """
+
+    def save(self, inventario_dict: Dict) -> bool:
+        """
+        Salva inventario serializzato su file JSON.
         
         Args:
-            inventario (Inventario): Istanza inventario da salvare
+            inventario_dict (Dict): Dati inventario serializzati
             
         Returns:
             bool: True se salvato con successo
         """
         try:
             # Determina nome file basato su proprietario o ID inventario
-            file_name = (
-                f"{inventario.id_proprietario}.json"
-                if inventario.id_proprietario else
-                f"{inventario.id}.json"
-            )
-            file_path = os.path.join(DATA_DIR_INV, file_name)
+            owner_id = inventario_dict.get('id_proprietario')
+            doc_id = str(owner_id) if owner_id else str(inventario_dict['id'])
+            file_name = f"{doc_id}.json"
+            file_path = prepare_path(DATA_DIR_INV, doc_id)
             
-            # Serializza con Marshmallow
-            inventario_dict = inventario_schema.dump(inventario)
-            
-            with open(file_path, "w", encoding="utf-8") as file:
-                json.dump(inventario_dict, file, indent=4)
+            data = encode_document(inventario_dict)
+
+            def on_commit():
+                remove_legacy(DATA_DIR_INV, doc_id)
+                document_cache.invalidate('inventari', file_name)
+                if owner_id:
+                    InventoryIndex.register(owner_id, file_name)
+
+            # Scrittura atomica, raggruppata con le altre della stessa richiesta
+            write_pipeline.submit(file_path, data, on_commit=on_commit)
 
             logger.info(f"Inventario salvato: {file_name}")
             return True
@@ -129,8 +239,7 @@ class InventoryManager:
             logger.error(f"Errore salvataggio inventario: {str(e)}")
             return False
     
-    @staticmethod
-    def load_inventory_json(personaggio_id: str) -> Optional[Dict]:
+    def load_by_owner(self, personaggio_id: str) -> Optional[Dict]:
         """
         Carica inventario da file JSON con validazione Marshmallow.
         
@@ -140,66 +249,94 @@ class InventoryManager:
         Returns:
             Optional[Dict]: Dati inventario validati o None se errore
         """
+        # Scrittura della stessa richiesta non ancora su disco
+        pending = write_pipeline.pending(document_path(DATA_DIR_INV, personaggio_id))
+        if pending is not None:
+            return decode_inventory(pending)
+        
         # Prova caricamento diretto per ID proprietario
-        file_name = os.path.join(DATA_DIR_INV, f"{personaggio_id}.json")
+        file_name = resolve_path(DATA_DIR_INV, personaggio_id)
         if os.path.exists(file_name):
-            try:
-                with open(file_name, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                # Validazione con Marshmallow
-                inventario_obj = inventario_schema.load(data)
-                validated_dict = inventario_schema.dump(inventario_obj)
-                
+            validated_dict = self._load_file(file_name)
+            if validated_dict is not None:
                 logger.info(f"Inventario caricato direttamente: {personaggio_id}")
-                return validated_dict
-                
-            except (json.JSONDecodeError, ValidationError) as e:
-                logger.error(f"Errore caricamento inventario {file_name}: {e}")
-                return None
+            return validated_dict
 
-        # Fallback: cerca in tutti i file per ID proprietario
-        return InventoryManager._search_inventory_by_owner(personaggio_id)
+        # Fallback: cerca il file tramite l'indice dei proprietari
+        return self._search_by_owner(personaggio_id)
     
     @staticmethod
-    def _search_inventory_by_owner(personaggio_id: str) -> Optional[Dict]:
+    def _load_file(file_path: str) -> Optional[Dict]:
         """
-        Cerca inventario per ID proprietario in tutti i file (fallback).
+        Legge e valida con Marshmallow un singolo file inventario,
+        passando dalla cache LRU condivisa dei documenti.
         
         Args:
-            personaggio_id (str): ID proprietario da cercare
+            file_path (str): Percorso del file inventario
             
         Returns:
-            Optional[Dict]: Inventario trovato o None
+            Optional[Dict]: Dati inventario validati o None se errore
         """
-        try:
-            for file in os.listdir(DATA_DIR_INV):
-                if file.endswith('.json') and file != '.gitkeep':
-                    file_path = os.path.join(DATA_DIR_INV, file)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                            
-                        if str(data.get('id_proprietario')) == str(personaggio_id):
-                            # Validazione con Marshmallow
-                            inventario_obj = inventario_schema.load(data)
-                            validated_dict = inventario_schema.dump(inventario_obj)
-                            
-                            logger.info(f"Inventario trovato via fallback: {personaggio_id} in {file}")
-                            return validated_dict
-                            
-                    except (json.JSONDecodeError, ValidationError) as e:
-                        logger.error(f"Errore fallback caricamento da {file}: {e}")
-                        continue
+        return document_cache.get_or_load(
+            'inventari', os.path.basename(file_path), file_path,
+            JsonInventoryRepository._read_file
+        )
+    
+    @staticmethod
+    def _read_file(file_path: str) -> Optional[Dict]:
+        """
+        Legge un file inventario e lo valida con il codec msgspec (senza cache),
+        con lo stesso risultato di InventarioSchema.load + dump.
         
-        except Exception as e:
-            logger.error(f"Errore durante ricerca fallback: {str(e)}")
+        Args:
+            file_path (str): Percorso del file inventario
+            
+        Returns:
+            Optional[Dict]: Dati inventario validati o None se errore
+        """
+        try:
+            with open(file_path, 'rb') as f:
+                return decode_inventory(f.read())
+            
+        except (OSError, msgspec.MsgspecError) as e:
+            logger.error(f"Errore caricamento inventario {file_path}: {e}")
+            return None
+    
+    def _search_by_owner(self, personaggio_id: str) -> Optional[Dict]:
+        """
+        Cerca inventario per ID proprietario tramite InventoryIndex (fallback).
+        Il costo è O(1): nessuna scansione della directory.
         
-        logger.warning(f"Inventario non trovato per personaggio {personaggio_id}")
-        return None
+        Args:
+            personaggio_id (str): ID proprietario da cercare
+            
+        Returns:
+            Optional[Dict]: Inventario trovato o None
+        """
+        file = InventoryIndex.lookup(personaggio_id)
+        if file is None:
+            logger.warning(f"Inventario non trovato per personaggio {personaggio_id}")
+            return None
+
+        file_path = resolve_path(DATA_DIR_INV, os.path.splitext(file)[0])
+        if not os.path.exists(file_path):
+            # Voce dell'indice orfana: il file è stato rimosso dall'esterno
+            InventoryIndex.unregister(personaggio_id)
+            logger.warning(f"Inventario indicizzato ma assente per personaggio {personaggio_id}")
+            return None
+
+        validated_dict = self._load_file(file_path)
+        if validated_dict is None:
+            return None
+
+        if str(validated_dict.get('id_proprietario')) != str(personaggio_id):
+            logger.warning(f"Indice inventari non aggiornato per {personaggio_id}: {file}")
+            return None
+
+        logger.info(f"Inventario trovato via indice: {personaggio_id} in {file}")
+        return validated_dict
     
-    @staticmethod
-    def delete_inventory_json(personaggio_id: str) -> bool:
+    def delete_by_owner(self, personaggio_id: str) -> bool:
         """
         Elimina file JSON inventario del personaggio.
         
@@ -210,10 +347,20 @@ class InventoryManager:
             bool: True se eliminato con successo
         """
         try:
-            file_path = os.path.join(DATA_DIR_INV, f"{personaggio_id}.json")
+            doc_id = str(personaggio_id)
+            if not os.path.exists(resolve_path(DATA_DIR_INV, doc_id)):
+                indexed_file = InventoryIndex.lookup(personaggio_id)
+                if indexed_file:
+                    doc_id = os.path.splitext(indexed_file)[0]
             
+            write_pipeline.discard(document_path(DATA_DIR_INV, doc_id))
+            document_cache.invalidate('inventari', f"{doc_id}.json")
+            
+            file_path = resolve_path(DATA_DIR_INV, doc_id)
             if os.path.exists(file_path):
                 os.remove(file_path)
+                remove_legacy(DATA_DIR_INV, doc_id)
+                InventoryIndex.unregister(personaggio_id)
                 logger.info(f"Inventario eliminato: {file_path}")
                 return True
             else:
@@ -224,8 +371,7 @@ class InventoryManager:
             logger.error(f"Errore eliminazione inventario {personaggio_id}: {str(e)}")
             return False
     
-    @staticmethod
-    def get_all_inventory_files() -> List[str]:
+    def all_ids(self) -> List[str]:
         """
         Ottiene lista di tutti i file inventario esistenti.
         
@@ -233,13 +379,7 @@ class InventoryManager:
             List[str]: Lista di IDs inventari trovati
         """
         try:
-            files = os.listdir(DATA_DIR_INV)
-            inventory_ids = []
-            
-            for file in files:
-                if file.endswith('.json') and file != '.gitkeep':
-                    filename = os.path.splitext(file)[0]
-                    inventory_ids.append(filename)
+            inventory_ids = [doc_id for doc_id, _ in iter_documents(DATA_DIR_INV)]
             
             logger.info(f"Trovati {len(inventory_ids)} file inventario")
             return inventory_ids
@@ -247,6 +387,66 @@ class InventoryManager:
         except Exception as e:
             logger.error(f"Errore lettura directory inventari: {str(e)}")
             return []
+
+
+class InventoryManager:
+    """Classe per operazioni CRUD sugli inventari."""
+    
+    @staticmethod
+    def save_inventory_json(inventario: Inventario) -> bool:
+        """
+        Salva inventario tramite il repository configurato.
+        
+        Args:
+            inventario (Inventario): Istanza inventario da salvare
+            
+        Returns:
+            bool: True se salvato con successo
+        """
+        try:
+            # Serializza con il serializzatore generato (stesso output di InventarioSchema.dump)
+            inventario_dict = to_dict(inventario)
+        except Exception as e:
+            logger.error(f"Errore serializzazione inventario: {str(e)}")
+            return False
+        
+        return RepositoryFactory.inventories().save(inventario_dict)
+    
+    @staticmethod
+    def load_inventory_json(personaggio_id: str) -> Optional[Dict]:
+        """
+        Carica inventario dal repository configurato con validazione Marshmallow.
+        
+        Args:
+            personaggio_id (str): ID del proprietario dell'inventario
+            
+        Returns:
+            Optional[Dict]: Dati inventario validati o None se errore
+        """
+        return RepositoryFactory.inventories().load_by_owner(personaggio_id)
+    
+    @staticmethod
+    def delete_inventory_json(personaggio_id: str) -> bool:
+        """
+        Elimina l'inventario del personaggio dal repository configurato.
+        
+        Args:
+            personaggio_id (str): ID del proprietario
+            
+        Returns:
+            bool: True se eliminato con successo
+        """
+        return RepositoryFactory.inventories().delete_by_owner(personaggio_id)
+    
+    @staticmethod
+    def get_all_inventory_files() -> List[str]:
+        """
+        Ottiene lista di tutti gli inventari esistenti.
+        
+        Returns:
+            List[str]: Lista di IDs inventari trovati
+        """
+        return RepositoryFactory.inventories().all_ids()
     
     @staticmethod
     def create_object_instance(object_type: str) -> Oggetto:
@@ -1,9 +1,14 @@
-from flask import Blueprint, render_template, session, redirect, url_for
-from flask_login import current_user
+from flask import Blueprint, render_template, session, redirect, url_for, abort, jsonify
+from flask_login import current_user, login_required
 from . import statistics_bp
 import os
 import json
-from config import DATA_DIR_SAVE, DATA_DIR_PGS, load_leaderboard
+from config import DATA_DIR_SAVE, load_leaderboard
+from battle.store import battle_store
+from characters.utils import CharacterManager
+from storage.cache import document_cache
+from storage.codec import validation_stats
+from storage.repository import RepositoryFactory
 
 template_dir = os.path.abspath(
     os.path.join(os.path.dirname(__file__), '..', 'templates')
@@ -32,21 +37,11 @@ def show_statistics():
     if current_user.is_authenticated:
         has_personaggi = False
         has_missioni = False
-        # controlla se ci sono personaggi e missioni nel file json
-        for filename in os.listdir(DATA_DIR_PGS):
-            if filename.endswith('.json'):
-                full_path = os.path.join(DATA_DIR_PGS, filename)
-                try:
-                    with open(full_path, 'r', encoding='utf-8') as file:
-                        personaggi = json.load(file)
-                        for char_id in current_user.character_ids:
-                            if personaggi['id'] == char_id:
-                                has_personaggi = True
-                                break
-                except (json.JSONDecodeError, KeyError, IOError) as e:
-                    # Salta i file JSON corrotti o malformati
-                    print(f"Errore nel caricamento del file {filename}: {e}")
-                    continue
+        # controlla se l'utente ha personaggi esistenti (indice dei personaggi,
+        # senza leggere tutti i file) e se c'è una missione salvata
+        has_personaggi = bool(
+            CharacterManager.filter_owned_characters(current_user.character_ids)
+        )
         file_path_save = os.path.join(DATA_DIR_SAVE, "salvataggio.json")
         if os.path.exists(file_path_save):
             try:
@@ -73,4 +68,24 @@ def show_statistics():
 
 @statistics_bp.route('/analytics_dashboard')
 def analytics_dashboard():
-    return redirect(url_for('gioco.coming_soon_session'))
\ No newline at end of file
+    return redirect(url_for('gioco.coming_soon_session'))
+
+
+@statistics_bp.route('/api/storage/stats')
+@login_required
+def storage_stats():
+    """
+    Contatori dello storage per gli amministratori: documenti letti senza
+    validazione grazie al checksum, statistiche della cache e delle
+    battaglie in corso, distribuzione per classe di tutti i personaggi
+    (con il backend pack una sola lettura sequenziale del file).
+    """
+    if not current_user.is_admin():
+        abort(403)
+
+    return jsonify({
+        'personaggi_per_classe': RepositoryFactory.characters().count_all_by_class(),
+        'validazione': validation_stats.stats(),
+        'cache': document_cache.stats(),
+        'battaglie': battle_store.stats()
+    })
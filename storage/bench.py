@@ -0,0 +1,971 @@
+"""
+Benchmark del livello di storage.
+
+Uso:
+    python -m storage.bench writer [--saves N] [--batch B]
+    python -m storage.bench codec [--rounds N]
+    python -m storage.bench scan [--docs N]
+    python -m storage.bench schemas [--rounds N]
+    python -m storage.bench serializers [--rounds N]
+    python -m storage.bench memory [--characters N] [--items N]
+    python -m storage.bench table [--characters N] [--rounds N]
+    python -m storage.bench duels [--objects N] [--duels N]
+    python -m storage.bench farm [--duels N] [--workers N]
+    python -m storage.bench replay [--duels N]
+    python -m storage.bench scheduler [--combatants N]
+    python -m storage.bench exact
+    python -m storage.bench environment [--calls N]
+    python -m storage.bench events [--duels N]
+    python -m storage.bench history [--hits N]
+    python -m storage.bench battles [--battles N] [--requests N]
+
+Qui si misurano solo i tempi: le verifiche di equivalenza con le
+implementazioni precedenti sono nei test accanto ai moduli (python -m pytest).
+"""
+import io
+import os
+import json
+import contextlib
+import time
+import uuid
+import shutil
+import argparse
+import tempfile
+import dataclasses
+
+from storage.layout import iter_documents
+from storage.codec import decode_character, encode_document
+from storage.writer import AtomicWriter, DURABILITY_MODES
+
+
+def _sample_character() -> dict:
+    """
+    Restituisce un personaggio serializzato di esempio.
+
+    Returns:
+        dict: Personaggio come salvato in DATA_DIR_PGS
+    """
+    return {
+        "classe": "Guerriero",
+        "id": str(uuid.uuid4()),
+        "nome": "Benchmark",
+        "npc": False,
+        "salute_max": 130,
+        "salute": 130,
+        "attacco_min": 20,
+        "attacco_max": 100,
+        "livello": 1,
+        "destrezza": 15,
+        "storico_danni_subiti": {},
+    }
+
+
+def bench_writer(saves: int, batch: int) -> None:
+    """
+    Misura i salvataggi al secondo per ogni modalità di durabilità,
+    confrontandoli con la vecchia scrittura in-place.
+
+    Args:
+        saves (int): Numero di salvataggi per modalità
+        batch (int): Scritture raggruppate in un commit (come in una richiesta)
+    """
+    docs = [_sample_character() for _ in range(saves)]
+    payloads = [json.dumps(doc, indent=4).encode("utf-8") for doc in docs]
+
+    print(f"{'modalità':<12} {'salvataggi/s':>14}   ({saves} salvataggi, commit da {batch})")
+
+    directory = tempfile.mkdtemp(prefix="bench_writer_")
+    try:
+        start = time.perf_counter()
+        for doc in docs:
+            with open(os.path.join(directory, f"{doc['id']}.json"), "w", encoding="utf-8") as file:
+                json.dump(doc, file, indent=4)
+        elapsed = time.perf_counter() - start
+        print(f"{'in-place':<12} {saves / elapsed:>14.0f}")
+
+        for mode in DURABILITY_MODES:
+            writer = AtomicWriter(mode)
+            start = time.perf_counter()
+            for i in range(0, saves, batch):
+                writer.commit({
+                    os.path.join(directory, f"{docs[j]['id']}.json"): payloads[j]
+                    for j in range(i, min(i + batch, saves))
+                })
+            elapsed = time.perf_counter() - start
+            print(f"{mode:<12} {saves / elapsed:>14.0f}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def bench_codec(rounds: int) -> None:
+    """
+    Misura i documenti decodificati e validati al secondo con Marshmallow
+    e con msgspec (l'equivalenza è verificata in storage/test_codec.py).
+
+    Args:
+        rounds (int): Numero di decodifiche per codec
+    """
+    from gioco.schemas.personaggio import PersonaggioSchema
+
+    raw = json.dumps(_sample_character(), indent=4).encode("utf-8")
+    sealed = encode_document(json.loads(raw))
+    schema = PersonaggioSchema()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            schema.dump(schema.load(json.loads(raw)))
+        marshmallow_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        decode_character(raw)
+    msgspec_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        decode_character(sealed)
+    trusted_elapsed = time.perf_counter() - start
+
+    print(f"{'codec':<12} {'documenti/s':>14}")
+    print(f"{'marshmallow':<12} {rounds / marshmallow_elapsed:>14.0f}")
+    print(f"{'msgspec':<12} {rounds / msgspec_elapsed:>14.0f}")
+    print(f"{'checksum':<12} {rounds / trusted_elapsed:>14.0f}")
+
+
+def bench_scan(docs: int) -> None:
+    """
+    Confronta il tempo di una scansione completa (distribuzione per classe)
+    su un file JSON per documento e sul file pack con gli stessi documenti
+    (l'uguaglianza dei risultati è verificata in storage/test_pack.py).
+
+    Args:
+        docs (int): Numero di personaggi generati
+    """
+    import msgspec
+    from storage.pack import PackStore, PackCharacterRepository
+
+    classi = ("Mago", "Guerriero", "Ladro")
+    characters = []
+    for i in range(docs):
+        character = _sample_character()
+        character["classe"] = classi[i % len(classi)]
+        characters.append(character)
+
+    directory = tempfile.mkdtemp(prefix="bench_scan_")
+    try:
+        for character in characters:
+            with open(os.path.join(directory, f"{character['id']}.json"), "w", encoding="utf-8") as file:
+                json.dump(character, file, indent=4)
+
+        store = PackStore(os.path.join(directory, "personaggi.pack"), durability="no-fsync")
+        store.put_many({c["id"]: msgspec.json.encode(c) for c in characters})
+        store.checkpoint()
+
+        start = time.perf_counter()
+        counts = {}
+        for _, path in iter_documents(directory):
+            with open(path, "rb") as file:
+                classe = decode_character(file.read())["classe"]
+            counts[classe] = counts.get(classe, 0) + 1
+        files_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        repository = PackCharacterRepository(PackStore(store.path))
+        repository.count_all_by_class()
+        pack_elapsed = time.perf_counter() - start
+
+        print(f"{'archivio':<12} {'ms':>10}   ({docs} personaggi)")
+        print(f"{'file JSON':<12} {files_elapsed * 1000:>10.1f}")
+        print(f"{'pack':<12} {pack_elapsed * 1000:>10.1f}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _legacy_schemas() -> dict:
+    """
+    Schemi con il post_load precedente al registro delle classi (mappa
+    ricostruita da __subclasses__() e print del payload a ogni oggetto),
+    usati come riferimento "prima" in bench_schemas.
+
+    Returns:
+        dict: {famiglia: schema}
+    """
+    from marshmallow import post_load
+    from gioco.ambiente import Ambiente, AmbienteSchema
+    from gioco.oggetto import Oggetto
+    from gioco.personaggio import Personaggio
+    from gioco.schemas.oggetto import OggettoSchema
+    from gioco.schemas.personaggio import PersonaggioSchema
+
+    def subclasses_map(base: type) -> dict:
+        return {subcls.__name__: subcls for subcls in base.__subclasses__()}
+
+    class LegacyPersonaggioSchema(PersonaggioSchema):
+        @post_load
+        def make_personaggio(self, data, **_kwargs):
+            print(f"\nimport: \n{data}\n")
+            return subclasses_map(Personaggio)[data.get("classe")](**data)
+
+    class LegacyOggettoSchema(OggettoSchema):
+        @post_load
+        def make_oggetto(self, data, **kwargs):
+            oggetto_cls = subclasses_map(Oggetto).get(data.get("classe"))
+            if oggetto_cls is None:
+                return Oggetto(**data)
+            return oggetto_cls(**{k: v for k, v in data.items() if k != "classe"})
+
+    class LegacyAmbienteSchema(AmbienteSchema):
+        @post_load
+        def make_obj(self, data, **kwargs):
+            ambiente_cls = subclasses_map(Ambiente).get(data.get("classe"), Ambiente)
+            return ambiente_cls(**{k: v for k, v in data.items() if k != "classe"})
+
+    return {
+        "personaggi": LegacyPersonaggioSchema(),
+        "oggetti": LegacyOggettoSchema(),
+        "ambienti": LegacyAmbienteSchema(),
+    }
+
+
+def _fields_of(obj) -> dict:
+    """
+    Args:
+        obj: Istanza di una dataclass (anche con slots, quindi senza __dict__)
+
+    Returns:
+        dict: {nome campo: valore}
+    """
+    return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+
+
+def bench_schemas(rounds: int) -> None:
+    """
+    Oggetti deserializzati al secondo dagli schemi Marshmallow con il
+    post_load che usa gioco.registry, confrontati con la versione che
+    percorreva __subclasses__() a ogni oggetto.
+
+    Args:
+        rounds (int): Oggetti deserializzati per schema
+    """
+    from gioco.ambiente import AmbienteSchema
+    from gioco.schemas.oggetto import OggettoSchema
+    from gioco.schemas.personaggio import PersonaggioSchema
+
+    payloads = {
+        "personaggi": _sample_character(),
+        "oggetti": {"nome": "Pozione Rossa", "usato": False, "valore": 30,
+                    "tipo_oggetto": "Ristorativo", "classe": "PozioneCura"},
+        "ambienti": {"classe": "Foresta", "nome": "Foresta", "mod_attacco": 0, "mod_cura": 0.0},
+    }
+    current = {
+        "personaggi": PersonaggioSchema(),
+        "oggetti": OggettoSchema(),
+        "ambienti": AmbienteSchema(),
+    }
+    legacy = _legacy_schemas()
+
+    def measure(load, payload) -> float:
+        # stdout su un file reale: il print del vecchio post_load costa una write
+        with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                load(payload)
+            return rounds / (time.perf_counter() - start)
+
+    def post_load_only(schema):
+        # solo l'hook post_load, senza la validazione dei campi di Marshmallow
+        hook = getattr(schema, {"personaggi": "make_personaggio", "oggetti": "make_oggetto",
+                                "ambienti": "make_obj"}[famiglia])
+        return lambda payload: hook(dict(payload), many=False)
+
+    print(f"{'schema':<12} {'load prima/s':>14} {'load dopo/s':>14} {'hook prima/s':>14} {'hook dopo/s':>14}")
+    for famiglia, payload in payloads.items():
+        loaded = current[famiglia].load(payload)
+        fields_payload = {k: v for k, v in _fields_of(loaded).items() if k != "classe"}
+        fields_payload["classe"] = payload["classe"]
+        print(f"{famiglia:<12}"
+              f" {measure(legacy[famiglia].load, payload):>14.0f}"
+              f" {measure(current[famiglia].load, payload):>14.0f}"
+              f" {measure(post_load_only(legacy[famiglia]), fields_payload):>14.0f}"
+              f" {measure(post_load_only(current[famiglia]), fields_payload):>14.0f}")
+
+    # liste (inventari, nemici delle missioni): un load per elemento contro many=True
+    classi = ("Mago", "Guerriero", "Ladro")
+    personaggi = []
+    for i in range(100):
+        personaggio = _sample_character()
+        personaggio["classe"] = classi[i % len(classi)]
+        personaggi.append(personaggio)
+    oggetti = [dict(payloads["oggetti"], classe=classe)
+               for classe in ("PozioneCura", "BombaAcida", "Medaglione") * 33]
+
+    print(f"\n{'lista':<12} {'per elemento/s':>14} {'many=True/s':>14}   (oggetti/s, liste da 100)")
+    for famiglia, items in (("personaggi", personaggi), ("oggetti", oggetti)):
+        schema = current[famiglia]
+        singoli = measure(lambda batch: [schema.load(item) for item in batch], items) * len(items)
+        blocco = measure(lambda batch: schema.load(batch, many=True), items) * len(items)
+        print(f"{famiglia:<12} {singoli:>14.0f} {blocco:>14.0f}")
+
+
+def bench_serializers(rounds: int) -> None:
+    """
+    Misura la velocità di serializzazione e deserializzazione di
+    gioco.serializers contro Marshmallow (l'equivalenza è verificata in
+    gioco/test_serializers.py).
+
+    Args:
+        rounds (int): Ripetizioni per la misura della velocità
+    """
+    import random
+    import logging
+    from gioco import serializers
+    from gioco.dati_di_test import random_objects
+
+    # StrategiaFactory e AmbienteFactory registrano ogni istanza creata
+    logging.disable(logging.INFO)
+    samples = random_objects(random.Random(42), 1)
+    print(f"{'classe':<12} {'dump mm/s':>12} {'to_dict/s':>12} {'load mm/s':>12} {'from_dict/s':>12}")
+    for obj, schema in samples:
+        data = schema.dump(obj)
+        cls = type(obj)
+        timings = []
+        for fn in (lambda: schema.dump(obj), lambda: serializers.to_dict(obj),
+                   lambda: schema.load(data), lambda: serializers.from_dict(cls, data)):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                fn()
+            timings.append(rounds / (time.perf_counter() - start))
+        print(f"{cls.__name__:<12}" + "".join(f" {t:>12.0f}" for t in timings))
+
+
+def _legacy_dataclass(cls: type) -> type:
+    """
+    Ricostruisce una dataclass di gioco com'era prima di gioco.compact:
+    stessi campi e default, ma con __dict__ per istanza e UUID come oggetti.
+
+    Args:
+        cls (type): Dataclass con slots
+
+    Returns:
+        type: Dataclass equivalente senza slots
+    """
+    specs = []
+    for f in dataclasses.fields(cls):
+        options = {"init": f.init}
+        if f.default is not dataclasses.MISSING:
+            options["default"] = f.default
+        if f.default_factory is not dataclasses.MISSING:
+            options["default_factory"] = f.default_factory
+        specs.append((f.name, f.type, dataclasses.field(**options)))
+    namespace = {"__post_init__": cls.__post_init__} if hasattr(cls, "__post_init__") else {}
+    return dataclasses.make_dataclass(cls.__name__, specs, namespace=namespace)
+
+
+def bench_memory(characters: int, items: int) -> None:
+    """
+    Memoria per entità (tracemalloc) delle dataclass di gioco prima e dopo
+    slots e id compatti, accanto a gioco.compact.MEMORY_BUDGET (il rispetto
+    del budget è verificato in gioco/test_compact.py).
+
+    Args:
+        characters (int): Personaggi (e inventari) da creare
+        items (int): Oggetti da creare
+    """
+    import gc
+    import sys
+    import tracemalloc
+    from gioco.classi import Guerriero
+    from gioco.compact import MEMORY_BUDGET
+    from gioco.inventario import Inventario
+    from gioco.oggetto import PozioneCura
+
+    def measure(make, count: int):
+        gc.collect()
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        entities = [None] * count
+        for i in range(count):
+            entities[i] = make(i)
+        elapsed = time.perf_counter() - start
+        allocated = tracemalloc.get_traced_memory()[0] - baseline - sys.getsizeof(entities)
+        tracemalloc.stop()
+        del entities
+        return allocated / count, count / elapsed
+
+    # nomi nuovi per i personaggi, nomi di default (condivisi) per gli oggetti,
+    # come nel gioco; ogni inventario ha un proprietario
+    cases = (
+        ("Personaggio", Guerriero, characters, lambda cls: lambda i: cls(nome=f"Personaggio {i}")),
+        ("Oggetto", PozioneCura, items, lambda cls: lambda i: cls()),
+        ("Inventario", Inventario, characters, lambda cls: lambda i: cls(id_proprietario=uuid.uuid4())),
+    )
+    print(f"{'entità':<12} {'numero':>9} {'B prima':>8} {'B dopo':>8} {'budget':>7}"
+          f" {'MB prima':>9} {'MB dopo':>8} {'crea prima/s':>13} {'crea dopo/s':>12}")
+    for nome, cls, count, factory in cases:
+        before, rate_before = measure(factory(_legacy_dataclass(cls)), count)
+        after, rate_after = measure(factory(cls), count)
+        print(f"{nome:<12} {count:>9} {before:>8.0f} {after:>8.0f} {MEMORY_BUDGET[nome]:>7}"
+              f" {before * count / 2**20:>9.1f} {after * count / 2**20:>8.1f}"
+              f" {rate_before:>13.0f} {rate_after:>12.0f}")
+
+
+def bench_table(characters: int, rounds: int) -> None:
+    """
+    Confronta la velocità di un turno (danno, sconfitti, recupero, livello)
+    oggetto per oggetto contro gioco.table.CharacterTable (l'equivalenza
+    delle regole è verificata in gioco/test_table.py).
+
+    Args:
+        characters (int): Personaggi nella tabella
+        rounds (int): Turni per la misura della velocità
+    """
+    import random
+    import logging
+    import numpy as np
+    from gioco.classi import Guerriero, Ladro, Mago
+    from gioco.personaggio import Personaggio
+    from gioco.table import CharacterTable
+
+    # i metodi degli oggetti scrivono un messaggio per chiamata: esclusi dalla misura
+    logging.disable(logging.INFO)
+    rng = random.Random(7)
+    classi = (Personaggio, Mago, Guerriero, Ladro)
+
+    def genera(count: int) -> list:
+        personaggi = []
+        for i in range(count):
+            personaggio = classi[i % len(classi)](nome=f"PG {i}")
+            personaggio.salute = rng.randint(0, personaggio.salute_max)
+            personaggio.attacco_max = rng.randint(50, 150)
+            personaggio.livello = rng.randint(1, 20)
+            personaggi.append(personaggio)
+        return personaggi
+
+    personaggi = genera(characters)
+    danni = [rng.randint(0, 60) for _ in personaggi]
+
+    def turno_oggetti() -> None:
+        for personaggio, danno in zip(personaggi, danni):
+            personaggio.subisci_danno(danno)
+        for personaggio in personaggi:
+            if not personaggio.sconfitto():
+                personaggio.recupera_salute()
+                personaggio.migliora_statistiche()
+
+    tabella = CharacterTable.from_personaggi(personaggi)
+    danni_array = np.asarray(danni)
+    generatore = np.random.default_rng(7)
+
+    def turno_tabella() -> None:
+        tabella.subisci_danno(danni_array)
+        vivi = ~tabella.sconfitto()
+        tabella.recupera_salute(indici=vivi, rng=generatore)
+        tabella.migliora_statistiche(vivi)
+
+    print(f"{'modo':<10} {'turni/s':>10} {'personaggi/s':>14}   ({characters} personaggi)")
+    for modo, turno in (("oggetti", turno_oggetti), ("tabella", turno_tabella)):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            turno()
+        per_secondo = rounds / (time.perf_counter() - start)
+        print(f"{modo:<10} {per_secondo:>10.1f} {per_secondo * characters:>14.0f}")
+
+    start = time.perf_counter()
+    tabella = CharacterTable.from_personaggi(personaggi)
+    tabella.to_personaggi()
+    print(f"conversione andata e ritorno: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+def bench_duels(objects: int, duels: int) -> None:
+    """
+    Misura la velocità del motore a oggetti (CharacterCombat.run_duel) e
+    del simulatore vettoriale (gioco.simulatore), poi stampa la matrice di
+    vittorie classe x classe x ambiente. L'equivalenza statistica dei due
+    motori è verificata in gioco/test_simulatore.py.
+
+    Args:
+        objects (int): Duelli del motore a oggetti
+        duels (int): Duelli del simulatore per cella
+    """
+    import logging
+    from characters.utils import CharacterCombat
+    from gioco.registry import ambienti, personaggi
+    from gioco.simulatore import NESSUN_AMBIENTE, matrice_duelli
+
+    logging.disable(logging.INFO)
+    classi = tuple(personaggi.classes())
+    nomi_ambienti = (NESSUN_AMBIENTE,) + tuple(ambienti.classes())
+    celle = len(classi) ** 2 * len(nomi_ambienti)
+
+    def nuovo(nome: str):
+        return personaggi.classes()[nome](nome=nome, classe=nome)
+
+    start = time.perf_counter()
+    for _ in range(objects):
+        CharacterCombat.run_duel(nuovo("Mago"), nuovo("Ladro"), ambienti.classes()["Vulcano"]())
+    oggetti_al_secondo = objects / (time.perf_counter() - start)
+    start = time.perf_counter()
+    matrice = matrice_duelli(classi, nomi_ambienti, duelli=duels, seed=1)
+    vettore_al_secondo = duels * celle / (time.perf_counter() - start)
+    print(f"duelli/s: oggetti {oggetti_al_secondo:.0f}, simulatore {vettore_al_secondo:.0f}")
+
+    print(f"\nVittorie di chi attacca per primo ({duels} duelli per cella)")
+    for k, ambiente_nome in enumerate(matrice.ambienti):
+        print(f"{ambiente_nome:<10}" + "".join(f" {nome:>10}" for nome in matrice.classi))
+        for i, primo in enumerate(matrice.classi):
+            print(f"{primo:<10}" + "".join(f" {matrice.win_rate[i, j, k]:>10.3f}"
+                                           for j in range(len(matrice.classi))))
+
+
+def bench_farm(duels: int, workers: int) -> None:
+    """
+    Misura turni/s e turni/s per core di gioco.farm da 1 a `workers`
+    processi (la riproducibilità con numeri diversi di processi è
+    verificata in gioco/test_farm.py).
+
+    Args:
+        duels (int): Duelli per cella del motore vettoriale
+        workers (int): Processi massimi
+    """
+    from gioco.farm import SimulationFarm
+
+    print(f"{'processi':>8} {'turni':>12} {'secondi':>8} {'turni/s':>12} {'per core':>12} {'efficienza':>10}")
+    n = 1
+    while n <= workers:
+        risultato = SimulationFarm(n).run(duels, seed=1)
+        print(f"{n:>8} {risultato.turni_totali:>12} {risultato.secondi:>8.2f}"
+              f" {risultato.turni_al_secondo:>12.0f} {risultato.turni_al_secondo_per_core:>12.0f}"
+              f" {risultato.efficienza:>10.0%}")
+        n *= 2
+    print(f"core disponibili: {os.cpu_count()}")
+
+
+def bench_replay(duels: int) -> None:
+    """
+    Misura la velocità del replay di gioco.replay e la dimensione dei
+    registri (l'identità dei duelli rigiocati è verificata in
+    gioco/test_replay.py).
+
+    Args:
+        duels (int): Duelli da registrare e rigiocare
+    """
+    import random
+    import logging
+    from gioco.registry import ambienti, personaggi
+    from gioco.replay import BattleRecord, play_duel, replay_duel
+    from gioco.serializers import to_dict
+
+    logging.disable(logging.INFO)
+    scelta = random.Random(99)
+    classi = list(personaggi.classes())
+    nomi_ambienti = [None] + list(ambienti.classes())
+
+    def documento() -> dict:
+        nome = scelta.choice(classi)
+        personaggio = personaggi.classes()[nome](nome=f"{nome} {scelta.randint(1, 999)}", classe=nome)
+        personaggio.livello = scelta.randint(1, 10)
+        return to_dict(personaggio)
+
+    giocati = [play_duel(documento(), documento(), scelta.choice(nomi_ambienti)) for _ in range(duels)]
+    registri = [BattleRecord.from_dict(json.loads(json.dumps(registro.to_dict())))
+                for _, registro in giocati]
+
+    start = time.perf_counter()
+    for registro in registri:
+        replay_duel(registro)
+    al_secondo = duels / (time.perf_counter() - start)
+
+    dimensione = sum(len(json.dumps(registro.to_dict())) for registro in registri) / duels
+    turni = sum(esito.turni for esito, _ in giocati) / duels
+    print(f"replay/s: {al_secondo:.0f}, turni medi {turni:.1f}, registro medio {dimensione:.0f} byte")
+
+
+def bench_scheduler(combatants: int) -> None:
+    """
+    Misura le operazioni al secondo di gioco.scheduler.TurnScheduler su una
+    battaglia con molti combattenti, anche con metà dei combattenti
+    sconfitti. Il confronto con il riferimento a scansione e le battaglie
+    ripristinate a ogni azione sono verificati in gioco/test_scheduler.py
+    e battle/test_battle.py.
+
+    Args:
+        combatants (int): Combattenti della battaglia misurata
+    """
+    import logging
+    from gioco.personaggio import Personaggio
+    from gioco.scheduler import TurnScheduler
+
+    logging.disable(logging.INFO)
+    gruppo = [Personaggio(nome=f"C{i}", npc=bool(i % 2), salute=10 ** 9) for i in range(combatants)]
+    scheduler = TurnScheduler(gruppo)
+    turni = combatants * 20
+    start = time.perf_counter()
+    for _ in range(turni):
+        indice = scheduler.prossimo()
+        scheduler.bersagli(indice)
+        scheduler.finita()
+    al_secondo = turni / (time.perf_counter() - start)
+    # metà dei combattenti di ogni lato sconfitti: le voci scadute vengono scartate
+    for i in range(combatants):
+        if i % 4 < 2:
+            gruppo[i].salute = 0
+            scheduler.aggiorna(i)
+    start = time.perf_counter()
+    for _ in range(turni):
+        scheduler.prossimo()
+    sconfitti = turni / (time.perf_counter() - start)
+    print(f"{combatants} combattenti: {al_secondo:,.0f} turni/s (prossimo+bersagli+finita), "
+          f"{sconfitti:,.0f} turni/s con metà sconfitti")
+
+
+def bench_exact() -> None:
+    """
+    Misura il tempo di calcolo di gioco.probabilita.duello_esatto per ogni
+    classe x classe x ambiente, con e senza cache, e su un duello con
+    salute 1000 (il confronto con ricorsione diretta e simulatore è
+    verificato in gioco/test_probabilita.py).
+    """
+    import logging
+    from gioco.registry import ambienti, personaggi
+    from gioco.simulatore import NESSUN_AMBIENTE, Profilo
+    from gioco.probabilita import duello_esatto
+
+    logging.disable(logging.INFO)
+    classi = tuple(personaggi.classes())
+    coppie = []
+    for ambiente_nome in (NESSUN_AMBIENTE,) + tuple(ambienti.classes()):
+        ambiente = None if ambiente_nome == NESSUN_AMBIENTE else ambienti.classes()[ambiente_nome]()
+        profili = [Profilo.from_personaggio(personaggi.classes()[nome](nome=nome, classe=nome), ambiente)
+                   for nome in classi]
+        coppie.extend((primo, secondo) for primo in profili for secondo in profili)
+
+    duello_esatto.cache_clear()
+    start = time.perf_counter()
+    for coppia in coppie:
+        duello_esatto(*coppia)
+    freddo = (time.perf_counter() - start) / len(coppie) * 1000
+    start = time.perf_counter()
+    for coppia in coppie:
+        duello_esatto(*coppia)
+    caldo = (time.perf_counter() - start) / len(coppie) * 1e6
+    grande = Profilo(salute=1000, destrezza=15, attacco_min=10, attacco_max=85,
+                     regola='tiro', mod_ambiente=0)
+    start = time.perf_counter()
+    duello_esatto(grande, grande)
+    print(f"ms per duello: {freddo:.2f} (calcolo), {caldo:.1f} µs in cache; "
+          f"1000x1000 stati in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+def bench_environment(calls: int) -> None:
+    """
+    Misura le chiamate al secondo dei modificatori d'ambiente e della
+    scelta dell'ambiente, con le tabelle e con le regole originali
+    (l'equivalenza è verificata in gioco/test_ambiente.py).
+
+    Args:
+        calls (int): Chiamate per la misura della velocità
+    """
+    import logging
+    from gioco.ambiente import AmbienteFactory
+    from gioco.oggetto import BombaAcida
+    from gioco.dati_di_test import legacy_environment_rules
+    from gioco.registry import personaggi
+
+    originali = legacy_environment_rules()
+    registro = logging.getLogger("gioco.ambiente")
+
+    # misura con il logging attivo, come nel gioco
+    logging.disable(logging.NOTSET)
+    registro.addHandler(logging.NullHandler())
+    registro.propagate = False
+    vulcano, mago = AmbienteFactory.istanza("Vulcano"), personaggi.classes()["Mago"](nome="Mago")
+    bomba = BombaAcida()
+    misure = [
+        ("modifica_attacco", lambda: originali["attacco"](vulcano, mago), lambda: vulcano.modifica_attacco(mago)),
+        ("modifica_effetto_oggetto", lambda: originali["oggetto"](vulcano, bomba),
+         lambda: vulcano.modifica_effetto_oggetto(bomba)),
+        ("usa_ambiente", lambda: originali["usa_ambiente"]("2"), lambda: AmbienteFactory.usa_ambiente("2")),
+    ]
+    print(f"{'operazione':<26} {'prima/s':>12} {'dopo/s':>12}")
+    try:
+        for nome, prima, dopo in misure:
+            velocita = []
+            for fn in (prima, dopo):
+                start = time.perf_counter()
+                for _ in range(calls):
+                    fn()
+                velocita.append(calls / (time.perf_counter() - start))
+            print(f"{nome:<26} {velocita[0]:>12,.0f} {velocita[1]:>12,.0f}")
+    finally:
+        registro.propagate = True
+
+
+def bench_events(duels: int) -> None:
+    """
+    Misura i duelli/s del motore a oggetti senza ascoltatori, con il bus
+    degli eventi (gioco.eventi) e con gli eventi formattati e scritti nel
+    log a ogni azione (come prima degli eventi). La coerenza degli eventi
+    con i duelli è verificata in gioco/test_eventi.py.
+
+    Args:
+        duels (int): Duelli per misura
+    """
+    import random
+    import logging
+    from characters.utils import CharacterCombat
+    from gioco.eventi import EventBus, inoltra_al_log, registra
+    from gioco.registry import personaggi
+    from gioco.rng import seeded
+
+    logging.disable(logging.NOTSET)
+    for nome in ("gioco", "characters"):
+        registro = logging.getLogger(nome)
+        registro.addHandler(logging.NullHandler())
+        registro.propagate = False
+    logging.getLogger("characters.utils").setLevel(logging.WARNING)
+
+    classi = list(personaggi.classes().values())
+    scelta = random.Random(8)
+    coppie = [(scelta.choice(classi), scelta.choice(classi)) for _ in range(duels)]
+
+    def duello(coppia, seed: int) -> None:
+        with seeded(seed):
+            CharacterCombat.run_duel(coppia[0](nome="Primo"), coppia[1](nome="Secondo"))
+
+    def misura(contesto) -> float:
+        start = time.perf_counter()
+        with contesto():
+            for seed, coppia in enumerate(coppie):
+                duello(coppia, seed)
+        return duels / (time.perf_counter() - start)
+
+    senza_bus = misura(contextlib.nullcontext)
+    con_bus = misura(lambda: registra(EventBus()))
+    con_log = misura(lambda: registra(EventBus(ascoltatori=[inoltra_al_log])))
+    print(f"duelli/s: senza ascoltatori {senza_bus:,.0f}, bus {con_bus:,.0f}, "
+          f"testo nel log a ogni evento {con_log:,.0f}")
+
+
+def bench_history(hits: int) -> None:
+    """
+    Confronta lo storico compatto dei danni (gioco.storico) con la vecchia
+    lista: dimensione del documento, memoria e append/s (la coerenza con
+    la lista è verificata in gioco/test_storico.py).
+
+    Args:
+        hits (int): Colpi dello storico più lungo nella misura
+    """
+    import random
+    import tracemalloc
+    from gioco.storico import StoricoDanni
+
+    rng = random.Random(24)
+    print(f"{'colpi':>8} {'JSON lista':>11} {'JSON compatto':>14} {'mem lista':>10} {'mem compatto':>13}")
+    n = 0
+    while True:
+        danni = [rng.randint(0, 120) for _ in range(n)]
+        righe = []
+        for costruisci in (list, StoricoDanni):
+            tracemalloc.start()
+            storico = costruisci(danni)
+            memoria = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            documento = storico if isinstance(storico, list) else storico.to_dict()
+            righe.append((len(json.dumps(documento, indent=4)), memoria))
+        print(f"{n:>8} {righe[0][0]:>11} {righe[1][0]:>14} {righe[0][1]:>10} {righe[1][1]:>13}")
+        if n >= hits:
+            break
+        n = min(max(n * 10, 10), hits)
+
+    danni = [rng.randint(0, 120) for _ in range(hits)]
+    for costruisci in (list, StoricoDanni):
+        storico = costruisci()
+        start = time.perf_counter()
+        for danno in danni:
+            storico.append(danno)
+        print(f"append/s {costruisci.__name__}: {hits / (time.perf_counter() - start):,.0f}")
+
+
+def bench_battles(battles: int, requests: int) -> None:
+    """
+    Confronta la memoria per battaglia stimata da battle.store con
+    tracemalloc e misura le richieste/s con lo store e con la battaglia
+    serializzata in sessione ad ogni richiesta (il comportamento
+    precedente). La coerenza dello store con la sessione è verificata in
+    battle/test_store.py.
+
+    Args:
+        battles (int): Battaglie concorrenti nella misura
+        requests (int): Richieste per misura
+    """
+    import random
+    import logging
+    import tracemalloc
+    from battle.store import BattleStore, stima_memoria
+    from battle.utils import Battle, BattleManager
+
+    logging.disable(logging.WARNING)
+    rng = random.Random(25)
+
+    def nuova(seed: int) -> Battle:
+        docs = [dict(_sample_character(), id=str(uuid.UUID(int=rng.getrandbits(128))), nome=f"PG {i}")
+                for i in range(1 + seed % 3)]
+        return BattleManager.start_battle(docs, rng.choice([None, "Foresta", "Vulcano"]), seed)
+
+    def azione(battle: Battle, scelta: int) -> None:
+        bersagli = sorted(battle.scheduler.bersagli(battle.attivo))
+        battle.azione_giocatore(bersagli[scelta % len(bersagli)])
+
+    tracemalloc.start()
+    campioni = []
+    for seed in range(300):
+        battle = nuova(seed)
+        for scelta in range(rng.randrange(30)):
+            if battle.attivo is None:
+                break
+            azione(battle, scelta)
+        campioni.append(battle)
+    misurata = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    stimata = sum(stima_memoria(b) for b in campioni)
+    print(f"memoria per battaglia: stimata {stimata / 300:,.0f} B, tracemalloc {misurata / 300:,.0f} B")
+    del campioni
+
+    def misura(store_fn, nome: str) -> None:
+        partite = [nuova(seed) for seed in range(battles)]
+        stato = store_fn(partite)
+        scelte = [(rng.randrange(battles), rng.randrange(100)) for _ in range(requests)]
+        start = time.perf_counter()
+        for i, scelta in scelte:
+            stato(i, scelta)
+        print(f"{nome:<28} {requests / (time.perf_counter() - start):>10,.0f} richieste/s")
+
+    def sessione(partite):
+        sessioni = [b.to_dict() for b in partite]
+
+        def richiesta(i, scelta):
+            battle = Battle.from_dict(sessioni[i])
+            if battle.attivo is None:
+                battle = nuova(i)
+            azione(battle, scelta)
+            sessioni[i] = battle.to_dict()
+        return richiesta
+
+    def in_memoria(max_entries):
+        def crea(partite):
+            directory = tempfile.mkdtemp()
+            store = BattleStore(directory, max_entries, 1 << 40, 3600, 86400)
+            ids = [store.create(b, 0) for b in partite]
+
+            def richiesta(i, scelta):
+                with store.open(ids[i], 0) as battle:
+                    if battle.attivo is None:
+                        store.remove(ids[i], 0)
+                        ids[i] = store.create(nuova(i), 0)
+                        return
+                    azione(battle, scelta)
+            return richiesta
+        return crea
+
+    print(f"{battles} battaglie concorrenti")
+    misura(sessione, "sessione (to_dict/from_dict)")
+    misura(in_memoria(battles), "store in memoria")
+    misura(in_memoria(battles // 10), "store, 10% in memoria")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del livello di storage")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    writer = sub.add_parser("writer", help="salvataggi/s per modalità di durabilità")
+    writer.add_argument("--saves", type=int, default=2000)
+    writer.add_argument("--batch", type=int, default=2)
+
+    codec = sub.add_parser("codec", help="velocità del codec msgspec contro Marshmallow")
+    codec.add_argument("--rounds", type=int, default=20000)
+
+    scan = sub.add_parser("scan", help="scansione completa: file JSON contro pack")
+    scan.add_argument("--docs", type=int, default=10000)
+
+    schemas = sub.add_parser("schemas", help="oggetti/s degli schemi prima e dopo il registro delle classi")
+    schemas.add_argument("--rounds", type=int, default=20000)
+
+    serializers = sub.add_parser("serializers", help="velocità dei serializzatori generati contro Marshmallow")
+    serializers.add_argument("--rounds", type=int, default=5000)
+
+    memory = sub.add_parser("memory", help="memoria per entità prima e dopo slots e id compatti")
+    memory.add_argument("--characters", type=int, default=100_000)
+    memory.add_argument("--items", type=int, default=1_000_000)
+
+    table = sub.add_parser("table", help="CharacterTable contro i metodi dei personaggi")
+    table.add_argument("--characters", type=int, default=10000)
+    table.add_argument("--rounds", type=int, default=20)
+
+    duels = sub.add_parser("duels", help="duelli/s del simulatore vettoriale e del motore a oggetti")
+    duels.add_argument("--objects", type=int, default=2000)
+    duels.add_argument("--duels", type=int, default=200_000)
+
+    farm = sub.add_parser("farm", help="farm multiprocesso: turni/s per core")
+    farm.add_argument("--duels", type=int, default=200_000)
+    farm.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+
+    replay = sub.add_parser("replay", help="velocità del replay e dimensione dei registri")
+    replay.add_argument("--duels", type=int, default=2000)
+
+    scheduler = sub.add_parser("scheduler", help="turni/s della coda di iniziativa")
+    scheduler.add_argument("--combatants", type=int, default=10000)
+
+    sub.add_parser("exact", help="tempo di calcolo dell'esito esatto dei duelli")
+
+    environment = sub.add_parser("environment", help="velocità delle tabelle dei modificatori d'ambiente")
+    environment.add_argument("--calls", type=int, default=200_000)
+
+    events = sub.add_parser("events", help="costo degli eventi di combattimento")
+    events.add_argument("--duels", type=int, default=20000)
+
+    history = sub.add_parser("history", help="storico compatto dei danni contro la vecchia lista")
+    history.add_argument("--hits", type=int, default=100_000)
+
+    battles = sub.add_parser("battles", help="battaglie in memoria contro lo stato in sessione")
+    battles.add_argument("--battles", type=int, default=5000)
+    battles.add_argument("--requests", type=int, default=20000)
+
+    args = parser.parse_args()
+    if args.comando == "writer":
+        bench_writer(args.saves, args.batch)
+    elif args.comando == "codec":
+        bench_codec(args.rounds)
+    elif args.comando == "scan":
+        bench_scan(args.docs)
+    elif args.comando == "schemas":
+        bench_schemas(args.rounds)
+    elif args.comando == "serializers":
+        bench_serializers(args.rounds)
+    elif args.comando == "memory":
+        bench_memory(args.characters, args.items)
+    elif args.comando == "table":
+        bench_table(args.characters, args.rounds)
+    elif args.comando == "duels":
+        bench_duels(args.objects, args.duels)
+    elif args.comando == "farm":
+        bench_farm(args.duels, args.workers)
+    elif args.comando == "replay":
+        bench_replay(args.duels)
+    elif args.comando == "scheduler":
+        bench_scheduler(args.combatants)
+    elif args.comando == "exact":
+        bench_exact()
+    elif args.comando == "environment":
+        bench_environment(args.calls)
+    elif args.comando == "events":
+        bench_events(args.duels)
+    elif args.comando == "history":
+        bench_history(args.hits)
+    elif args.comando == "battles":
+        bench_battles(args.battles, args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import os
+import copy
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from config import CACHE_MAX_ENTRIES, CACHE_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class DocumentCache:
+    """
+    Cache LRU read-through, limitata per numero di voci e per byte,
+    dei documenti JSON già validati (personaggi, inventari).
+
+    Ogni voce è indicizzata da (namespace, id) e ricorda la coppia
+    (mtime_ns, size) del file da cui è stata letta: se il file su disco
+    cambia, la voce non è più valida e il documento viene ricaricato.
+    Il peso in byte di una voce è stimato con la dimensione del file.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        """
+        Args:
+            max_entries (int): Numero massimo di documenti in cache
+            max_bytes (int): Budget massimo in byte (somma delle dimensioni dei file)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[Tuple[int, int], Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_load(self, namespace: str, doc_id: Hashable, path: str,
+                    loader: Callable[[str], Optional[Dict]]) -> Optional[Dict]:
+        """
+        Restituisce il documento dalla cache o lo carica con loader.
+
+        Args:
+            namespace (str): Tipo di documento (es. 'personaggi', 'inventari')
+            doc_id (Hashable): ID del documento
+            path (str): Percorso del file sorgente
+            loader (Callable[[str], Optional[Dict]]): Funzione che legge e valida il file
+
+        Returns:
+            Optional[Dict]: Copia del documento o None se il file non esiste
+            o il loader non restituisce nulla
+        """
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self.invalidate(namespace, doc_id)
+            return None
+
+        stamp = (st.st_mtime_ns, st.st_size)
+        key = (namespace, doc_id)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            self.misses += 1
+
+        value = loader(path)
+        if value is None:
+            return None
+
+        self._store(key, stamp, value)
+        return copy.deepcopy(value)
+
+    def get_fresh(self, namespace: str, doc_id: Hashable,
+                  stamp: Tuple[int, int]) -> Optional[Dict]:
+        """
+        Restituisce il documento in cache solo se è stato letto da un file
+        con lo stesso (mtime_ns, size); usato dai caricamenti multipli che
+        eseguono lo stat per conto proprio.
+
+        Args:
+            namespace (str): Tipo di documento
+            doc_id (Hashable): ID del documento
+            stamp (Tuple[int, int]): (mtime_ns, size) attuale del file
+
+        Returns:
+            Optional[Dict]: Copia del documento o None se assente o non aggiornato
+        """
+        key = (namespace, doc_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            self.misses += 1
+        return None
+
+    def put(self, namespace: str, doc_id: Hashable, stamp: Tuple[int, int], value: Dict) -> None:
+        """
+        Inserisce un documento già validato, letto da un file con il dato stamp.
+
+        Args:
+            namespace (str): Tipo di documento
+            doc_id (Hashable): ID del documento
+            stamp (Tuple[int, int]): (mtime_ns, size) del file letto
+            value (Dict): Documento validato
+        """
+        self._store((namespace, doc_id), stamp, value)
+
+    def _store(self, key: Tuple[str, Hashable], stamp: Tuple[int, int], value: Dict) -> None:
+        """
+        Inserisce una voce ed elimina le meno recenti oltre i limiti.
+
+        Args:
+            key (Tuple[str, Hashable]): Chiave (namespace, id)
+            stamp (Tuple[int, int]): (mtime_ns, size) del file letto
+            value (Dict): Documento validato
+        """
+        size = stamp[1]
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[0][1]
+
+            self._entries[key] = (stamp, value)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (old_stamp, _) = self._entries.popitem(last=False)
+                self._bytes -= old_stamp[1]
+                self.evictions += 1
+
+    def invalidate(self, namespace: str, doc_id: Hashable) -> None:
+        """
+        Rimuove un documento dalla cache (chiamato dai percorsi di save/delete).
+
+        Args:
+            namespace (str): Tipo di documento
+            doc_id (Hashable): ID del documento
+        """
+        with self._lock:
+            entry = self._entries.pop((namespace, doc_id), None)
+            if entry is not None:
+                self._bytes -= entry[0][1]
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """
+        Svuota completamente la cache mantenendo i contatori.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Restituisce i contatori della cache.
+
+        Returns:
+            Dict[str, int]: hits, misses, evictions, invalidations, entries, bytes
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+# Istanza condivisa dal processo per personaggi e inventari
+document_cache = DocumentCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES)
@@ -0,0 +1,464 @@
+"""
+Codec msgspec per personaggi e inventari sul percorso di lettura/scrittura
+dello storage JSON.
+
+Le Struct rispecchiano le dataclass di gioco (Personaggio e sottoclassi,
+Oggetto e sottoclassi, Inventario) e gli schemi Marshmallow: stessi campi,
+stessi default e stesso ordine delle chiavi di PersonaggioSchema.dump e
+InventarioSchema.dump, così i documenti decodificati sono identici a quelli
+di Marshmallow. La validazione avviene in C durante la decodifica, senza
+istanziare gli oggetti di gioco.
+
+Ogni documento salvato porta in coda la chiave '_meta' con la versione
+dello schema e il checksum del contenuto calcolato al salvataggio. In
+lettura, se versione e checksum corrispondono, il documento è quello
+scritto (e già validato) dall'applicazione e la validazione viene saltata;
+i file senza '_meta' o modificati a mano seguono la validazione completa.
+È un cambio di formato dei file: fino a '_meta' il contenuto è quello di
+json.dump(indent=4), ma il file non è più identico byte per byte e chi
+lo legge senza questo codec (es. con PersonaggioSchema.load) deve
+scartare la chiave '_meta'. I decoder la rimuovono sempre.
+
+Lo storico dei danni nel vecchio formato (lista di danni) viene convertito
+in decodifica nel documento compatto di gioco.storico.StoricoDanni.
+"""
+import uuid
+import hashlib
+import threading
+from typing import Annotated, Any, Dict, List, Optional, Union
+
+import msgspec
+
+from gioco.storico import CAPACITA_STORICO, FASCE_ISTOGRAMMA, MAX_CONTATORE, MAX_DANNO, StoricoDanni
+
+# Versione del formato dei documenti: va incrementata quando cambiano
+# campi o default delle Struct, così i documenti salvati prima vengono
+# rivalidati invece di essere considerati affidabili
+SCHEMA_VERSION = 3
+
+META_KEY = '_meta'
+
+# Byte finali del documento in cui cercare '_meta' (il blocco ne occupa meno di 128)
+_TAIL_WINDOW = 256
+
+
+# ------------------- PERSONAGGI -------------------
+
+Danno = Annotated[int, msgspec.Meta(ge=0, le=MAX_DANNO)]
+Contatore = Annotated[int, msgspec.Meta(ge=0, le=MAX_CONTATORE)]
+
+
+class StoricoStruct(msgspec.Struct, kw_only=True, omit_defaults=True):
+    """
+    Storico dei danni compatto, chiavi nell'ordine di StoricoDanni.to_dict
+    e, come in to_dict, senza le chiavi che valgono 0.
+    """
+    recenti: Annotated[List[Danno], msgspec.Meta(max_length=CAPACITA_STORICO)] = []
+    conteggio: Contatore = 0
+    somma: Contatore = 0
+    massimo: Danno = 0
+    istogramma: Annotated[List[Contatore], msgspec.Meta(max_length=FASCE_ISTOGRAMMA)] = []
+
+    def __post_init__(self) -> None:
+        # stessi controlli di coerenza di gioco.storico.StoricoDanniField
+        if self.conteggio and self.conteggio < len(self.recenti):
+            raise ValueError(f"'conteggio' ({self.conteggio}) minore dei colpi recenti")
+        if self.conteggio > len(self.recenti) and sum(self.istogramma) != self.conteggio:
+            raise ValueError(f"'istogramma' non somma al conteggio ({self.conteggio})")
+        # aggregati ricalcolabili dai colpi recenti: non vengono conservati
+        if self.conteggio <= len(self.recenti):
+            self.conteggio = self.somma = self.massimo = 0
+            self.istogramma = []
+        else:
+            while self.istogramma and self.istogramma[-1] == 0:
+                self.istogramma.pop()
+
+
+class PersonaggioStruct(msgspec.Struct, tag_field='classe', kw_only=True):
+    """
+    Personaggio serializzato. Il campo 'classe' è il tag dell'unione:
+    in decodifica sceglie la Struct della sottoclasse, in codifica
+    viene scritto per primo come in PersonaggioSchema.
+    """
+    id: uuid.UUID = msgspec.field(default_factory=uuid.uuid4)
+    nome: str
+    npc: bool = True
+    salute_max: int = 200
+    salute: int = 100
+    attacco_min: int = 5
+    attacco_max: int = 80
+    livello: int = 1
+    destrezza: int = 15
+    storico_danni_subiti: Union[StoricoStruct, List[int]] = msgspec.field(default_factory=StoricoStruct)
+
+    def __post_init__(self) -> None:
+        # vecchio formato: aggregati calcolati sull'intera lista
+        if isinstance(self.storico_danni_subiti, list):
+            self.storico_danni_subiti = StoricoStruct(
+                **StoricoDanni(self.storico_danni_subiti).to_dict()
+            )
+
+
+class MagoStruct(PersonaggioStruct, tag='Mago', kw_only=True):
+    """Default di gioco.classi.Mago."""
+    salute_max: int = 80
+    salute: int = 80
+    attacco_min: int = 0
+    attacco_max: int = 90
+
+
+class GuerrieroStruct(PersonaggioStruct, tag='Guerriero', kw_only=True):
+    """Default di gioco.classi.Guerriero."""
+    salute_max: int = 130
+    salute: int = 130
+    attacco_min: int = 20
+    attacco_max: int = 100
+
+
+class LadroStruct(PersonaggioStruct, tag='Ladro', kw_only=True):
+    """Default di gioco.classi.Ladro."""
+    salute_max: int = 120
+    salute: int = 120
+    attacco_min: int = 10
+    attacco_max: int = 85
+
+
+PersonaggioUnion = Union[MagoStruct, GuerrieroStruct, LadroStruct]
+
+
+# ------------------- OGGETTI E INVENTARI -------------------
+
+class OggettoStruct(msgspec.Struct, tag_field='classe', kw_only=True):
+    """
+    Oggetto serializzato, con dispatch sulla 'classe' come per i personaggi.
+    OggettoSchema scrive 'classe' come ultima chiave: l'ordine viene
+    ripristinato in _oggetto_to_dict.
+    """
+    id: uuid.UUID = msgspec.field(default_factory=uuid.uuid4)
+    nome: str = ""
+    usato: bool = False
+    valore: int = 30
+    tipo_oggetto: str = ""
+
+
+class PozioneCuraStruct(OggettoStruct, tag='PozioneCura', kw_only=True):
+    """Default di gioco.oggetto.PozioneCura."""
+    nome: str = "Pozione Rossa"
+    valore: int = 30
+    tipo_oggetto: str = "Ristorativo"
+
+
+class BombaAcidaStruct(OggettoStruct, tag='BombaAcida', kw_only=True):
+    """Default di gioco.oggetto.BombaAcida."""
+    nome: str = "Bomba Acida"
+    valore: int = 30
+    tipo_oggetto: str = "Offensivo"
+
+
+class MedaglioneStruct(OggettoStruct, tag='Medaglione', kw_only=True):
+    """Default di gioco.oggetto.Medaglione."""
+    nome: str = "Medaglione"
+    valore: int = 10
+    tipo_oggetto: str = "Buff"
+
+
+OggettoUnion = Union[PozioneCuraStruct, BombaAcidaStruct, MedaglioneStruct]
+
+
+class InventarioStruct(msgspec.Struct, kw_only=True):
+    """Inventario serializzato, campi nell'ordine di InventarioSchema."""
+    id: uuid.UUID = msgspec.field(default_factory=uuid.uuid4)
+    id_proprietario: Optional[uuid.UUID] = None
+    oggetti: List[OggettoUnion] = []
+
+
+class SommarioStruct(msgspec.Struct):
+    """Sommario di un personaggio (storage.repository.SUMMARY_FIELDS): gli altri campi vengono saltati."""
+    id: str
+    nome: str
+    classe: str
+    livello: int = 1
+
+
+# Decoder ed encoder riutilizzabili (evitano di ricostruire il tipo ad ogni chiamata)
+_raw_decoder = msgspec.json.Decoder()
+_sommario_decoder = msgspec.json.Decoder(SommarioStruct)
+_personaggio_decoder = msgspec.json.Decoder(PersonaggioUnion)
+_personaggi_decoder = msgspec.json.Decoder(List[PersonaggioUnion])
+_inventario_decoder = msgspec.json.Decoder(InventarioStruct)
+_encoder = msgspec.json.Encoder()
+
+
+class ValidationStats:
+    """
+    Contatori delle letture: percorso veloce (checksum valido, nessuna
+    validazione) e validazione completa (documenti legacy o modificati).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.trusted = 0
+        self.validated = 0
+
+    def record(self, trusted: bool) -> None:
+        """
+        Args:
+            trusted (bool): True se la lettura ha usato il percorso veloce
+        """
+        with self._lock:
+            if trusted:
+                self.trusted += 1
+            else:
+                self.validated += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: trusted, validated e percentuale di letture veloci
+        """
+        with self._lock:
+            total = self.trusted + self.validated
+            return {
+                "trusted": self.trusted,
+                "validated": self.validated,
+                "trusted_ratio": round(self.trusted / total, 4) if total else 0.0,
+            }
+
+
+# Contatori condivisi dal processo
+validation_stats = ValidationStats()
+
+
+def _checksum(prefix) -> str:
+    """
+    Args:
+        prefix (bytes | memoryview): Byte del documento prima della chiave '_meta'
+
+    Returns:
+        str: Checksum esadecimale del contenuto
+    """
+    return hashlib.blake2b(prefix, digest_size=16).hexdigest()
+
+
+def _trusted(data) -> Optional[Dict]:
+    """
+    Restituisce il documento senza validarlo se '_meta' certifica che è
+    stato scritto da encode_document con la versione di schema corrente.
+    Il checksum è calcolato sui byte del file che precedono '_meta',
+    quindi la verifica non richiede di ricodificare il documento.
+
+    Args:
+        data (bytes | memoryview): Documento JSON
+
+    Returns:
+        Optional[Dict]: Documento senza '_meta', o None se va validato
+    """
+    try:
+        doc = _raw_decoder.decode(data)
+    except msgspec.DecodeError:
+        return None
+    if not isinstance(doc, dict) or next(reversed(doc), None) != META_KEY:
+        return None
+
+    meta = doc.pop(META_KEY)
+    if not isinstance(meta, dict) or meta.get('versione') != SCHEMA_VERSION:
+        return None
+
+    # '_meta' è l'ultima chiave: la cerchiamo solo in coda al documento
+    tail = bytes(data[-_TAIL_WINDOW:])
+    key_pos = tail.rfind(b'"' + META_KEY.encode() + b'"')
+    comma_pos = tail.rfind(b",", 0, key_pos) if key_pos >= 0 else -1
+    if comma_pos < 0:
+        return None
+
+    prefix_end = len(data) - len(tail) + comma_pos
+    if meta.get('checksum') != _checksum(memoryview(data)[:prefix_end]):
+        return None
+    return doc
+
+
+def _oggetto_to_dict(oggetto: OggettoStruct) -> Dict:
+    """
+    Converte un oggetto in dizionario con 'classe' come ultima chiave.
+
+    Args:
+        oggetto (OggettoStruct): Oggetto decodificato
+
+    Returns:
+        Dict: Oggetto come prodotto da OggettoSchema.dump
+    """
+    data = msgspec.to_builtins(oggetto)
+    data['classe'] = data.pop('classe')
+    return data
+
+
+def _inventario_to_dict(inventario: InventarioStruct) -> Dict:
+    """
+    Args:
+        inventario (InventarioStruct): Inventario decodificato
+
+    Returns:
+        Dict: Inventario come prodotto da InventarioSchema.dump
+    """
+    return {
+        'id': str(inventario.id),
+        'id_proprietario': str(inventario.id_proprietario) if inventario.id_proprietario is not None else None,
+        'oggetti': [_oggetto_to_dict(oggetto) for oggetto in inventario.oggetti],
+    }
+
+
+def decode_character(data: bytes) -> Dict:
+    """
+    Decodifica e valida un personaggio in formato JSON.
+
+    Args:
+        data (bytes): Documento JSON del personaggio
+
+    Returns:
+        Dict: Personaggio validato, come PersonaggioSchema.dump(load(...))
+
+    Raises:
+        msgspec.ValidationError: Se i dati non sono validi
+        msgspec.DecodeError: Se il JSON è malformato
+    """
+    doc = _trusted(data)
+    validation_stats.record(doc is not None)
+    if doc is not None:
+        return doc
+    return msgspec.to_builtins(_personaggio_decoder.decode(data))
+
+
+def decode_characters(raws: List[bytes]) -> List[Dict]:
+    """
+    Decodifica un gruppo di personaggi: quelli con checksum valido senza
+    validazione, gli altri validati in un solo passaggio unendoli in un
+    unico array JSON.
+
+    Args:
+        raws (List[bytes]): Documenti JSON dei personaggi
+
+    Returns:
+        List[Dict]: Personaggi validati, nello stesso ordine
+
+    Raises:
+        msgspec.ValidationError: Se almeno un documento non è valido
+        msgspec.DecodeError: Se almeno un documento è malformato
+    """
+    docs = [_trusted(raw) for raw in raws]
+    to_validate = [raw for raw, doc in zip(raws, docs) if doc is None]
+    for doc in docs:
+        validation_stats.record(doc is not None)
+    if not to_validate:
+        return docs
+
+    validated = msgspec.to_builtins(
+        _personaggi_decoder.decode(b"[" + b",".join(to_validate) + b"]")
+    )
+    if len(validated) != len(to_validate):
+        raise msgspec.DecodeError("Numero di documenti decodificati non corrispondente")
+
+    validated_iter = iter(validated)
+    return [doc if doc is not None else next(validated_iter) for doc in docs]
+
+
+def decode_summary(data: bytes) -> Dict:
+    """
+    Decodifica solo il sommario di un personaggio, senza validare né
+    convertire gli altri campi.
+
+    Args:
+        data (bytes): Documento JSON del personaggio
+
+    Returns:
+        Dict: {'id', 'nome', 'classe', 'livello'}
+
+    Raises:
+        msgspec.ValidationError: Se i campi del sommario non sono validi
+        msgspec.DecodeError: Se il JSON è malformato
+    """
+    summary = _sommario_decoder.decode(data)
+    return {'id': summary.id, 'nome': summary.nome, 'classe': summary.classe, 'livello': summary.livello}
+
+
+def validate_character(doc: Dict) -> Dict:
+    """
+    Valida un personaggio già in forma di dizionario (es. colonna JSON SQLite).
+
+    Args:
+        doc (Dict): Personaggio serializzato
+
+    Returns:
+        Dict: Personaggio validato
+
+    Raises:
+        msgspec.ValidationError: Se i dati non sono validi
+    """
+    validation_stats.record(False)
+    return msgspec.to_builtins(msgspec.convert(doc, PersonaggioUnion))
+
+
+def decode_inventory(data: bytes) -> Dict:
+    """
+    Decodifica e valida un inventario in formato JSON.
+
+    Args:
+        data (bytes): Documento JSON dell'inventario
+
+    Returns:
+        Dict: Inventario validato, come InventarioSchema.dump(load(...))
+
+    Raises:
+        msgspec.ValidationError: Se i dati non sono validi
+        msgspec.DecodeError: Se il JSON è malformato
+    """
+    doc = _trusted(data)
+    validation_stats.record(doc is not None)
+    if doc is not None:
+        return doc
+    return _inventario_to_dict(_inventario_decoder.decode(data))
+
+
+def validate_inventory(doc: Dict) -> Dict:
+    """
+    Valida un inventario già in forma di dizionario.
+
+    Args:
+        doc (Dict): Inventario serializzato
+
+    Returns:
+        Dict: Inventario validato
+
+    Raises:
+        msgspec.ValidationError: Se i dati non sono validi
+    """
+    validation_stats.record(False)
+    return _inventario_to_dict(msgspec.convert(doc, InventarioStruct))
+
+
+def encode_document(doc: Dict, indent: int = 4) -> bytes:
+    """
+    Codifica un documento in JSON aggiungendo in coda la chiave '_meta' con
+    versione dello schema e checksum dei byte che la precedono. Con indent=4
+    i byte prima di '_meta' sono quelli di
+    json.dumps(doc, indent=4, ensure_ascii=False) in UTF-8 senza la '}'
+    finale; il file completo contiene in più il blocco '_meta'.
+
+    Args:
+        doc (Dict): Documento validato da salvare
+        indent (int): Spazi di indentazione, 0 per JSON compatto
+
+    Returns:
+        bytes: Contenuto del file
+    """
+    body = _encoder.encode({key: value for key, value in doc.items() if key != META_KEY})
+    if indent:
+        body = msgspec.json.format(body, indent=indent)
+    if body == b"{}":
+        return body
+
+    # il documento senza la '}' finale, poi ',' e il blocco '_meta'
+    prefix = body[:-1].rstrip()
+    meta = _encoder.encode({META_KEY: {'versione': SCHEMA_VERSION, 'checksum': _checksum(prefix)}})
+    if indent:
+        meta = msgspec.json.format(meta, indent=indent)
+    return prefix + b"," + meta[1:]
@@ -0,0 +1,139 @@
+import logging
+from typing import Callable, Dict, List
+
+import click
+import msgspec
+from flask.cli import AppGroup
+
+from auth.models import User, db
+from config import DATA_DIR_PGS, DATA_DIR_INV, PACK_PGS_FILE, PACK_INV_FILE
+from storage.codec import decode_character, decode_inventory, encode_document
+from storage.layout import iter_documents, migrate_directory
+from storage.pack import PackStore
+from storage.repository import RepositoryFactory
+from storage.sqlite import SqliteCharacterRepository, SqliteInventoryRepository
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+storage_cli = AppGroup('storage', help="Comandi di gestione dello storage di personaggi e inventari")
+
+
+def _read_documents(directory: str, decode: Callable[[bytes], Dict]) -> List[Dict]:
+    """
+    Legge e valida tutti i file *.json di una directory.
+    I file illeggibili o non validi vengono saltati e segnalati.
+
+    Args:
+        directory (str): Directory da leggere
+        decode (Callable[[bytes], Dict]): Decoder del codec per la validazione
+
+    Returns:
+        List[Dict]: Documenti validati
+    """
+    documents = []
+    for doc_id, path in iter_documents(directory):
+        try:
+            with open(path, 'rb') as f:
+                documents.append(decode(f.read()))
+        except (OSError, msgspec.MsgspecError) as e:
+            logger.error(f"File saltato durante la migrazione {doc_id}.json: {e}")
+    return documents
+
+
+@storage_cli.command('migrate-json')
+def migrate_json():
+    """
+    Importa personaggi e inventari da data/json nelle tabelle SQLite.
+    Il proprietario di ogni personaggio viene ricavato da User.character_ids.
+    Il comando è ripetibile: i record già presenti vengono aggiornati.
+    """
+    owners = {}
+    for user in User.query.all():
+        for char_id in user.character_ids or []:
+            owners[str(char_id)] = user.id
+
+    characters = _read_documents(DATA_DIR_PGS, decode_character)
+    inventories = _read_documents(DATA_DIR_INV, decode_inventory)
+
+    n_chars = SqliteCharacterRepository().import_many(characters, owners)
+    n_invs = SqliteInventoryRepository().import_many(inventories)
+    db.session.commit()
+
+    click.echo(f"Importati {n_chars} personaggi e {n_invs} inventari in SQLite")
+
+
+@storage_cli.command('migrate-layout')
+def migrate_layout():
+    """
+    Sposta i file di personaggi e inventari nel layout impostato da
+    STORAGE_SHARDED. Si può eseguire con il server avviato: le letture
+    trovano i file sia nella vecchia che nella nuova posizione.
+    """
+    for directory in (DATA_DIR_PGS, DATA_DIR_INV):
+        moved, failed = migrate_directory(directory)
+        click.echo(f"{directory}: {moved} file spostati, {failed} errori")
+
+
+@storage_cli.command('migrate-pack')
+def migrate_pack():
+    """
+    Importa personaggi e inventari da data/json nei file pack e scrive
+    l'indice in coda. Il comando è ripetibile: i documenti già presenti
+    vengono sovrascritti (lo spazio si recupera con compact-pack).
+    """
+    characters = _read_documents(DATA_DIR_PGS, decode_character)
+    inventories = _read_documents(DATA_DIR_INV, decode_inventory)
+
+    chars_store = PackStore(PACK_PGS_FILE)
+    chars_store.put_many({doc['id']: encode_document(doc, indent=0) for doc in characters})
+    chars_store.checkpoint()
+
+    invs_store = PackStore(PACK_INV_FILE)
+    invs_store.put_many({
+        doc['id_proprietario'] or doc['id']: encode_document(doc, indent=0) for doc in inventories
+    })
+    invs_store.checkpoint()
+
+    click.echo(f"Importati {len(characters)} personaggi e {len(inventories)} inventari nei pack")
+
+
+@storage_cli.command('compact-pack')
+def compact_pack():
+    """
+    Compatta i file pack recuperando lo spazio di documenti sovrascritti
+    o eliminati. Si può eseguire con il server avviato: le scritture
+    attendono la fine della compattazione.
+    """
+    for path in (PACK_PGS_FILE, PACK_INV_FILE):
+        before, after = PackStore(path).compact()
+        click.echo(f"{path}: {before} -> {after} byte")
+
+
+@storage_cli.command('check')
+def check():
+    """
+    Valida tutti i personaggi e gli inventari del backend configurato e
+    segnala i documenti non validi. Con il backend pack ogni archivio
+    viene letto con una sola scansione sequenziale.
+    """
+    for name, repository in (("personaggi", RepositoryFactory.characters()),
+                             ("inventari", RepositoryFactory.inventories())):
+        total, invalid = 0, []
+        for doc_id, document in repository.scan():
+            total += 1
+            if document is None:
+                invalid.append(doc_id)
+        click.echo(f"{name}: {total - len(invalid)}/{total} validi")
+        for doc_id in invalid:
+            click.echo(f"  non valido: {doc_id}")
+
+
+def register_commands(app) -> None:
+    """
+    Registra i comandi CLI dello storage (flask --app app storage ...).
+
+    Args:
+        app (Flask): Applicazione Flask
+    """
+    app.cli.add_command(storage_cli)
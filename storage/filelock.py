@@ -0,0 +1,48 @@
+"""
+Lock esclusivo su un file condiviso fra processi (più worker gunicorn
+che scrivono lo stesso pack o lo stesso indice).
+
+Su POSIX è un flock() sull'intero file, su Windows un msvcrt.locking()
+sul primo byte. In entrambi i casi il lock è consultivo: esclude solo
+gli altri utenti di file_lock, non le letture.
+"""
+import os
+from contextlib import contextmanager
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def file_lock(fd: int) -> Iterator[None]:
+    """
+    Tiene un lock esclusivo sul file per la durata del blocco.
+    Il lock è legato al descrittore: due descrittori dello stesso file
+    si escludono anche all'interno dello stesso processo.
+
+    Args:
+        fd (int): Descrittore del file da bloccare
+    """
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        return
+
+    # msvcrt blocca un intervallo di byte a partire dalla posizione corrente
+    pos = os.lseek(fd, 0, os.SEEK_CUR)
+    os.lseek(fd, 0, os.SEEK_SET)
+    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+    os.lseek(fd, pos, os.SEEK_SET)
+    try:
+        yield
+    finally:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        os.lseek(fd, pos, os.SEEK_SET)
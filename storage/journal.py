@@ -0,0 +1,280 @@
+"""
+Indice chiave -> valore persistente, condiviso fra più processi.
+
+Su disco l'indice è uno snapshot (un oggetto JSON, <path>) più un log in
+append (<path>.log) con una riga JSON [chiave, valore] per ogni modifica;
+valore null rimuove la chiave. Un salvataggio aggiunge solo le righe
+delle chiavi cambiate invece di riscrivere tutto l'indice; lo snapshot
+viene riscritto (e il log svuotato) solo alla ricostruzione o quando il
+log diventa più grande dello snapshot.
+
+Le scritture avvengono sotto un lock esclusivo su <path>.lock: prima di
+aggiungere righe si rilegge quanto scritto dagli altri processi, quindi
+nessuna modifica concorrente va persa. Le letture non prendono il lock
+finché snapshot e log non cambiano (due stat per accesso).
+"""
+import os
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import msgspec
+
+from storage.filelock import file_lock
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Sotto questa dimensione il log non viene mai compattato
+MIN_COMPACT_BYTES = 64 * 1024
+
+_O_BINARY = getattr(os, 'O_BINARY', 0)
+
+
+def _identity(path: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Returns:
+        Optional[Tuple[int, int, int]]: (inode, mtime_ns, size) del file o
+        None se non esiste
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+class JournaledIndex:
+    """
+    Dizionario in memoria allineato a snapshot + log su disco.
+
+    I valori devono essere serializzabili in JSON e diversi da None.
+    Se lo snapshot manca o è illeggibile l'indice viene ricostruito con
+    la funzione scan (la scansione completa dei documenti).
+    """
+
+    def __init__(self, path: str, scan: Callable[[], Dict[str, Any]], name: str) -> None:
+        """
+        Args:
+            path (str): Percorso dello snapshot
+            scan (Callable[[], Dict[str, Any]]): Ricostruzione completa dell'indice
+            name (str): Nome dell'indice per i messaggi di log
+        """
+        self.path = path
+        self.log_path = f"{path}.log"
+        self.lock_path = f"{path}.lock"
+        self._scan = scan
+        self._name = name
+        self._data: Dict[str, Any] = {}
+        self._snapshot: Optional[Tuple[int, int, int]] = None
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """
+        Lock esclusivo fra processi (e fra thread: il descrittore è nuovo
+        ad ogni chiamata).
+        """
+        os.makedirs(os.path.dirname(self.lock_path) or '.', exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT | _O_BINARY, 0o644)
+        try:
+            with file_lock(fd):
+                yield
+        finally:
+            os.close(fd)
+
+    def _stale(self) -> bool:
+        """
+        Returns:
+            bool: True se snapshot o log sono cambiati dall'ultima lettura
+        """
+        if self._snapshot is None or _identity(self.path) != self._snapshot:
+            return True
+        log = _identity(self.log_path)
+        return (log[2] if log else 0) != self._offset
+
+    def _refresh(self) -> None:
+        """
+        Rilegge lo snapshot se è cambiato e applica le righe del log non
+        ancora lette. Da chiamare con entrambi i lock acquisiti.
+        """
+        snapshot = _identity(self.path)
+        if snapshot is None:
+            self._compact(self._scan())
+            logger.info(f"{self._name} creato: {len(self._data)} voci")
+            return
+
+        if snapshot != self._snapshot:
+            try:
+                with open(self.path, 'rb') as f:
+                    data = msgspec.json.decode(f.read())
+                if not isinstance(data, dict):
+                    raise ValueError("lo snapshot non è un oggetto JSON")
+            except (OSError, ValueError, msgspec.MsgspecError) as e:
+                logger.error(f"{self._name} illeggibile, ricostruzione: {e}")
+                self._compact(self._scan())
+                return
+            self._data = data
+            self._snapshot = snapshot
+            self._offset = 0
+
+        try:
+            with open(self.log_path, 'rb') as f:
+                f.seek(self._offset)
+                chunk = f.read()
+        except FileNotFoundError:
+            return
+
+        # una riga senza '\n' finale è una scrittura interrotta: si ignora
+        end = chunk.rfind(b'\n') + 1
+        for line in chunk[:end].splitlines():
+            try:
+                key, value = msgspec.json.decode(line)
+            except (ValueError, TypeError, msgspec.MsgspecError):
+                logger.warning(f"{self._name}: riga del log non valida ignorata")
+                continue
+            if value is None:
+                self._data.pop(key, None)
+            else:
+                self._data[key] = value
+        self._offset += end
+
+    def _compact(self, data: Dict[str, Any]) -> None:
+        """
+        Scrive lo snapshot in modo atomico (file temporaneo + os.replace) e
+        svuota il log. Da chiamare con entrambi i lock acquisiti.
+
+        Args:
+            data (Dict[str, Any]): Contenuto completo dell'indice
+        """
+        self._data = data
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(msgspec.json.encode(data))
+            os.replace(tmp_path, self.path)
+            with open(self.log_path, 'wb'):
+                pass
+        except OSError as e:
+            logger.error(f"Errore salvataggio {self._name}: {str(e)}")
+            return
+        self._snapshot = _identity(self.path)
+        self._offset = 0
+
+    def _append(self, lines: bytes) -> None:
+        """
+        Aggiunge righe complete al log; se la scrittura fallisce a metà il
+        log viene riportato alla lunghezza precedente.
+        Da chiamare con entrambi i lock acquisiti.
+        """
+        fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | _O_BINARY, 0o644)
+        try:
+            # coda interrotta da un crash: sarebbe incollata alla prima riga nuova
+            if os.fstat(fd).st_size > self._offset:
+                os.ftruncate(fd, self._offset)
+            view = memoryview(lines)
+            try:
+                while view:
+                    written = os.write(fd, view)
+                    if written == 0:
+                        raise OSError(f"scrittura di 0 byte su {self.log_path}")
+                    view = view[written:]
+            except OSError:
+                os.ftruncate(fd, self._offset)
+                raise
+        finally:
+            os.close(fd)
+        self._offset += len(lines)
+
+    def _ensure(self) -> None:
+        """
+        Allinea l'indice ai file; il lock sul file viene preso solo se
+        qualcosa è cambiato. Da chiamare con il lock di thread acquisito.
+        """
+        if self._stale():
+            try:
+                with self._file_lock():
+                    self._refresh()
+            except OSError as e:
+                logger.error(f"Errore lettura {self._name}: {str(e)}")
+
+    def get(self, key: str) -> Any:
+        """
+        Args:
+            key (str): Chiave
+
+        Returns:
+            Any: Valore o None se la chiave non è indicizzata
+        """
+        with self._lock:
+            self._ensure()
+            return self._data.get(key)
+
+    def get_many(self, keys) -> Dict[str, Any]:
+        """
+        Args:
+            keys (Iterable[str]): Chiavi
+
+        Returns:
+            Dict[str, Any]: {chiave: valore} delle sole chiavi indicizzate
+        """
+        with self._lock:
+            self._ensure()
+            data = self._data
+            return {key: data[key] for key in keys if key in data}
+
+    def update(self, changes: Dict[str, Any]) -> None:
+        """
+        Applica le modifiche (valore None = rimozione) aggiungendo al log
+        solo quelle che cambiano davvero l'indice.
+
+        Args:
+            changes (Dict[str, Any]): {chiave: nuovo valore o None}
+        """
+        with self._lock:
+            self._ensure()
+            if not self._pending(changes):
+                return
+            try:
+                with self._file_lock():
+                    # rilettura sotto lock: le modifiche degli altri processi restano
+                    self._refresh()
+                    pending = self._pending(changes)
+                    if not pending:
+                        return
+                    self._append(b''.join(msgspec.json.encode([key, value]) + b'\n'
+                                          for key, value in pending.items()))
+                    for key, value in pending.items():
+                        if value is None:
+                            self._data.pop(key, None)
+                        else:
+                            self._data[key] = value
+                    # senza snapshot (_compact fallito) si riprova a compattare
+                    snapshot_size = self._snapshot[2] if self._snapshot else 0
+                    if self._offset > max(MIN_COMPACT_BYTES, snapshot_size):
+                        self._compact(self._data)
+            except OSError as e:
+                logger.error(f"Errore salvataggio {self._name}: {str(e)}")
+
+    def _pending(self, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: Le modifiche che cambiano l'indice in memoria
+        """
+        data = self._data
+        return {key: value for key, value in changes.items()
+                if (key in data if value is None else data.get(key) != value)}
+
+    def rebuild(self) -> int:
+        """
+        Ricostruisce l'indice con una scansione completa e lo compatta.
+
+        Returns:
+            int: Numero di voci indicizzate
+        """
+        with self._lock:
+            with self._file_lock():
+                self._compact(self._scan())
+            return len(self._data)
@@ -0,0 +1,230 @@
+"""
+Layout su disco dei documenti JSON (personaggi, inventari).
+
+Con STORAGE_SHARDED = False i file stanno direttamente nella directory
+(personaggi/<uuid>.json); con STORAGE_SHARDED = True vengono distribuiti in
+sottodirectory in base al prefisso dell'UUID (personaggi/ab/cd/<uuid>.json),
+così nessuna directory supera qualche centinaio di voci.
+
+Tutti i percorsi dei documenti passano da document_path/resolve_path.
+Durante il passaggio da un layout all'altro le letture cercano il file
+prima nel layout configurato e poi nell'altro, quindi la migrazione
+(flask --app app storage migrate-layout) può avvenire a server avviato.
+"""
+import os
+import logging
+from typing import Iterator, List, Optional, Tuple
+
+from config import STORAGE_SHARDED
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Caratteri esadecimali per livello e numero di livelli: ab/cd/<uuid>.json
+SHARD_WIDTH = 2
+SHARD_LEVELS = 2
+
+
+def _shard_parts(doc_id: str) -> List[str]:
+    """
+    Args:
+        doc_id (str): ID del documento (UUID)
+
+    Returns:
+        List[str]: Sottodirectory del documento, es. ['ab', 'cd']
+    """
+    key = doc_id.replace('-', '').lower()
+    return [key[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(SHARD_LEVELS)]
+
+
+def flat_path(directory: str, doc_id: str) -> str:
+    """
+    Returns:
+        str: Percorso del documento nel layout piatto
+    """
+    return os.path.join(directory, f"{doc_id}.json")
+
+
+def sharded_path(directory: str, doc_id: str) -> str:
+    """
+    Returns:
+        str: Percorso del documento nel layout a sottodirectory
+    """
+    return os.path.join(directory, *_shard_parts(str(doc_id)), f"{doc_id}.json")
+
+
+def document_path(directory: str, doc_id: str, sharded: Optional[bool] = None) -> str:
+    """
+    Percorso di un documento nel layout configurato (usato per le scritture).
+
+    Args:
+        directory (str): Directory radice (es. DATA_DIR_PGS)
+        doc_id (str): ID del documento
+        sharded (Optional[bool]): Layout da usare, di default STORAGE_SHARDED
+
+    Returns:
+        str: Percorso del file
+    """
+    if sharded is None:
+        sharded = STORAGE_SHARDED
+    return sharded_path(directory, doc_id) if sharded else flat_path(directory, doc_id)
+
+
+def legacy_path(directory: str, doc_id: str) -> str:
+    """
+    Returns:
+        str: Percorso del documento nel layout non configurato
+    """
+    return document_path(directory, doc_id, sharded=not STORAGE_SHARDED)
+
+
+def resolve_path(directory: str, doc_id: str) -> str:
+    """
+    Percorso di un documento esistente (usato per letture ed eliminazioni).
+    Se il file non è nel layout configurato si cerca nell'altro; il terzo
+    controllo copre il file spostato dalla migrazione tra i primi due.
+
+    Args:
+        directory (str): Directory radice
+        doc_id (str): ID del documento
+
+    Returns:
+        str: Percorso del file esistente, o del layout configurato se assente
+    """
+    path = document_path(directory, doc_id)
+    if os.path.exists(path):
+        return path
+    old_path = legacy_path(directory, doc_id)
+    if os.path.exists(old_path):
+        return old_path
+    return path
+
+
+def prepare_path(directory: str, doc_id: str) -> str:
+    """
+    Percorso di scrittura di un documento, con le sottodirectory create.
+
+    Args:
+        directory (str): Directory radice
+        doc_id (str): ID del documento
+
+    Returns:
+        str: Percorso del file nel layout configurato
+    """
+    path = document_path(directory, doc_id)
+    if STORAGE_SHARDED:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def remove_legacy(directory: str, doc_id: str) -> None:
+    """
+    Elimina l'eventuale copia del documento nel layout non configurato,
+    dopo che è stato scritto nel layout configurato.
+
+    Args:
+        directory (str): Directory radice
+        doc_id (str): ID del documento
+    """
+    try:
+        os.remove(legacy_path(directory, doc_id))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.error(f"Errore rimozione copia non migrata di {doc_id}: {e}")
+
+
+def touch_root(directory: str) -> None:
+    """
+    Aggiorna l'mtime della directory radice quando un documento viene creato
+    o eliminato in una sottodirectory, così gli indici degli altri processi
+    (che controllano solo l'mtime della radice) si accorgono della modifica.
+    Nel layout piatto non serve: il file è già nella radice.
+
+    Args:
+        directory (str): Directory radice
+    """
+    if STORAGE_SHARDED:
+        try:
+            os.utime(directory)
+        except OSError as e:
+            logger.error(f"Errore aggiornamento mtime {directory}: {e}")
+
+
+def iter_documents(directory: str) -> Iterator[Tuple[str, str]]:
+    """
+    Elenca i documenti *.json presenti in entrambi i layout.
+
+    Args:
+        directory (str): Directory radice
+
+    Yields:
+        Tuple[str, str]: (ID documento, percorso del file)
+    """
+    def walk(path: str, depth: int) -> Iterator[Tuple[str, str]]:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.name.endswith('.json') and entry.is_file():
+                    yield entry.name[:-len('.json')], entry.path
+                elif depth < SHARD_LEVELS and len(entry.name) == SHARD_WIDTH and entry.is_dir():
+                    yield from walk(entry.path, depth + 1)
+
+    yield from walk(directory, 0)
+
+
+def shard_roots(directory: str) -> List[str]:
+    """
+    Sottodirectory di primo livello del layout a sottodirectory (00 ... ff).
+
+    Args:
+        directory (str): Directory radice
+
+    Returns:
+        List[str]: Percorsi delle sottodirectory
+    """
+    return [
+        os.path.join(directory, f"{i:0{SHARD_WIDTH}x}")
+        for i in range(16 ** SHARD_WIDTH)
+    ]
+
+
+def migrate_directory(directory: str) -> Tuple[int, int]:
+    """
+    Sposta i documenti nel layout configurato senza fermare il server.
+
+    Ogni file viene prima collegato (hard link) nella nuova posizione e poi
+    rimosso dalla vecchia: in ogni istante il documento è raggiungibile da
+    resolve_path. Se nella nuova posizione esiste già un file, è una
+    scrittura più recente e la vecchia copia viene solo eliminata.
+
+    Args:
+        directory (str): Directory radice
+
+    Returns:
+        Tuple[int, int]: (documenti spostati, documenti non spostati per errore)
+    """
+    moved, failed = 0, 0
+    for doc_id, path in list(iter_documents(directory)):
+        target = document_path(directory, doc_id)
+        if path == target:
+            continue
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.link(path, target)
+        except FileExistsError:
+            pass
+        except OSError as e:
+            logger.error(f"Errore migrazione di {path}: {e}")
+            failed += 1
+            continue
+
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        moved += 1
+
+    touch_root(directory)
+    logger.info(f"Migrazione layout di {directory}: {moved} spostati, {failed} errori")
+    return moved, failed
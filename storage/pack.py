@@ -0,0 +1,782 @@
+"""
+Archivio "pack" per personaggi e inventari: un unico file append-only al
+posto di un file JSON per documento, pensato per le scansioni complete
+(statistiche, controlli di integrità) che altrimenti aprono migliaia di
+file piccoli.
+
+Formato del file (interi little-endian):
+
+    MAGIC (8 byte)
+    record*                      -> <I lunghezza corpo><I crc32 corpo><corpo>
+                                    corpo = <B tipo><H lunghezza id><id><payload>
+    [record INDEX + trailer]     -> scritto da checkpoint/compattazione
+
+    tipo: 0 = documento (payload JSON), 1 = eliminazione, 2 = indice
+    trailer: <Q offset del record INDEX><8s TRAILER_MAGIC>
+
+Ogni scrittura aggiunge un record in coda in O_APPEND con il lock
+esclusivo sul file (storage.filelock), quindi più processi possono
+scrivere sullo stesso file. Una scrittura interrotta (os.write parziale,
+disco pieno) viene troncata subito; una coda incompleta o con crc errato
+lasciata da un crash viene troncata dal primo scrittore successivo,
+l'unico che sotto lock può distinguerla da una scrittura in corso.
+In lettura il file è mappato con mmap e i documenti vengono restituiti come
+memoryview del mapping, senza copie. Se il file termina con un trailer
+l'indice id -> offset viene letto dal footer; altrimenti (o per i record
+aggiunti dopo) viene ricostruito con una lettura sequenziale.
+La compattazione riscrive solo i documenti vivi e recupera lo spazio dei
+documenti sovrascritti o eliminati.
+"""
+import os
+import mmap
+import time
+import zlib
+import errno
+import struct
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import msgspec
+
+from config import PACK_PGS_FILE, PACK_INV_FILE, STORAGE_DURABILITY
+from storage.filelock import file_lock
+from storage.codec import decode_character, decode_inventory, decode_summary, encode_document
+from storage.repository import BatchResult, CharacterRepository, InventoryRepository
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+MAGIC = b"GDRPACK2"
+TRAILER_MAGIC = b"GDRPIDX1"
+
+KIND_PUT = 0
+KIND_DELETE = 1
+KIND_INDEX = 2
+
+_HEADER = struct.Struct("<IIBH")    # lunghezza corpo, crc32 corpo, tipo, lunghezza id
+_BODY = struct.Struct("<BH")        # inizio del corpo: tipo, lunghezza id
+_PREFIX = _HEADER.size - _BODY.size  # byte che precedono il corpo
+_TRAILER = struct.Struct("<Q8s")    # offset record INDEX, TRAILER_MAGIC
+
+# O_BINARY esiste solo su Windows: senza, le scritture tradurrebbero i \n
+_O_BINARY = getattr(os, "O_BINARY", 0)
+
+
+def _record(kind: int, doc_id: str, payload: bytes = b"") -> bytes:
+    """
+    Costruisce un record del pack.
+
+    Args:
+        kind (int): KIND_PUT, KIND_DELETE o KIND_INDEX
+        doc_id (str): ID del documento
+        payload (bytes): Contenuto del record
+
+    Returns:
+        bytes: Record pronto da scrivere
+    """
+    key = doc_id.encode("utf-8")
+    head = _BODY.pack(kind, len(key)) + key
+    crc = zlib.crc32(payload, zlib.crc32(head))
+    return _HEADER.pack(len(head) + len(payload), crc, kind, len(key)) + key + payload
+
+
+class PackStore:
+    """
+    Un file pack con il suo indice in memoria id -> (offset, lunghezza) del payload.
+    """
+
+    def __init__(self, path: str, durability: str = STORAGE_DURABILITY) -> None:
+        """
+        Args:
+            path (str): Percorso del file pack
+            durability (str): Se diversa da 'no-fsync' ogni scrittura fa fsync
+        """
+        self.path = path
+        self.durability = durability
+        self._lock = threading.RLock()
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._dead_bytes = 0
+        self._end = 0
+        self._file_id: Optional[Tuple[int, int]] = None
+        self._mm: Optional[mmap.mmap] = None
+
+    # ------------------- APERTURA E INDICE -------------------
+
+    def _create(self) -> None:
+        """
+        Crea un pack vuoto (solo MAGIC) se il file non esiste.
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | _O_BINARY, 0o666)
+        except FileExistsError:
+            return
+        try:
+            os.write(fd, MAGIC)
+        finally:
+            os.close(fd)
+
+    def _map(self) -> None:
+        """
+        Mappa in memoria il file nella sua dimensione attuale.
+        Il mapping precedente non viene chiuso: eventuali memoryview
+        ancora in uso restano valide finché non vengono rilasciate.
+        """
+        with open(self.path, "rb") as file:
+            self._mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _ensure_fresh(self) -> None:
+        """
+        Allinea l'indice al file: lo ricarica se il file è stato sostituito
+        (compattazione) e legge solo i record aggiunti dall'ultimo accesso.
+        Da chiamare con il lock acquisito.
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._create()
+            st = os.stat(self.path)
+
+        file_id = (st.st_dev, st.st_ino)
+        if file_id != self._file_id:
+            self._file_id = file_id
+            self._index = {}
+            self._dead_bytes = 0
+            self._map()
+            self._end = self._load_footer()
+            if self._end == 0:
+                self._end = self._replay(len(MAGIC))
+            return
+
+        if st.st_size > self._end:
+            self._map()
+            self._end = self._replay(self._end)
+
+    def _load_footer(self) -> int:
+        """
+        Carica l'indice dal footer se il file termina con un trailer valido.
+        Da chiamare con il lock acquisito.
+
+        Returns:
+            int: Byte coperti dall'indice (dimensione del file), 0 se nessun footer
+        """
+        mm = self._mm
+        size = len(mm)
+        if mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"File pack non valido: {self.path}")
+        if size < len(MAGIC) + _TRAILER.size:
+            return 0
+
+        index_offset, magic = _TRAILER.unpack_from(mm, size - _TRAILER.size)
+        if magic != TRAILER_MAGIC:
+            return 0
+
+        if index_offset + _HEADER.size > size - _TRAILER.size:
+            return 0
+        body_len, crc, kind, key_len = _HEADER.unpack_from(mm, index_offset)
+        payload_offset = index_offset + _HEADER.size + key_len
+        record_end = index_offset + _PREFIX + body_len
+        if kind != KIND_INDEX or record_end != size - _TRAILER.size:
+            return 0
+        if zlib.crc32(mm[index_offset + _PREFIX:record_end]) != crc:
+            return 0
+
+        footer = msgspec.json.decode(mm[payload_offset:record_end])
+        self._index = {doc_id: (entry[0], entry[1]) for doc_id, entry in footer["index"].items()}
+        self._dead_bytes = footer["dead_bytes"]
+        return size
+
+    def _replay(self, pos: int) -> int:
+        """
+        Aggiorna l'indice leggendo in sequenza i record a partire da pos.
+        La lettura si ferma al primo record incompleto o con crc errato:
+        può essere una scrittura in corso di un altro processo, quindi i
+        byte seguenti non vengono indicizzati ma nemmeno toccati (vedi
+        _recover). Da chiamare con il lock acquisito.
+
+        Args:
+            pos (int): Offset da cui leggere
+
+        Returns:
+            int: Offset del primo byte non ancora indicizzato
+        """
+        mm = self._mm
+        size = len(mm)
+        view = memoryview(mm)
+        try:
+            pos = self._replay_records(mm, view, pos, size)
+        finally:
+            view.release()
+        return pos
+
+    def _replay_records(self, mm: mmap.mmap, view: memoryview, pos: int, size: int) -> int:
+        """
+        Corpo di _replay, con la vista sul mapping da rilasciare al termine.
+        """
+        while pos + _HEADER.size <= size:
+            body_len, crc, kind, key_len = _HEADER.unpack_from(mm, pos)
+            record_end = pos + _PREFIX + body_len
+            if body_len < _BODY.size + key_len or record_end > size:
+                break
+            if kind == KIND_INDEX and record_end + _TRAILER.size > size:
+                break
+            if zlib.crc32(view[pos + _PREFIX:record_end]) != crc:
+                break
+
+            key_offset = pos + _HEADER.size
+            doc_id = mm[key_offset:key_offset + key_len].decode("utf-8")
+            payload_offset = key_offset + key_len
+            record_len = record_end - pos
+
+            if kind == KIND_PUT:
+                old = self._index.get(doc_id)
+                if old is not None:
+                    self._dead_bytes += old[1] + _HEADER.size + key_len
+                self._index[doc_id] = (payload_offset, record_end - payload_offset)
+            elif kind == KIND_DELETE:
+                old = self._index.pop(doc_id, None)
+                if old is not None:
+                    self._dead_bytes += old[1] + _HEADER.size + key_len
+                self._dead_bytes += record_len
+            elif kind == KIND_INDEX:
+                # il record indice è sempre seguito dal trailer
+                self._dead_bytes += record_len + _TRAILER.size
+                record_end += _TRAILER.size
+
+            pos = record_end
+        return pos
+
+    def _recover(self, fd: int) -> None:
+        """
+        Tronca la coda del file oltre l'ultimo record valido. Con il lock
+        del file acquisito nessuna scrittura è in corso: i byte non
+        indicizzati sono un record interrotto (crash) e vanno eliminati,
+        altrimenti i record aggiunti dopo non verrebbero mai letti.
+        Da chiamare con entrambi i lock acquisiti, dopo _ensure_fresh().
+
+        Args:
+            fd (int): Descrittore del pack aperto da _locked
+        """
+        size = os.fstat(fd).st_size
+        if size > self._end:
+            logger.warning(f"Pack {self.path}: troncati {size - self._end} byte "
+                           f"di coda non valida dall'offset {self._end}")
+            os.ftruncate(fd, self._end)
+
+    # ------------------- LETTURA -------------------
+
+    def get(self, doc_id: str) -> Optional[memoryview]:
+        """
+        Restituisce il payload di un documento senza copiarlo.
+
+        Args:
+            doc_id (str): ID del documento
+
+        Returns:
+            Optional[memoryview]: Vista sul JSON del documento o None se assente
+        """
+        with self._lock:
+            self._ensure_fresh()
+            entry = self._index.get(str(doc_id))
+            if entry is None:
+                return None
+            offset, length = entry
+            return memoryview(self._mm)[offset:offset + length]
+
+    def contains(self, doc_id: str) -> bool:
+        """
+        Returns:
+            bool: True se il documento esiste
+        """
+        with self._lock:
+            self._ensure_fresh()
+            return str(doc_id) in self._index
+
+    def ids(self) -> List[str]:
+        """
+        Returns:
+            List[str]: ID di tutti i documenti vivi
+        """
+        with self._lock:
+            self._ensure_fresh()
+            return list(self._index)
+
+    def scan(self) -> Iterator[Tuple[str, memoryview]]:
+        """
+        Scorre tutti i documenti vivi in ordine di offset, cioè con una
+        sola lettura sequenziale del file.
+
+        Yields:
+            Tuple[str, memoryview]: (ID documento, vista sul JSON)
+        """
+        with self._lock:
+            self._ensure_fresh()
+            view = memoryview(self._mm)
+            entries = sorted(self._index.items(), key=lambda item: item[1][0])
+        for doc_id, (offset, length) in entries:
+            yield doc_id, view[offset:offset + length]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dict[str, int]: documenti, byte totali e stima dei byte recuperabili
+            con la compattazione
+        """
+        with self._lock:
+            self._ensure_fresh()
+            return {
+                "documents": len(self._index),
+                "bytes": self._end,
+                "dead_bytes": self._dead_bytes,
+            }
+
+    # ------------------- SCRITTURA -------------------
+
+    @contextmanager
+    def _locked(self) -> Iterator[int]:
+        """
+        Apre il pack in O_APPEND con il lock esclusivo del file, allinea
+        l'indice e tronca un'eventuale coda non valida. Dentro il blocco
+        self._end è la posizione della prossima scrittura.
+        Se mentre si attendeva il lock il file è stato sostituito da una
+        compattazione, il lock del vecchio file viene rilasciato e si
+        riprova sul nuovo. Da usare con self._lock acquisito.
+
+        Yields:
+            int: Descrittore del file
+        """
+        while True:
+            self._ensure_fresh()
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | _O_BINARY)
+            try:
+                with file_lock(fd):
+                    locked, current = os.fstat(fd), os.stat(self.path)
+                    if (locked.st_dev, locked.st_ino) != (current.st_dev, current.st_ino):
+                        continue
+                    self._ensure_fresh()
+                    self._recover(fd)
+                    yield fd
+                    return
+            finally:
+                os.close(fd)
+
+    def _append(self, fd: int, data: bytes) -> None:
+        """
+        Scrive dati in coda al file ripetendo os.write finché non sono
+        scritti tutti. Se la scrittura fallisce il file viene troncato
+        alla dimensione precedente e l'errore rilanciato.
+
+        Args:
+            fd (int): Descrittore aperto da _locked
+            data (bytes): Uno o più record completi
+        """
+        start = self._end
+        view = memoryview(data)
+        try:
+            while view:
+                written = os.write(fd, view)
+                if written == 0:
+                    raise OSError(errno.EIO, f"Scrittura interrotta sul pack {self.path}")
+                view = view[written:]
+            if self.durability != 'no-fsync':
+                os.fsync(fd)
+        except OSError:
+            os.ftruncate(fd, start)
+            raise
+
+    def put(self, doc_id: str, payload: bytes) -> None:
+        """
+        Salva (o sovrascrive) un documento.
+
+        Args:
+            doc_id (str): ID del documento
+            payload (bytes): JSON del documento
+        """
+        with self._lock:
+            with self._locked() as fd:
+                self._append(fd, _record(KIND_PUT, str(doc_id), payload))
+            self._ensure_fresh()
+
+    def put_many(self, documents: Dict[str, bytes]) -> None:
+        """
+        Salva più documenti con un'unica scrittura (importazioni).
+
+        Args:
+            documents (Dict[str, bytes]): Dizionario {id: JSON del documento}
+        """
+        if not documents:
+            return
+        with self._lock:
+            with self._locked() as fd:
+                self._append(fd, b"".join(
+                    _record(KIND_PUT, str(doc_id), payload) for doc_id, payload in documents.items()
+                ))
+            self._ensure_fresh()
+
+    def delete(self, doc_id: str) -> bool:
+        """
+        Elimina un documento aggiungendo un record di eliminazione.
+
+        Args:
+            doc_id (str): ID del documento
+
+        Returns:
+            bool: True se il documento esisteva
+        """
+        with self._lock:
+            with self._locked() as fd:
+                if str(doc_id) not in self._index:
+                    return False
+                self._append(fd, _record(KIND_DELETE, str(doc_id)))
+            self._ensure_fresh()
+            return True
+
+    def _footer(self, index_offset: int, index: Dict[str, Tuple[int, int]], dead_bytes: int) -> bytes:
+        """
+        Costruisce record INDEX e trailer per un indice dato.
+
+        Args:
+            index_offset (int): Offset a cui verrà scritto il record INDEX
+            index (Dict[str, Tuple[int, int]]): Indice id -> (offset, lunghezza)
+            dead_bytes (int): Byte recuperabili
+
+        Returns:
+            bytes: Record INDEX seguito dal trailer
+        """
+        payload = msgspec.json.encode({"index": index, "dead_bytes": dead_bytes})
+        return _record(KIND_INDEX, "", payload) + _TRAILER.pack(index_offset, TRAILER_MAGIC)
+
+    def checkpoint(self) -> None:
+        """
+        Scrive l'indice in coda al file, così la prossima apertura
+        non deve rileggere tutti i record. Offset e contenuto dell'indice
+        sono letti sotto il lock del file usato per la scrittura: nessun
+        altro processo può aggiungere record nel frattempo.
+        """
+        with self._lock:
+            with self._locked() as fd:
+                self._append(fd, self._footer(self._end, self._index, self._dead_bytes))
+            self._ensure_fresh()
+
+    def compact(self) -> Tuple[int, int]:
+        """
+        Riscrive il pack con i soli documenti vivi, seguiti dall'indice,
+        e lo sostituisce in modo atomico. Il lock del file è tenuto per
+        tutta la riscrittura e la sostituzione: gli altri processi
+        attendono e poi scrivono sul nuovo file (vedi _locked).
+
+        Returns:
+            Tuple[int, int]: (byte prima, byte dopo)
+        """
+        with self._lock:
+            with self._locked():
+                before = self._end
+                view = memoryview(self._mm)
+
+                chunks = [MAGIC]
+                index: Dict[str, Tuple[int, int]] = {}
+                pos = len(MAGIC)
+                for doc_id, (offset, length) in sorted(self._index.items(), key=lambda item: item[1][0]):
+                    record = _record(KIND_PUT, doc_id, view[offset:offset + length].tobytes())
+                    index[doc_id] = (pos + len(record) - length, length)
+                    chunks.append(record)
+                    pos += len(record)
+                chunks.append(self._footer(pos, index, 0))
+
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as file:
+                    for chunk in chunks:
+                        file.write(chunk)
+                    file.flush()
+                    os.fsync(file.fileno())
+
+                # il vecchio mapping va rilasciato prima della sostituzione (Windows)
+                del view
+                self._mm = None
+                os.replace(tmp_path, self.path)
+                self._file_id = None
+
+            self._ensure_fresh()
+            after = self._end
+
+        logger.info(f"Pack compattato {self.path}: {before} -> {after} byte")
+        return before, after
+
+
+class _ClasseOnly(msgspec.Struct):
+    """Solo il campo 'classe' di un personaggio: gli altri vengono saltati."""
+    classe: str
+
+
+_classe_decoder = msgspec.json.Decoder(_ClasseOnly)
+
+
+class PackCharacterRepository(CharacterRepository):
+    """
+    Backend dei personaggi sul file pack PACK_PGS_FILE.
+    """
+
+    def __init__(self, store: Optional[PackStore] = None) -> None:
+        """
+        Args:
+            store (Optional[PackStore]): Pack da usare, di default PACK_PGS_FILE
+        """
+        self.store = store or PackStore(PACK_PGS_FILE)
+
+    def save(self, character_dict: Dict, owner_id: Optional[int] = None) -> bool:
+        """
+        Salva un personaggio aggiungendolo in coda al pack.
+
+        Args:
+            character_dict (Dict): Dati personaggio serializzati
+            owner_id (Optional[int]): Ignorato, come nel backend JSON
+
+        Returns:
+            bool: True se salvato con successo
+        """
+        try:
+            self.store.put(str(character_dict['id']), encode_document(character_dict, indent=0))
+            logger.info(f"Personaggio salvato nel pack: {character_dict['id']}")
+            return True
+        except Exception as e:
+            logger.error(f"Errore salvataggio personaggio nel pack: {str(e)}")
+            return False
+
+    def load(self, char_id: str) -> Optional[Dict]:
+        """
+        Carica un personaggio decodificandolo direttamente dal mapping.
+
+        Args:
+            char_id (str): ID del personaggio
+
+        Returns:
+            Optional[Dict]: Dati personaggio validati o None se non trovato
+        """
+        try:
+            payload = self.store.get(char_id)
+            if payload is None:
+                logger.warning(f"Personaggio non trovato nel pack: {char_id}")
+                return None
+            return decode_character(payload)
+        except Exception as e:
+            logger.error(f"Errore caricamento personaggio {char_id} dal pack: {str(e)}")
+            return None
+
+    def delete(self, char_id: str) -> bool:
+        """
+        Args:
+            char_id (str): ID del personaggio
+
+        Returns:
+            bool: True se eliminato, False se non trovato
+        """
+        try:
+            deleted = self.store.delete(char_id)
+            if not deleted:
+                logger.warning(f"Personaggio non trovato nel pack: {char_id}")
+            return deleted
+        except OSError as e:
+            logger.error(f"Errore eliminazione personaggio {char_id} dal pack: {str(e)}")
+            return False
+
+    def all_ids(self) -> List[str]:
+        """
+        Returns:
+            List[str]: ID di tutti i personaggi nel pack
+        """
+        return self.store.ids()
+
+    def filter_existing(self, char_ids: List[str]) -> List[str]:
+        """
+        Args:
+            char_ids (List[str]): ID da filtrare
+
+        Returns:
+            List[str]: ID presenti nel pack, nell'ordine ricevuto
+        """
+        return [str(char_id) for char_id in char_ids if self.store.contains(str(char_id))]
+
+    def load_many(self, char_ids: List[str]) -> BatchResult:
+        """
+        Carica più personaggi dal mapping (nessuna apertura di file).
+
+        Args:
+            char_ids (List[str]): ID da caricare
+
+        Returns:
+            BatchResult: Documenti nell'ordine richiesto ed errori per ID
+        """
+        start = time.perf_counter()
+        ids = [str(char_id) for char_id in char_ids]
+        documents: List[Optional[Dict]] = []
+        errors: Dict[str, str] = {}
+        for char_id in ids:
+            payload = self.store.get(char_id)
+            if payload is None:
+                documents.append(None)
+                errors[char_id] = "Personaggio non trovato"
+                continue
+            try:
+                documents.append(decode_character(payload))
+            except msgspec.MsgspecError as e:
+                documents.append(None)
+                errors[char_id] = str(e)
+        return BatchResult(ids, documents, errors, (time.perf_counter() - start) * 1000)
+
+    def load_summaries(self, char_ids: List[str]) -> List[Dict]:
+        """
+        Carica i sommari decodificando dal mapping solo i campi del sommario.
+
+        Args:
+            char_ids (List[str]): ID da caricare
+
+        Returns:
+            List[Dict]: Sommari nell'ordine richiesto (i mancanti sono saltati)
+        """
+        summaries = []
+        for char_id in char_ids:
+            payload = self.store.get(str(char_id))
+            if payload is None:
+                continue
+            try:
+                summaries.append(decode_summary(payload))
+            except msgspec.MsgspecError as e:
+                logger.error(f"Sommario non leggibile per {char_id}: {e}")
+        return summaries
+
+    def count_by_class(self, char_ids: List[str]) -> Dict[str, int]:
+        """
+        Conta i personaggi per classe decodificando solo il campo 'classe'.
+
+        Args:
+            char_ids (List[str]): ID dei personaggi da contare
+
+        Returns:
+            Dict[str, int]: Dizionario {classe: numero_personaggi}
+        """
+        counts: Dict[str, int] = {}
+        for char_id in char_ids:
+            payload = self.store.get(char_id)
+            if payload is None:
+                continue
+            classe = _classe_decoder.decode(payload).classe
+            counts[classe] = counts.get(classe, 0) + 1
+        return counts
+
+    def count_all_by_class(self) -> Dict[str, int]:
+        """
+        Distribuzione per classe di tutti i personaggi con una sola
+        lettura sequenziale del pack.
+
+        Returns:
+            Dict[str, int]: Dizionario {classe: numero_personaggi}
+        """
+        counts: Dict[str, int] = {}
+        for _, payload in self.store.scan():
+            classe = _classe_decoder.decode(payload).classe
+            counts[classe] = counts.get(classe, 0) + 1
+        return counts
+
+    def scan(self) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """
+        Valida tutti i personaggi con una sola lettura sequenziale del pack.
+
+        Yields:
+            Tuple[str, Optional[Dict]]: (ID, documento validato o None se non valido)
+        """
+        for char_id, payload in self.store.scan():
+            try:
+                yield char_id, decode_character(payload)
+            except msgspec.MsgspecError as e:
+                logger.error(f"Personaggio non valido nel pack {char_id}: {e}")
+                yield char_id, None
+
+
+class PackInventoryRepository(InventoryRepository):
+    """
+    Backend degli inventari sul file pack PACK_INV_FILE, con chiave
+    id_proprietario (o ID inventario se senza proprietario) come i file JSON.
+    """
+
+    def __init__(self, store: Optional[PackStore] = None) -> None:
+        """
+        Args:
+            store (Optional[PackStore]): Pack da usare, di default PACK_INV_FILE
+        """
+        self.store = store or PackStore(PACK_INV_FILE)
+
+    def save(self, inventario_dict: Dict) -> bool:
+        """
+        Args:
+            inventario_dict (Dict): Dati inventario serializzati
+
+        Returns:
+            bool: True se salvato con successo
+        """
+        try:
+            owner_id = inventario_dict.get('id_proprietario')
+            key = str(owner_id) if owner_id else str(inventario_dict['id'])
+            self.store.put(key, encode_document(inventario_dict, indent=0))
+            logger.info(f"Inventario salvato nel pack: {key}")
+            return True
+        except Exception as e:
+            logger.error(f"Errore salvataggio inventario nel pack: {str(e)}")
+            return False
+
+    def load_by_owner(self, owner_id: str) -> Optional[Dict]:
+        """
+        Args:
+            owner_id (str): ID del personaggio proprietario
+
+        Returns:
+            Optional[Dict]: Dati inventario validati o None se non trovato
+        """
+        try:
+            payload = self.store.get(owner_id)
+            if payload is None:
+                logger.warning(f"Inventario non trovato nel pack per personaggio {owner_id}")
+                return None
+            return decode_inventory(payload)
+        except Exception as e:
+            logger.error(f"Errore caricamento inventario di {owner_id} dal pack: {str(e)}")
+            return None
+
+    def delete_by_owner(self, owner_id: str) -> bool:
+        """
+        Args:
+            owner_id (str): ID del personaggio proprietario
+
+        Returns:
+            bool: True se eliminato, False se non trovato
+        """
+        try:
+            deleted = self.store.delete(owner_id)
+            if not deleted:
+                logger.warning(f"Inventario non trovato nel pack per personaggio {owner_id}")
+            return deleted
+        except OSError as e:
+            logger.error(f"Errore eliminazione inventario di {owner_id} dal pack: {str(e)}")
+            return False
+
+    def all_ids(self) -> List[str]:
+        """
+        Returns:
+            List[str]: Chiavi di tutti gli inventari nel pack
+        """
+        return self.store.ids()
+
+    def scan(self) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """
+        Valida tutti gli inventari con una sola lettura sequenziale del pack.
+
+        Yields:
+            Tuple[str, Optional[Dict]]: (chiave, documento validato o None se non valido)
+        """
+        for key, payload in self.store.scan():
+            try:
+                yield key, decode_inventory(payload)
+            except msgspec.MsgspecError as e:
+                logger.error(f"Inventario non valido nel pack {key}: {e}")
+                yield key, None
@@ -0,0 +1,329 @@
+import time
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import STORAGE_BACKEND
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Campi del sommario di un personaggio: bastano alle pagine con le liste
+# (personaggi, menu, scelta dell'inventario) e si leggono senza validare
+# e istanziare il personaggio completo
+SUMMARY_FIELDS = ('id', 'nome', 'classe', 'livello')
+
+
+@dataclass
+class BatchResult:
+    """
+    Risultato di un caricamento multiplo.
+
+    Attributes:
+        ids (List[str]): ID richiesti, nell'ordine della richiesta
+        documents (List[Optional[Dict]]): Documento per ogni ID (None se non caricato)
+        errors (Dict[str, str]): Errore per ogni ID non caricato
+        elapsed_ms (float): Durata del caricamento in millisecondi
+    """
+    ids: List[str]
+    documents: List[Optional[Dict]]
+    errors: Dict[str, str] = field(default_factory=dict)
+    elapsed_ms: float = 0.0
+
+    def loaded(self) -> List[Dict]:
+        """
+        Returns:
+            List[Dict]: Documenti caricati con successo, nell'ordine della richiesta
+        """
+        return [doc for doc in self.documents if doc is not None]
+
+
+class CharacterRepository(ABC):
+    """
+    Interfaccia di persistenza dei personaggi.
+    CharacterManager delega a un'implementazione di questa classe
+    (file JSON, SQLite o pack) scelta con STORAGE_BACKEND in config.py.
+    """
+
+    @abstractmethod
+    def save(self, character_dict: Dict, owner_id: Optional[int] = None) -> bool:
+        """
+        Salva un personaggio serializzato.
+
+        Args:
+            character_dict (Dict): Dati personaggio serializzati
+            owner_id (Optional[int]): ID dell'utente proprietario, se noto
+
+        Returns:
+            bool: True se salvato con successo
+        """
+
+    @abstractmethod
+    def load(self, char_id: str) -> Optional[Dict]:
+        """
+        Carica e valida un personaggio.
+
+        Args:
+            char_id (str): ID del personaggio
+
+        Returns:
+            Optional[Dict]: Dati personaggio validati o None se non trovato
+        """
+
+    @abstractmethod
+    def delete(self, char_id: str) -> bool:
+        """
+        Elimina un personaggio.
+
+        Args:
+            char_id (str): ID del personaggio
+
+        Returns:
+            bool: True se eliminato, False se non trovato
+        """
+
+    @abstractmethod
+    def all_ids(self) -> List[str]:
+        """
+        Restituisce gli ID di tutti i personaggi salvati.
+
+        Returns:
+            List[str]: ID dei personaggi
+        """
+
+    @abstractmethod
+    def filter_existing(self, char_ids: List[str]) -> List[str]:
+        """
+        Filtra una lista di ID mantenendo solo i personaggi esistenti.
+
+        Args:
+            char_ids (List[str]): ID da filtrare
+
+        Returns:
+            List[str]: ID esistenti, nell'ordine ricevuto
+        """
+
+    def load_many(self, char_ids: List[str]) -> BatchResult:
+        """
+        Carica più personaggi. L'implementazione di base li carica uno alla volta.
+
+        Args:
+            char_ids (List[str]): ID da caricare
+
+        Returns:
+            BatchResult: Documenti nell'ordine richiesto ed errori per ID
+        """
+        start = time.perf_counter()
+        ids = [str(char_id) for char_id in char_ids]
+        documents = [self.load(char_id) for char_id in ids]
+        errors = {
+            char_id: "Personaggio non trovato o non valido"
+            for char_id, doc in zip(ids, documents) if doc is None
+        }
+        return BatchResult(ids, documents, errors, (time.perf_counter() - start) * 1000)
+
+    def load_summaries(self, char_ids: List[str]) -> List[Dict]:
+        """
+        Carica solo i campi SUMMARY_FIELDS dei personaggi esistenti.
+        L'implementazione di base carica i personaggi completi.
+
+        Args:
+            char_ids (List[str]): ID da caricare
+
+        Returns:
+            List[Dict]: Sommari nell'ordine richiesto (i mancanti sono saltati)
+        """
+        return [
+            {name: doc.get(name) for name in SUMMARY_FIELDS}
+            for doc in self.load_many(char_ids).loaded()
+        ]
+
+    def count_by_class(self, char_ids: List[str]) -> Dict[str, int]:
+        """
+        Conta i personaggi esistenti per classe a partire dai sommari.
+
+        Args:
+            char_ids (List[str]): ID dei personaggi da contare
+
+        Returns:
+            Dict[str, int]: Dizionario {classe: numero_personaggi}
+        """
+        counts: Dict[str, int] = {}
+        for summary in self.load_summaries(char_ids):
+            classe = summary.get('classe') or 'Unknown'
+            counts[classe] = counts.get(classe, 0) + 1
+        return counts
+
+    def count_all_by_class(self) -> Dict[str, int]:
+        """
+        Distribuzione per classe di tutti i personaggi salvati.
+
+        Returns:
+            Dict[str, int]: Dizionario {classe: numero_personaggi}
+        """
+        return self.count_by_class(self.all_ids())
+
+    def scan(self) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """
+        Scorre tutti i personaggi salvati (controlli di integrità).
+        L'implementazione di base li carica uno alla volta.
+
+        Yields:
+            Tuple[str, Optional[Dict]]: (ID, documento validato o None se non valido)
+        """
+        for char_id in self.all_ids():
+            yield char_id, self.load(char_id)
+
+
+class InventoryRepository(ABC):
+    """
+    Interfaccia di persistenza degli inventari.
+    InventoryManager delega a un'implementazione di questa classe
+    (file JSON, SQLite o pack) scelta con STORAGE_BACKEND in config.py.
+    """
+
+    @abstractmethod
+    def save(self, inventario_dict: Dict) -> bool:
+        """
+        Salva un inventario serializzato.
+
+        Args:
+            inventario_dict (Dict): Dati inventario serializzati
+
+        Returns:
+            bool: True se salvato con successo
+        """
+
+    @abstractmethod
+    def load_by_owner(self, owner_id: str) -> Optional[Dict]:
+        """
+        Carica e valida l'inventario di un personaggio.
+
+        Args:
+            owner_id (str): ID del personaggio proprietario
+
+        Returns:
+            Optional[Dict]: Dati inventario validati o None se non trovato
+        """
+
+    @abstractmethod
+    def delete_by_owner(self, owner_id: str) -> bool:
+        """
+        Elimina l'inventario di un personaggio.
+
+        Args:
+            owner_id (str): ID del personaggio proprietario
+
+        Returns:
+            bool: True se eliminato, False se non trovato
+        """
+
+    @abstractmethod
+    def all_ids(self) -> List[str]:
+        """
+        Restituisce le chiavi di tutti gli inventari salvati
+        (ID proprietario o, in sua assenza, ID inventario).
+
+        Returns:
+            List[str]: Chiavi degli inventari
+        """
+
+    def scan(self) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """
+        Scorre tutti gli inventari salvati (controlli di integrità).
+        L'implementazione di base li carica uno alla volta.
+
+        Yields:
+            Tuple[str, Optional[Dict]]: (chiave, documento validato o None se non valido)
+        """
+        for key in self.all_ids():
+            yield key, self.load_by_owner(key)
+
+
+class RepositoryFactory:
+    """
+    Factory dei repository di personaggi e inventari in base a STORAGE_BACKEND.
+    Le istanze sono condivise dal processo.
+    """
+
+    BACKENDS = ('json', 'sqlite', 'pack')
+
+    _characters: Optional[CharacterRepository] = None
+    _inventories: Optional[InventoryRepository] = None
+
+    @staticmethod
+    def _check_backend(backend: str) -> None:
+        """
+        Raises:
+            ValueError: Se il backend non è supportato
+        """
+        if backend not in RepositoryFactory.BACKENDS:
+            raise ValueError(
+                f"Backend di storage '{backend}' non valido. "
+                f"Disponibili: {', '.join(RepositoryFactory.BACKENDS)}"
+            )
+
+    @staticmethod
+    def create_characters(backend: str) -> CharacterRepository:
+        """
+        Crea un repository dei personaggi per il backend richiesto.
+
+        Args:
+            backend (str): 'json', 'sqlite' o 'pack'
+
+        Returns:
+            CharacterRepository: Nuova istanza del repository
+        """
+        RepositoryFactory._check_backend(backend)
+        if backend == 'sqlite':
+            from storage.sqlite import SqliteCharacterRepository
+            return SqliteCharacterRepository()
+        if backend == 'pack':
+            from storage.pack import PackCharacterRepository
+            return PackCharacterRepository()
+        from characters.utils import JsonCharacterRepository
+        return JsonCharacterRepository()
+
+    @staticmethod
+    def create_inventories(backend: str) -> InventoryRepository:
+        """
+        Crea un repository degli inventari per il backend richiesto.
+
+        Args:
+            backend (str): 'json', 'sqlite' o 'pack'
+
+        Returns:
+            InventoryRepository: Nuova istanza del repository
+        """
+        RepositoryFactory._check_backend(backend)
+        if backend == 'sqlite':
+            from storage.sqlite import SqliteInventoryRepository
+            return SqliteInventoryRepository()
+        if backend == 'pack':
+            from storage.pack import PackInventoryRepository
+            return PackInventoryRepository()
+        from inventory.utils import JsonInventoryRepository
+        return JsonInventoryRepository()
+
+    @classmethod
+    def characters(cls) -> CharacterRepository:
+        """
+        Returns:
+            CharacterRepository: Repository dei personaggi configurato
+        """
+        if cls._characters is None:
+            cls._characters = cls.create_characters(STORAGE_BACKEND)
+            logger.info(f"Repository personaggi: {STORAGE_BACKEND}")
+        return cls._characters
+
+    @classmethod
+    def inventories(cls) -> InventoryRepository:
+        """
+        Returns:
+            InventoryRepository: Repository degli inventari configurato
+        """
+        if cls._inventories is None:
+            cls._inventories = cls.create_inventories(STORAGE_BACKEND)
+            logger.info(f"Repository inventari: {STORAGE_BACKEND}")
+        return cls._inventories
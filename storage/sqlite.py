@@ -0,0 +1,436 @@
+import time
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import msgspec
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import JSON
+
+from auth.models import db
+from storage.codec import validate_character, validate_inventory
+from storage.repository import BatchResult, CharacterRepository, InventoryRepository
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Numero massimo di parametri per query "IN (...)": SQLite ne accetta
+# al massimo 999 nelle versioni più vecchie
+CHUNK_SIZE = 500
+
+
+class PersonaggioRecord(db.Model):
+    """
+    Personaggio salvato su SQLite.
+
+    Le colonne classe, livello e owner_id sono copie indicizzate dei campi
+    del documento per le query di filtro e statistica; il documento
+    completo serializzato con PersonaggioSchema resta in dati.
+
+    Attributes:
+        id (str): UUID del personaggio
+        owner_id (int): ID dell'utente proprietario (None se non noto)
+        classe (str): Classe del personaggio
+        livello (int): Livello del personaggio
+        nome (str): Nome del personaggio
+        dati (dict): Documento completo del personaggio
+    """
+    __tablename__ = 'personaggi'
+
+    id = db.Column(db.String(36), primary_key=True)
+    owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True, index=True)
+    classe = db.Column(db.String(40), nullable=False, index=True)
+    livello = db.Column(db.Integer, nullable=False, default=1, index=True)
+    nome = db.Column(db.String(80), nullable=False)
+    dati = db.Column(JSON, nullable=False)
+
+
+class InventarioRecord(db.Model):
+    """
+    Inventario salvato su SQLite, uno per proprietario.
+
+    Attributes:
+        id (str): UUID dell'inventario
+        id_proprietario (str): UUID del personaggio proprietario
+        dati (dict): Documento completo dell'inventario
+    """
+    __tablename__ = 'inventari'
+
+    id = db.Column(db.String(36), primary_key=True)
+    id_proprietario = db.Column(db.String(36), nullable=True, unique=True, index=True)
+    dati = db.Column(JSON, nullable=False)
+
+
+def _chunks(items: List[str], size: int = CHUNK_SIZE) -> Iterable[List[str]]:
+    """
+    Divide una lista in blocchi di al massimo size elementi.
+
+    Args:
+        items (List[str]): Lista da dividere
+        size (int): Dimensione massima del blocco
+
+    Yields:
+        List[str]: Blocco successivo
+    """
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class SqliteCharacterRepository(CharacterRepository):
+    """
+    Backend dei personaggi su SQLite (stesso database degli utenti).
+    Esistenza, filtri per proprietario e conteggi per classe sono
+    query indicizzate invece di scansioni di file.
+
+    I metodi che modificano i dati eseguono solo flush(): commit e rollback
+    spettano alla route, che li esegue insieme alle altre modifiche della
+    richiesta (ad esempio i crediti dell'utente).
+    """
+
+    @staticmethod
+    def _record_from_dict(character_dict: Dict, owner_id: Optional[int]) -> PersonaggioRecord:
+        """
+        Costruisce il record di un personaggio serializzato.
+
+        Args:
+            character_dict (Dict): Dati personaggio serializzati
+            owner_id (Optional[int]): ID dell'utente proprietario
+
+        Returns:
+            PersonaggioRecord: Record da salvare
+        """
+        return PersonaggioRecord(
+            id=str(character_dict['id']),
+            owner_id=owner_id,
+            classe=character_dict.get('classe', 'Unknown'),
+            livello=character_dict.get('livello', 1),
+            nome=character_dict.get('nome', ''),
+            dati=character_dict,
+        )
+
+    def save(self, character_dict: Dict, owner_id: Optional[int] = None) -> bool:
+        """
+        Inserisce o aggiorna un personaggio. Se owner_id è None,
+        un personaggio già esistente mantiene il proprietario salvato.
+
+        Args:
+            character_dict (Dict): Dati personaggio serializzati
+            owner_id (Optional[int]): ID dell'utente proprietario, se noto
+
+        Returns:
+            bool: True se salvato con successo
+        """
+        try:
+            char_id = str(character_dict['id'])
+            if owner_id is None:
+                existing = db.session.get(PersonaggioRecord, char_id)
+                owner_id = existing.owner_id if existing else None
+
+            db.session.merge(self._record_from_dict(character_dict, owner_id))
+            db.session.flush()
+
+            logger.info(f"Personaggio salvato su SQLite: {char_id}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Errore salvataggio personaggio su SQLite: {str(e)}")
+            return False
+
+    def load(self, char_id: str) -> Optional[Dict]:
+        """
+        Carica un personaggio e lo valida con il codec msgspec.
+
+        Args:
+            char_id (str): ID del personaggio da caricare
+
+        Returns:
+            Optional[Dict]: Dati personaggio o None se errore
+        """
+        try:
+            record = db.session.get(PersonaggioRecord, str(char_id))
+            if record is None:
+                logger.warning(f"Personaggio non trovato su SQLite: {char_id}")
+                return None
+
+            return validate_character(record.dati)
+
+        except Exception as e:
+            logger.error(f"Errore caricamento personaggio {char_id} da SQLite: {str(e)}")
+            return None
+
+    def load_many(self, char_ids: List[str]) -> BatchResult:
+        """
+        Carica più personaggi con query sulla chiave primaria a blocchi di CHUNK_SIZE.
+
+        Args:
+            char_ids (List[str]): ID da caricare
+
+        Returns:
+            BatchResult: Documenti nell'ordine richiesto ed errori per ID
+        """
+        start = time.perf_counter()
+        ids = [str(char_id) for char_id in char_ids]
+        rows: Dict[str, Dict] = {}
+        for chunk in _chunks(ids):
+            query = db.session.query(PersonaggioRecord.id, PersonaggioRecord.dati)
+            rows.update(query.filter(PersonaggioRecord.id.in_(chunk)))
+
+        documents: List[Optional[Dict]] = []
+        errors: Dict[str, str] = {}
+        for char_id in ids:
+            if char_id not in rows:
+                documents.append(None)
+                errors[char_id] = "Personaggio non trovato"
+                continue
+            try:
+                documents.append(validate_character(rows[char_id]))
+            except msgspec.ValidationError as e:
+                documents.append(None)
+                errors[char_id] = str(e)
+
+        return BatchResult(ids, documents, errors, (time.perf_counter() - start) * 1000)
+
+    def delete(self, char_id: str) -> bool:
+        """
+        Elimina un personaggio.
+
+        Args:
+            char_id (str): ID del personaggio da eliminare
+
+        Returns:
+            bool: True se eliminato con successo
+        """
+        try:
+            deleted = PersonaggioRecord.query.filter_by(id=str(char_id)).delete()
+            db.session.flush()
+
+            if deleted:
+                logger.info(f"Personaggio eliminato da SQLite: {char_id}")
+                return True
+            logger.warning(f"Personaggio non trovato su SQLite: {char_id}")
+            return False
+
+        except Exception as e:
+            logger.error(f"Errore eliminazione personaggio {char_id} da SQLite: {str(e)}")
+            return False
+
+    def all_ids(self) -> List[str]:
+        """
+        Returns:
+            List[str]: ID di tutti i personaggi salvati
+        """
+        return [row[0] for row in db.session.query(PersonaggioRecord.id).all()]
+
+    def filter_existing(self, char_ids: List[str]) -> List[str]:
+        """
+        Filtra gli ID mantenendo quelli presenti in tabella,
+        con query sulla chiave primaria a blocchi di CHUNK_SIZE.
+
+        Args:
+            char_ids (List[str]): ID da filtrare
+
+        Returns:
+            List[str]: ID esistenti, nell'ordine ricevuto
+        """
+        ids = [str(char_id) for char_id in char_ids]
+        found = set()
+        for chunk in _chunks(ids):
+            rows = db.session.query(PersonaggioRecord.id).filter(PersonaggioRecord.id.in_(chunk))
+            found.update(row[0] for row in rows)
+        return [char_id for char_id in ids if char_id in found]
+
+    def load_summaries(self, char_ids: List[str]) -> List[Dict]:
+        """
+        Carica i sommari dalle colonne id, nome, classe e livello, senza
+        leggere né validare il documento in dati.
+
+        Args:
+            char_ids (List[str]): ID da caricare
+
+        Returns:
+            List[Dict]: Sommari nell'ordine richiesto (i mancanti sono saltati)
+        """
+        ids = [str(char_id) for char_id in char_ids]
+        found: Dict[str, Dict] = {}
+        for chunk in _chunks(ids):
+            rows = (
+                db.session.query(PersonaggioRecord.id, PersonaggioRecord.nome,
+                                 PersonaggioRecord.classe, PersonaggioRecord.livello)
+                .filter(PersonaggioRecord.id.in_(chunk))
+            )
+            for record_id, nome, classe, livello in rows:
+                found[record_id] = {'id': record_id, 'nome': nome, 'classe': classe, 'livello': livello}
+        return [found[char_id] for char_id in ids if char_id in found]
+
+    def count_by_class(self, char_ids: List[str]) -> Dict[str, int]:
+        """
+        Conta i personaggi per classe con una GROUP BY sull'indice della classe.
+
+        Args:
+            char_ids (List[str]): ID dei personaggi da contare
+
+        Returns:
+            Dict[str, int]: Dizionario {classe: numero_personaggi}
+        """
+        counts: Dict[str, int] = {}
+        ids = [str(char_id) for char_id in char_ids]
+        for chunk in _chunks(ids):
+            rows = (
+                db.session.query(PersonaggioRecord.classe, func.count(PersonaggioRecord.id))
+                .filter(PersonaggioRecord.id.in_(chunk))
+                .group_by(PersonaggioRecord.classe)
+            )
+            for classe, count in rows:
+                counts[classe] = counts.get(classe, 0) + count
+        return counts
+
+    def count_all_by_class(self) -> Dict[str, int]:
+        """
+        Distribuzione per classe di tutti i personaggi con una sola GROUP BY.
+
+        Returns:
+            Dict[str, int]: Dizionario {classe: numero_personaggi}
+        """
+        rows = (
+            db.session.query(PersonaggioRecord.classe, func.count(PersonaggioRecord.id))
+            .group_by(PersonaggioRecord.classe)
+        )
+        return {classe: count for classe, count in rows}
+
+    def import_many(self, characters: List[Dict], owners: Dict[str, int]) -> int:
+        """
+        Importa una lista di personaggi (migrazione), senza commit.
+
+        Args:
+            characters (List[Dict]): Personaggi serializzati e validati
+            owners (Dict[str, int]): Dizionario {id_personaggio: id_utente}
+
+        Returns:
+            int: Numero di personaggi importati
+        """
+        for character_dict in characters:
+            owner_id = owners.get(str(character_dict['id']))
+            db.session.merge(self._record_from_dict(character_dict, owner_id))
+        db.session.flush()
+        return len(characters)
+
+
+class SqliteInventoryRepository(InventoryRepository):
+    """
+    Backend degli inventari su SQLite, con indice univoco su id_proprietario.
+    Come per i personaggi, commit e rollback spettano alla route.
+    """
+
+    def save(self, inventario_dict: Dict) -> bool:
+        """
+        Inserisce o aggiorna un inventario. Un eventuale altro inventario
+        dello stesso proprietario viene sostituito.
+
+        Args:
+            inventario_dict (Dict): Dati inventario serializzati
+
+        Returns:
+            bool: True se salvato con successo
+        """
+        try:
+            inv_id = str(inventario_dict['id'])
+            owner_id = inventario_dict.get('id_proprietario')
+            owner_id = str(owner_id) if owner_id else None
+
+            if owner_id:
+                InventarioRecord.query.filter(
+                    InventarioRecord.id_proprietario == owner_id,
+                    InventarioRecord.id != inv_id,
+                ).delete()
+
+            db.session.merge(InventarioRecord(id=inv_id, id_proprietario=owner_id, dati=inventario_dict))
+            db.session.flush()
+
+            logger.info(f"Inventario salvato su SQLite: {inv_id}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Errore salvataggio inventario su SQLite: {str(e)}")
+            return False
+
+    def load_by_owner(self, owner_id: str) -> Optional[Dict]:
+        """
+        Carica l'inventario di un personaggio e lo valida con il codec msgspec.
+
+        Args:
+            owner_id (str): ID del personaggio proprietario
+
+        Returns:
+            Optional[Dict]: Dati inventario validati o None se errore
+        """
+        try:
+            record = InventarioRecord.query.filter_by(id_proprietario=str(owner_id)).first()
+            if record is None:
+                logger.warning(f"Inventario non trovato su SQLite per personaggio {owner_id}")
+                return None
+
+            return validate_inventory(record.dati)
+
+        except msgspec.ValidationError as e:
+            logger.error(f"Errore validazione inventario di {owner_id}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Errore caricamento inventario di {owner_id} da SQLite: {str(e)}")
+            return None
+
+    def delete_by_owner(self, owner_id: str) -> bool:
+        """
+        Elimina l'inventario di un personaggio.
+
+        Args:
+            owner_id (str): ID del personaggio proprietario
+
+        Returns:
+            bool: True se eliminato con successo
+        """
+        try:
+            deleted = InventarioRecord.query.filter_by(id_proprietario=str(owner_id)).delete()
+            db.session.flush()
+
+            if deleted:
+                logger.info(f"Inventario eliminato da SQLite: {owner_id}")
+                return True
+            logger.warning(f"Inventario non trovato su SQLite per personaggio {owner_id}")
+            return False
+
+        except Exception as e:
+            logger.error(f"Errore eliminazione inventario {owner_id} da SQLite: {str(e)}")
+            return False
+
+    def all_ids(self) -> List[str]:
+        """
+        Returns:
+            List[str]: ID proprietario (o ID inventario) di tutti gli inventari
+        """
+        rows = db.session.query(InventarioRecord.id_proprietario, InventarioRecord.id).all()
+        return [owner or inv_id for owner, inv_id in rows]
+
+    def import_many(self, inventories: List[Dict]) -> int:
+        """
+        Importa una lista di inventari (migrazione), senza commit.
+        Per ogni proprietario viene tenuto l'ultimo inventario della lista.
+
+        Args:
+            inventories (List[Dict]): Inventari serializzati e validati
+
+        Returns:
+            int: Numero di inventari importati
+        """
+        by_owner: Dict[str, Dict] = {}
+        for inventario_dict in inventories:
+            owner_id = inventario_dict.get('id_proprietario')
+            by_owner[str(owner_id) if owner_id else str(inventario_dict['id'])] = inventario_dict
+
+        for inventario_dict in by_owner.values():
+            owner_id = inventario_dict.get('id_proprietario')
+            db.session.merge(InventarioRecord(
+                id=str(inventario_dict['id']),
+                id_proprietario=str(owner_id) if owner_id else None,
+                dati=inventario_dict,
+            ))
+        db.session.flush()
+        return len(by_owner)
@@ -0,0 +1,112 @@
+"""
+storage.cache.DocumentCache: eliminazione LRU oltre i limiti, voci
+invalidate dai salvataggi e dalle eliminazioni dei repository, rilettura
+del file cambiato su disco in get_or_load.
+"""
+import json
+import os
+
+from characters.utils import JsonCharacterRepository
+from storage.cache import DocumentCache
+from storage.writer import write_pipeline
+
+
+def _file(tmp_path, nome: str, contenuto: dict) -> str:
+    path = tmp_path / f"{nome}.json"
+    path.write_text(json.dumps(contenuto), encoding="utf-8")
+    return str(path)
+
+
+def _carica(path: str) -> dict:
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def test_eliminazione_oltre_il_numero_di_voci():
+    cache = DocumentCache(max_entries=2, max_bytes=1000)
+    for doc_id in ("a", "b"):
+        cache.put("test", doc_id, (1, 10), {"id": doc_id})
+    # "a" diventa la più recente: esce "b"
+    assert cache.get_fresh("test", "a", (1, 10)) == {"id": "a"}
+    cache.put("test", "c", (1, 10), {"id": "c"})
+    assert cache.get_fresh("test", "b", (1, 10)) is None
+    assert cache.get_fresh("test", "a", (1, 10)) == {"id": "a"}
+    assert cache.stats()["evictions"] == 1 and cache.stats()["entries"] == 2
+
+
+def test_eliminazione_oltre_il_budget_di_byte():
+    cache = DocumentCache(max_entries=10, max_bytes=100)
+    cache.put("test", "a", (1, 60), {"id": "a"})
+    cache.put("test", "b", (1, 60), {"id": "b"})
+    assert cache.get_fresh("test", "a", (1, 60)) is None
+    assert cache.stats()["bytes"] == 60
+    # un documento più grande dell'intero budget non entra in cache
+    cache.put("test", "enorme", (1, 101), {"id": "enorme"})
+    assert cache.get_fresh("test", "enorme", (1, 101)) is None
+
+
+def test_copie_indipendenti():
+    cache = DocumentCache(max_entries=2, max_bytes=1000)
+    cache.put("test", "a", (1, 10), {"lista": [1]})
+    cache.get_fresh("test", "a", (1, 10))["lista"].append(2)
+    assert cache.get_fresh("test", "a", (1, 10)) == {"lista": [1]}
+
+
+def test_get_or_load_rilegge_il_file_cambiato(tmp_path):
+    cache = DocumentCache(max_entries=10, max_bytes=1000)
+    letture = []
+
+    def loader(path):
+        letture.append(path)
+        return _carica(path)
+
+    path = _file(tmp_path, "a", {"v": 1})
+    assert cache.get_or_load("test", "a", path, loader) == {"v": 1}
+    assert cache.get_or_load("test", "a", path, loader) == {"v": 1}
+    assert len(letture) == 1
+
+    # file riscritto con dimensione e mtime diversi: la voce non è più valida
+    _file(tmp_path, "a", {"v": 22})
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+    assert cache.get_or_load("test", "a", path, loader) == {"v": 22}
+    assert len(letture) == 2
+
+    os.remove(path)
+    assert cache.get_or_load("test", "a", path, loader) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_invalidazione_da_salvataggio_ed_eliminazione(archivio_json, personaggio_di_esempio):
+    repository = JsonCharacterRepository()
+    personaggio = personaggio_di_esempio(nome="Primo")
+    char_id = personaggio["id"]
+
+    repository.save(personaggio)
+    assert repository.load(char_id)["nome"] == "Primo"
+    assert archivio_json.cache.stats()["entries"] == 1
+
+    repository.save(personaggio_di_esempio(id=char_id, nome="Secondo"))
+    assert archivio_json.cache.stats()["invalidations"] == 1
+    assert repository.load(char_id)["nome"] == "Secondo"
+
+    assert repository.delete(char_id)
+    assert archivio_json.cache.stats()["entries"] == 0
+    assert repository.load(char_id) is None
+
+
+def test_salvataggio_in_attesa_invalida_solo_al_commit(archivio_json, personaggio_di_esempio):
+    from flask import Flask
+
+    repository = JsonCharacterRepository()
+    personaggio = personaggio_di_esempio(nome="Primo")
+    repository.save(personaggio)
+    repository.load(personaggio["id"])
+
+    with Flask(__name__).test_request_context():
+        repository.save(dict(personaggio, nome="Secondo"))
+        # la voce resta finché il file non è scritto
+        assert archivio_json.cache.stats()["entries"] == 1
+        assert repository.load(personaggio["id"])["nome"] == "Secondo"
+        write_pipeline.flush()
+    assert archivio_json.cache.stats()["entries"] == 0
+    assert repository.load(personaggio["id"])["nome"] == "Secondo"
@@ -0,0 +1,68 @@
+"""
+I documenti decodificati dal codec msgspec, riscritti con json.dumps e
+indent=4, devono dare gli stessi byte di Marshmallow (load + dump), sia
+con la validazione completa sia rileggendo il documento salvato con
+'_meta' (percorso veloce).
+
+I file scritti da encode_document invece non sono identici a quelli di
+json.dump(indent=4): hanno in coda il blocco '_meta' con versione e
+checksum. Fino a quel blocco il contenuto è lo stesso.
+"""
+import json
+
+import msgspec
+import pytest
+
+from config import DATA_DIR_PGS, DATA_DIR_INV
+from gioco.schemas.inventario import InventarioSchema
+from gioco.schemas.personaggio import PersonaggioSchema
+from storage.codec import decode_character, decode_inventory, encode_document
+from storage.layout import iter_documents
+
+
+def _atteso(schema, raw: bytes) -> bytes:
+    documento = schema.dump(schema.load(json.loads(raw)))
+    return json.dumps(documento, indent=4, ensure_ascii=False).encode("utf-8")
+
+
+def _verifica(schema, decode, raw: bytes) -> None:
+    expected = _atteso(schema, raw)
+    for data in (raw, encode_document(json.loads(expected))):
+        doc = decode(data)
+        assert json.dumps(doc, indent=4, ensure_ascii=False).encode("utf-8") == expected
+
+
+@pytest.mark.parametrize("directory, schema, decode", [
+    (DATA_DIR_PGS, PersonaggioSchema(), decode_character),
+    (DATA_DIR_INV, InventarioSchema(), decode_inventory),
+], ids=["personaggi", "inventari"])
+def test_documenti_salvati_identici_a_marshmallow(directory, schema, decode):
+    documenti = list(iter_documents(directory))
+    if not documenti:
+        pytest.skip(f"nessun documento in {directory}")
+    for _, path in documenti:
+        with open(path, "rb") as file:
+            _verifica(schema, decode, file.read())
+
+
+@pytest.mark.parametrize("classe", ["Mago", "Guerriero", "Ladro"])
+def test_personaggio_di_esempio_identico_a_marshmallow(personaggio_di_esempio, classe):
+    raw = json.dumps(personaggio_di_esempio(classe=classe), indent=4).encode("utf-8")
+    _verifica(PersonaggioSchema(), decode_character, raw)
+
+
+def test_documento_modificato_rivalidato(personaggio_di_esempio):
+    sealed = encode_document(personaggio_di_esempio())
+    manomesso = sealed.replace(b'"salute": 130', b'"salute": "tanta"')
+    with pytest.raises(msgspec.ValidationError):
+        decode_character(manomesso)
+
+
+def test_formato_del_file_salvato(personaggio_di_esempio):
+    documento = personaggio_di_esempio()
+    vecchio = json.dumps(documento, indent=4, ensure_ascii=False).encode("utf-8")
+    salvato = encode_document(documento)
+    # stesso contenuto di json.dump fino al blocco '_meta' aggiunto in coda
+    assert salvato != vecchio
+    assert salvato.startswith(vecchio[:-1].rstrip() + b',\n    "_meta": {')
+    assert set(json.loads(salvato)) == set(documento) | {"_meta"}
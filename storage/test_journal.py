@@ -0,0 +1,72 @@
+"""
+storage.journal.JournaledIndex: le modifiche di più processi non si
+perdono, il log viene compattato e una riga interrotta viene scartata;
+un errore nella scrittura dello snapshot non interrompe le modifiche.
+"""
+import multiprocessing
+
+import storage.journal as journal
+from storage.journal import JournaledIndex
+
+
+def _scrittore(path: str, n: int) -> None:
+    journal.MIN_COMPACT_BYTES = 2000
+    indice = JournaledIndex(path, dict, "test")
+    for i in range(200):
+        indice.update({f"{n}-{i}": i})
+        if i % 3 == 0:
+            indice.update({f"{n}-{i}": None})
+
+
+def test_scritture_concorrenti_fra_processi(tmp_path):
+    path = str(tmp_path / "indice.json")
+    processi = [multiprocessing.Process(target=_scrittore, args=(path, n)) for n in range(4)]
+    for processo in processi:
+        processo.start()
+    for processo in processi:
+        processo.join()
+        assert processo.exitcode == 0
+
+    chiavi = [f"{n}-{i}" for n in range(4) for i in range(200)]
+    atteso = {f"{n}-{i}": i for n in range(4) for i in range(200) if i % 3}
+    assert JournaledIndex(path, dict, "test").get_many(chiavi) == atteso
+
+
+def test_riga_interrotta_scartata(tmp_path):
+    path = str(tmp_path / "indice.json")
+    indice = JournaledIndex(path, dict, "test")
+    indice.update({"a": 1})
+    with open(f"{path}.log", "ab") as file:
+        file.write(b'["b", 2')
+    indice.update({"c": 3})
+    riaperto = JournaledIndex(path, dict, "test")
+    assert riaperto.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+
+
+def test_ricostruzione_se_manca_lo_snapshot(tmp_path):
+    path = str(tmp_path / "indice.json")
+    indice = JournaledIndex(path, lambda: {"x": "scansione"}, "test")
+    assert indice.get("x") == "scansione"
+    indice.update({"y": "nuovo"})
+    assert indice.rebuild() == 1
+    assert JournaledIndex(path, dict, "test").get("y") is None
+
+
+def test_snapshot_non_scrivibile(tmp_path, monkeypatch):
+    def replace_fallito(src, dst):
+        raise OSError("disco pieno")
+
+    # senza snapshot l'indice si ricostruisce dai documenti
+    documenti = {}
+    path = str(tmp_path / "indice.json")
+    monkeypatch.setattr(journal, "MIN_COMPACT_BYTES", 0)
+    monkeypatch.setattr(journal.os, "replace", replace_fallito)
+    indice = JournaledIndex(path, lambda: dict(documenti), "test")
+    indice.update({"a": 1})
+    assert not (tmp_path / "indice.json").exists()
+
+    monkeypatch.undo()
+    documenti["a"] = 1
+    indice.update({"b": 2})
+    assert indice.get_many(["a", "b"]) == {"a": 1, "b": 2}
+    assert JournaledIndex(path, dict, "test").get_many(["a", "b"]) == {"a": 1, "b": 2}
@@ -0,0 +1,95 @@
+"""
+storage.layout: percorsi nel layout piatto e a sottodirectory, elenco dei
+documenti in entrambi i layout e migrazione di una directory piatta.
+"""
+import os
+import uuid
+
+import pytest
+
+import storage.layout as layout
+from storage.layout import document_path, iter_documents, migrate_directory, resolve_path
+
+
+@pytest.fixture
+def a_sottodirectory(monkeypatch):
+    monkeypatch.setattr(layout, "STORAGE_SHARDED", True)
+
+
+def _scrivi(path: str, contenuto: str = "{}") -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(contenuto)
+
+
+def test_percorsi():
+    doc_id = "AB12cd34-0000-4000-8000-000000000000"
+    assert document_path("radice", doc_id, sharded=False) == os.path.join("radice", f"{doc_id}.json")
+    # prefisso dell'UUID senza trattini e in minuscolo, due livelli da due caratteri
+    assert document_path("radice", doc_id, sharded=True) == os.path.join("radice", "ab", "12", f"{doc_id}.json")
+
+
+@pytest.mark.usefixtures("a_sottodirectory")
+def test_layout_configurato():
+    doc_id = str(uuid.uuid4())
+    assert document_path("radice", doc_id) == document_path("radice", doc_id, sharded=True)
+
+
+def test_elenco_in_entrambi_i_layout(tmp_path):
+    piatti = [str(uuid.uuid4()) for _ in range(3)]
+    divisi = [str(uuid.uuid4()) for _ in range(5)]
+    for doc_id in piatti:
+        _scrivi(document_path(str(tmp_path), doc_id, sharded=False))
+    for doc_id in divisi:
+        _scrivi(document_path(str(tmp_path), doc_id, sharded=True))
+    # file temporanei, altri file e directory non di shard vengono ignorati
+    _scrivi(str(tmp_path / ".x.json.123.tmp"))
+    _scrivi(str(tmp_path / "note.txt"))
+    _scrivi(str(tmp_path / "archivio" / f"{uuid.uuid4()}.json"))
+
+    trovati = dict(iter_documents(str(tmp_path)))
+    assert sorted(trovati) == sorted(piatti + divisi)
+    for doc_id in divisi:
+        assert trovati[doc_id] == document_path(str(tmp_path), doc_id, sharded=True)
+
+
+@pytest.mark.usefixtures("a_sottodirectory")
+def test_migrazione_directory_piatta(tmp_path):
+    radice = str(tmp_path)
+    ids = [str(uuid.uuid4()) for _ in range(20)]
+    for doc_id in ids:
+        _scrivi(document_path(radice, doc_id, sharded=False), f'{{"id": "{doc_id}"}}')
+    # un documento già riscritto nel nuovo layout: la vecchia copia viene scartata
+    _scrivi(document_path(radice, ids[0], sharded=True), '{"id": "nuovo"}')
+
+    # prima della migrazione le letture trovano i file nel vecchio layout
+    assert resolve_path(radice, ids[1]) == document_path(radice, ids[1], sharded=False)
+
+    assert migrate_directory(radice) == (20, 0)
+    assert [name for name in os.listdir(radice) if name.endswith(".json")] == []
+    assert sorted(doc_id for doc_id, _ in iter_documents(radice)) == sorted(ids)
+    for doc_id in ids[1:]:
+        path = resolve_path(radice, doc_id)
+        assert path == document_path(radice, doc_id)
+        with open(path, encoding="utf-8") as file:
+            assert file.read() == f'{{"id": "{doc_id}"}}'
+    with open(resolve_path(radice, ids[0]), encoding="utf-8") as file:
+        assert file.read() == '{"id": "nuovo"}'
+
+    # una seconda migrazione non sposta nulla
+    assert migrate_directory(radice) == (0, 0)
+
+
+def test_personaggi_riletti_dopo_la_migrazione(archivio_json, monkeypatch, personaggio_di_esempio):
+    from characters.utils import JsonCharacterRepository
+
+    repository = JsonCharacterRepository()
+    personaggi = [personaggio_di_esempio(nome=f"Pg{i}") for i in range(5)]
+    for personaggio in personaggi:
+        repository.save(personaggio)
+
+    monkeypatch.setattr(layout, "STORAGE_SHARDED", True)
+    assert migrate_directory(archivio_json.pgs) == (5, 0)
+    batch = repository.load_many([p["id"] for p in personaggi])
+    assert [doc["nome"] for doc in batch.documents] == [p["nome"] for p in personaggi]
+    assert sorted(repository.all_ids()) == sorted(p["id"] for p in personaggi)
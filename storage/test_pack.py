@@ -0,0 +1,86 @@
+"""
+Una scansione completa sul file pack deve dare gli stessi risultati della
+scansione dei file JSON con gli stessi documenti, e la compattazione
+non deve perdere le scritture di altri processi.
+"""
+import json
+import multiprocessing
+
+import msgspec
+
+from storage.codec import decode_character
+from storage.layout import iter_documents
+from storage.pack import PackCharacterRepository, PackStore
+
+
+def test_distribuzione_per_classe_come_i_file_json(tmp_path, personaggio_di_esempio):
+    classi = ("Mago", "Guerriero", "Ladro")
+    characters = [personaggio_di_esempio(classe=classi[i % len(classi)]) for i in range(500)]
+    for character in characters:
+        (tmp_path / f"{character['id']}.json").write_text(json.dumps(character, indent=4), encoding="utf-8")
+
+    store = PackStore(str(tmp_path / "personaggi.pack"), durability="no-fsync")
+    store.put_many({c["id"]: msgspec.json.encode(c) for c in characters})
+    store.checkpoint()
+
+    counts = {}
+    for _, path in iter_documents(str(tmp_path)):
+        with open(path, "rb") as file:
+            classe = decode_character(file.read())["classe"]
+        counts[classe] = counts.get(classe, 0) + 1
+
+    repository = PackCharacterRepository(PackStore(store.path))
+    assert repository.count_all_by_class() == counts
+
+
+def test_coda_interrotta_scartata_alla_riapertura(tmp_path):
+    path = str(tmp_path / "dati.pack")
+    store = PackStore(path, durability="no-fsync")
+    store.put_many({"a": b'{"n": 1}', "b": b'{"n": 2}'})
+    with open(path, "ab") as file:
+        file.write(b"\x40\x00\x00\x00record interrotto")
+
+    store = PackStore(path, durability="no-fsync")
+    assert bytes(store.get("a")) == b'{"n": 1}'
+    assert bytes(store.get("b")) == b'{"n": 2}'
+    store.put("c", b'{"n": 3}')
+    assert sorted(PackStore(path).ids()) == ["a", "b", "c"]
+
+
+def _scrittore_pack(path: str, n: int) -> None:
+    store = PackStore(path, durability="no-fsync")
+    for i in range(150):
+        store.put(f"{n}-{i}", b'{"n": %d}' % i)
+
+
+def test_compattazione_con_scrittori_concorrenti(tmp_path):
+    path = str(tmp_path / "dati.pack")
+    store = PackStore(path, durability="no-fsync")
+    store.put_many({"vecchio": b'{"n": 0}'})
+    store.put("vecchio", b'{"n": 1}')
+    processi = [multiprocessing.Process(target=_scrittore_pack, args=(path, n)) for n in range(3)]
+    for processo in processi:
+        processo.start()
+    for _ in range(20):
+        store.compact()
+    for processo in processi:
+        processo.join()
+        assert processo.exitcode == 0
+
+    # nessuna scrittura persa sul file sostituito
+    riaperto = PackStore(path)
+    assert sorted(riaperto.ids()) == sorted(["vecchio"] + [f"{n}-{i}" for n in range(3) for i in range(150)])
+    assert bytes(riaperto.get("vecchio")) == b'{"n": 1}'
+
+
+def test_scansione_di_integrita(tmp_path, personaggio_di_esempio):
+    store = PackStore(str(tmp_path / "personaggi.pack"), durability="no-fsync")
+    validi = [personaggio_di_esempio(classe=classe) for classe in ("Mago", "Ladro")]
+    store.put_many({c["id"]: msgspec.json.encode(c) for c in validi})
+    store.put("rotto", b'{"classe": "Mago", "salute": "tanta"}')
+
+    documenti = dict(PackCharacterRepository(store).scan())
+    assert documenti.pop("rotto") is None
+    assert {doc_id: doc["classe"] for doc_id, doc in documenti.items()} == {
+        c["id"]: c["classe"] for c in validi
+    }
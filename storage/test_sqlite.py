@@ -0,0 +1,118 @@
+"""
+Backend SQLite (storage.sqlite) su un database in memoria: salvataggi,
+caricamenti, proprietari, conteggi per classe e migrazione dei file JSON
+con 'flask storage migrate-json'.
+"""
+import json
+import uuid
+
+import pytest
+
+import storage.commands
+from auth.models import db
+from storage.commands import migrate_json
+from storage.sqlite import PersonaggioRecord, SqliteCharacterRepository, SqliteInventoryRepository
+
+
+def _inventario(owner_id, *classi) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "id_proprietario": owner_id,
+        "oggetti": [{"id": str(uuid.uuid4()), "nome": classe, "usato": False, "valore": 10,
+                     "tipo_oggetto": "Buff", "classe": classe} for classe in classi],
+    }
+
+
+@pytest.fixture
+def repository(app_di_test):
+    return SqliteCharacterRepository()
+
+
+def test_salvataggio_e_caricamento(repository, personaggio_di_esempio):
+    personaggi = [personaggio_di_esempio(nome=f"Pg{i}") for i in range(3)]
+    for personaggio in personaggi:
+        assert repository.save(personaggio)
+    ids = [p["id"] for p in personaggi]
+
+    assert repository.load(ids[0])["nome"] == "Pg0"
+    assert sorted(repository.all_ids()) == sorted(ids)
+
+    mancante = str(uuid.uuid4())
+    batch = repository.load_many([ids[2], mancante, ids[0]])
+    assert [doc and doc["nome"] for doc in batch.documents] == ["Pg2", None, "Pg0"]
+    assert list(batch.errors) == [mancante]
+    assert repository.filter_existing([mancante, ids[1]]) == [ids[1]]
+
+    assert repository.delete(ids[1]) and not repository.delete(ids[1])
+    assert repository.load(ids[1]) is None
+
+
+def test_proprietario_mantenuto(repository, giocatore, personaggio_di_esempio):
+    personaggio = personaggio_di_esempio()
+    repository.save(personaggio, giocatore.id)
+    # un salvataggio senza proprietario (es. dopo un duello) non lo cancella
+    repository.save(dict(personaggio, livello=2))
+    record = db.session.get(PersonaggioRecord, personaggio["id"])
+    assert (record.owner_id, record.livello) == (giocatore.id, 2)
+
+
+def test_conteggi_per_classe_e_sommari(repository, personaggio_di_esempio):
+    classi = ["Mago", "Mago", "Ladro", "Guerriero"]
+    personaggi = [personaggio_di_esempio(classe=classe, nome=classe) for classe in classi]
+    for personaggio in personaggi:
+        repository.save(personaggio)
+    ids = [p["id"] for p in personaggi]
+
+    assert repository.count_by_class(ids[:3] + [str(uuid.uuid4())]) == {"Mago": 2, "Ladro": 1}
+    assert repository.count_all_by_class() == {"Mago": 2, "Ladro": 1, "Guerriero": 1}
+    assert repository.load_summaries([ids[3], ids[0]]) == [
+        {"id": ids[3], "nome": "Guerriero", "classe": "Guerriero", "livello": 1},
+        {"id": ids[0], "nome": "Mago", "classe": "Mago", "livello": 1},
+    ]
+
+
+def test_inventari_per_proprietario(app_di_test):
+    repository = SqliteInventoryRepository()
+    owner_id = str(uuid.uuid4())
+    assert repository.save(_inventario(owner_id, "Medaglione"))
+    assert repository.load_by_owner(owner_id)["oggetti"][0]["classe"] == "Medaglione"
+
+    # un nuovo inventario dello stesso proprietario sostituisce il precedente
+    nuovo = _inventario(owner_id, "BombaAcida", "PozioneCura")
+    repository.save(nuovo)
+    assert repository.all_ids() == [owner_id]
+    assert repository.load_by_owner(owner_id)["id"] == nuovo["id"]
+
+    assert repository.delete_by_owner(owner_id)
+    assert repository.load_by_owner(owner_id) is None
+    assert not repository.delete_by_owner(owner_id)
+
+
+def test_migrazione_da_json(app_di_test, giocatore, tmp_path, monkeypatch, personaggio_di_esempio):
+    pgs, inv = tmp_path / "personaggi", tmp_path / "inventari"
+    pgs.mkdir()
+    inv.mkdir()
+    monkeypatch.setattr(storage.commands, "DATA_DIR_PGS", str(pgs))
+    monkeypatch.setattr(storage.commands, "DATA_DIR_INV", str(inv))
+
+    posseduto, libero = personaggio_di_esempio(classe="Mago"), personaggio_di_esempio(classe="Ladro")
+    for documento in (posseduto, libero):
+        (pgs / f"{documento['id']}.json").write_text(json.dumps(documento, indent=4), encoding="utf-8")
+    (pgs / f"{uuid.uuid4()}.json").write_text('{"classe": "Mago", "salute": "tanta"}', encoding="utf-8")
+    inventario = _inventario(posseduto["id"], "Medaglione")
+    (inv / f"{posseduto['id']}.json").write_text(json.dumps(inventario), encoding="utf-8")
+    giocatore.character_ids = [posseduto["id"]]
+    db.session.commit()
+
+    runner = app_di_test.test_cli_runner()
+    for _ in range(2):  # il comando è ripetibile
+        risultato = runner.invoke(migrate_json)
+        assert risultato.exit_code == 0, risultato.output
+        assert "Importati 2 personaggi e 1 inventari" in risultato.output
+
+    personaggi = SqliteCharacterRepository()
+    assert sorted(personaggi.all_ids()) == sorted([posseduto["id"], libero["id"]])
+    assert db.session.get(PersonaggioRecord, posseduto["id"]).owner_id == giocatore.id
+    assert db.session.get(PersonaggioRecord, libero["id"]).owner_id is None
+    assert personaggi.load(posseduto["id"])["classe"] == "Mago"
+    assert SqliteInventoryRepository().load_by_owner(posseduto["id"])["id"] == inventario["id"]
@@ -0,0 +1,122 @@
+"""
+storage.writer: commit di gruppo delle scritture di una richiesta,
+rollback, flush a fine richiesta e sostituzione atomica dei file con le
+tre modalità di durabilità.
+"""
+import os
+
+import pytest
+from flask import Flask
+
+import storage.writer as writer
+from storage.writer import AtomicWriter, DURABILITY_MODES, WriteCommitError, WritePipeline
+
+
+@pytest.fixture
+def app():
+    return Flask(__name__)
+
+
+def _leggi(path) -> bytes:
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def test_commit_di_gruppo_per_richiesta(app, tmp_path):
+    pipeline = WritePipeline("no-fsync")
+    a, b = str(tmp_path / "a.json"), str(tmp_path / "b.json")
+    eseguite = []
+    with app.test_request_context():
+        pipeline.submit(a, b"1", on_commit=lambda: eseguite.append("a1"))
+        pipeline.submit(b, b"2")
+        pipeline.submit(a, b"3", on_commit=lambda: eseguite.append("a3"))
+        # niente su disco prima del flush, ma la richiesta vede le proprie scritture
+        assert not os.path.exists(a) and pipeline.pending(a) == b"3"
+        assert pipeline.flush() == 2
+        assert pipeline.pending(a) is None
+    assert _leggi(a) == b"3" and _leggi(b) == b"2"
+    assert eseguite == ["a1", "a3"]
+
+
+def test_rollback_scarta_le_scritture(app, tmp_path):
+    pipeline = WritePipeline("no-fsync")
+    path = str(tmp_path / "a.json")
+    with app.test_request_context():
+        pipeline.submit(path, b"1", on_commit=pytest.fail)
+        pipeline.submit(str(tmp_path / "b.json"), b"2")
+        assert pipeline.rollback() == 2
+        assert pipeline.flush() == 0
+    assert os.listdir(tmp_path) == []
+
+
+def test_fuori_da_una_richiesta_scrive_subito(tmp_path):
+    path = str(tmp_path / "a.json")
+    WritePipeline("no-fsync").submit(path, b"1")
+    assert _leggi(path) == b"1"
+
+
+def test_flush_a_fine_richiesta(app, tmp_path):
+    pipeline = WritePipeline("no-fsync")
+    pipeline.init_app(app)
+    ok, errore = str(tmp_path / "ok.json"), str(tmp_path / "errore.json")
+
+    @app.route("/ok")
+    def scrivi():
+        pipeline.submit(ok, b"ok")
+        return ""
+
+    @app.route("/errore")
+    def fallisci():
+        pipeline.submit(errore, b"errore")
+        raise RuntimeError("richiesta fallita")
+
+    client = app.test_client()
+    client.get("/ok")
+    assert _leggi(ok) == b"ok"
+    assert client.get("/errore").status_code == 500
+    assert not os.path.exists(errore)
+
+
+@pytest.mark.parametrize("modalita, attesi", [
+    ("no-fsync", 0), ("fsync-file", 2), ("fsync-dir", 3),
+])
+def test_modalita_di_durabilita(monkeypatch, tmp_path, modalita, attesi):
+    chiamate = []
+    fsync = os.fsync
+    monkeypatch.setattr(writer.os, "fsync", lambda fd: chiamate.append(fd) or fsync(fd))
+    scritti = AtomicWriter(modalita).commit({
+        str(tmp_path / "a.json"): b"a",
+        str(tmp_path / "b.json"): b"b",
+    })
+    assert len(scritti) == 2
+    # un fsync per file, più uno solo per la directory comune
+    if os.name != "nt" or modalita != "fsync-dir":
+        assert len(chiamate) == attesi
+    assert sorted(os.listdir(tmp_path)) == ["a.json", "b.json"]
+    assert oct(os.stat(tmp_path / "a.json").st_mode & 0o777) == oct(writer.FILE_MODE)
+
+
+def test_modalita_non_valida():
+    assert "fsync-file" in DURABILITY_MODES
+    with pytest.raises(ValueError):
+        AtomicWriter("sempre")
+
+
+def test_replace_fallito_lascia_il_file_precedente(app, monkeypatch, tmp_path):
+    path = str(tmp_path / "a.json")
+    with open(path, "wb") as file:
+        file.write(b"vecchio")
+
+    def replace(src, dst):
+        raise OSError("disco pieno")
+
+    monkeypatch.setattr(writer.os, "replace", replace)
+    pipeline = WritePipeline("fsync-file")
+    with app.test_request_context():
+        pipeline.submit(path, b"nuovo", on_commit=pytest.fail)
+        with pytest.raises(WriteCommitError) as errore:
+            pipeline.flush()
+    assert errore.value.paths == [path]
+    assert _leggi(path) == b"vecchio"
+    # nessun file temporaneo rimasto accanto all'originale
+    assert os.listdir(tmp_path) == ["a.json"]
@@ -0,0 +1,293 @@
+import os
+import logging
+import tempfile
+from typing import Callable, Dict, List, Optional, Tuple
+
+from flask import g, has_request_context
+
+from config import STORAGE_DURABILITY
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Modalità di durabilità supportate, dalla più veloce alla più sicura:
+# - no-fsync:   file temporaneo + os.replace (atomico ma non durevole)
+# - fsync-file: come sopra + fsync del file temporaneo prima del replace
+# - fsync-dir:  come sopra + fsync della directory dopo il replace
+DURABILITY_MODES = ('no-fsync', 'fsync-file', 'fsync-dir')
+
+# mkstemp crea file con permessi 0600: usiamo gli stessi permessi
+# che avrebbe un open(path, "w") con la umask del processo
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+
+class AtomicWriter:
+    """
+    Scrittura atomica di file: il contenuto viene scritto in un file
+    temporaneo nella stessa directory e poi sostituito al file di
+    destinazione con os.replace, così un lettore concorrente o un crash
+    non vedono mai un file troncato.
+    """
+
+    def __init__(self, durability: str = 'fsync-file') -> None:
+        """
+        Args:
+            durability (str): Una delle DURABILITY_MODES
+
+        Raises:
+            ValueError: Se la modalità non è supportata
+        """
+        if durability not in DURABILITY_MODES:
+            raise ValueError(
+                f"Modalità di durabilità '{durability}' non valida. "
+                f"Disponibili: {', '.join(DURABILITY_MODES)}"
+            )
+        self.durability = durability
+
+    def _write_temp(self, path: str, data: bytes) -> str:
+        """
+        Scrive data in un file temporaneo accanto a path.
+
+        Args:
+            path (str): Percorso finale del file
+            data (bytes): Contenuto da scrivere
+
+        Returns:
+            str: Percorso del file temporaneo
+        """
+        # prefisso '.' e suffisso '.tmp': le scansioni dei file *.json li ignorano
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+                if self.durability != 'no-fsync':
+                    file.flush()
+                    os.fsync(file.fileno())
+            os.chmod(tmp_path, FILE_MODE)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return tmp_path
+
+    @staticmethod
+    def _fsync_dir(directory: str) -> None:
+        """
+        Rende durevole la voce di directory creata da os.replace.
+
+        Args:
+            directory (str): Directory da sincronizzare
+        """
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def commit(self, writes: Dict[str, bytes]) -> List[str]:
+        """
+        Scrive un gruppo di file in un'unica fase di commit:
+        prima tutti i file temporanei, poi tutti i replace e infine
+        un solo fsync per ogni directory coinvolta.
+
+        Args:
+            writes (Dict[str, bytes]): Dizionario {percorso: contenuto}
+
+        Returns:
+            List[str]: Percorsi scritti con successo
+        """
+        temps: List[Tuple[str, str]] = []
+        for path, data in writes.items():
+            try:
+                temps.append((path, self._write_temp(path, data)))
+            except OSError as e:
+                logger.error(f"Errore scrittura temporanea {path}: {e}")
+
+        done = []
+        for path, tmp_path in temps:
+            try:
+                os.replace(tmp_path, path)
+                done.append(path)
+            except OSError as e:
+                logger.error(f"Errore sostituzione atomica {path}: {e}")
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+
+        # su Windows le directory non si possono aprire per fare fsync
+        if self.durability == 'fsync-dir' and os.name != 'nt':
+            for directory in {os.path.dirname(path) for path in done}:
+                try:
+                    self._fsync_dir(directory)
+                except OSError as e:
+                    logger.error(f"Errore fsync directory {directory}: {e}")
+
+        return done
+
+
+class WriteCommitError(OSError):
+    """
+    Errore della fase di commit: alcuni file della richiesta non sono stati
+    scritti.
+    """
+
+    def __init__(self, paths: List[str]) -> None:
+        """
+        Args:
+            paths (List[str]): Percorsi non scritti
+        """
+        super().__init__(f"Commit di gruppo fallito per {len(paths)} file: {', '.join(paths)}")
+        self.paths = paths
+
+
+class WritePipeline:
+    """
+    Raccoglie le scritture emesse durante una richiesta Flask e le scrive
+    tutte insieme, con AtomicWriter, alla fine della richiesta.
+
+    Più scritture sullo stesso file nella stessa richiesta vengono fuse
+    (vince l'ultima). Fuori da una richiesta (CLI, script) ogni scrittura
+    viene eseguita subito. Le route che modificano anche il database
+    chiamano flush() prima di db.session.commit().
+    """
+
+    def __init__(self, durability: str) -> None:
+        """
+        Args:
+            durability (str): Una delle DURABILITY_MODES
+        """
+        self.writer = AtomicWriter(durability)
+
+    @staticmethod
+    def _batch() -> Optional[Dict[str, Tuple[bytes, List[Callable[[], None]]]]]:
+        """
+        Restituisce il gruppo di scritture della richiesta corrente.
+
+        Returns:
+            Optional[Dict]: {percorso: (contenuto, callback)} o None fuori da una richiesta
+        """
+        if not has_request_context():
+            return None
+        if '_write_batch' not in g:
+            g._write_batch = {}
+        return g._write_batch
+
+    def submit(self, path: str, data: bytes,
+               on_commit: Optional[Callable[[], None]] = None) -> None:
+        """
+        Accoda una scrittura; on_commit viene chiamata dopo che il file
+        è stato sostituito su disco (es. per aggiornare indici e cache).
+
+        Args:
+            path (str): Percorso del file
+            data (bytes): Contenuto completo del file
+            on_commit (Optional[Callable[[], None]]): Callback post-commit
+        """
+        batch = self._batch()
+        if batch is None:
+            if self.writer.commit({path: data}) and on_commit:
+                on_commit()
+            return
+
+        callbacks = batch[path][1] if path in batch else []
+        if on_commit:
+            callbacks.append(on_commit)
+        batch[path] = (data, callbacks)
+
+    def pending(self, path: str) -> Optional[bytes]:
+        """
+        Restituisce il contenuto accodato per path e non ancora scritto,
+        così le letture nella stessa richiesta vedono le proprie scritture.
+
+        Args:
+            path (str): Percorso del file
+
+        Returns:
+            Optional[bytes]: Contenuto in attesa o None
+        """
+        batch = g.get('_write_batch') if has_request_context() else None
+        if batch and path in batch:
+            return batch[path][0]
+        return None
+
+    def discard(self, path: str) -> None:
+        """
+        Annulla una scrittura in attesa (es. file eliminato nella stessa richiesta).
+
+        Args:
+            path (str): Percorso del file
+        """
+        batch = g.get('_write_batch') if has_request_context() else None
+        if batch:
+            batch.pop(path, None)
+
+    def flush(self) -> int:
+        """
+        Esegue la fase di commit per tutte le scritture in attesa. Va
+        chiamata esplicitamente prima di db.session.commit() nelle route che
+        modificano anche il database, così un errore di scrittura annulla
+        la transazione invece di essere solo registrato nel log.
+
+        Returns:
+            int: File scritti
+
+        Raises:
+            WriteCommitError: Se almeno un file non è stato scritto (le
+            callback dei file scritti vengono eseguite comunque)
+        """
+        batch = g.pop('_write_batch', None) if has_request_context() else None
+        if not batch:
+            return 0
+
+        done = self.writer.commit({path: data for path, (data, _) in batch.items()})
+        for path in done:
+            for callback in batch[path][1]:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error(f"Errore callback post-commit {path}: {e}")
+
+        logger.info(f"Commit di gruppo: {len(done)}/{len(batch)} file scritti")
+        written = set(done)
+        failed = [path for path in batch if path not in written]
+        if failed:
+            raise WriteCommitError(failed)
+        return len(done)
+
+    def rollback(self) -> int:
+        """
+        Scarta tutte le scritture in attesa della richiesta corrente.
+
+        Returns:
+            int: Scritture scartate
+        """
+        batch = g.pop('_write_batch', None) if has_request_context() else None
+        return len(batch) if batch else 0
+
+    def init_app(self, app) -> None:
+        """
+        Registra il commit di gruppo a fine richiesta. Le scritture di una
+        richiesta terminata con un'eccezione vengono scartate.
+
+        Args:
+            app (Flask): Applicazione Flask
+        """
+        @app.teardown_request
+        def _commit_writes(exc=None):
+            if exc is not None:
+                discarded = self.rollback()
+                if discarded:
+                    logger.warning(f"Richiesta fallita: {discarded} scritture scartate ({exc})")
+                return
+            try:
+                self.flush()
+            except WriteCommitError as e:
+                logger.error(str(e))
+
+
+# Pipeline condivisa dal processo per personaggi e inventari
+write_pipeline = WritePipeline(STORAGE_DURABILITY)